@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the CPU hot paths
+Times ExtractionEngine.extract_article_html, ArticleExtractor.extract_metadata / extract_images /
+html_to_markdown and InvertedLearner.apply_exclusions / extract_with_boundaries on pages of
+10 KB to 5 MB per site config, and writes throughput and peak memory to a JSON file.
+
+Usage:
+    python benchmarks/bench_hot_paths.py                                   # all sites, all sizes
+    python benchmarks/bench_hot_paths.py --sizes 10KB 1MB --sites hbr.org
+    python benchmarks/bench_hot_paths.py --baseline benchmarks/results/before.json
+    python benchmarks/bench_hot_paths.py --html-dir saved_pages/ --archive fixtures/run1
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.html_fixtures import DEFAULT_SIZES, generate_page, load_saved_pages, load_site_configs, size_label
+from src.article_extractor import ArticleExtractor
+from src.extraction_engine import ExtractionEngine
+from src.image_rules import ImageRules
+from src.inverted_learning import InvertedLearner
+
+RESULTS_VERSION = 1
+
+# Allowed slowdown / memory growth against a baseline before the run fails
+DEFAULT_MAX_REGRESSION = 0.20
+DEFAULT_MAX_MEMORY_REGRESSION = 0.25
+
+
+def measure(func, min_time=0.5, min_repeats=3, max_repeats=50):
+    """Run func until min_time has passed (at least min_repeats). Returns sorted wall times in seconds"""
+    times = []
+    started = time.perf_counter()
+    while len(times) < max_repeats and (len(times) < min_repeats or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return sorted(times)
+
+
+def peak_memory(func):
+    """Peak traced Python allocation of one call, in bytes"""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+class HotPathBench:
+    """The benchmarked calls for one page, sharing the intermediate results they depend on"""
+
+    def __init__(self, extractor, engine, learner):
+        self.extractor = extractor
+        self.engine = engine
+        self.learner = learner
+
+    def cases(self, html_content, config):
+        """[(benchmark name, callable)]; the article HTML and images come from one untimed run"""
+        article_config = config.get('extraction', {}).get('article_content', {})
+        exclude_selectors = article_config.get('exclude_selectors', [])
+        start_selector = article_config.get('selector')
+        end_selector = article_config.get('truncate_after')
+        image_rules = ImageRules.from_site_config(config)
+
+        article_html = self.engine.extract_article_html(html_content, config) or html_content
+        images = self.extractor.extract_images(article_html, image_rules=image_rules)
+
+        return [
+            ('extract_article_html', lambda: self.engine.extract_article_html(html_content, config)),
+            ('extract_metadata', lambda: self.extractor.extract_metadata(html_content)),
+            ('extract_images', lambda: self.extractor.extract_images(article_html, image_rules=image_rules)),
+            ('html_to_markdown', lambda: self.extractor.html_to_markdown(article_html, images, {})),
+            ('apply_exclusions', lambda: self.learner.apply_exclusions(html_content, exclude_selectors)),
+            ('extract_with_boundaries',
+             lambda: self.learner.extract_with_boundaries(html_content, start_selector, end_selector)),
+        ]
+
+
+def run_benchmarks(pages, benchmarks=None, min_time=0.5, min_repeats=3, max_repeats=50, progress=print):
+    """
+    Benchmark each (site, label, html, config) page. Returns result dicts with median/min time,
+    throughput (MB/s of input HTML) and peak memory.
+    """
+    work_dir = Path(tempfile.mkdtemp(prefix='bench_'))
+    extractor = ArticleExtractor(output_dir=work_dir / 'out', log_file=work_dir / 'bench.log',
+                                 image_cache_file=work_dir / 'image_cache.json')
+    extractor.logger.setLevel(logging.WARNING)
+    bench = HotPathBench(extractor, ExtractionEngine(), InvertedLearner(use_gemini=False))
+
+    results = []
+    for site, label, html_content, config in pages:
+        num_bytes = len(html_content.encode('utf-8'))
+        # The learner and extractor print progress: keep the benchmark output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            cases = bench.cases(html_content, config)
+        for name, func in cases:
+            if benchmarks and name not in benchmarks:
+                continue
+            with contextlib.redirect_stdout(io.StringIO()):
+                times = measure(func, min_time, min_repeats, max_repeats)
+                peak = peak_memory(func)
+            median = statistics.median(times)
+            result = {
+                'benchmark': name,
+                'site': site,
+                'size': label,
+                'bytes': num_bytes,
+                'repeats': len(times),
+                'median_s': round(median, 6),
+                'min_s': round(times[0], 6),
+                'throughput_mb_s': round(num_bytes / (1024 * 1024) / median, 3) if median else None,
+                'peak_memory_mb': round(peak / (1024 * 1024), 3),
+            }
+            results.append(result)
+            progress(f"   {name:<24} {site:<24} {label:>8}  {median * 1000:10.2f} ms  "
+                     f"{result['throughput_mb_s'] or 0:8.2f} MB/s  {result['peak_memory_mb']:8.2f} MB peak")
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).parent.parent).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline, max_regression=DEFAULT_MAX_REGRESSION,
+            max_memory_regression=DEFAULT_MAX_MEMORY_REGRESSION):
+    """Regression messages for results slower / hungrier than the baseline beyond the thresholds"""
+    previous = {(r['benchmark'], r['site'], r['size']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        before = previous.get((result['benchmark'], result['site'], result['size']))
+        if not before:
+            continue
+        key = f"{result['benchmark']} {result['site']} {result['size']}"
+        if before['median_s'] and result['median_s'] > before['median_s'] * (1 + max_regression):
+            regressions.append(f"{key}: {before['median_s'] * 1000:.2f} ms -> {result['median_s'] * 1000:.2f} ms "
+                               f"(+{(result['median_s'] / before['median_s'] - 1) * 100:.0f}%)")
+        if before['peak_memory_mb'] and result['peak_memory_mb'] > before['peak_memory_mb'] * (1 + max_memory_regression):
+            regressions.append(f"{key}: peak memory {before['peak_memory_mb']:.2f} MB -> {result['peak_memory_mb']:.2f} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmarks for the extraction and conversion hot paths')
+    parser.add_argument('--sizes', nargs='+', default=list(DEFAULT_SIZES),
+                        help=f"Generated page sizes (default: {' '.join(DEFAULT_SIZES)}); KB/MB suffixes allowed")
+    parser.add_argument('--sites', nargs='+', help='Site configs to use (domain or file name; default: all)')
+    parser.add_argument('--config-dir', default='config/sites', help='Site config directory (default: config/sites)')
+    parser.add_argument('--benchmarks', nargs='+', help='Only these benchmarks (e.g. html_to_markdown)')
+    parser.add_argument('--html-dir', help='Also benchmark saved pages: <domain>[-name].html files')
+    parser.add_argument('--archive', help='Also benchmark the pages of a --record fixture archive')
+    parser.add_argument('--no-generated', action='store_true', help='Only benchmark saved pages')
+    parser.add_argument('--min-time', type=float, default=0.5, help='Seconds to spend per benchmark (default: 0.5)')
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--baseline', help='Earlier results file; exit 1 on regressions')
+    parser.add_argument('--max-regression', type=float, default=DEFAULT_MAX_REGRESSION,
+                        help=f'Allowed median slowdown vs baseline (default: {DEFAULT_MAX_REGRESSION})')
+    parser.add_argument('--max-memory-regression', type=float, default=DEFAULT_MAX_MEMORY_REGRESSION,
+                        help=f'Allowed peak memory growth vs baseline (default: {DEFAULT_MAX_MEMORY_REGRESSION})')
+    args = parser.parse_args()
+
+    configs = load_site_configs(args.config_dir, args.sites)
+    if not configs:
+        print(f"❌ No site configs found in {args.config_dir}")
+        sys.exit(1)
+
+    sizes = {}
+    for size in args.sizes:
+        match = size.upper().rstrip('B')
+        multiplier = 1024 * 1024 if match.endswith('M') else 1024 if match.endswith('K') else 1
+        sizes[size] = int(float(match.rstrip('MK')) * multiplier)
+
+    pages = []
+    if not args.no_generated:
+        for name, config in configs.items():
+            for target in sizes.values():
+                pages.append((name, size_label(target), generate_page(config, target), config))
+    pages.extend(load_saved_pages(configs, args.html_dir, args.archive))
+
+    print(f"⏱️  Benchmarking {len(pages)} page(s) across {len(configs)} site config(s)...")
+    results = run_benchmarks(pages, benchmarks=args.benchmarks, min_time=args.min_time)
+
+    report = {
+        'version': RESULTS_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    output = Path(args.output or f"benchmarks/results/{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding='utf-8')
+    print(f"\n💾 Results written to {output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        regressions = compare(results, baseline, args.max_regression, args.max_memory_regression)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"   • {regression}")
+            sys.exit(1)
+        print(f"✅ No regressions against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
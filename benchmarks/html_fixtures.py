@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Benchmark HTML fixtures
+Deterministic article pages of a target size, built for a site config: the article container
+matches the config's selector and noise blocks match its exclude selectors, so the extraction
+hot paths do the same work they do on the real site. Saved pages (an HTML directory or a
+--record fixture archive) can be benchmarked instead.
+"""
+
+import json
+import random
+import re
+import sys
+from pathlib import Path
+from urllib.parse import urlparse
+
+import yaml
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.fixtures import FixtureArchive
+
+DEFAULT_SIZES = {'10KB': 10 * 1024, '100KB': 100 * 1024, '1MB': 1024 * 1024, '5MB': 5 * 1024 * 1024}
+
+WORDS = ('revenue retention churn cohort pricing customer acquisition cost payback expansion pipeline '
+         'growth margin segment enterprise onboarding usage contract renewal forecast benchmark quota '
+         'market product team quarter annual metric funnel conversion activation trial').split()
+
+SIMPLE_SELECTOR = re.compile(
+    r"^(?P<tag>[a-zA-Z][\w-]*)?(?P<rest>(?:[.#][\w-]+|\[[^\]]+\])*)$"
+)
+
+
+def size_label(num_bytes):
+    for label, size in DEFAULT_SIZES.items():
+        if size == num_bytes:
+            return label
+    return f"{num_bytes // 1024}KB"
+
+
+def _element_for_compound(compound, default_tag='div'):
+    """Opening/closing tag pair matching one compound selector such as div[class*='Promo'].x, or None"""
+    match = SIMPLE_SELECTOR.match(compound)
+    if not match:
+        return None
+    tag = match.group('tag') or default_tag
+    classes, attributes = [], {}
+    for part in re.findall(r"[.#][\w-]+|\[[^\]]+\]", match.group('rest')):
+        if part.startswith('.'):
+            classes.append(part[1:])
+        elif part.startswith('#'):
+            attributes['id'] = part[1:]
+        else:
+            attr = re.match(r"\[\s*([\w-]+)\s*(?:([*^$~|]?=)\s*['\"]?([^'\"]*)['\"]?)?\s*\]", part)
+            if not attr:
+                return None
+            name, operator, value = attr.group(1), attr.group(2), attr.group(3) or ''
+            if operator in ('*=', '$='):
+                value = f"x-{value}"
+            elif operator == '^=':
+                value = f"{value}-x"
+            if name == 'class':
+                classes.append(value)
+            else:
+                attributes[name] = value or name
+    if classes:
+        attributes['class'] = ' '.join(classes)
+    attrs = ''.join(f' {name}="{value}"' for name, value in attributes.items())
+    return f"<{tag}{attrs}>", f"</{tag}>"
+
+
+def element_for_selector(selector, inner, default_tag='div'):
+    """HTML that the CSS selector matches, wrapping `inner` (descendant selectors are nested), or None"""
+    compounds = selector.replace('>', ' ').split()
+    if not compounds:
+        return None
+    opening, closing = [], []
+    for compound in compounds:
+        pair = _element_for_compound(compound, default_tag)
+        if pair is None:
+            return None
+        opening.append(pair[0])
+        closing.insert(0, pair[1])
+    markup = ''.join(opening) + inner + ''.join(closing)
+    try:
+        if BeautifulSoup(markup, 'html.parser').select_one(selector) is None:
+            return None
+    except Exception:
+        return None
+    return markup
+
+
+def _sentence(rng, words=14):
+    text = ' '.join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+
+def _paragraph(rng):
+    return f"<p>{' '.join(_sentence(rng, rng.randint(10, 22)) for _ in range(rng.randint(2, 5)))}</p>"
+
+
+def _figure(rng, index):
+    width = rng.choice([640, 800, 1200])
+    height = width * 9 // 16
+    src = f"https://cdn.example.com/images/chart-{index}.png"
+    srcset = ', '.join(f"{src}?w={w} {w}w" for w in (480, 800, 1200, 1600))
+    return (f'<figure class="wp-block-image"><img src="{src}" srcset="{srcset}" width="{width}" height="{height}" '
+            f'alt="Chart {index}: {_sentence(rng, 5)}" loading="lazy">'
+            f"<figcaption>Figure {index}: {_sentence(rng, 8)}</figcaption></figure>")
+
+
+def _block(rng, index):
+    """One chunk of article body: mostly prose, with headings, lists, quotes, tables and figures"""
+    roll = rng.random()
+    if roll < 0.08:
+        return f"<h2>{_sentence(rng, 6)}</h2>"
+    if roll < 0.14:
+        return "<ul>" + ''.join(f"<li>{_sentence(rng, 8)}</li>" for _ in range(rng.randint(3, 6))) + "</ul>"
+    if roll < 0.18:
+        return f"<blockquote><p>{_sentence(rng, 20)}</p></blockquote>"
+    if roll < 0.21:
+        rows = ''.join(f"<tr><td>{rng.choice(WORDS)}</td><td>{rng.randint(1, 999)}%</td></tr>" for _ in range(5))
+        return f"<table><thead><tr><th>Metric</th><th>Value</th></tr></thead><tbody>{rows}</tbody></table>"
+    if roll < 0.27:
+        return _figure(rng, index)
+    return _paragraph(rng)
+
+
+def _noise(rng, selector):
+    links = ''.join(f'<a href="/related/{rng.randint(1, 9999)}">{_sentence(rng, 5)}</a>' for _ in range(4))
+    return element_for_selector(selector, f"<span>{_sentence(rng, 6)}</span>{links}")
+
+
+def generate_page(config, target_bytes, seed=0):
+    """Article HTML of roughly target_bytes for a site config (same seed and size give the same page)"""
+    rng = random.Random(f"{config.get('domain', 'site')}:{target_bytes}:{seed}")
+    article_config = config.get('extraction', {}).get('article_content', {})
+    noise_selectors = [s for s in article_config.get('exclude_selectors', []) if _noise(rng, s)]
+
+    title = _sentence(rng, 7).rstrip('.')
+    json_ld = json.dumps({'@type': 'Article', 'headline': title, 'author': {'name': 'Benchmark Author'},
+                          'datePublished': '2025-01-15'})
+    head = (f"<head><title>{title}</title><meta property=\"og:title\" content=\"{title}\">"
+            f"<meta name=\"author\" content=\"Benchmark Author\">"
+            f"<meta property=\"article:published_time\" content=\"2025-01-15\">"
+            f"<script type=\"application/ld+json\">{json_ld}</script></head>")
+
+    body_parts = [f"<h1>{title}</h1>"]
+    size = len(head) + 500
+    index = 0
+    while size < target_bytes:
+        index += 1
+        if noise_selectors and index % 12 == 0:
+            block = _noise(rng, rng.choice(noise_selectors))
+        else:
+            block = _block(rng, index)
+        body_parts.append(block)
+        size += len(block)
+    body = '\n'.join(body_parts)
+
+    selector = article_config.get('selector') or 'article'
+    article = element_for_selector(selector, body, default_tag='article') if selector not in ('body', 'html') else body
+    if article is None:
+        article = f"<article>{body}</article>"
+
+    tail = ''
+    if article_config.get('truncate_after'):
+        tail = element_for_selector(article_config['truncate_after'], f"<p>{_sentence(rng)}</p>") or ''
+    return (f"<!DOCTYPE html><html>{head}<body><nav><a href=\"/\">Home</a><a href=\"/blog\">Blog</a></nav>"
+            f"{article}{tail}<footer><p>Copyright Benchmark Inc.</p></footer></body></html>")
+
+
+def load_site_configs(config_dir='config/sites', sites=None):
+    """{domain: config} for every learned config with an article selector (templates skipped)"""
+    configs = {}
+    for path in sorted(Path(config_dir).glob('*.yaml')):
+        if path.name.startswith('_'):
+            continue
+        config = yaml.safe_load(path.read_text(encoding='utf-8')) or {}
+        domain = config.get('domain') or path.stem
+        if not config.get('extraction', {}).get('article_content'):
+            continue
+        name = path.stem
+        if sites and domain not in sites and name not in sites:
+            continue
+        configs[name] = config
+    return configs
+
+
+def _config_for_url(configs, url):
+    domain = urlparse(url).netloc.lower()
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    for name, config in configs.items():
+        if config.get('domain') == domain:
+            return name, config
+    return None, None
+
+
+def load_saved_pages(configs, html_dir=None, archive=None):
+    """
+    Real pages as (site, label, html, config): *.html files named <domain>[-anything].html,
+    and/or the curl pages of a fixture archive. Pages without a matching config are skipped.
+    """
+    pages = []
+    if html_dir:
+        for path in sorted(Path(html_dir).glob('*.html')):
+            for name, config in configs.items():
+                if path.stem == name or path.stem.startswith(f"{config.get('domain', name)}-"):
+                    pages.append((name, path.stem, path.read_text(encoding='utf-8', errors='replace'), config))
+                    break
+    if archive:
+        fixture_archive = FixtureArchive(archive, 'replay')
+        for url in sorted(fixture_archive.index['pages']):
+            name, config = _config_for_url(configs, url)
+            if config:
+                pages.append((name, urlparse(url).path.strip('/') or '/', fixture_archive.page(url), config))
+    return pages
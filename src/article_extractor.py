@@ -7,6 +7,7 @@ Now with Google Gemini Vision API support!
 
 import re
 import html
+import base64
 import json
 import sys
 import argparse
@@ -15,6 +16,10 @@ import time
 import urllib.request
 import logging
 import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 from urllib.parse import urlparse
 from datetime import datetime
@@ -24,12 +29,85 @@ import subprocess
 try:
     from .site_registry import SiteRegistry
     from .extraction_engine import ExtractionEngine
+    from .model_router import ModelRouter
+    from .circuit_breaker import CircuitOpenError, configure_circuit_breaker
+    from .llm_errors import (BadInputError, CachedContentError, PermanentRefusalError, classify_error,
+                             classify_llm_error)
+    from .image_cache import ImageCache
+    from . import local_images
+    from .image_rules import ImageRules, image_attributes
+    from . import image_variants
+    from .image_budget import ImageBudget
+    from .llm_service import LLMService, DEFAULT_MAX_CONCURRENCY
+    from .llm_backends import FakeBackend
+    from .fixtures import FixtureArchive
+    from .article_metrics import ArticleMetrics, MetricsRecorder, usage_delta
+    from .metrics_registry import get_metrics_registry
+    from .token_budget import BudgetExceededError, TokenBudget
+    from .profiling import StageProfiler
+    from . import tracing
+    from . import events
+    from . import lazy_imports
+    from .browser_pool import BrowserPool
+    from .article_result import ArticleDocument, ArticleResult, ImageResult, MarkdownFileSink
+    from . import service
 except ImportError:
     # Fallback for direct execution
     import site_registry
     import extraction_engine
+    import model_router
+    import circuit_breaker
+    import llm_errors
+    import image_cache
+    import local_images
+    import image_rules
+    import image_variants
+    import image_budget
+    import llm_service
+    import llm_backends
+    import fixtures
+    import article_metrics
+    import metrics_registry
+    import token_budget
+    import profiling
+    import tracing
+    import events
+    import lazy_imports
+    import browser_pool
+    import article_result
+    import service
     SiteRegistry = site_registry.SiteRegistry
     ExtractionEngine = extraction_engine.ExtractionEngine
+    ModelRouter = model_router.ModelRouter
+    CircuitOpenError = circuit_breaker.CircuitOpenError
+    configure_circuit_breaker = circuit_breaker.configure_circuit_breaker
+    BadInputError = llm_errors.BadInputError
+    CachedContentError = llm_errors.CachedContentError
+    PermanentRefusalError = llm_errors.PermanentRefusalError
+    classify_error = llm_errors.classify_error
+    classify_llm_error = llm_errors.classify_llm_error
+    ImageCache = image_cache.ImageCache
+    ImageRules = image_rules.ImageRules
+    image_attributes = image_rules.image_attributes
+    ImageBudget = image_budget.ImageBudget
+    LLMService = llm_service.LLMService
+    DEFAULT_MAX_CONCURRENCY = llm_service.DEFAULT_MAX_CONCURRENCY
+    FakeBackend = llm_backends.FakeBackend
+    FixtureArchive = fixtures.FixtureArchive
+    ArticleMetrics = article_metrics.ArticleMetrics
+    MetricsRecorder = article_metrics.MetricsRecorder
+    usage_delta = article_metrics.usage_delta
+    get_metrics_registry = metrics_registry.get_metrics_registry
+    BudgetExceededError = token_budget.BudgetExceededError
+    TokenBudget = token_budget.TokenBudget
+    StageProfiler = profiling.StageProfiler
+    BrowserPool = browser_pool.BrowserPool
+    ArticleDocument = article_result.ArticleDocument
+    ArticleResult = article_result.ArticleResult
+    ImageResult = article_result.ImageResult
+    MarkdownFileSink = article_result.MarkdownFileSink
+
+_events = events.emitter('extractor')
 
 # Suppress gRPC/ALTS warnings from Google APIs
 os.environ['GRPC_VERBOSITY'] = 'ERROR'
@@ -39,70 +117,219 @@ os.environ['GLOG_minloglevel'] = '2'
 import warnings
 warnings.filterwarnings('ignore', message='Field name .* shadows an attribute')
 
-# Optional Gemini support
-GEMINI_AVAILABLE = False
-try:
-    from google import genai
-    from google.genai.types import GenerateContentConfig, ThinkingConfig
-    from PIL import Image
-    from dotenv import load_dotenv
-    load_dotenv()
-    GEMINI_AVAILABLE = True
-except ImportError:
-    pass
+# Optional Gemini support (google-genai, PIL and dotenv are imported on first use, see lazy_imports)
+GEMINI_AVAILABLE = lazy_imports.available('google.genai', 'PIL', 'dotenv')
+
+
+# Fixed instructions for the vision model (identical for every image)
+VISION_SYSTEM_PROMPT = """You are an expert at analyzing business charts, diagrams, and visualizations for SaaS metrics and business analytics.
+
+Your task is to create detailed, accessible text descriptions that will replace images in a text-only document.
+
+IMPORTANT: SKIP the following types of images by responding with exactly "SKIP: [reason]":
+- Navigation elements (buttons, menus, breadcrumbs, headers, footers)
+- UI elements (icons, logos, decorative graphics, social media buttons)
+- Call-to-action buttons or link graphics
+- Page layout elements (dividers, backgrounds, borders)
+- Non-content images
+
+ONLY describe content-relevant visualizations such as:
+- Charts (Line, Bar, Area, Pie, etc.)
+- Graphs and plots
+- Tables with data
+- Diagrams (flowcharts, schematics, concept maps)
+- Formulas and equations
+- Screenshots of actual data/dashboards (not UI chrome)
+- Infographics with business information
+
+For valid content visualizations, the description MUST:
+1. Start by identifying the TYPE (Line Graph, Bar Chart, Area Chart, Table, Diagram, Formula, Dashboard, etc.)
+   - Be specific: "Line Graph" not just "Graph"
+   - For cumulative metrics, note this explicitly
+2. Describe what is being measured or visualized
+3. Explain the key patterns, trends, or insights visible
+4. Include specific data points, axes labels, and important values when present
+5. Be comprehensive enough for someone listening via text-to-speech to fully understand
+
+CRITICAL FORMATTING RULES:
+- Write in the SAME LANGUAGE as the article text
+- Do NOT include image URLs or file paths in your description
+- Do NOT use phrases like "the image shows" - describe directly
+- Write in clear, professional language
+
+The surrounding article context is provided to help you understand what the visualization illustrates."""
+
+# Gemini bills images in 768x768 tiles (258 tokens each); small images are a single tile
+IMAGE_TILE_SIZE = 768
+IMAGE_TILE_TOKENS = 258
+
+# How long the cached vision system instruction lives on the Gemini side; a long-running
+# process (--serve) extends it once VISION_CACHE_REFRESH of the TTL has passed
+VISION_CACHE_TTL_SECONDS = 3600
+VISION_CACHE_REFRESH = 0.8
 
 
 class ArticleExtractor:
-    def __init__(self, output_dir="results", use_gemini=False, gemini_api_key=None, log_file=None, force_renew=False):
+    def __init__(self, output_dir="results", use_gemini=False, gemini_api_key=None, log_file=None, force_renew=False,
+                 batch_images=False, batch_max_images=8, batch_token_budget=12000,
+                 image_cache_file="cache/image_cache.json", vision_width=image_variants.VISION_TARGET_WIDTH,
+                 max_images_per_article=None, max_images_total=None, article_deadline=None, checkpoint_interval=2.0,
+                 hedge_percentile=None, llm_concurrency=DEFAULT_MAX_CONCURRENCY, llm_backend=None,
+                 fixtures=None, metrics_file=None, token_budget=None, cost_budget=None, profile=False, verbose=False,
+                 sinks=None):
         self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Where finished articles go (see article_result); by default the Markdown file in output_dir
+        self.file_sink = MarkdownFileSink(self.output_dir)
+        self.sinks = [self.file_sink] if sinks is None else list(sinks)
         self.use_gemini = use_gemini and GEMINI_AVAILABLE
-        self.gemini_client = None
         self.force_renew = force_renew
         
-        # Setup logging
-        self.setup_logging(log_file)
-        
-        # Initialize site registry for self-learning
-        self.site_registry = SiteRegistry(use_gemini=use_gemini) if use_gemini else None
-        self.extraction_engine = ExtractionEngine()
-        
-        if self.use_gemini:
+        # Multi-image packing: several images of one article per Gemini request
+        self.batch_images = batch_images
+        self.batch_max_images = batch_max_images
+        self.batch_token_budget = batch_token_budget
+        
+        # Width of the image variant fetched for vision calls (srcset / resizing CDNs)
+        self.vision_width = vision_width
+        
+        # Vision calls per article / per batch run; the least important images get context descriptions
+        self.image_budget = ImageBudget(per_article=max_images_per_article, per_batch=max_images_total)
+        
+        # Seconds per article before unfinished image descriptions fall back to context (None = no limit);
+        # partial Markdown is rewritten at most every checkpoint_interval seconds while descriptions arrive
+        self.article_deadline = article_deadline
+        self.checkpoint_interval = checkpoint_interval
+        
+        # Static vision instructions: created once per run, shared by all image calls
+        self.vision_cache_name = None
+        self.vision_cache_checked = False
+        # time.monotonic() after which the cache is extended before use, and when it expires
+        self.vision_cache_refresh_at = None
+        self.vision_cache_expires_at = None
+        self.vision_cache_lock = threading.Lock()
+        self.vision_prompt_stats = {
+            'calls': 0,
+            'prompt_tokens': 0,
+            'cached_tokens': 0,
+            'prompt_chars_saved': 0
+        }
+        
+        # Per-article stage timings, sizes and LLM usage (JSONL when metrics_file is set),
+        # also fed into the live registry (OpenMetrics file / endpoint)
+        self.metrics_registry = get_metrics_registry()
+        self.metrics = MetricsRecorder(metrics_file, registry=self.metrics_registry)
+        self.current_metrics = None
+        
+        # --profile: cProfile per pipeline stage plus sampled stacks (None = off, no overhead)
+        self.profiler = StageProfiler() if profile else None
+        self._browser_sessions_metric = self.metrics_registry.gauge('browser_sessions_active',
+                                                                    'Headless browser sessions currently open')
+        # Warm headless browser kept between renders (service mode); None = one browser per render
+        self.browser_pool = None
+        
+        # Event loop reused by the sync API, and the one thread that runs the blocking pipeline
+        # stages (curl, parsing, browser, learning) for aprocess_article
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._pipeline_executor = None
+        # One asyncio.Lock per caller loop (a lock cannot be shared between loops); articles from
+        # different loops still run one at a time on the single pipeline thread
+        self._article_locks = weakref.WeakKeyDictionary()
+        self._article_locks_guard = threading.Lock()
+        self._browser_renders_metric = self.metrics_registry.counter('browser_renders', 'Browser renders by outcome',
+                                                                     ('outcome',))
+        
+        # Setup logging (once per run: one log file)
+        self.setup_logging(log_file, verbose=verbose)
+        
+        # Model tiering: one router shared by vision and learning calls
+        self.model_router = ModelRouter()
+        
+        # Record/replay fixture archive: replay answers pages, images and LLM calls offline
+        self.fixtures = fixtures
+        if fixtures is not None and fixtures.replaying:
+            llm_backend = llm_backend or fixtures.replay_backend()
+            image_cache_file = fixtures.scratch_dir / 'image_cache.json'
+        
+        # Optional hard cap on tokens / estimated USD for the run; once spent, AI steps are skipped
+        self.token_budget = TokenBudget(token_budget, cost_budget) if token_budget or cost_budget else None
+        
+        # One LLM service for vision and learning: shared client, concurrency limit, retries,
+        # per-call deadlines (slow calls may be hedged), token and cost accounting and response cache
+        # (llm_backend replaces the Gemini API, e.g. FakeBackend for offline runs)
+        self.llm = LLMService(self.model_router, hedge_percentile=hedge_percentile,
+                              max_concurrency=llm_concurrency, backend=llm_backend, logger=self.logger,
+                              metrics_registry=self.metrics_registry, budget=self.token_budget)
+        
+        # Shared circuit breaker: a degraded API fails fast to context-based descriptions
+        self.circuit_breaker = self.llm.circuit_breaker
+        self.deadline_caller = self.llm.deadline_caller
+        
+        # Images that failed permanently in earlier runs are never retried
+        self.image_cache = ImageCache(image_cache_file)
+        
+        if self.use_gemini and llm_backend is not None:
+            _events.info(f"✓ Using {llm_backend.name} LLM backend (no Gemini API calls)")
+        elif self.use_gemini:
+            lazy_imports.load_env()
             if not gemini_api_key:
                 gemini_api_key = os.getenv('GEMINI_API_KEY')
             
             if not gemini_api_key:
-                print("⚠️  Warning: GEMINI_API_KEY not found, falling back to context-based descriptions")
+                _events.warning("⚠️  Warning: GEMINI_API_KEY not found, falling back to context-based descriptions")
                 self.use_gemini = False
             else:
                 try:
-                    self.gemini_client = genai.Client(api_key=gemini_api_key)
-                    print("✓ Gemini Vision API enabled (2.5 Flash - thinking disabled)")
+                    self.llm.connect(gemini_api_key)
+                    _events.info("✓ Gemini Vision API enabled (2.5 Flash - thinking disabled)")
                 except Exception as e:
-                    print(f"⚠️  Warning: Failed to initialize Gemini: {e}")
-                    print("   Falling back to context-based descriptions")
+                    _events.warning(f"⚠️  Warning: Failed to initialize Gemini: {e}")
+                    _events.info("   Falling back to context-based descriptions")
                     self.use_gemini = False
+        
+        if fixtures is not None and fixtures.recording and self.llm.available:
+            self.llm.backend = fixtures.recording_backend(self.llm.backend)
+        
+        # Initialize site registry for self-learning (reuses the shared LLM service)
+        site_config_dir = fixtures.site_config_dir() if fixtures is not None else "config/sites"
+        self.site_registry = SiteRegistry(config_dir=site_config_dir, use_gemini=use_gemini,
+                                          llm=self.llm) if use_gemini else None
+        self.extraction_engine = ExtractionEngine()
+        
+        # Learned domains, counted from the config directory at every exposition
+        learned_domains = self.metrics_registry.gauge('learned_domains', 'Sites with a learned extraction config')
+        config_dir = Path(site_config_dir)
+        self.metrics_registry.add_collector('learned_domains', lambda: learned_domains.set(
+            sum(1 for path in config_dir.glob('*.yaml') if not path.name.startswith('_'))
+        ))
+    
+    @property
+    def gemini_client(self):
+        """The shared LLM service's Gemini client (None when Gemini is unavailable)"""
+        return self.llm.client
+    
+    @gemini_client.setter
+    def gemini_client(self, client):
+        self.llm.client = client
     
     def setup_logging(self, log_file=None, verbose=False):
-        """Setup logging to file and console"""
-        # Create logs directory
-        log_dir = Path('logs')
-        log_dir.mkdir(exist_ok=True)
-        
+        """Setup logging to file and console (calling it again keeps the same log file)"""
         # Generate log filename if not provided
-        if not log_file:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            log_file = log_dir / f'extraction_{timestamp}.log'
-        else:
+        if log_file:
             log_file = Path(log_file)
+        elif getattr(self, 'log_file', None):
+            log_file = self.log_file
+        else:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            log_file = Path('logs') / f'extraction_{timestamp}.log'
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        self.log_file = log_file
         
         # Configure logging
         self.logger = logging.getLogger('ArticleExtractor')
         self.logger.setLevel(logging.DEBUG if verbose else logging.INFO)
         
-        # Clear any existing handlers
-        self.logger.handlers.clear()
-        
         # File handler
         file_handler = logging.FileHandler(log_file, encoding='utf-8')
         file_handler.setLevel(logging.INFO)
@@ -115,207 +342,765 @@ class ArticleExtractor:
         console_formatter = logging.Formatter('%(levelname)s: %(message)s')
         console_handler.setFormatter(console_formatter)
         
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        # Callers only enqueue records; one listener thread formats and writes them
+        # (replaces any previous handlers and listener of this logger)
+        events.queue_logging(self.logger, file_handler, console_handler)
         
         self.logger.info(f"Logging initialized: {log_file} | verbose={verbose}")
         
     def download_article(self, url):
-        """Download article HTML using curl"""
-        print(f"📥 Downloading article from {url}...")
+        """Download article HTML using curl (or read it from the replay archive)"""
+        if self.fixtures is not None and self.fixtures.replaying:
+            _events.info(f"📼 Replaying article from {url}...")
+            return self.fixtures.page(url)
+        
+        _events.info(f"📥 Downloading article from {url}...")
         self.logger.info(f"Downloading article from {url}")
-        result = subprocess.run(
-            ['curl', '-s', url],
-            capture_output=True,
-            text=True
-        )
-        if result.returncode != 0:
-            self.logger.error(f"Failed to download article: {result.stderr}")
-            raise Exception(f"Failed to download article: {result.stderr}")
+        with tracing.span('curl', tracing.SPAN_KIND_CLIENT, **{'url.full': url}) as curl_span:
+            result = subprocess.run(
+                ['curl', '-s', url],
+                capture_output=True,
+                text=True
+            )
+            if result.returncode != 0:
+                self.logger.error(f"Failed to download article: {result.stderr}")
+                raise Exception(f"Failed to download article: {result.stderr}")
+            curl_span.set_attribute('http.response.body.size', len(result.stdout))
         self.logger.info(f"Downloaded {len(result.stdout)} bytes")
+        if self.fixtures is not None:
+            self.fixtures.record_page(url, result.stdout)
         return result.stdout
     
+    def fetch_rendered_page(self, url):
+        """Fetch with the headless browser (or the replay archive). Returns (success, html_content, error)"""
+        if self.fixtures is not None and self.fixtures.replaying:
+            return self.fixtures.rendered(url)
+        
+        with tracing.span('browser render', tracing.SPAN_KIND_CLIENT, **{'url.full': url}) as browser_span, \
+                self._browser_sessions_metric.track():
+            if self.browser_pool is not None:
+                success, html_content, error = self.browser_pool.fetch(url)
+            else:
+                success, html_content, error = SiteRegistry.fetch_with_browser(url)
+            browser_span.set_attributes(**{'browser.success': success,
+                                           'http.response.body.size': len(html_content) if success else None})
+        self._browser_renders_metric.inc(outcome='ok' if success else 'error')
+        if self.fixtures is not None:
+            self.fixtures.record_rendered(url, success, html_content, error)
+        return success, html_content, error
+    
     def download_image(self, url, output_path):
         """Download image from URL"""
         try:
-            urllib.request.urlretrieve(url, output_path)
-            if output_path.stat().st_size < 100:
-                return False
+            self._fetch_image(url, output_path)
             return True
         except Exception:
             return False
     
+    def _fetch_image(self, url, output_path):
+        """Download image from URL, raising classified errors (BadInputError for 404s and placeholders)"""
+        if self.fixtures is not None and self.fixtures.replaying:
+            # Recorded bytes, or the recorded download failure raised again
+            Path(output_path).write_bytes(self.fixtures.image(url))
+        else:
+            try:
+                urllib.request.urlretrieve(url, output_path)
+            except Exception as e:
+                error = classify_error(e)
+                if self.fixtures is not None:
+                    self.fixtures.record_image(url, error=error)
+                raise error from e
+            if self.fixtures is not None:
+                self.fixtures.record_image(url, Path(output_path).read_bytes())
+        if output_path.stat().st_size < 100:
+            raise BadInputError(f"Image too small ({output_path.stat().st_size} bytes)")
+    
     def generate_gemini_description(self, image_url, context_before, context_after):
         """Generate image description using Gemini Vision API (synchronous wrapper)"""
-        if not self.use_gemini or not self.gemini_client:
+        if not self.use_gemini or not self.llm.available:
             return None
         
         # This is now just a wrapper for the async version
         # Used when called individually (shouldn't happen in normal flow)
-        return asyncio.run(self._generate_gemini_description_async(image_url, context_before, context_after))
+        return self._run_async(self._generate_gemini_description_async(image_url, context_before, context_after))
     
-    async def _generate_gemini_description_async(self, image_url, context_before, context_after, max_retries=3):
-        """Generate image description using Gemini Vision API (async with retry logic)"""
-        if not self.use_gemini or not self.gemini_client:
+    def _download_image_for_vision(self, image_url, fetch_url=None):
+        """
+        Download an image to the temp directory (data: URIs are decoded in place). Returns local path or None.
+        image_url is the page's src, the key permanent failures are remembered under; fetch_url is a
+        resized variant to try first (see image_variants). If the variant fails, the page src is fetched.
+        """
+        if image_url.startswith('data:'):
+            return self._fetch_vision_image(image_url)
+        
+        if self.image_cache.get_failure(image_url):
+            self.logger.info(f"Skipping image with recorded permanent failure: {image_url}")
+            if self.current_metrics is not None:
+                self.current_metrics.count('image_cache_hits')
             return None
         
-        # Download image to temp location
+        if fetch_url and fetch_url != image_url:
+            if not self.image_cache.get_failure(fetch_url):
+                image_path = self._fetch_vision_image(fetch_url)
+                if image_path is not None:
+                    return image_path
+            if not image_url.startswith(('http://', 'https://')):
+                # Inline SVG: there is no page URL to fall back to
+                return None
+            self.logger.info(f"Image variant unavailable, fetching the page src: {image_url}")
+        return self._fetch_vision_image(image_url)
+    
+    def _fetch_vision_image(self, image_url):
+        """One download attempt; non-retryable failures are recorded under image_url"""
         temp_dir = Path('/tmp/article_extractor_images')
         temp_dir.mkdir(exist_ok=True)
         
-        image_name = image_url.split('/')[-1].split('?')[0]
-        if not any(image_name.endswith(ext) for ext in ['.png', '.jpg', '.jpeg', '.gif', '.webp']):
-            image_name += '.png'
+        if image_url.startswith('data:'):
+            decoded = local_images.decode_data_uri(image_url)
+            if decoded is None:
+                self.logger.warning("Skipping malformed data: URI image")
+                return None
+            mime_type, data = decoded
+            return local_images.write_temp_image(data, mime_type, temp_dir)
         
-        image_path = temp_dir / image_name
+        image_name = image_url.split('/')[-1].split('?')[0]
+        extension = Path(image_name).suffix.lower()
+        if extension not in ('.png', '.jpg', '.jpeg', '.gif', '.webp'):
+            extension = '.png'
+        # Unique per download: batch mode holds every image of an article at once
+        image_path = local_images.temp_image_path(temp_dir, image_url, extension)
+        
+        metrics = self.current_metrics
+        start = time.perf_counter()
+        try:
+            with tracing.span('image download', tracing.SPAN_KIND_CLIENT, **{'url.full': image_url}) as download_span:
+                self._fetch_image(image_url, image_path)
+                download_span.set_attribute('http.response.body.size', image_path.stat().st_size)
+        except Exception as e:
+            error = classify_error(e)
+            if not error.retryable:
+                self.image_cache.record_failure(image_url, error.category, error)
+            self.logger.warning(f"Image download failed ({error.category}) for {image_url}: {error}")
+            image_path.unlink(missing_ok=True)
+            if metrics is not None:
+                metrics.add_time('image_download', time.perf_counter() - start)
+                metrics.count('image_download_failures')
+            return None
+        if metrics is not None:
+            metrics.add_time('image_download', time.perf_counter() - start)
+            metrics.count('images_downloaded')
+            metrics.count('image_bytes', image_path.stat().st_size)
+        return image_path
+    
+    def _prepare_vision_image(self, image_url, image_path):
+        """
+        SVG fast path before a vision call.
+        Returns (image_path, local_description): SVGs with enough text are described from their
+        markup (no API call); other SVGs are rasterized, or dropped if rasterization is unavailable.
+        """
+        try:
+            with open(image_path, 'rb') as f:
+                head = f.read(2048)
+        except OSError:
+            return None, None
+        if not local_images.is_svg(head):
+            return image_path, None
+        
+        markup = image_path.read_text(encoding='utf-8', errors='ignore')
+        description = local_images.describe_svg(markup)
+        if description:
+            self.logger.info(f"Described SVG from its markup, no vision call: {image_url[:100]}")
+            image_path.unlink(missing_ok=True)
+            return None, description
+        
+        png_path = local_images.rasterize_svg(image_path)
+        image_path.unlink(missing_ok=True)
+        if png_path is None:
+            self.logger.info(f"SVG without text and no rasterizer available, using context: {image_url[:100]}")
+        return png_path, None
+    
+    def _get_vision_cache(self):
+        """
+        Create the cached vision system instruction once per run, and extend its TTL before it
+        expires (a service outlives it). Returns the cache name, or None when caching is
+        unavailable (e.g. prompt below the model's minimum cacheable size) - calls then send it
+        as a plain system instruction.
+        """
+        with self.vision_cache_lock:
+            if self.vision_cache_checked:
+                if not self.vision_cache_name or time.monotonic() < self.vision_cache_refresh_at:
+                    return self.vision_cache_name
+                if time.monotonic() < self.vision_cache_expires_at and self._extend_vision_cache():
+                    return self.vision_cache_name
+                # Expired while idle (or the extension failed): start a new one
+                self.vision_cache_name = None
+            self.vision_cache_checked = True
+            if self.gemini_client is None:
+                # Offline backend: no context caching
+                return None
+            
+            try:
+                cache = self.gemini_client.caches.create(
+                    model=self.model_router.model_for('vision'),
+                    config=lazy_imports.genai_types().CreateCachedContentConfig(
+                        display_name='article-extractor-vision',
+                        system_instruction=VISION_SYSTEM_PROMPT,
+                        ttl=f"{VISION_CACHE_TTL_SECONDS}s"
+                    )
+                )
+                self.vision_cache_name = cache.name
+                self._schedule_vision_cache_refresh()
+                self.logger.info(f"Created vision system instruction cache: {cache.name}")
+            except Exception as e:
+                self.logger.info(f"Vision context cache unavailable, using system instruction: {e}")
+                self.vision_cache_name = None
+            
+            return self.vision_cache_name
+    
+    def _schedule_vision_cache_refresh(self):
+        now = time.monotonic()
+        self.vision_cache_expires_at = now + VISION_CACHE_TTL_SECONDS
+        self.vision_cache_refresh_at = now + VISION_CACHE_TTL_SECONDS * VISION_CACHE_REFRESH
+    
+    def _extend_vision_cache(self):
+        """Push the cache expiry a full TTL ahead. Returns False if the API refused"""
+        try:
+            self.gemini_client.caches.update(
+                name=self.vision_cache_name,
+                config=lazy_imports.genai_types().UpdateCachedContentConfig(ttl=f"{VISION_CACHE_TTL_SECONDS}s")
+            )
+        except Exception as e:
+            self.logger.info(f"Could not extend vision cache {self.vision_cache_name}, recreating it: {e}")
+            return False
+        self._schedule_vision_cache_refresh()
+        self.logger.info(f"Extended vision cache: {self.vision_cache_name}")
+        return True
+    
+    def _drop_vision_cache(self, cache_name):
+        """The API no longer knows cache_name (expired or deleted): recreate it on the next call"""
+        with self.vision_cache_lock:
+            if self.vision_cache_name == cache_name:
+                self.logger.warning(f"Vision cache {cache_name} is gone, sending the system instruction")
+                self.vision_cache_name = None
+                self.vision_cache_checked = False
+    
+    def release_vision_cache(self):
+        """Delete the cached vision system instruction (it also expires on its own)"""
+        with self.vision_cache_lock:
+            if self.vision_cache_name and self.gemini_client:
+                try:
+                    self.gemini_client.caches.delete(name=self.vision_cache_name)
+                    self.logger.info(f"Deleted vision cache: {self.vision_cache_name}")
+                except Exception as e:
+                    self.logger.warning(f"Failed to delete vision cache {self.vision_cache_name}: {e}")
+            self.vision_cache_name = None
+            self.vision_cache_checked = False
+    
+    def _build_vision_config(self, use_cache=True, **overrides):
+        """Generation config shared by all vision calls (thinking disabled, static instructions attached)"""
+        types = lazy_imports.genai_types()
+        params = dict(
+            temperature=0.1,
+            top_p=0.95,
+            top_k=40,
+            max_output_tokens=8192,
+            thinking_config=types.ThinkingConfig(thinking_budget=0)
+        )
+        cache_name = self._get_vision_cache() if use_cache else None
+        if cache_name:
+            params['cached_content'] = cache_name
+        else:
+            params['system_instruction'] = VISION_SYSTEM_PROMPT
+        params.update(overrides)
+        return types.GenerateContentConfig(**params)
+    
+    async def _agenerate_vision(self, call_type, contents, max_attempts=None, **overrides):
+        """
+        Vision call with the shared retry policy. A request naming a cache the API no longer
+        knows is sent once more with the plain system instruction.
+        """
+        config = self._build_vision_config(**overrides)
+        try:
+            return await self.llm.agenerate_with_retry(call_type, contents, config=config, max_attempts=max_attempts)
+        except Exception as e:
+            if not config.cached_content or not isinstance(classify_llm_error(e), CachedContentError):
+                raise
+            self._drop_vision_cache(config.cached_content)
+        return await self.llm.agenerate_with_retry(call_type, contents, max_attempts=max_attempts,
+                                                   config=self._build_vision_config(use_cache=False, **overrides))
+    
+    def _record_vision_usage(self, response):
+        """Account prompt tokens and the system prompt text served from the context cache"""
+        stats = self.vision_prompt_stats
+        stats['calls'] += 1
+        if self.vision_cache_name:
+            stats['prompt_chars_saved'] += len(VISION_SYSTEM_PROMPT)
+        
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is not None:
+            stats['prompt_tokens'] += getattr(usage, 'prompt_token_count', None) or 0
+            stats['cached_tokens'] += getattr(usage, 'cached_content_token_count', None) or 0
+    
+    def vision_prompt_summary(self):
+        """One-line summary of system prompt reuse for the current run"""
+        stats = self.vision_prompt_stats
+        mode = "context cache" if self.vision_cache_name else "system instruction"
+        return (f"{stats['calls']} vision calls via {mode}: "
+                f"{stats['prompt_chars_saved']:,} system prompt chars not resent, "
+                f"{stats['cached_tokens']:,}/{stats['prompt_tokens']:,} input tokens served from cache")
+    
+    def _format_vision_result(self, image_url, description):
+        """Turn a raw model answer into the description stored for an image"""
+        # Check if AI decided to skip this image
+        if description.startswith("SKIP:"):
+            self.logger.info(f"Skipped UI element: {image_url}")
+            return f"[UI Element - {description[5:].strip()}]"
+        
+        self.logger.info(f"Generated description for {image_url}: {len(description)} chars")
+        return description
+    
+    async def _generate_gemini_description_async(self, image_url, context_before, context_after, max_retries=None,
+                                                 image_path=None, fetch_url=None):
+        """
+        Generate image description using Gemini Vision API (async with retry logic).
+        Retries follow the policy of the classified error; max_retries caps the attempts.
+        image_url is the page's src (the image cache key); fetch_url a variant to download instead.
+        """
+        if not self.use_gemini or not self.llm.available:
+            return None
         
-        # Download
-        if not self.download_image(image_url, image_path):
+        if self.llm.degraded:
+            # API degraded or budget spent: caller falls back to the context-based description
+            if image_path is not None:
+                image_path.unlink(missing_ok=True)
             return None
         
-        # Retry logic
-        last_error = None
-        for attempt in range(max_retries):
-            try:
-                # Load image
-                img = Image.open(image_path)
-                
-                # Create comprehensive prompt
-                system_context = """You are an expert at analyzing business charts, diagrams, and visualizations for SaaS metrics and business analytics.
-
-Your task is to create detailed, accessible text descriptions that will replace images in a text-only document.
+        # Download image to temp location (batch mode passes an already downloaded file)
+        if image_path is None:
+            loop = asyncio.get_event_loop()
+            image_path = await loop.run_in_executor(None, tracing.in_context(
+                self._download_image_for_vision, image_url, fetch_url
+            ))
+            if image_path is None:
+                return None
+            image_path, local_description = self._prepare_vision_image(image_url, image_path)
+            if local_description:
+                return local_description
+            if image_path is None:
+                return None
+        
+        # Cheap skip-vs-describe decision first (only when the triage route is enabled)
+        if self.model_router.is_enabled('image_triage'):
+            skip_reason = await self._triage_image_async(image_url, image_path, context_before)
+            if skip_reason:
+                image_path.unlink(missing_ok=True)
+                return self._format_vision_result(image_url, f"SKIP: {skip_reason}")
+        
+        # Retries (policy depends on the error class) happen in the shared LLM service
+        try:
+            # Load image (unreadable formats raise BadInputError, never retried)
+            img = lazy_imports.pil_image().open(image_path)
+            
+            user_prompt = f"""Analyze this image and determine if it's a content-relevant visualization or a UI/navigation element.
 
-IMPORTANT: SKIP the following types of images by responding with exactly "SKIP: [reason]":
-- Navigation elements (buttons, menus, breadcrumbs, headers, footers)
-- UI elements (icons, logos, decorative graphics, social media buttons)
-- Call-to-action buttons or link graphics
-- Page layout elements (dividers, backgrounds, borders)
-- Non-content images
+ARTICLE CONTEXT BEFORE:
+{context_before[:800]}
 
-ONLY describe content-relevant visualizations such as:
-- Charts (Line, Bar, Area, Pie, etc.)
-- Graphs and plots
-- Tables with data
-- Diagrams (flowcharts, schematics, concept maps)
-- Formulas and equations
-- Screenshots of actual data/dashboards (not UI chrome)
-- Infographics with business information
+ARTICLE CONTEXT AFTER:
+{context_after[:800]}
 
-For valid content visualizations, the description MUST:
-1. Start by identifying the TYPE (Line Graph, Bar Chart, Area Chart, Table, Diagram, Formula, Dashboard, etc.)
-   - Be specific: "Line Graph" not just "Graph"
-   - For cumulative metrics, note this explicitly
-2. Describe what is being measured or visualized
-3. Explain the key patterns, trends, or insights visible
-4. Include specific data points, axes labels, and important values when present
-5. Be comprehensive enough for someone listening via text-to-speech to fully understand
+If it's a UI element, button, logo, or navigation graphic, respond with "SKIP: [brief reason]".
 
-CRITICAL FORMATTING RULES:
-- Write in the SAME LANGUAGE as the article text
-- Do NOT include image URLs or file paths in your description
-- Do NOT use phrases like "the image shows" - describe directly
-- Write in clear, professional language
+If it's a business chart, graph, table, diagram, or formula, provide a comprehensive description.
+IMPORTANT: Write in the same language as the article text above. Do NOT include any URLs or image paths."""
 
-The surrounding article context is provided to help you understand what the visualization illustrates."""
+            response = await self._agenerate_vision('vision', [user_prompt, img], max_attempts=max_retries)
+            self._record_vision_usage(response)
+            description = response.text.strip()
+            
+            # Clean up
+            image_path.unlink(missing_ok=True)
+            
+            return self._format_vision_result(image_url, description)
+            
+        except Exception as e:
+            image_path.unlink(missing_ok=True)
+            if isinstance(e, BudgetExceededError):
+                self.logger.warning(f"Token budget spent, using context-based description for {image_url}")
+                return None
+            if isinstance(e, CircuitOpenError) or self.circuit_breaker.is_open:
+                # Degraded mode: no backoff, fall back straight away
+                self.logger.warning(f"Gemini circuit open, using context-based description for {image_url}")
+                return None
+            
+            error = classify_llm_error(e)
+            if error.fatal:
+                # Our key, model or config is wrong, not the image: nothing to remember about it
+                # (the service stops sending requests and the run degrades to context descriptions)
+                self.logger.error(f"Fatal request error, using context-based description for {image_url}: {e}")
+                return None
+            if isinstance(error, (BadInputError, PermanentRefusalError)):
+                # Permanent: remember it so later runs never download or send it again
+                # (data: URIs and inline SVGs are embedded in the page, nothing to remember by URL)
+                self.logger.warning(f"Permanent failure for {image_url} ({error.category}): {e}")
+                if image_url.startswith(('http://', 'https://')):
+                    self.image_cache.record_failure(image_url, error.category, error)
+                return None
+            
+            self.logger.error(f"All attempts failed for {image_url}: {error}")
+            _events.warning(f"   ⚠️  Gemini API error ({error.category}): {error}")
+            return None
+    
+    async def _triage_image_async(self, image_url, image_path, context_before):
+        """
+        Ask the light model whether an image is UI chrome.
+        Returns the skip reason, or None to describe it with the full vision model
+        (also on low confidence or any triage failure).
+        """
+        prompt = f"""Is this image a content-relevant visualization (chart, graph, table, diagram, formula, data screenshot, infographic)
+or a UI/navigation element (button, logo, icon, avatar, social badge, decorative graphic)?
 
-                user_prompt = f"""Analyze this image and determine if it's a content-relevant visualization or a UI/navigation element.
+ARTICLE CONTEXT BEFORE:
+{context_before[:300]}
 
+Respond in JSON format:
+{{"decision": "skip" or "describe", "confidence": "high"/"medium"/"low", "reason": "Brief reason"}}"""
+        
+        def call_gemini():
+            img = lazy_imports.pil_image().open(image_path)
+            types = lazy_imports.genai_types()
+            return self.llm.generate(
+                'image_triage', [prompt, img],
+                config=types.GenerateContentConfig(
+                    temperature=0.0,
+                    max_output_tokens=256,
+                    response_mime_type='application/json',
+                    thinking_config=types.ThinkingConfig(thinking_budget=0)
+                )
+            )
+        
+        try:
+            loop = asyncio.get_event_loop()
+            response = await loop.run_in_executor(None, tracing.in_context(call_gemini))
+            json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
+            verdict = json.loads(json_match.group()) if json_match else {}
+        except Exception as e:
+            self.logger.info(f"Image triage failed for {image_url}, describing instead: {e}")
+            return None
+        
+        self.model_router.record('image_triage', 'calls')
+        if verdict.get('decision') == 'skip' and str(verdict.get('confidence', '')).lower() != 'low':
+            return verdict.get('reason') or 'Non-content image'
+        if str(verdict.get('confidence', '')).lower() == 'low':
+            self.model_router.record('image_triage', 'escalations')
+        return None
+    
+    def _estimate_image_tokens(self, image_path):
+        """Estimate the input tokens Gemini will bill for an image"""
+        try:
+            with lazy_imports.pil_image().open(image_path) as img:
+                width, height = img.size
+        except Exception:
+            return IMAGE_TILE_TOKENS
+        
+        tiles_x = max(1, -(-width // IMAGE_TILE_SIZE))
+        tiles_y = max(1, -(-height // IMAGE_TILE_SIZE))
+        return tiles_x * tiles_y * IMAGE_TILE_TOKENS
+    
+    def _plan_image_batches(self, entries):
+        """
+        Group downloaded images into batches bounded by image count and token budget.
+        Each entry is a dict with 'img_data', 'image_path' and 'tokens'.
+        """
+        batches = []
+        current = []
+        current_tokens = 0
+        
+        for entry in entries:
+            # Context text is roughly 4 chars per token
+            entry_tokens = entry['tokens'] + 1600 // 4
+            if current and (len(current) >= self.batch_max_images or
+                            current_tokens + entry_tokens > self.batch_token_budget):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(entry)
+            current_tokens += entry_tokens
+        
+        if current:
+            batches.append(current)
+        
+        return batches
+    
+    async def _describe_image_batch_async(self, batch):
+        """
+        Describe several images of one article in a single Gemini request.
+        Returns {image_url: description} for every image the model answered.
+        """
+        contents = []
+        sections = []
+        for i, entry in enumerate(batch, 1):
+            img_data = entry['img_data']
+            sections.append(f"""IMAGE {i}
 ARTICLE CONTEXT BEFORE:
-{context_before[:800]}
+{img_data['context_before'][:800]}
 
 ARTICLE CONTEXT AFTER:
-{context_after[:800]}
+{img_data['context_after'][:800]}""")
+        
+        user_prompt = f"""You are given {len(batch)} images from the same article, in order (IMAGE 1 to IMAGE {len(batch)}).
+For EACH image, determine if it's a content-relevant visualization or a UI/navigation element.
 
-If it's a UI element, button, logo, or navigation graphic, respond with "SKIP: [brief reason]".
+{chr(10).join(sections)}
 
-If it's a business chart, graph, table, diagram, or formula, provide a comprehensive description.
+Respond with a JSON array containing exactly one object per image:
+[
+  {{"index": 1, "skip": false, "reason": "", "description": "Comprehensive description..."}},
+  {{"index": 2, "skip": true, "reason": "Social media button", "description": ""}}
+]
+
+For UI elements, buttons, logos, or navigation graphics set "skip" to true and give a brief reason.
+For business charts, graphs, tables, diagrams, or formulas provide a comprehensive description.
 IMPORTANT: Write in the same language as the article text above. Do NOT include any URLs or image paths."""
 
-                full_prompt = system_context + "\n\n" + user_prompt
-                
-                # Generate description using new SDK (run in executor to avoid blocking)
-                loop = asyncio.get_event_loop()
+        contents.append(user_prompt)
+        Image = lazy_imports.pil_image()
+        for i, entry in enumerate(batch, 1):
+            contents.append(f"IMAGE {i}:")
+            contents.append(Image.open(entry['image_path']))
+        
+        # Same per-class retry policy as single images: one 503 or 429 must not cost the whole batch
+        response = await self._agenerate_vision('vision_batch', contents, response_mime_type='application/json')
+        self._record_vision_usage(response)
+        response_text = response.text.strip()
+        
+        json_match = re.search(r'\[.*\]', response_text, re.DOTALL)
+        items = json.loads(json_match.group() if json_match else response_text)
+        
+        results = {}
+        for item in items:
+            try:
+                index = int(item.get('index', 0))
+            except (TypeError, ValueError):
+                continue
+            if not 1 <= index <= len(batch):
+                continue
+            
+            image_url = batch[index - 1]['img_data']['src']
+            if item.get('skip'):
+                answer = f"SKIP: {item.get('reason') or 'Non-content image'}"
+            else:
+                answer = (item.get('description') or '').strip()
+                if not answer:
+                    continue
+            results[image_url] = self._format_vision_result(image_url, answer)
+        
+        return results
+    
+    async def _collect_descriptions(self, tasks, descriptions_map, deadline=None, on_result=None):
+        """
+        Consume description tasks as they complete (each returns {image_url: description}).
+        on_result(descriptions_map) is called after every completion; when the deadline
+        (time.monotonic() value) passes, unfinished tasks are cancelled and keep None.
+        """
+        pending = set(tasks)
+        while pending:
+            timeout = None if deadline is None else deadline - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    descriptions_map.update(task.result())
+                except Exception as e:
+                    self.logger.error(f"Image description task failed: {e}")
+            if done and on_result:
+                on_result(descriptions_map)
+        
+        if pending:
+            _events.info(f"   ⏰ Article deadline reached: {len(pending)} image task(s) unfinished, using context-based descriptions")
+            self.logger.warning(f"Article deadline reached with {len(pending)} image tasks unfinished")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        return descriptions_map
+    
+    async def _process_images_batched(self, images_data, deadline=None, on_result=None):
+        """
+        Process images packed into multi-image requests, falling back to single-image calls.
+        No image_triage call up front: the batch prompt asks for skip-vs-describe per image, so
+        triage would add one request per image to save image tokens of a request sent anyway.
+        """
+        loop = asyncio.get_event_loop()
+        
+        # Download everything first so batches can be planned by actual image size
+        download_tasks = [
+            asyncio.ensure_future(loop.run_in_executor(None, tracing.in_context(
+                self._download_image_for_vision, img_data['src'], img_data.get('vision_src')
+            )))
+            for img_data in images_data
+        ]
+        timeout = None if deadline is None else max(0, deadline - time.monotonic())
+        _, pending_downloads = await asyncio.wait(download_tasks, timeout=timeout)
+        for task in pending_downloads:
+            task.cancel()
+        paths = [task.result() if task.done() and not task.cancelled() and task.exception() is None else None
+                 for task in download_tasks]
+        
+        descriptions_map = {img_data['src']: None for img_data in images_data}
+        entries = []
+        for img_data, image_path in zip(images_data, paths):
+            if image_path is not None:
+                image_path, local_description = self._prepare_vision_image(img_data['src'], image_path)
+                if local_description:
+                    descriptions_map[img_data['src']] = local_description
+            if image_path is not None:
+                entries.append({
+                    'img_data': img_data,
+                    'image_path': image_path,
+                    'tokens': self._estimate_image_tokens(image_path)
+                })
+        
+        batches = self._plan_image_batches(entries)
+        _events.info(f"   📦 Packed {len(entries)} images into {len(batches)} request(s)")
+        
+        async def run_batch(batch):
+            try:
+                try:
+                    results = await self._describe_image_batch_async(batch)
+                except Exception as e:
+                    self.logger.warning(f"Batch of {len(batch)} images failed, falling back to single calls: {e}")
+                    results = {}
                 
-                def call_gemini():
-                    config = GenerateContentConfig(
-                        temperature=0.1,
-                        top_p=0.95,
-                        top_k=40,
-                        max_output_tokens=8192,
-                        thinking_config=ThinkingConfig(thinking_budget=0)
-                    )
-                    # New SDK requires image to be part of contents list
-                    return self.gemini_client.models.generate_content(
-                        model='gemini-2.5-flash',
-                        contents=[full_prompt, img],
-                        config=config
+                # Anything the batch did not answer goes through the single-image path
+                missing = [entry for entry in batch if entry['img_data']['src'] not in results]
+                if missing and results:
+                    self.logger.info(f"Batch answered {len(results)}/{len(batch)} images, retrying {len(missing)} individually")
+                singles = await asyncio.gather(*[
+                    self._generate_gemini_description_async(
+                        entry['img_data']['src'],
+                        entry['img_data']['context_before'],
+                        entry['img_data']['context_after'],
+                        image_path=entry['image_path']
                     )
-                
-                response = await loop.run_in_executor(None, call_gemini)
-                description = response.text.strip()
-                
-                # Clean up
-                image_path.unlink(missing_ok=True)
-                
-                # Check if AI decided to skip this image
-                if description.startswith("SKIP:"):
-                    self.logger.info(f"Skipped UI element: {image_url}")
-                    return f"[UI Element - {description[5:].strip()}]"
-                
-                self.logger.info(f"Generated description for {image_url}: {len(description)} chars")
-                return description
-                
-            except Exception as e:
-                last_error = e
-                self.logger.warning(f"Attempt {attempt + 1}/{max_retries} failed for {image_url}: {e}")
-                
-                if attempt < max_retries - 1:
-                    # Wait before retry (exponential backoff)
-                    wait_time = 2 ** attempt
-                    await asyncio.sleep(wait_time)
-                else:
-                    # Final attempt failed
-                    self.logger.error(f"All {max_retries} attempts failed for {image_url}: {last_error}")
-                    print(f"   ⚠️  Gemini API error after {max_retries} retries: {last_error}")
-                    image_path.unlink(missing_ok=True)
-                    return None
-        
-        return None
+                    for entry in missing
+                ], return_exceptions=True)
+                for entry, result in zip(missing, singles):
+                    if isinstance(result, Exception):
+                        self.logger.error(f"Failed to process {entry['img_data']['src']}: {result}")
+                        result = None
+                    results[entry['img_data']['src']] = result
+                return results
+            finally:
+                # Also when the article deadline cancels the batch
+                for entry in batch:
+                    entry['image_path'].unlink(missing_ok=True)
+        
+        tasks = [asyncio.ensure_future(run_batch(batch)) for batch in batches]
+        try:
+            return await self._collect_descriptions(tasks, descriptions_map, deadline=deadline, on_result=on_result)
+        finally:
+            # Batches cancelled before they started never reach their own cleanup
+            for entry in entries:
+                entry['image_path'].unlink(missing_ok=True)
     
-    async def _process_images_parallel(self, images_data):
-        """Process all images in parallel with staggered start"""
+    async def _process_images_parallel(self, images_data, deadline=None, on_result=None):
+        """
+        Process all images in parallel with staggered start.
+        Descriptions are consumed as they complete; see _collect_descriptions for deadline/on_result.
+        """
         if not self.use_gemini or not images_data:
             return {}
         
-        print(f"🤖 Processing {len(images_data)} images in parallel with Gemini Vision API...")
+        if self.batch_images:
+            _events.info(f"🤖 Processing {len(images_data)} images in batched requests with Gemini Vision API...")
+            return await self._process_images_batched(images_data, deadline=deadline, on_result=on_result)
         
-        tasks = []
-        for i, img_data in enumerate(images_data):
-            # Create task
-            task = self._generate_gemini_description_async(
-                img_data['src'],
-                img_data['context_before'],
-                img_data['context_after']
-            )
-            tasks.append(task)
-            
+        _events.info(f"🤖 Processing {len(images_data)} images in parallel with Gemini Vision API...")
+        
+        async def describe(img_data, start_delay):
             # Stagger the start of requests (0.1s delay between each)
-            if i < len(images_data) - 1:
-                await asyncio.sleep(0.1)
-        
-        # Wait for all tasks to complete
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Build a dictionary mapping image URLs to descriptions
-        descriptions_map = {}
-        for img_data, result in zip(images_data, results):
-            if isinstance(result, Exception):
-                self.logger.error(f"Failed to process {img_data['src']}: {result}")
-                descriptions_map[img_data['src']] = None
-            else:
-                descriptions_map[img_data['src']] = result
+            await asyncio.sleep(start_delay)
+            try:
+                result = await self._generate_gemini_description_async(
+                    img_data['src'],
+                    img_data['context_before'],
+                    img_data['context_after'],
+                    fetch_url=img_data.get('vision_src')
+                )
+            except Exception as e:
+                self.logger.error(f"Failed to process {img_data['src']}: {e}")
+                result = None
+            return {img_data['src']: result}
         
-        return descriptions_map
+        tasks = [asyncio.ensure_future(describe(img_data, i * 0.1)) for i, img_data in enumerate(images_data)]
+        
+        # Build a dictionary mapping image URLs to descriptions as results arrive
+        descriptions_map = {img_data['src']: None for img_data in images_data}
+        return await self._collect_descriptions(tasks, descriptions_map, deadline=deadline, on_result=on_result)
+    
+    def _run_async(self, coro):
+        """
+        Run a coroutine on the extractor's event loop, created once and reused by every sync call
+        (with its default executor). Executor calls abandoned at a deadline are not waited for, so
+        they cannot hold the article. Inside a running loop, await the async API instead.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            coro.close()
+            raise RuntimeError("Sync ArticleExtractor API called from a running event loop; "
+                               "use 'await extractor.aprocess_article(url)' instead")
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+            return self._loop.run_until_complete(coro)
+    
+    def _pipeline_thread(self):
+        if self._pipeline_executor is None:
+            self._pipeline_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='article-pipeline')
+        return self._pipeline_executor
+    
+    def close(self):
+        """
+        Close the warm browser (on the thread that owns it), the sync API's event loop and the
+        pipeline thread. Both are created again if the extractor is used afterwards.
+        """
+        if self._pipeline_executor is not None:
+            if self.browser_pool is not None:
+                self._pipeline_executor.submit(self.browser_pool.close).result()
+            self._pipeline_executor.shutdown(wait=False)
+            self._pipeline_executor = None
+        elif self.browser_pool is not None:
+            self.browser_pool.close()
+        with self._loop_lock:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+                self._loop.close()
+            self._loop = None
+    
+    def _markdown_checkpointer(self, url, metadata, article_html, images, total, sink=None):
+        """on_result callback that rewrites the output file with the descriptions ready so far"""
+        sink = sink or self.file_sink
+        last_write = [0.0]
+        
+        def checkpoint(descriptions_map):
+            now = time.monotonic()
+            if now - last_write[0] < self.checkpoint_interval:
+                return
+            last_write[0] = now
+            ready = sum(1 for desc in descriptions_map.values() if desc is not None)
+            markdown_content = self.html_to_markdown(article_html, images, descriptions_map)
+            output_path = sink.write_text(metadata.get('title') or 'article', self.render_markdown(
+                url, metadata, markdown_content, images,
+                status_note=f"Partial: {ready}/{total} AI image descriptions ready, remaining images are still being described"
+            ))
+            _events.info(f"   💾 Checkpoint: {ready}/{total} descriptions written to {output_path.name}")
+        
+        return checkpoint
     
     def extract_metadata(self, html_content):
         """Extract article metadata (title, author, date)"""
@@ -347,6 +1132,16 @@ IMPORTANT: Write in the same language as the article text above. Do NOT include
         
         return metadata
     
+    @contextmanager
+    def _sub_stage(self, name):
+        """Trace span for a sub-stage, also profiled when --profile is on"""
+        with tracing.span(name, **{'pipeline.stage': name}):
+            if self.profiler is None:
+                yield
+            else:
+                with self.profiler.stage(name):
+                    yield
+    
     def extract_article_content(self, html_content, url=None, requires_browser=False):
         """Extract main article content from HTML using site registry"""
         
@@ -367,66 +1162,209 @@ IMPORTANT: Write in the same language as the article text above. Do NOT include
             
             if not config and self.use_gemini:
                 # Learn from this site
-                success, config, error = self.site_registry.learn_from_html(
-                    url, html_content, force=self.force_renew, requires_browser=requires_browser
-                )
+                with self._sub_stage('learning'):
+                    success, config, error = self.site_registry.learn_from_html(
+                        url, html_content, force=self.force_renew, requires_browser=requires_browser
+                    )
                 if not success:
                     self.logger.warning(f"Failed to learn site structure: {error}")
                     # Fall through to fallback strategies
             
             # Try extraction with config
             if config:
-                content = self.extraction_engine.extract_article_html(html_content, config)
+                with self._sub_stage('extraction_engine'):
+                    content = self.extraction_engine.extract_article_html(html_content, config)
                 if content:
                     return content
         
         # No fallback - if learning failed, we should know about it
         raise Exception(f"Could not extract article content. Site template learning failed or no config available for {url}")
     
-    def extract_images(self, content):
-        """Extract all images with their context"""
+    def _image_context(self, content, start, end):
+        """Surrounding text for an image (500 chars before and after, HTML removed)"""
+        context_before = content[max(0, start - 500):start]
+        context_after = content[end:min(len(content), end + 500)]
+        
+        context_before_text = re.sub(r'<[^>]+>', ' ', context_before)
+        context_before_text = html.unescape(context_before_text).strip()
+        context_after_text = re.sub(r'<[^>]+>', ' ', context_after)
+        context_after_text = html.unescape(context_after_text).strip()
+        return context_before_text, context_after_text
+    
+    def _figure_context(self, content, start, end):
+        """(in_figure, caption) for an element at content[start:end]"""
+        before = content[:start]
+        figure_open = before.rfind('<figure')
+        if figure_open == -1 or before.rfind('</figure>') > figure_open:
+            return False, ''
+        
+        figure_close = content.find('</figure>', end)
+        figure_html = content[figure_open:figure_close if figure_close != -1 else len(content)]
+        caption = re.search(r'<figcaption[^>]*>(.*?)</figcaption>', figure_html, re.DOTALL | re.IGNORECASE)
+        caption_text = html.unescape(re.sub(r'<[^>]+>', ' ', caption.group(1))).strip() if caption else ''
+        return True, re.sub(r'\s+', ' ', caption_text)
+    
+    def extract_images(self, content, image_rules=None):
+        """
+        Extract all images with their context.
+        Lazy-load placeholders (tiny data: URIs, empty SVGs) are resolved to the real
+        lazy-loaded URL or dropped; inline <svg> charts are extracted alongside <img> tags.
+        Site image rules (skip selectors, URL patterns, minimum size) drop chrome images here,
+        before anything is downloaded - except a small sample kept to re-check the rules.
+        """
         images = []
+        selector_srcs = image_rules.selector_matches(content) if image_rules else set()
+        site_skipped = 0
         
         for img_match in re.finditer(r'<img[^>]*>', content):
             img_tag = img_match.group(0)
             
-            src = re.search(r'src=["\']([^"\']+)["\']', img_tag)
+            src = re.search(r'\ssrc=["\']([^"\']+)["\']', img_tag)
             alt = re.search(r'alt=["\']([^"\']*)["\']', img_tag)
             title = re.search(r'title=["\']([^"\']*)["\']', img_tag)
             
-            # Get surrounding text for context (500 chars before and after)
-            start = max(0, img_match.start() - 500)
-            end = min(len(content), img_match.end() + 500)
-            context_before = content[start:img_match.start()]
-            context_after = content[img_match.end():end]
+            if not src:
+                continue
+            src_value = src.group(1)
             
-            # Clean HTML from context
-            context_before_text = re.sub(r'<[^>]+>', ' ', context_before)
-            context_before_text = html.unescape(context_before_text).strip()
-            context_after_text = re.sub(r'<[^>]+>', ' ', context_after)
-            context_after_text = html.unescape(context_after_text).strip()
+            if src_value.startswith('data:'):
+                decoded = local_images.decode_data_uri(src_value)
+                if decoded is None or local_images.is_placeholder(*decoded):
+                    # Lazy-load placeholder: use the real image if the page names it
+                    lazy_src = image_variants.lazy_src(img_tag)
+                    if not lazy_src:
+                        self.logger.debug("Skipping data: URI placeholder image")
+                        continue
+                    src_value = lazy_src
             
-            if src:
-                images.append({
-                    'src': src.group(1),
-                    'alt': alt.group(1) if alt else '',
-                    'title': title.group(1) if title else '',
-                    'position': img_match.start(),
-                    'context_before': context_before_text,
-                    'context_after': context_after_text
-                })
-        
+            if image_rules:
+                skip_reason = image_rules.skip_reason(src_value, img_tag, selector_srcs)
+                if skip_reason and image_rules.audit():
+                    # A sample still goes to vision: a description there demotes a wrong rule
+                    self.logger.info(f"Re-checking site image rule ({skip_reason}) with vision: {src_value[:100]}")
+                elif skip_reason:
+                    self.logger.info(f"Skipping site chrome image ({skip_reason}): {src_value[:100]}")
+                    site_skipped += 1
+                    continue
+            
+            context_before_text, context_after_text = self._image_context(content, img_match.start(), img_match.end())
+            in_figure, caption = self._figure_context(content, img_match.start(), img_match.end())
+            img_data = {
+                'src': src_value,
+                'alt': alt.group(1) if alt else '',
+                'title': title.group(1) if title else '',
+                'position': img_match.start(),
+                'context_before': context_before_text,
+                'context_after': context_after_text,
+                'in_figure': in_figure,
+                'caption': caption,
+                **image_attributes(img_tag)
+            }
+            
+            # Fetch the right-sized variant (srcset / resizing CDN); 'src' stays the page URL
+            target_width = (image_rules.preferred_srcset_width if image_rules else None) or self.vision_width
+            vision_src = image_variants.select_vision_url(img_tag, src_value, target_width)
+            if vision_src != src_value:
+                img_data['vision_src'] = vision_src
+            images.append(img_data)
+        
+        # Inline SVG charts: keep those with text or chart-sized dimensions, skip icons
+        for svg_index, svg_match in enumerate(re.finditer(r'<svg\b.*?</svg>', content, re.DOTALL | re.IGNORECASE)):
+            markup = svg_match.group(0)
+            svg_text = local_images.extract_svg_text(markup)
+            dimensions = local_images.svg_dimensions(markup)
+            is_chart_sized = dimensions and min(dimensions) >= local_images.MIN_CHART_DIMENSION
+            if not local_images.svg_text_count(svg_text) and not is_chart_sized:
+                continue
+            
+            context_before_text, context_after_text = self._image_context(content, svg_match.start(), svg_match.end())
+            images.append({
+                'src': f"inline-svg-{svg_index + 1}",
+                'alt': svg_text['title'],
+                'title': '',
+                'position': svg_match.start(),
+                'context_before': context_before_text,
+                'context_after': context_after_text,
+                'svg': markup
+            })
+        
+        if site_skipped:
+            _events.info(f"   🧹 Skipped {site_skipped} image(s) by site image rules")
+        
+        images.sort(key=lambda img: img['position'])
         return images
     
+    def _image_decisions(self, images, gemini_descriptions):
+        """SKIP / describe outcome per image, for learning site image rules"""
+        decisions = []
+        for img_data in images:
+            if img_data.get('svg') or img_data['src'].startswith('data:'):
+                continue
+            if img_data.get('local_description'):
+                skipped = False
+            elif gemini_descriptions.get(img_data['src']):
+                skipped = gemini_descriptions[img_data['src']].startswith('[UI Element')
+            else:
+                continue
+            decisions.append({
+                'src': img_data['src'],
+                'classes': img_data.get('classes', []),
+                'width': img_data.get('width'),
+                'height': img_data.get('height'),
+                'skipped': skipped
+            })
+        return decisions
+    
+    def describe_local_images(self, images):
+        """
+        Describe images that need no download: inline SVGs and data: URI SVGs with readable text.
+        Stores the text in img_data['local_description'] and returns the images still needing vision.
+        """
+        remaining = []
+        for img_data in images:
+            markup = img_data.get('svg')
+            if markup is None and img_data['src'].startswith('data:'):
+                decoded = local_images.decode_data_uri(img_data['src'])
+                if decoded and local_images.is_svg(decoded[1]):
+                    markup = decoded[1].decode('utf-8', errors='ignore')
+            
+            description = local_images.describe_svg(markup) if markup else None
+            if description:
+                img_data['local_description'] = description
+            elif img_data.get('svg'):
+                # Inline SVG without enough text: hand the markup to vision as a data: URI
+                encoded = base64.b64encode(markup.encode('utf-8')).decode('ascii')
+                img_data['vision_src'] = f"data:image/svg+xml;base64,{encoded}"
+                remaining.append(img_data)
+            else:
+                remaining.append(img_data)
+        
+        return remaining
+    
     def generate_image_description(self, img_data, img_index, total_images, gemini_desc=None):
         """Generate a description for an image (using pre-generated Gemini description if available)"""
         
+        # Embedded images have no URL worth printing
+        if img_data.get('svg'):
+            reference = "inline SVG in the article"
+        elif img_data['src'].startswith('data:'):
+            reference = "embedded data: URI image"
+        else:
+            reference = img_data['src']
+        
         # Use pre-generated Gemini description if provided
         if gemini_desc:
             # Format nicely
             desc = f"\n\n**[AI-Generated Image Description {img_index + 1}/{total_images}]**\n\n"
             desc += gemini_desc
-            desc += f"\n\n*[Original image: {img_data['src']}]*\n\n"
+            desc += f"\n\n*[Original image: {reference}]*\n\n"
+            return desc
+        
+        # SVG text read straight from the markup
+        if img_data.get('local_description'):
+            desc = f"\n\n**[Image Description {img_index + 1}/{total_images}]**\n\n"
+            desc += img_data['local_description']
+            desc += f"\n\n*[Original image: {reference}]*\n\n"
             return desc
         
         # Fallback to context-based description
@@ -438,6 +1376,9 @@ IMPORTANT: Write in the same language as the article text above. Do NOT include
         if img_data['title'] and img_data['title'].lower() not in ['image', '', 'img']:
             desc_parts.append(f"Title: {img_data['title']}")
         
+        if img_data.get('caption'):
+            desc_parts.append(f"Caption: {img_data['caption']}")
+        
         # Analyze context for clues
         context = (img_data['context_before'] + ' ' + img_data['context_after']).lower()
         
@@ -461,7 +1402,7 @@ IMPORTANT: Write in the same language as the article text above. Do NOT include
             description += " | ".join(desc_parts) + "\n\n"
         
         description += f"Context: {img_data['context_before'][:400]}...\n\n"
-        description += f"*[For full details, see original image: {img_data['src']}]*\n\n"
+        description += f"*[For full details, see original image: {reference}]*\n\n"
         
         return description
     
@@ -483,6 +1424,9 @@ IMPORTANT: Write in the same language as the article text above. Do NOT include
         # First, replace images with placeholders
         for i, img in enumerate(sorted(images_data, key=lambda x: x['position'])):
             placeholder = f"___IMAGE_{i}___"
+            if img.get('svg'):
+                text = text.replace(img['svg'], placeholder, 1)
+                continue
             img_pattern = re.escape(img['src'].split('?')[0])
             text = re.sub(
                 f'<img[^>]*src=["\'][^"\']*{img_pattern}[^"\']*["\'][^>]*>',
@@ -552,14 +1496,13 @@ IMPORTANT: Write in the same language as the article text above. Do NOT include
         
         return text.strip()
     
-    def create_markdown_file(self, url, metadata, content, images):
-        """Create final Markdown file"""
-        # Generate filename from title
-        title = metadata.get('title', 'article')
-        filename = re.sub(r'[^\w\s-]', '', title)
-        filename = re.sub(r'[-\s]+', '_', filename)
-        filename = filename[:100] + '.md'
-        
+    def create_markdown_file(self, url, metadata, content, images, status_note=None):
+        """Create (or rewrite) the Markdown file in output_dir; status_note marks a partial checkpoint"""
+        return self.file_sink.write_text(metadata.get('title') or 'article',
+                                         self.render_markdown(url, metadata, content, images, status_note))
+    
+    def render_markdown(self, url, metadata, content, images, status_note=None):
+        """The full Markdown document: metadata header plus the converted article"""
         # Create header
         header = f"# {metadata.get('title', 'Article')}\n\n"
         
@@ -582,93 +1525,269 @@ IMPORTANT: Write in the same language as the article text above. Do NOT include
         header += "  \n"
         
         header += "\n*Note: This is a text-only version. All charts and images have been replaced with detailed text descriptions.*\n"
+        if status_note:
+            header += f"\n*{status_note}*\n"
         header += "\n---\n\n"
         
         # Combine
         full_content = header + content
         
         # Remove duplicate title if present
-        full_content = re.sub(r'---\n+# ' + re.escape(metadata.get('title', '')) + r'[^\n]*\n+', '---\n\n', full_content)
-        
-        # Save
-        output_path = self.output_dir / filename
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(full_content)
-        
-        return output_path
+        return re.sub(r'---\n+# ' + re.escape(metadata.get('title', '')) + r'[^\n]*\n+', '---\n\n', full_content)
     
-    def process_article(self, url):
-        """Main processing pipeline"""
+    def _image_results(self, images, gemini_descriptions):
+        """What replaced each image in the Markdown, in article order"""
+        results = []
+        for img in sorted(images, key=lambda x: x['position']):
+            if gemini_descriptions.get(img['src']):
+                description, source = gemini_descriptions[img['src']], 'vision'
+            elif img.get('local_description'):
+                description, source = img['local_description'], 'svg'
+            else:
+                description, source = None, 'context'
+            results.append(ImageResult(src=img['src'], position=img['position'], alt=img.get('alt') or '',
+                                       title=img.get('title') or '', caption=img.get('caption'),
+                                       description=description, source=source))
+        return results
+    
+    
+    def enable_browser_pool(self):
+        """Keep one headless browser warm between renders (for long-running processes)"""
+        if self.browser_pool is None:
+            self.browser_pool = BrowserPool(fallback=SiteRegistry.fetch_with_browser)
+        return self.browser_pool
+    
+    async def aextract_article(self, url, html=None, sinks=None):
+        """
+        Main processing pipeline, for callers with a running event loop (one metrics record per
+        article, see article_metrics). Returns an ArticleResult (metadata, Markdown, image
+        descriptions, metrics) whether the article succeeded or failed.
+        html: the page's HTML when the caller already has it (no download, no browser render)
+        sinks: where the finished document goes instead of self.sinks; () keeps it in memory only
+        
+        The blocking stages run on the extractor's pipeline thread and the image descriptions on
+        the caller's loop and its default executor, so the loop stays responsive. Articles of one
+        extractor run one at a time (shared budgets, site learning and usage accounting);
+        concurrent callers wait for their turn without blocking the loop.
+        """
+        loop = asyncio.get_running_loop()
+        with self._article_locks_guard:
+            article_lock = self._article_locks.get(loop)
+            if article_lock is None:
+                article_lock = self._article_locks[loop] = asyncio.Lock()
+        async with article_lock:
+            return await loop.run_in_executor(self._pipeline_thread(), tracing.in_context(
+                self._run_article, url, html, loop, self.sinks if sinks is None else list(sinks)
+            ))
+    
+    async def aextract_articles(self, urls, sinks=None):
+        """Async iterator over a batch: yields an ArticleResult as each article finishes"""
+        urls = list(urls)
+        for i, url in enumerate(urls, 1):
+            _events.emit(events.ArticleStarted(url, i, len(urls)))
+            yield await self.aextract_article(url, sinks=sinks)
+    
+    async def aprocess_article(self, url, html=None):
+        """aextract_article, returning only the Markdown file path (None when the article failed)"""
+        return (await self.aextract_article(url, html)).output_path
+    
+    async def aprocess_articles(self, urls):
+        """Async iterator over a batch: yields (url, output_path or None) as each article finishes"""
+        async for result in self.aextract_articles(urls):
+            yield result.url, result.output_path
+    
+    def extract_article(self, url, html=None, sinks=None):
+        """Sync aextract_article (on the extractor's own event loop, reused across articles)"""
+        return self._run_async(self.aextract_article(url, html, sinks))
+    
+    def extract_articles(self, urls, sinks=None):
+        """Sync aextract_articles: yields an ArticleResult per article"""
+        return self._iterate(self.aextract_articles(urls, sinks))
+    
+    def process_article(self, url, html=None):
+        """Sync aprocess_article: the Markdown file path, or None when the article failed"""
+        return self._run_async(self.aprocess_article(url, html))
+    
+    def process_articles(self, urls):
+        """Sync aprocess_articles: yields (url, output_path or None) per article"""
+        return self._iterate(self.aprocess_articles(urls))
+    
+    def _iterate(self, batch):
+        """Drive an async iterator from sync code, one item per run of the extractor's loop"""
         try:
-            # Download with curl first (fast)
-            html_content = self.download_article(url)
-            
-            # Smart detection: Check if content looks dynamic/incomplete
-            requires_browser = False
-            if self.site_registry and self.use_gemini:
-                # Check the site config first
-                domain = self.site_registry.get_domain_from_url(url)
-                config = self.site_registry.load_config(domain)
+            while True:
+                try:
+                    yield self._run_async(batch.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._run_async(batch.aclose())
+    
+    def _run_article(self, url, html, loop, sinks):
+        """One article on the pipeline thread; loop runs the image description coroutines"""
+        article_start = time.monotonic()
+        metrics = self.current_metrics = ArticleMetrics(url, profiler=self.profiler)
+        usage_before = self.llm.usage_snapshot()
+        document, outputs = None, {}
+        with tracing.span('article', **{'url.full': url, 'article.domain': metrics.domain}) as article_span:
+            try:
+                document, outputs = self._process_article(url, metrics, article_start, loop, sinks, html)
+                metrics.finish('success', llm_usage=usage_delta(usage_before, self.llm.usage_snapshot()))
                 
-                if config and config.get('requires_browser'):
-                    # Config says we need browser for this site
-                    requires_browser = True
-                    print("   ℹ️  Site config indicates dynamic content")
-                elif not config:
-                    # No config yet - ask LLM to check the HTML
-                    print("🔍 Checking if content requires JavaScript...")
-                    is_dynamic, reason = self.site_registry.check_if_dynamic_content(html_content, url)
-                    requires_browser = is_dynamic
+            except Exception as e:
+                _events.error(f"❌ Error processing {url}: {str(e)}")
+                self.logger.error(f"Error processing {url}: {str(e)}", exc_info=True)
+                article_span.record_error(e)
+                metrics.finish('failed', error=e, llm_usage=usage_delta(usage_before, self.llm.usage_snapshot()))
+                document, outputs = None, {}
             
-            # Re-fetch with browser if needed
-            if requires_browser:
-                print("🌐 Re-fetching with headless browser...")
-                success, browser_html, error = self.site_registry.fetch_with_browser(url)
-                if success:
-                    html_content = browser_html
-                else:
-                    print(f"   ⚠️  Browser fetch failed: {error}")
-                    print("   📄 Continuing with curl version...")
+            finally:
+                self.current_metrics = None
+                record = self.metrics.record(metrics)
+                _events.emit(events.ArticleFinished(url, record['status'], record.get('output'), record['total_s'],
+                                                    record['error']))
+                llm = record['llm']
+                article_span.set_attributes(**{
+                    'article.status': record['status'],
+                    'article.html_bytes': record.get('html_bytes'),
+                    'article.markdown_bytes': record.get('markdown_bytes'),
+                    'article.images': record.get('images_found'),
+                    'llm.calls': llm['calls'],
+                    'llm.prompt_tokens': llm['prompt_tokens'],
+                    'llm.output_tokens': llm['output_tokens'],
+                    'llm.cost_usd': llm['cost_usd'],
+                })
+        return ArticleResult(url, record['status'], document=document, metrics=record, outputs=outputs,
+                             error=record['error'])
+    
+    def _process_article(self, url, metrics, article_start, loop, sinks, html_content=None):
+        """The pipeline stages of aextract_article, each timed into metrics. Returns (document, sink outputs)"""
+        provided = html_content is not None
+        if not provided:
+            # Download with curl first (fast)
+            with metrics.stage('fetch'):
+                html_content = self.download_article(url)
+        metrics.set(html_bytes=len(html_content.encode('utf-8')))
+        
+        # Smart detection: Check if content looks dynamic/incomplete (caller-provided HTML is used as is)
+        requires_browser = False
+        if self.site_registry and self.use_gemini and not provided:
+            # Check the site config first
+            domain = self.site_registry.get_domain_from_url(url)
+            config = self.site_registry.load_config(domain)
             
-            # Extract components
-            print("📝 Extracting metadata...")
+            if config and config.get('requires_browser'):
+                # Config says we need browser for this site
+                requires_browser = True
+                _events.info("   ℹ️  Site config indicates dynamic content")
+            elif not config:
+                # No config yet - ask LLM to check the HTML
+                _events.info("🔍 Checking if content requires JavaScript...")
+                with metrics.stage('dynamic_check'):
+                    is_dynamic, reason = self.site_registry.check_if_dynamic_content(html_content, url)
+                requires_browser = is_dynamic
+        
+        # Re-fetch with browser if needed
+        if requires_browser:
+            _events.info("🌐 Re-fetching with headless browser...")
+            with metrics.stage('browser_render'):
+                success, browser_html, error = self.fetch_rendered_page(url)
+            if success:
+                html_content = browser_html
+                metrics.set(rendered_bytes=len(html_content.encode('utf-8')))
+            else:
+                _events.warning(f"   ⚠️  Browser fetch failed: {error}")
+                _events.info("   📄 Continuing with curl version...")
+        metrics.set(requires_browser=requires_browser)
+        
+        # Extract components
+        _events.info("📝 Extracting metadata...")
+        with metrics.stage('metadata'):
             metadata = self.extract_metadata(html_content)
-            
-            print("📄 Extracting article content...")
+        
+        _events.info("📄 Extracting article content...")
+        with metrics.stage('extraction'):
             article_html = self.extract_article_content(html_content, url=url, requires_browser=requires_browser)
+        metrics.set(article_bytes=len(article_html.encode('utf-8')))
+        
+        _events.info("🖼️  Extracting images...")
+        with metrics.stage('image_extraction'):
+            site_config = None
+            if self.site_registry:
+                domain = self.site_registry.get_domain_from_url(url)
+                site_config = self.site_registry.load_config(domain, verbose=False)
+            images = self.extract_images(article_html, image_rules=ImageRules.from_site_config(site_config, self.logger))
+            _events.info(f"   Found {len(images)} images")
             
-            print("🖼️  Extracting images...")
-            images = self.extract_images(article_html)
-            print(f"   Found {len(images)} images")
-            
-            # Process images in parallel with Gemini if enabled
-            gemini_descriptions = {}
-            if self.use_gemini and images:
-                start_time = time.time()
-                gemini_descriptions = asyncio.run(self._process_images_parallel(images))
-                elapsed = time.time() - start_time
-                successful = sum(1 for desc in gemini_descriptions.values() if desc is not None)
-                print(f"   ✓ Processed {successful}/{len(images)} images in {elapsed:.1f}s")
-            
-            print("🔄 Converting to Markdown...")
+            # SVG charts with readable text are described locally, without any API call
+            vision_images = self.describe_local_images(images)
+        local_count = len(images) - len(vision_images)
+        if local_count:
+            _events.info(f"   📐 Described {local_count} SVG image(s) from their markup")
+        metrics.set(images_found=len(images), images_local=local_count)
+        
+        # The Markdown file sink, if the result goes to disk (partial checkpoints are written there)
+        file_sink = next((sink for sink in sinks if isinstance(sink, MarkdownFileSink)), None)
+        
+        # Process images in parallel with Gemini if enabled
+        gemini_descriptions = {}
+        if self.use_gemini and vision_images and self.token_budget is not None and self.token_budget.exhausted:
+            _events.info(f"   💸 Token budget spent ({self.token_budget.summary()}), using context-based descriptions")
+            metrics.set(images_deferred=len(vision_images))
+            vision_images = []
+        if self.use_gemini and vision_images:
+            # Most important images first; the rest keep the context-based description
+            vision_images, deferred = self.image_budget.allocate(vision_images)
+            metrics.set(images_deferred=len(deferred))
+            if deferred:
+                _events.info(f"   🎯 Image budget: describing {len(vision_images)} of {len(vision_images) + len(deferred)} images with Gemini, "
+                             f"{len(deferred)} get context-based descriptions")
+                self.logger.info(f"Image budget deferred {len(deferred)} images: {[img['src'][:100] for img in deferred]}")
+        
+        if self.use_gemini and vision_images:
+            deadline = article_start + self.article_deadline if self.article_deadline else None
+            checkpoint = file_sink and self._markdown_checkpointer(url, metadata, article_html, images,
+                                                                   len(vision_images), sink=file_sink)
+            with metrics.stage('vision'):
+                gemini_descriptions = asyncio.run_coroutine_threadsafe(
+                    self._process_images_parallel(vision_images, deadline=deadline, on_result=checkpoint), loop
+                ).result()
+            successful = sum(1 for desc in gemini_descriptions.values() if desc is not None)
+            metrics.set(images_vision=len(vision_images), images_described=successful)
+            _events.info(f"   ✓ Processed {successful}/{len(vision_images)} images in {metrics.stages['vision']:.1f}s")
+            self.logger.info(f"Vision prompt reuse: {self.vision_prompt_summary()}")
+        
+        if self.use_gemini:
+            self.logger.info(f"Model routing: {self.model_router.summary()}")
+            self.logger.info(f"Call deadlines: {self.deadline_caller.summary()}")
+            self.logger.info(f"LLM usage: {self.llm.usage_summary()}")
+        
+        # Learn recurring chrome images so the next article skips them before download
+        if site_config and gemini_descriptions:
+            self.site_registry.record_image_decisions(domain, self._image_decisions(images, gemini_descriptions))
+        
+        _events.info("🔄 Converting to Markdown...")
+        with metrics.stage('conversion'):
             markdown_content = self.html_to_markdown(article_html, images, gemini_descriptions)
-            
-            print("💾 Creating Markdown file...")
-            output_path = self.create_markdown_file(url, metadata, markdown_content, images)
-            
-            print(f"✅ Success! Created: {output_path}")
-            print(f"   Words: {len(markdown_content.split())}")
-            print(f"   Images processed: {len(images)}")
-            if self.use_gemini:
-                successful = sum(1 for desc in gemini_descriptions.values() if desc is not None)
-                print(f"   AI descriptions: {successful}/{len(images)}")
-            
-            return output_path
-            
-        except Exception as e:
-            print(f"❌ Error processing {url}: {str(e)}")
-            self.logger.error(f"Error processing {url}: {str(e)}", exc_info=True)
-            return None
+            document = ArticleDocument(url, metadata, self.render_markdown(url, metadata, markdown_content, images),
+                                       self._image_results(images, gemini_descriptions))
+        
+        if sinks:
+            _events.info("💾 Creating Markdown file..." if file_sink else "💾 Writing result...")
+        with metrics.stage('write'):
+            outputs = {sink.name: sink.write(document) for sink in sinks}
+        output_path = outputs.get(MarkdownFileSink.name)
+        metrics.set(output=str(output_path) if output_path else None,
+                    markdown_bytes=len(document.markdown.encode('utf-8')), words=len(markdown_content.split()))
+        
+        _events.info(f"✅ Success! Created: {output_path}" if output_path else f"✅ Success! Extracted: {document.title}")
+        _events.info(f"   Words: {len(markdown_content.split())}")
+        _events.info(f"   Images processed: {len(images)}")
+        if self.use_gemini:
+            successful = sum(1 for desc in gemini_descriptions.values() if desc is not None)
+            _events.info(f"   AI descriptions: {successful}/{len(images)}")
+        
+        return document, outputs
 
 
 def main():
@@ -691,6 +1810,10 @@ Examples:
   
   # Custom output directory
   %(prog)s --gemini --output ./articles https://example.com/article
+  
+  # Long-running service (warm clients, browser and configs)
+  %(prog)s --gemini --serve --port 8765
+  curl -d '{"url": "https://example.com/article"}' http://127.0.0.1:8765/extract
 
 Note: Gemini Vision API requires GEMINI_API_KEY in environment or .env file
       Get your key from: https://makersuite.google.com/app/apikey
@@ -703,15 +1826,84 @@ Note: Gemini Vision API requires GEMINI_API_KEY in environment or .env file
     parser.add_argument('--gemini', action='store_true', help='Use Gemini Vision API for image descriptions (requires API key)')
     parser.add_argument('--api-key', help='Gemini API key (or set GEMINI_API_KEY environment variable)')
     parser.add_argument('--force-renew', action='store_true', help='Force re-learning of site extraction rules (ignores existing config)')
-    parser.add_argument('-v', '--verbose', action='store_true', help='Verbose console logging (debug level)')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='Verbose console logging (debug level), including LLM prompts and responses')
+    parser.add_argument('--progress', choices=sorted(events.RENDERERS), default='tty',
+                        help='Progress output: human-readable lines (tty), one JSON event per line (jsonl) '
+                             'or nothing (silent) (default: tty)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='No progress output (same as --progress silent)')
+    parser.add_argument('--batch-images', action='store_true', help='Describe several images of an article per Gemini request')
+    parser.add_argument('--batch-max-images', type=int, default=8, help='Maximum images per batched request (default: 8)')
+    parser.add_argument('--batch-token-budget', type=int, default=12000, help='Approximate input token budget per batched request (default: 12000)')
+    parser.add_argument('--circuit-threshold', type=int, default=5, help='Consecutive Gemini failures before failing fast (default: 5)')
+    parser.add_argument('--circuit-reset', type=float, default=30.0, help='Seconds before probing a degraded Gemini API again (default: 30)')
+    parser.add_argument('--max-images', type=int, help='Maximum images per article described with Gemini, by importance (default: all)')
+    parser.add_argument('--max-images-total', type=int, help='Maximum images described with Gemini across the whole batch (default: all)')
+    parser.add_argument('--article-deadline', type=float,
+                        help='Seconds per article before unfinished image descriptions fall back to context (default: no limit)')
+    parser.add_argument('--hedge-percentile', type=float,
+                        help='Send a duplicate Gemini request once a call is slower than this latency percentile, e.g. 95 (default: off)')
+    parser.add_argument('--llm-concurrency', type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help=f'Maximum Gemini calls in flight at once, vision and learning combined (default: {DEFAULT_MAX_CONCURRENCY})')
+    parser.add_argument('--llm-backend', choices=['gemini', 'fake'], default='gemini',
+                        help='LLM backend: the Gemini API, or an offline deterministic fake (default: gemini)')
+    parser.add_argument('--fake-llm-config', help='YAML file for the fake backend: scripted/replayed responses, latency, error rates')
+    parser.add_argument('--record', metavar='DIR',
+                        help='Capture pages, rendered pages, images and LLM exchanges into a fixture archive')
+    parser.add_argument('--replay', metavar='DIR',
+                        help='Run entirely from a fixture archive recorded with --record (no network)')
+    parser.add_argument('--vision-width', type=int, default=image_variants.VISION_TARGET_WIDTH,
+                        help=f'Image width requested from srcset/resizing CDNs for vision calls (default: {image_variants.VISION_TARGET_WIDTH})')
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='Append one JSON record per article (stage timings, sizes, images, LLM usage) and a batch summary to FILE')
+    parser.add_argument('--profile', action='store_true',
+                        help='Profile each pipeline stage: per-stage .prof/.txt files and a flamegraph-compatible '
+                             'stages.folded in <output>/profile')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='Append one OpenTelemetry (OTLP/JSON) trace per article to FILE: spans for every stage and external call')
+    parser.add_argument('--token-budget', type=int,
+                        help='Hard cap on Gemini tokens (input + output) for the run; afterwards AI steps are skipped (default: none)')
+    parser.add_argument('--cost-budget', type=float,
+                        help='Hard cap on estimated Gemini cost in USD for the run; afterwards AI steps are skipped (default: none)')
+    parser.add_argument('--openmetrics-file', metavar='FILE',
+                        help='Rewrite live metrics in OpenMetrics text format to FILE after every article')
+    parser.add_argument('--serve', action='store_true',
+                        help='Run as a local HTTP service: POST /extract {"url", "html", "format"}, GET /health, GET /metrics')
+    parser.add_argument('--port', type=int, default=service.DEFAULT_PORT,
+                        help=f'Service port on 127.0.0.1 (default: {service.DEFAULT_PORT})')
+    parser.add_argument('--socket', metavar='PATH', help='Serve on a unix socket instead of a TCP port')
+    parser.add_argument('--max-queue', type=int, default=service.DEFAULT_MAX_QUEUE,
+                        help=f'Articles queued before the service answers 503 (default: {service.DEFAULT_MAX_QUEUE})')
+    parser.add_argument('--metrics-port', type=int,
+                        help='Serve live metrics in OpenMetrics format on http://127.0.0.1:PORT/metrics')
     
     args = parser.parse_args()
     
+    # Offline stand-in for the Gemini API
+    llm_backend = None
+    if args.llm_backend == 'fake':
+        llm_backend = FakeBackend.from_file(args.fake_llm_config) if args.fake_llm_config else FakeBackend()
+    
+    if args.record and args.replay:
+        _events.error("❌ Error: --record and --replay cannot be combined")
+        sys.exit(1)
+    fixture_archive = None
+    if args.record:
+        fixture_archive = FixtureArchive(args.record, 'record')
+        _events.info(f"📼 Recording fixtures to {args.record}")
+    elif args.replay:
+        try:
+            fixture_archive = FixtureArchive(args.replay, 'replay')
+        except FileNotFoundError as e:
+            _events.error(f"❌ Error: {e}")
+            sys.exit(1)
+        _events.info(f"📼 Replaying fixtures from {args.replay} (no network)")
+    
     # Check Gemini availability
     if args.gemini and not GEMINI_AVAILABLE:
-        print("❌ Error: Gemini support requires additional packages")
-        print("\nInstall them with:")
-        print("  pip install google-generativeai pillow python-dotenv")
+        _events.error("❌ Error: Gemini support requires additional packages")
+        _events.info("\nInstall them with:")
+        _events.info("  pip install google-generativeai pillow python-dotenv")
         sys.exit(1)
     
     # Collect URLs
@@ -723,55 +1915,121 @@ Note: Gemini Vision API requires GEMINI_API_KEY in environment or .env file
                 file_urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
                 urls.extend(file_urls)
         except Exception as e:
-            print(f"❌ Error reading file {args.file}: {e}")
+            _events.error(f"❌ Error reading file {args.file}: {e}")
             sys.exit(1)
     
-    if not urls:
+    if not urls and not args.serve:
         parser.print_help()
         sys.exit(1)
     
+    # Progress events: TTY lines, JSONL or nothing
+    events.configure_events('silent' if args.quiet else args.progress, verbose=args.verbose)
+    
+    # Span export for every stage and external call (off unless --trace)
+    tracer = tracing.configure_tracing(args.trace)
+    
+    # Shared circuit breaker for every Gemini call site
+    configure_circuit_breaker(failure_threshold=args.circuit_threshold, reset_timeout=args.circuit_reset)
+    
     # Process articles
     extractor = ArticleExtractor(
         output_dir=args.output,
         use_gemini=args.gemini,
         gemini_api_key=args.api_key,
-        force_renew=args.force_renew
+        force_renew=args.force_renew,
+        batch_images=args.batch_images,
+        batch_max_images=args.batch_max_images,
+        batch_token_budget=args.batch_token_budget,
+        vision_width=args.vision_width,
+        max_images_per_article=args.max_images,
+        max_images_total=args.max_images_total,
+        article_deadline=args.article_deadline,
+        hedge_percentile=args.hedge_percentile,
+        llm_concurrency=args.llm_concurrency,
+        llm_backend=llm_backend,
+        fixtures=fixture_archive,
+        metrics_file=args.metrics,
+        token_budget=args.token_budget,
+        cost_budget=args.cost_budget,
+        profile=args.profile,
+        verbose=args.verbose
     )
-    # Reconfigure logging with verbosity
-    extractor.setup_logging(verbose=args.verbose)
     
-    print(f"\n🚀 Processing {len(urls)} article(s)...")
+    if args.metrics_port:
+        host, port = extractor.metrics_registry.serve(args.metrics_port)
+        _events.info(f"📈 Serving metrics on http://{host}:{port}/metrics")
+    
+    if args.serve:
+        service.run_service(extractor, port=args.port, socket_path=args.socket, max_queue=args.max_queue)
+        if tracer is not None:
+            tracer.flush()
+        if extractor.use_gemini:
+            extractor.release_vision_cache()
+        return
+    
+    _events.info(f"\n🚀 Processing {len(urls)} article(s)...")
     if args.gemini:
-        print("🤖 AI-powered image descriptions enabled (Gemini Vision API)")
+        _events.info("🤖 AI-powered image descriptions enabled (Gemini Vision API)")
     else:
-        print("📝 Using context-based image descriptions (free)")
-    print()
+        _events.info("📝 Using context-based image descriptions (free)")
+    _events.info('')
     
     results = []
-    for i, url in enumerate(urls, 1):
-        print(f"\n[{i}/{len(urls)}] Processing: {url}")
-        print("-" * 60)
-        result = extractor.process_article(url)
+    for url, result in extractor.process_articles(urls):
         results.append((url, result))
-        print()
+        if fixture_archive is not None:
+            # Keep the archive usable even if a long recording is interrupted
+            fixture_archive.save()
+        if args.openmetrics_file:
+            extractor.metrics_registry.write_file(args.openmetrics_file)
+        _events.info('')
     
     # Summary
-    print("\n" + "=" * 60)
-    print("📊 SUMMARY")
-    print("=" * 60)
+    _events.info("\n" + "=" * 60)
+    _events.info("📊 SUMMARY")
+    _events.info("=" * 60)
     
     successful = sum(1 for _, r in results if r)
     failed = len(results) - successful
     
-    print(f"✅ Successful: {successful}")
-    print(f"❌ Failed: {failed}")
+    _events.info(f"✅ Successful: {successful}")
+    _events.info(f"❌ Failed: {failed}")
     
     if successful > 0:
-        print(f"\n📁 Output directory: {Path(args.output).absolute()}")
-        print("\n✅ Successfully processed:")
+        _events.info(f"\n📁 Output directory: {Path(args.output).absolute()}")
+        _events.info("\n✅ Successfully processed:")
         for url, path in results:
             if path:
-                print(f"   • {path.name}")
+                _events.info(f"   • {path.name}")
+    
+    metrics_summary = extractor.metrics.write_summary()
+    if metrics_summary['articles']:
+        _events.info("\n⏱️  Stage timings:")
+        for line in extractor.metrics.summary_lines(metrics_summary):
+            _events.info(f"   {line}")
+        if args.metrics:
+            _events.info(f"   Per-article metrics: {args.metrics}")
+    if extractor.token_budget is not None:
+        _events.info(f"\n💸 Token budget: {extractor.token_budget.summary()}")
+    
+    if tracer is not None:
+        tracer.flush()
+        _events.info(f"\n🧵 {tracer.exported_traces} trace(s) written to {args.trace} (OTLP/JSON)")
+    
+    if extractor.profiler is not None:
+        profile_dir = Path(args.output) / 'profile'
+        extractor.profiler.write(profile_dir)
+        _events.info(f"\n🔬 Stage profiles: {extractor.profiler.summary()}")
+        _events.info(f"   Written to {profile_dir} (stages.folded: flamegraph.pl / speedscope)")
+    
+    if extractor.use_gemini and extractor.vision_prompt_stats['calls']:
+        _events.info(f"\n🧾 Vision prompt reuse: {extractor.vision_prompt_summary()}")
+        extractor.release_vision_cache()
+    
+    if fixture_archive is not None:
+        _events.info(f"\n📼 {fixture_archive.summary()}")
+    
+    extractor.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Per-Article Metrics
+One structured record per processed article: stage durations (fetch, dynamic check, browser
+render, metadata, extraction, image download, vision, conversion, write), byte sizes, image
+counts and the LLM calls, tokens, estimated cost and cache hits it caused. Records are appended
+to a JSONL file as articles finish; the batch ends with a percentile summary of the stage
+durations and token totals per call type and per domain.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+try:
+    from .tracing import span
+except ImportError:
+    from tracing import span
+
+# Pipeline stages in the order they run (image_download is summed over concurrent downloads)
+STAGES = ('fetch', 'dynamic_check', 'browser_render', 'metadata', 'extraction', 'image_extraction',
+          'image_download', 'vision', 'conversion', 'write')
+
+SUMMARY_PERCENTILES = (50, 90, 99)
+
+LLM_COUNTERS = ('calls', 'cache_hits', 'prompt_tokens', 'output_tokens', 'cached_tokens', 'cost_usd')
+
+
+def percentile(values: Iterable[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile (None for no values)"""
+    samples = sorted(values)
+    if not samples:
+        return None
+    index = min(len(samples) - 1, int(len(samples) * pct / 100))
+    return samples[index]
+
+
+def _add_usage(totals: Dict[str, Any], usage: Dict[str, Any]):
+    for name in LLM_COUNTERS:
+        totals[name] = totals.get(name, 0) + usage.get(name, 0)
+    totals['cost_usd'] = round(totals['cost_usd'], 6)
+
+
+def usage_delta(before: Dict[str, Dict[str, int]], after: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, int]]:
+    """Per call type LLM usage between two LLMService.usage snapshots (call types without activity dropped)"""
+    delta = {}
+    for call_type, stats in after.items():
+        previous = before.get(call_type, {})
+        changes = {name: stats.get(name, 0) - previous.get(name, 0) for name in LLM_COUNTERS}
+        changes['cost_usd'] = round(changes['cost_usd'], 6)
+        if any(changes.values()):
+            delta[call_type] = changes
+    return delta
+
+
+class ArticleMetrics:
+    """
+    Measurements for one article; stage times and counters may be added from worker threads.
+    Every stage is also a trace span, and with a StageProfiler (--profile) profiled under its name.
+    """
+
+    def __init__(self, url: str, profiler=None):
+        self.url = url
+        self.profiler = profiler
+        domain = urlparse(url).netloc.lower()
+        self.domain = domain[4:] if domain.startswith('www.') else domain
+        self.started_at = datetime.now().isoformat()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stages: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.values: Dict[str, Any] = {}
+        self.llm_usage: Dict[str, Dict[str, int]] = {}
+        self.status = 'running'
+        self.error: Optional[str] = None
+        self.total_s: Optional[float] = None
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block of the pipeline (repeated stages accumulate)"""
+        start = time.perf_counter()
+        try:
+            with span(name, **{'pipeline.stage': name}):
+                if self.profiler is None:
+                    yield
+                else:
+                    with self.profiler.stage(name):
+                        yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + amount
+
+    def set(self, **values):
+        with self._lock:
+            self.values.update(values)
+
+    def finish(self, status: str, error: Optional[Exception] = None, llm_usage=None):
+        """Close the record: 'success' or 'failed', with the LLM usage the article caused"""
+        self.total_s = time.perf_counter() - self._start
+        self.status = status
+        self.error = str(error)[:300] if error is not None else None
+        self.llm_usage = llm_usage or {}
+
+    def llm_totals(self) -> Dict[str, Any]:
+        """LLM counters summed over call types"""
+        totals = {name: 0 for name in LLM_COUNTERS}
+        for stats in self.llm_usage.values():
+            _add_usage(totals, stats)
+        return totals
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'type': 'article',
+                'url': self.url,
+                'domain': self.domain,
+                'started_at': self.started_at,
+                'status': self.status,
+                'error': self.error,
+                'total_s': round(self.total_s, 4) if self.total_s is not None else None,
+                'stages': {name: round(self.stages[name], 4) for name in STAGES if name in self.stages},
+                **self.values,
+                **self.counts,
+                'llm': self.llm_totals(),
+                'llm_by_call_type': self.llm_usage,
+            }
+
+
+class MetricsRecorder:
+    """
+    Collects the article records of a run and writes them as JSONL (metrics_file=None keeps them
+    in memory). With a metrics registry, every record also feeds the live article metrics.
+    """
+
+    def __init__(self, metrics_file=None, registry=None):
+        self.metrics_file = Path(metrics_file) if metrics_file else None
+        self.records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        if self.metrics_file:
+            self.metrics_file.parent.mkdir(parents=True, exist_ok=True)
+
+        self.registry = registry
+        if registry is not None:
+            self._articles_metric = registry.counter('articles', 'Processed articles by status', ('status',))
+            self._article_seconds_metric = registry.histogram('article_seconds', 'End-to-end article latency')
+            self._stage_seconds_metric = registry.histogram('stage_seconds', 'Pipeline stage latency', ('stage',))
+            self._images_metric = registry.counter('images', 'Article images by outcome', ('outcome',))
+            self._image_cache_metric = registry.counter('image_cache_hits',
+                                                        'Image downloads skipped by the permanent failure cache')
+
+    def limit_records(self, max_records: int):
+        """Keep only the latest records in memory (long-running processes); the JSONL file keeps all"""
+        with self._lock:
+            self.records = deque(self.records, maxlen=max_records)
+
+    def _export(self, record: Dict[str, Any]):
+        if self.registry is None:
+            return
+        self._articles_metric.inc(status=record['status'])
+        if record['total_s'] is not None:
+            self._article_seconds_metric.observe(record['total_s'])
+        for stage, seconds in record['stages'].items():
+            self._stage_seconds_metric.observe(seconds, stage=stage)
+        for outcome in ('found', 'local', 'deferred', 'described', 'downloaded'):
+            if record.get(f'images_{outcome}'):
+                self._images_metric.inc(record[f'images_{outcome}'], outcome=outcome)
+        if record.get('image_cache_hits'):
+            self._image_cache_metric.inc(record['image_cache_hits'])
+
+    def _append(self, record: Dict[str, Any]):
+        if not self.metrics_file:
+            return
+        with open(self.metrics_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def record(self, metrics: ArticleMetrics) -> Dict[str, Any]:
+        """Store a finished article and append it to the metrics file"""
+        record = metrics.to_dict()
+        with self._lock:
+            self.records.append(record)
+            self._append(record)
+        self._export(record)
+        return record
+
+    def summary(self) -> Dict[str, Any]:
+        """Batch summary: article counts, stage percentiles (seconds) and LLM totals"""
+        with self._lock:
+            records = list(self.records)
+
+        stages = {}
+        for name in ('total',) + STAGES:
+            values = [r['total_s'] if name == 'total' else r['stages'].get(name) for r in records]
+            values = [v for v in values if v is not None]
+            if not values:
+                continue
+            stages[name] = {'count': len(values), **{f"p{pct}": round(percentile(values, pct), 4)
+                                                     for pct in SUMMARY_PERCENTILES}, 'max': round(max(values), 4)}
+
+        llm_totals = {name: 0 for name in LLM_COUNTERS}
+        by_call_type, by_domain = {}, {}
+        for r in records:
+            _add_usage(llm_totals, r['llm'])
+            domain = by_domain.setdefault(r['domain'], {'articles': 0, **{name: 0 for name in LLM_COUNTERS}})
+            domain['articles'] += 1
+            _add_usage(domain, r['llm'])
+            for call_type, usage in r.get('llm_by_call_type', {}).items():
+                _add_usage(by_call_type.setdefault(call_type, {name: 0 for name in LLM_COUNTERS}), usage)
+
+        return {
+            'type': 'batch_summary',
+            'articles': len(records),
+            'successful': sum(1 for r in records if r['status'] == 'success'),
+            'failed': sum(1 for r in records if r['status'] != 'success'),
+            'stages': stages,
+            'llm': llm_totals,
+            'llm_by_call_type': dict(sorted(by_call_type.items())),
+            'llm_by_domain': dict(sorted(by_domain.items())),
+            'images_found': sum(r.get('images_found', 0) for r in records),
+            'images_described': sum(r.get('images_described', 0) for r in records),
+        }
+
+    def write_summary(self) -> Dict[str, Any]:
+        """Append the batch summary to the metrics file and return it"""
+        summary = self.summary()
+        with self._lock:
+            self._append(summary)
+        return summary
+
+    def summary_lines(self, summary: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Human-readable stage percentile table"""
+        summary = summary or self.summary()
+        lines = [f"{'stage':<18}{'n':>5}" + ''.join(f"{'p' + str(pct):>10}" for pct in SUMMARY_PERCENTILES)
+                 + f"{'max':>10}"]
+        for name, stats in summary['stages'].items():
+            lines.append(f"{name:<18}{stats['count']:>5}"
+                         + ''.join(f"{stats['p' + str(pct)]:>9.2f}s" for pct in SUMMARY_PERCENTILES)
+                         + f"{stats['max']:>9.2f}s")
+        llm = summary['llm']
+        lines.append(f"LLM: {llm['calls']} calls ({llm['cache_hits']} cache hits), "
+                     f"{llm['prompt_tokens']:,} in / {llm['output_tokens']:,} out tokens "
+                     f"({llm['cached_tokens']:,} cached), ~${llm['cost_usd']:.4f}")
+        for label, groups in (('call type', summary.get('llm_by_call_type', {})),
+                              ('domain', summary.get('llm_by_domain', {}))):
+            for name, usage in sorted(groups.items(), key=lambda item: -item[1]['prompt_tokens']):
+                if usage['calls']:
+                    lines.append(f"   {label} {name}: {usage['calls']} calls, {usage['prompt_tokens']:,} in / "
+                                 f"{usage['output_tokens']:,} out tokens, ~${usage['cost_usd']:.4f}")
+        return lines
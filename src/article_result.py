@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Article Results
+What the pipeline returns for one article: metadata, the Markdown document, the text that
+replaced each image and the article's metrics record, held in memory as read-only containers.
+Writing the Markdown file is one sink among others: a sink receives the finished document and
+returns where it went, so callers that only need the data never touch the disk.
+"""
+
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+
+def freeze(value):
+    """Read-only copy: dicts become mappingproxies and lists tuples, recursively"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Plain dicts and lists again (for JSON)"""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    if isinstance(value, Path):
+        return str(value)
+    return value
+
+
+@dataclass(frozen=True)
+class ImageResult:
+    """One article image and the description that replaced it in the Markdown"""
+
+    src: str
+    position: int
+    alt: str = ''
+    title: str = ''
+    caption: Optional[str] = None
+    # Vision description or text read from an SVG; None when the Markdown uses the context fallback
+    description: Optional[str] = None
+    # 'vision', 'svg' or 'context'
+    source: str = 'context'
+
+
+@dataclass(frozen=True)
+class ArticleDocument:
+    """The extracted article, as handed to the sinks"""
+
+    url: str
+    metadata: Mapping[str, Any]
+    markdown: str
+    images: Tuple[ImageResult, ...] = ()
+
+    def __post_init__(self):
+        object.__setattr__(self, 'metadata', freeze(self.metadata))
+        object.__setattr__(self, 'images', tuple(self.images))
+
+    @property
+    def title(self) -> str:
+        return self.metadata.get('title') or 'article'
+
+
+@dataclass(frozen=True)
+class ArticleResult:
+    """
+    Outcome of one article. status is 'success' or 'failed' (then error is set and there is no
+    document); metrics is the article's metrics record and outputs maps sink names to what they wrote.
+    """
+
+    url: str
+    status: str
+    document: Optional[ArticleDocument] = None
+    metrics: Mapping[str, Any] = field(default_factory=dict)
+    outputs: Mapping[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def __post_init__(self):
+        object.__setattr__(self, 'metrics', freeze(self.metrics))
+        object.__setattr__(self, 'outputs', freeze(self.outputs))
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 'success'
+
+    @property
+    def metadata(self) -> Mapping[str, Any]:
+        return self.document.metadata if self.document else MappingProxyType({})
+
+    @property
+    def markdown(self) -> Optional[str]:
+        return self.document.markdown if self.document else None
+
+    @property
+    def images(self) -> Tuple[ImageResult, ...]:
+        return self.document.images if self.document else ()
+
+    @property
+    def output_path(self) -> Optional[Path]:
+        """The Markdown file, when a MarkdownFileSink ran"""
+        return self.outputs.get(MarkdownFileSink.name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'url': self.url,
+            'status': self.status,
+            'error': self.error,
+            'metadata': thaw(self.metadata),
+            'markdown': self.markdown,
+            'images': [asdict(image) for image in self.images],
+            'metrics': thaw(self.metrics),
+            'outputs': thaw(self.outputs),
+        }
+
+
+def markdown_filename(title: str) -> str:
+    """File name for an article title (word characters only, at most 100 before .md)"""
+    filename = re.sub(r'[^\w\s-]', '', title)
+    filename = re.sub(r'[-\s]+', '_', filename)
+    return filename[:100] + '.md'
+
+
+class ResultSink:
+    """Receives every finished document; write() returns what it produced (stored under name)"""
+
+    name = 'sink'
+
+    def write(self, document: ArticleDocument) -> Any:
+        raise NotImplementedError
+
+
+class MarkdownFileSink(ResultSink):
+    """Writes <output_dir>/<title>.md (the CLI's output); the directory is created on first write"""
+
+    name = 'markdown_file'
+
+    def __init__(self, output_dir):
+        self.output_dir = Path(output_dir)
+
+    def write(self, document: ArticleDocument) -> Path:
+        return self.write_text(document.title, document.markdown)
+
+    def write_text(self, title: str, markdown: str) -> Path:
+        """Save atomically, so a checkpoint is never read half-written"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        output_path = self.output_dir / markdown_filename(title)
+        tmp_path = output_path.with_suffix('.md.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(markdown)
+        tmp_path.replace(output_path)
+        return output_path
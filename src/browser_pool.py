@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Browser Pool
+Keeps one headless Chromium running between renders for long-lived processes (service mode):
+each render opens a fresh browser context and page instead of launching a new browser.
+Playwright's sync API is bound to the thread that started it, so renders from any other
+thread fall back to a one-shot browser.
+"""
+
+import threading
+from typing import Optional, Tuple
+
+try:
+    from . import lazy_imports
+    from .events import emitter
+except ImportError:
+    import lazy_imports
+    from events import emitter
+
+_events = emitter('browser_pool')
+
+# Renders before the browser is restarted (bounds memory growth of a long-lived Chromium)
+DEFAULT_MAX_RENDERS = 200
+
+
+class BrowserPool:
+    """A warm Chromium owned by the first thread that renders with it"""
+
+    def __init__(self, max_renders: int = DEFAULT_MAX_RENDERS, fallback=None):
+        self.max_renders = max_renders
+        # One-shot renderer for other threads: (url, timeout) -> (success, html, error)
+        self.fallback = fallback
+        self._owner: Optional[int] = None
+        self._playwright = None
+        self._browser = None
+        self._browser_renders = 0
+        self.stats = {'renders': 0, 'launches': 0, 'fallbacks': 0}
+
+    def _ensure_browser(self):
+        if self._browser is not None and self._browser_renders >= self.max_renders:
+            self._close_browser()
+        if self._browser is None:
+            if self._playwright is None:
+                self._playwright = lazy_imports.sync_playwright().start()
+            self._browser = self._playwright.chromium.launch(headless=True)
+            self._browser_renders = 0
+            self.stats['launches'] += 1
+            _events.info("   🌐 Launched pooled headless browser")
+        return self._browser
+
+    def fetch(self, url: str, timeout: int = 30000) -> Tuple[bool, Optional[str], Optional[str]]:
+        """Render url. Returns (success, html_content, error_message) like SiteRegistry.fetch_with_browser"""
+        if self._owner is None:
+            self._owner = threading.get_ident()
+        if threading.get_ident() != self._owner:
+            self.stats['fallbacks'] += 1
+            if self.fallback is None:
+                return False, None, "Browser pool is owned by another thread"
+            return self.fallback(url, timeout)
+
+        try:
+            browser = self._ensure_browser()
+            context = browser.new_context()
+            try:
+                page = context.new_page()
+                _events.info("   📄 Loading page with JavaScript...")
+                page.goto(url, timeout=timeout, wait_until='networkidle')
+                # Wait a bit more for any async content
+                page.wait_for_timeout(2000)
+                html_content = page.content()
+            finally:
+                context.close()
+            self._browser_renders += 1
+            self.stats['renders'] += 1
+            _events.info(f"   ✅ Fetched {len(html_content)} bytes (browser-rendered, pooled)")
+            return True, html_content, None
+        except Exception as e:
+            # A crashed browser is relaunched on the next render
+            self._close_browser()
+            return False, None, f"Browser fetch failed: {str(e)}"
+
+    def _close_browser(self):
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+
+    def close(self):
+        """Close the browser and Playwright (from the owner thread)"""
+        self._close_browser()
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
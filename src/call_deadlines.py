@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Per-Call Deadlines and Hedged Requests
+Every Gemini call runs under an explicit deadline (per call type, from the model routes).
+Optionally, once a call is slower than a latency percentile of its call type, a duplicate
+request is sent and whichever answers first wins.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from .llm_errors import ServerTimeoutError
+    from . import lazy_imports
+except ImportError:
+    from llm_errors import ServerTimeoutError
+    import lazy_imports
+
+# Seconds, for call types whose route sets no 'timeout'
+DEFAULT_CALL_TIMEOUT = 120.0
+
+# Hedging only starts once a call type has this many latency samples
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+
+class DeadlineCaller:
+    """Runs calls on a dedicated pool with a wall-clock deadline and optional hedging"""
+
+    def __init__(self, router=None, hedge_percentile: Optional[float] = None,
+                 default_timeout: float = DEFAULT_CALL_TIMEOUT, max_workers: int = 32, logger=None,
+                 slots: Optional[threading.Semaphore] = None,
+                 on_late_answer: Optional[Callable[..., None]] = None):
+        self.router = router
+        self.hedge_percentile = hedge_percentile
+        # Concurrency limit (LLMService's slots): every request holds a slot until the API answers,
+        # also after its deadline passed or the other request of a hedged pair won. A hedged
+        # request is skipped rather than waiting for a slot
+        self.slots = slots
+        # Called as on_late_answer(call_type, result, **kwargs) for answers nobody waits for any
+        # more (the losing request of a hedged pair, a call abandoned at its deadline): they were
+        # still billed
+        self.on_late_answer = on_late_answer
+        self.default_timeout = default_timeout
+        self.logger = logger or logging.getLogger(__name__)
+
+        # Own pool: a call abandoned at its deadline never blocks the default executor
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gemini-call')
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, deque] = {}
+        self.stats = {'calls': 0, 'timeouts': 0, 'hedges': 0, 'hedge_wins': 0, 'hedges_skipped': 0}
+
+    def _route(self, call_type: str) -> Dict[str, Any]:
+        return self.router.get_route(call_type) if self.router else {}
+
+    def timeout_for(self, call_type: str) -> float:
+        """Deadline in seconds for one call of this type"""
+        return float(self._route(call_type).get('timeout') or self.default_timeout)
+
+    def hedge_delay(self, call_type: str) -> Optional[float]:
+        """Seconds after which a hedged duplicate is sent, or None (hedging off / not enough samples)"""
+        if not self.hedge_percentile or not self._route(call_type).get('hedge'):
+            return None
+        with self._lock:
+            samples = sorted(self._latencies.get(call_type, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * self.hedge_percentile / 100))
+        return samples[index]
+
+    def _record_latency(self, call_type: str, seconds: float):
+        with self._lock:
+            self._latencies.setdefault(call_type, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def _with_http_timeout(self, kwargs: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """Copy a GenerateContentConfig with a matching HTTP timeout (milliseconds)"""
+        config = kwargs.get('config')
+        # Optional: per-request HTTP timeout so an abandoned call also frees its connection
+        # (a config with model_copy is a google-genai pydantic model, so its types are importable)
+        if config is None or not hasattr(config, 'model_copy'):
+            return kwargs
+        if getattr(config, 'http_options', None) is not None:
+            return kwargs
+        http_options = lazy_imports.genai_types().HttpOptions(timeout=int(timeout * 1000))
+        return {**kwargs, 'config': config.model_copy(update={'http_options': http_options})}
+
+    def call(self, call_type: str, func: Callable, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) under the call type's deadline.
+        Waits for a concurrency slot first. Raises ServerTimeoutError when no attempt answered
+        in time; the first successful answer wins, otherwise the last error is raised.
+        """
+        timeout = self.timeout_for(call_type)
+        kwargs = self._with_http_timeout(kwargs, timeout)
+        hedge_after = self.hedge_delay(call_type)
+
+        if self.slots is not None:
+            self.slots.acquire()
+        start = time.monotonic()
+        deadline = start + timeout
+        futures = {self._submit(func, *args, **kwargs): start}
+        with self._lock:
+            self.stats['calls'] += 1
+        try:
+            return self._await(call_type, futures, start, deadline, hedge_after, func, *args, **kwargs)
+        finally:
+            for future in futures:
+                future.add_done_callback(lambda done: self._late_answer(call_type, done, kwargs))
+
+    def _await(self, call_type: str, futures: Dict[Future, float], start: float, deadline: float,
+               hedge_after: Optional[float], func: Callable, *args, **kwargs):
+        """Wait for the first answer; futures left in the dict afterwards are abandoned"""
+        timeout = deadline - start
+        hedged = False
+        last_error = None
+        while futures:
+            wait_until = deadline
+            if hedge_after is not None and not hedged:
+                wait_until = min(deadline, start + hedge_after)
+            done, _ = wait(list(futures), timeout=max(0.0, wait_until - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+
+            for future in done:
+                started = futures.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                self._record_latency(call_type, time.monotonic() - started)
+                if started != start:
+                    with self._lock:
+                        self.stats['hedge_wins'] += 1
+                for other in futures:
+                    other.cancel()
+                return result
+
+            if done:
+                continue
+            if hedge_after is not None and not hedged and time.monotonic() < deadline:
+                # Slower than the percentile: send a duplicate, first answer wins
+                hedged = True
+                if self.slots is not None and not self.slots.acquire(blocking=False):
+                    with self._lock:
+                        self.stats['hedges_skipped'] += 1
+                    self.logger.info(f"{call_type}: no answer after {hedge_after:.1f}s, no free slot for a hedged request")
+                    continue
+                with self._lock:
+                    self.stats['hedges'] += 1
+                self.logger.info(f"{call_type}: no answer after {hedge_after:.1f}s, sending hedged request")
+                futures[self._submit(func, *args, **kwargs)] = time.monotonic()
+                continue
+            break
+
+        if futures:
+            with self._lock:
+                self.stats['timeouts'] += 1
+            self.logger.warning(f"{call_type}: no answer within {timeout:.0f}s deadline")
+            raise ServerTimeoutError(f"{call_type} call exceeded its {timeout:.0f}s deadline")
+        raise last_error
+
+    def _submit(self, func: Callable, *args, **kwargs) -> Future:
+        """Start one request on the pool; the slot the caller acquired is freed when it finishes"""
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except BaseException:
+            if self.slots is not None:
+                self.slots.release()
+            raise
+        if self.slots is not None:
+            future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def _late_answer(self, call_type: str, future: Future, kwargs: Dict[str, Any]):
+        """Hand an abandoned request's answer to on_late_answer (errors and cancellations are dropped)"""
+        if self.on_late_answer is None or future.cancelled() or future.exception() is not None:
+            return
+        try:
+            self.on_late_answer(call_type, future.result(), **kwargs)
+        except Exception as e:
+            self.logger.warning(f"{call_type}: could not record a late answer: {e}")
+
+    def summary(self) -> str:
+        """One-line summary of deadlines and hedging"""
+        with self._lock:
+            stats = dict(self.stats)
+        return (f"{stats['calls']} calls, {stats['timeouts']} deadline timeouts, "
+                f"{stats['hedges']} hedged ({stats['hedge_wins']} won by the hedge, "
+                f"{stats['hedges_skipped']} skipped at the concurrency limit)")
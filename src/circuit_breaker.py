@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Circuit Breaker for Gemini API calls
+Shared by every call site so a degraded API fails fast instead of slowly retrying
+"""
+
+import logging
+import threading
+import time
+
+try:
+    from .llm_errors import classify_llm_error
+    from .events import emitter
+except ImportError:
+    from llm_errors import classify_llm_error
+    from events import emitter
+
+_events = emitter('circuit_breaker')
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker:
+    - closed: calls go through, consecutive failures are counted
+    - open: calls are rejected immediately for `reset_timeout` seconds
+    - half-open: one probe call is let through; success closes, failure re-opens
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, name='gemini', logger=None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.stats = {'rejected': 0, 'opened': 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    @property
+    def is_open(self):
+        """True while calls would be rejected (open and not yet due for a probe)"""
+        with self._lock:
+            if self._state == self.OPEN:
+                return time.monotonic() - self._opened_at < self.reset_timeout
+            if self._state == self.HALF_OPEN:
+                return self._probe_in_flight
+            return False
+
+    def allow_request(self):
+        """Decide whether a call may go out now (may move open -> half-open)"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self.stats['rejected'] += 1
+                    return False
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+                self.logger.info(f"Circuit '{self.name}' half-open, probing API")
+
+            # Half-open: a single probe at a time
+            if self._probe_in_flight:
+                self.stats['rejected'] += 1
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                self.logger.info(f"Circuit '{self.name}' closed, API recovered")
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            self._probe_in_flight = False
+
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.stats['opened'] += 1
+                    self.logger.warning(
+                        f"Circuit '{self.name}' opened after {self._consecutive_failures} consecutive failures; "
+                        f"failing fast for {self.reset_timeout:.0f}s"
+                    )
+                    _events.warning(f"   ⛔ Gemini API degraded - failing fast for {self.reset_timeout:.0f}s")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def call(self, func, *args, **kwargs):
+        """
+        Run `func` under the breaker. Raises CircuitOpenError without calling when open.
+        Retryable and fatal errors (bad key, unknown model) count as failures - a bad
+        input or a refusal means the API itself is answering.
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open - Gemini API degraded")
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            error = classify_llm_error(e)
+            if error.retryable or error.fatal:
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        self.record_success()
+        return result
+
+
+# Shared breaker for all Gemini call sites in this process
+_shared_breaker = None
+_shared_lock = threading.Lock()
+
+
+def get_circuit_breaker():
+    """Return the process-wide Gemini circuit breaker"""
+    global _shared_breaker
+    with _shared_lock:
+        if _shared_breaker is None:
+            _shared_breaker = CircuitBreaker()
+        return _shared_breaker
+
+
+def configure_circuit_breaker(failure_threshold=None, reset_timeout=None):
+    """Adjust the shared breaker (e.g. from CLI options)"""
+    breaker = get_circuit_breaker()
+    if failure_threshold is not None:
+        breaker.failure_threshold = failure_threshold
+    if reset_timeout is not None:
+        breaker.reset_timeout = reset_timeout
+    return breaker
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Event Stream
+Progress reporting through one bus: components emit typed events and the selected renderer
+decides what reaches the terminal - human TTY lines, JSON lines for log collectors, or nothing
+(--quiet). Each event is written whole under one lock, so parallel work never interleaves
+mid-message; events below every renderer's level are dropped before they are built.
+Log records go through a queue and are written by a single listener thread.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+SILENT = logging.CRITICAL + 10
+
+LEVEL_NAMES = {DEBUG: 'debug', INFO: 'info', WARNING: 'warning', ERROR: 'error'}
+
+# Width of the rule around dumped prompts and responses
+RULE = '=' * 80
+
+
+@dataclass
+class Event:
+    """Base of every event: subclasses define fields, a kind and a TTY rendering"""
+
+    kind = 'event'
+    level = INFO
+
+    def text(self) -> Optional[str]:
+        """Human rendering (None = nothing to show on a terminal)"""
+        return None
+
+    def to_dict(self) -> Dict:
+        return {**asdict(self), 'event': self.kind, 'level': LEVEL_NAMES.get(self.level, str(self.level))}
+
+
+@dataclass
+class Message(Event):
+    """A progress line (the former print output)"""
+
+    message: str
+    component: str = ''
+    level: int = INFO
+    kind = 'message'
+
+    def text(self) -> Optional[str]:
+        return self.message
+
+
+@dataclass
+class LLMExchange(Event):
+    """Prompt/response detail of one LLM call (debug only: shown with --verbose)"""
+
+    component: str
+    purpose: str
+    prompt_chars: int = 0
+    response: str = ''
+    kind = 'llm_exchange'
+    level = DEBUG
+
+    def text(self) -> Optional[str]:
+        header = f"\n📥 LLM RESPONSE ({self.purpose}): {self.prompt_chars:,} prompt chars, {len(self.response):,} response chars"
+        return f"{header}\n{RULE}\n{self.response}\n{RULE}"
+
+
+@dataclass
+class Detail(Event):
+    """Large diagnostic payload (prompts, parsed JSON, YAML, HTML samples; debug only)"""
+
+    component: str
+    title: str
+    body: str
+    kind = 'detail'
+    level = DEBUG
+
+    def text(self) -> Optional[str]:
+        return f"\n🔍 {self.title}:\n{RULE}\n{self.body}\n{RULE}"
+
+
+@dataclass
+class ArticleStarted(Event):
+    url: str
+    index: int = 1
+    total: int = 1
+    kind = 'article_started'
+
+    def text(self) -> Optional[str]:
+        return f"\n[{self.index}/{self.total}] Processing: {self.url}\n" + '-' * 60
+
+
+@dataclass
+class ArticleFinished(Event):
+    url: str
+    status: str
+    output: Optional[str] = None
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+    kind = 'article_finished'
+
+
+class TTYRenderer:
+    """Human-readable lines (the classic console output); debug events only when verbose"""
+
+    def __init__(self, stream=None, verbose: bool = False):
+        self.stream = stream
+        self.level = DEBUG if verbose else INFO
+
+    def render(self, event: Event):
+        text = event.text()
+        if text is None:
+            return
+        stream = self.stream or sys.stdout
+        stream.write(text + '\n')
+        stream.flush()
+
+
+class JSONLRenderer:
+    """One JSON object per event, for log collectors and tooling"""
+
+    def __init__(self, stream=None, verbose: bool = False):
+        self.stream = stream
+        self.level = DEBUG if verbose else INFO
+
+    def render(self, event: Event):
+        record = {'ts': round(time.time(), 3), **event.to_dict()}
+        stream = self.stream or sys.stdout
+        stream.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        stream.flush()
+
+
+class SilentRenderer:
+    """Renders nothing (--quiet); the bus then skips building events altogether"""
+
+    level = SILENT
+
+    def __init__(self, stream=None, verbose: bool = False):
+        pass
+
+    def render(self, event: Event):
+        pass
+
+
+RENDERERS = {'tty': TTYRenderer, 'jsonl': JSONLRenderer, 'silent': SilentRenderer}
+
+
+class EventBus:
+    """Delivers events to its renderers, one event at a time"""
+
+    def __init__(self, *renderers):
+        self._lock = threading.Lock()
+        self._renderers = []
+        self.level = SILENT
+        self.set_renderers(*renderers)
+
+    def set_renderers(self, *renderers):
+        with self._lock:
+            self._renderers = list(renderers)
+            self.level = min((r.level for r in self._renderers), default=SILENT)
+
+    def enabled(self, level: int) -> bool:
+        """True when some renderer shows events of this level (guard for expensive messages)"""
+        return level >= self.level
+
+    def emit(self, event: Event):
+        if event.level < self.level:
+            return
+        with self._lock:
+            for renderer in self._renderers:
+                if event.level >= renderer.level:
+                    renderer.render(event)
+
+
+class Emitter:
+    """Shortcuts for one component: messages go to the process-wide bus"""
+
+    def __init__(self, component: str):
+        self.component = component
+
+    def enabled(self, level: int) -> bool:
+        return level >= _bus.level
+
+    def emit(self, event: Event):
+        _bus.emit(event)
+
+    def _message(self, level: int, message: str):
+        if level >= _bus.level:
+            _bus.emit(Message(message, self.component, level))
+
+    def debug(self, message: str):
+        self._message(DEBUG, message)
+
+    def info(self, message: str):
+        self._message(INFO, message)
+
+    def warning(self, message: str):
+        self._message(WARNING, message)
+
+    def error(self, message: str):
+        self._message(ERROR, message)
+
+    def detail(self, title: str, body):
+        """Debug dump of a large payload; body may be a callable so it is only built when shown"""
+        if DEBUG >= _bus.level:
+            _bus.emit(Detail(self.component, title, body() if callable(body) else str(body)))
+
+    def llm_exchange(self, purpose: str, prompt_chars: int, response: str):
+        if DEBUG >= _bus.level:
+            _bus.emit(LLMExchange(self.component, purpose, prompt_chars, response or ''))
+
+
+# Process-wide bus; human output until configure_events() selects another renderer
+_bus = EventBus(TTYRenderer())
+
+
+def get_event_bus() -> EventBus:
+    return _bus
+
+
+def configure_events(mode: str = 'tty', verbose: bool = False, stream=None) -> EventBus:
+    """Select the renderer of the process-wide bus: 'tty', 'jsonl' or 'silent'"""
+    if mode not in RENDERERS:
+        raise ValueError(f"Unknown event renderer {mode!r} (expected one of {', '.join(RENDERERS)})")
+    _bus.set_renderers(RENDERERS[mode](stream, verbose))
+    return _bus
+
+
+def emitter(component: str) -> Emitter:
+    return Emitter(component)
+
+
+# Queue-based logging: callers only enqueue, one listener thread formats and writes
+_listeners: Dict[str, QueueListener] = {}
+_listeners_lock = threading.Lock()
+
+
+def queue_logging(logger: logging.Logger, *handlers: logging.Handler) -> QueueListener:
+    """Route logger through a queue to handlers (replacing its previous handlers and listener)"""
+    stop_queue_logging(logger)
+    record_queue = queue.SimpleQueue()
+    logger.handlers.clear()
+    logger.addHandler(QueueHandler(record_queue))
+    listener = QueueListener(record_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    with _listeners_lock:
+        _listeners[logger.name] = listener
+    return listener
+
+
+def stop_queue_logging(logger: logging.Logger):
+    """Flush and close the logger's queue listener, if any"""
+    with _listeners_lock:
+        listener = _listeners.pop(logger.name, None)
+    if listener is None:
+        return
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+@atexit.register
+def _stop_all_listeners():
+    for name in list(_listeners):
+        stop_queue_logging(logging.getLogger(name))
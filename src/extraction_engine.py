@@ -6,8 +6,15 @@ Centralized logic for extracting article content from HTML using site-specific c
 
 import re
 import logging
-from typing import Optional, Dict, Any
-from bs4 import BeautifulSoup
+from typing import TYPE_CHECKING, Optional, Dict, Any
+
+try:
+    from .lazy_imports import parse_html
+except ImportError:
+    from lazy_imports import parse_html
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 
 
 class ExtractionEngine:
@@ -21,7 +28,7 @@ class ExtractionEngine:
         if not html_content:
             return html_content
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = parse_html(html_content)
         
         # Only remove script and style elements (keep everything else for now)
         for element in soup(['script', 'style', 'noscript']):
@@ -81,7 +88,7 @@ class ExtractionEngine:
     
     def _extract_with_selectors(self, html_content: str, config: Dict[str, Any]) -> Optional[str]:
         """Extract content using CSS selectors"""
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = parse_html(html_content)
         
         # Get article content configuration
         extraction = config.get('extraction', {})
@@ -137,7 +144,7 @@ class ExtractionEngine:
         
         return None
     
-    def _try_selector(self, soup: BeautifulSoup, selector: str) -> Optional[BeautifulSoup]:
+    def _try_selector(self, soup: 'BeautifulSoup', selector: str) -> Optional['BeautifulSoup']:
         """Safely try a CSS selector"""
         try:
             element = soup.select_one(selector)
@@ -151,7 +158,7 @@ class ExtractionEngine:
         
         return None
     
-    def _process_element(self, element: BeautifulSoup, article_config: Dict[str, Any]) -> Optional[str]:
+    def _process_element(self, element: 'BeautifulSoup', article_config: Dict[str, Any]) -> Optional[str]:
         """Process extracted element with exclusions and cleanup"""
         # Apply truncate_after first (if specified) - removes everything after a boundary selector
         element = self._apply_truncate_after(element, article_config)
@@ -171,7 +178,7 @@ class ExtractionEngine:
         
         return None
     
-    def _apply_truncate_after(self, element: BeautifulSoup, article_config: Dict[str, Any]) -> BeautifulSoup:
+    def _apply_truncate_after(self, element: 'BeautifulSoup', article_config: Dict[str, Any]) -> 'BeautifulSoup':
         """
         Truncate content after a specific selector (removes everything after that element).
         This is useful for removing content that comes after the article ends.
@@ -182,7 +189,7 @@ class ExtractionEngine:
             return element
         
         # Make a copy to avoid modifying original
-        element_copy = BeautifulSoup(str(element), 'html.parser')
+        element_copy = parse_html(str(element))
         
         try:
             # Find the boundary element
@@ -200,7 +207,7 @@ class ExtractionEngine:
         
         return element_copy
     
-    def _apply_exclusions(self, element: BeautifulSoup, article_config: Dict[str, Any]) -> BeautifulSoup:
+    def _apply_exclusions(self, element: 'BeautifulSoup', article_config: Dict[str, Any]) -> 'BeautifulSoup':
         """Remove excluded elements from content"""
         exclude_selectors = article_config.get('exclude_selectors', [])
         
@@ -208,7 +215,7 @@ class ExtractionEngine:
             return element
         
         # Make a copy to avoid modifying original
-        element_copy = BeautifulSoup(str(element), 'html.parser')
+        element_copy = parse_html(str(element))
         
         for exclude_selector in exclude_selectors:
             try:
@@ -258,7 +265,7 @@ class ExtractionEngine:
             r'(?i)View [Mm]ore(?:</[^>]+>){0,3}\s*$',  # "View More" near end
         ]
         
-        soup = BeautifulSoup(content, 'html.parser')
+        soup = parse_html(content)
         text = soup.get_text()
         
         # Find patterns that indicate > 2 "Read more" links (related articles)
@@ -325,7 +332,7 @@ class ExtractionEngine:
             return False
         
         # Check for substantial content indicators
-        soup = BeautifulSoup(content, 'html.parser')
+        soup = parse_html(content)
         h1_count = len(soup.find_all('h1'))
         h2_count = len(soup.find_all('h2'))
         p_count = len(soup.find_all('p'))
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Record/Replay Fixture Archive
+--record captures every fetched page, browser-rendered page, image and LLM exchange of a run;
+--replay runs the whole pipeline from that archive with no network.
+
+Archive layout (a directory):
+    index.json   url -> blob for pages, rendered pages and images (plus recorded image failures)
+    blobs/       gzip-compressed bytes named by SHA-256 (identical images are stored once)
+    llm.jsonl    LLM exchanges in the FakeBackend replay format
+    sites/       snapshot of the site configs the recording started from
+"""
+
+import gzip
+import hashlib
+import json
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+try:
+    from .llm_errors import (LLMCallError, NetworkTransientError, RateLimitError, ServerTimeoutError, EmptyResponseError,
+                             BadInputError, PermanentRefusalError)
+    from .llm_backends import FakeBackend, RecordingBackend
+except ImportError:
+    from llm_errors import (LLMCallError, NetworkTransientError, RateLimitError, ServerTimeoutError, EmptyResponseError,
+                            BadInputError, PermanentRefusalError)
+    from llm_backends import FakeBackend, RecordingBackend
+
+ARCHIVE_VERSION = 1
+
+# Recorded image failures are raised again as the same error class
+ERROR_CLASSES = {cls.category: cls for cls in (LLMCallError, NetworkTransientError, RateLimitError,
+                                               ServerTimeoutError, EmptyResponseError, BadInputError,
+                                               PermanentRefusalError)}
+
+
+class FixtureMissError(Exception):
+    """Replay asked for a page or image the archive never recorded"""
+
+
+class FixtureArchive:
+    """A record or replay session over one archive directory"""
+
+    def __init__(self, path, mode: str):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown fixture mode: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.blob_dir = self.path / 'blobs'
+        self.llm_log = self.path / 'llm.jsonl'
+        self._lock = threading.Lock()
+        self._scratch_dir = None
+        self.stats = {'pages': 0, 'rendered': 0, 'images': 0, 'misses': 0}
+
+        index_file = self.path / 'index.json'
+        if mode == 'replay' and not index_file.exists():
+            raise FileNotFoundError(f"No fixture archive at {self.path} (missing index.json)")
+        if index_file.exists():
+            self.index = json.loads(index_file.read_text(encoding='utf-8'))
+        else:
+            # Recording into a new archive (an existing one is extended)
+            self.index = {'version': ARCHIVE_VERSION, 'pages': {}, 'rendered': {}, 'images': {}}
+        if mode == 'record':
+            self.blob_dir.mkdir(parents=True, exist_ok=True)
+            self.index['recorded_at'] = datetime.now().isoformat()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == 'record'
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+
+    def _put_blob(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = self.blob_dir / f"{digest}.gz"
+        if not blob_path.exists():
+            tmp_path = blob_path.with_suffix('.tmp')
+            tmp_path.write_bytes(gzip.compress(data, compresslevel=6))
+            tmp_path.replace(blob_path)
+        return digest
+
+    def _get_blob(self, digest: str) -> bytes:
+        return gzip.decompress((self.blob_dir / f"{digest}.gz").read_bytes())
+
+    def _lookup(self, section: str, url: str):
+        with self._lock:
+            entry = self.index[section].get(url)
+            if entry is None:
+                self.stats['misses'] += 1
+                raise FixtureMissError(f"{url} is not in the fixture archive ({section})")
+            self.stats[section] += 1
+        return entry
+
+    # Pages fetched with curl
+
+    def record_page(self, url: str, html_content: str):
+        digest = self._put_blob(html_content.encode('utf-8'))
+        with self._lock:
+            self.index['pages'][url] = {'blob': digest}
+            self.stats['pages'] += 1
+
+    def page(self, url: str) -> str:
+        return self._get_blob(self._lookup('pages', url)['blob']).decode('utf-8')
+
+    # Browser-rendered pages (Playwright)
+
+    def record_rendered(self, url: str, success: bool, html_content: Optional[str], error: Optional[str]):
+        entry = {'success': success, 'error': error}
+        if success and html_content is not None:
+            entry['blob'] = self._put_blob(html_content.encode('utf-8'))
+        with self._lock:
+            self.index['rendered'][url] = entry
+            self.stats['rendered'] += 1
+
+    def rendered(self, url: str) -> Tuple[bool, Optional[str], Optional[str]]:
+        """(success, html_content, error) as SiteRegistry.fetch_with_browser returned it"""
+        try:
+            entry = self._lookup('rendered', url)
+        except FixtureMissError as e:
+            return False, None, str(e)
+        if not entry.get('blob'):
+            return False, None, entry.get('error')
+        return True, self._get_blob(entry['blob']).decode('utf-8'), None
+
+    # Images
+
+    def record_image(self, url: str, data: Optional[bytes] = None, error: Optional[LLMCallError] = None):
+        if error is not None:
+            entry = {'error': {'category': error.category, 'message': str(error)}}
+        else:
+            entry = {'blob': self._put_blob(data)}
+        with self._lock:
+            self.index['images'][url] = entry
+            self.stats['images'] += 1
+
+    def image(self, url: str) -> bytes:
+        """Recorded image bytes; a recorded download failure is raised again"""
+        entry = self._lookup('images', url)
+        if 'error' in entry:
+            error = entry['error']
+            raise ERROR_CLASSES.get(error['category'], LLMCallError)(error['message'])
+        return self._get_blob(entry['blob'])
+
+    # LLM exchanges
+
+    def recording_backend(self, backend):
+        """Wrap the live backend so every answer is appended to llm.jsonl"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        return RecordingBackend(backend, self.llm_log)
+
+    def replay_backend(self) -> FakeBackend:
+        """Offline backend answering from llm.jsonl (unrecorded prompts get well-formed defaults)"""
+        return FakeBackend(replay=str(self.llm_log) if self.llm_log.exists() else None, time_scale=0)
+
+    # Site configs
+
+    def site_config_dir(self, config_dir="config/sites") -> Path:
+        """
+        Recording snapshots config_dir into the archive and keeps using it; replay works on a
+        scratch copy of the snapshot so learned configs never touch the real directory.
+        """
+        snapshot = self.path / 'sites'
+        if self.recording:
+            if not snapshot.exists() and Path(config_dir).exists():
+                shutil.copytree(config_dir, snapshot)
+            return Path(config_dir)
+
+        scratch = self.scratch_dir / 'sites'
+        if not scratch.exists():
+            if snapshot.exists():
+                shutil.copytree(snapshot, scratch)
+            else:
+                scratch.mkdir(parents=True)
+        return scratch
+
+    @property
+    def scratch_dir(self) -> Path:
+        """Temporary directory for replay state (site configs, image failure cache)"""
+        if self._scratch_dir is None:
+            self._scratch_dir = Path(tempfile.mkdtemp(prefix='article_fixtures_'))
+        return self._scratch_dir
+
+    def save(self):
+        """Write index.json (recording only; atomic)"""
+        if not self.recording:
+            return
+        with self._lock:
+            payload = json.dumps(self.index, indent=1, sort_keys=True)
+        index_file = self.path / 'index.json'
+        tmp_path = index_file.with_suffix('.tmp')
+        tmp_path.write_text(payload, encoding='utf-8')
+        tmp_path.replace(index_file)
+
+    def summary(self) -> str:
+        """One-line summary of what was recorded or replayed"""
+        verb = 'Recorded' if self.recording else 'Replayed'
+        text = (f"{verb} {self.stats['pages']} pages, {self.stats['rendered']} rendered pages, "
+                f"{self.stats['images']} images")
+        if self.stats['misses']:
+            text += f" ({self.stats['misses']} not in archive)"
+        return text
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Image Budget
+Caps the Gemini vision calls per article and per batch run. Images are ranked by an
+importance score; the top ones get AI descriptions, the rest the context-based fallback.
+"""
+
+import math
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Score weights
+POSITION_WEIGHT = 1.0       # earlier in the body ranks higher
+SIZE_WEIGHT = 2.0           # declared size, relative to a typical content image
+FIGURE_WEIGHT = 0.5         # wrapped in <figure>
+CAPTION_WEIGHT = 1.5        # has a <figcaption>
+ALT_WEIGHT = 0.5            # meaningful alt text
+TEXT_DENSITY_WEIGHT = 1.0   # prose around the image (galleries have little)
+
+# Side length (sqrt of area) that counts as a full-size content image
+FULL_SIZE_SIDE = 600
+# Characters of surrounding text that count as dense prose
+DENSE_TEXT_CHARS = 800
+
+GENERIC_ALT_TEXT = {'', 'image', 'img', 'photo', 'picture'}
+
+
+def importance_score(img_data: Dict[str, Any], index: int, total: int) -> float:
+    """Importance of one image among `total` images of an article (higher is more important)"""
+    score = POSITION_WEIGHT * (1 - index / max(total, 1))
+
+    width, height = img_data.get('width'), img_data.get('height')
+    if width and height:
+        score += SIZE_WEIGHT * min(1.0, math.sqrt(width * height) / FULL_SIZE_SIDE)
+    else:
+        # Unknown size: neither rewarded nor punished
+        score += SIZE_WEIGHT * 0.5
+
+    if img_data.get('in_figure'):
+        score += FIGURE_WEIGHT
+    if img_data.get('caption'):
+        score += CAPTION_WEIGHT
+    if (img_data.get('alt') or '').strip().lower() not in GENERIC_ALT_TEXT:
+        score += ALT_WEIGHT
+
+    text_chars = len(img_data.get('context_before', '')) + len(img_data.get('context_after', ''))
+    score += TEXT_DENSITY_WEIGHT * min(1.0, text_chars / DENSE_TEXT_CHARS)
+    return score
+
+
+class ImageBudget:
+    """Per-article and per-batch caps on images sent to the vision model (None = unlimited)"""
+
+    def __init__(self, per_article: Optional[int] = None, per_batch: Optional[int] = None):
+        self.per_article = per_article
+        self.per_batch = per_batch
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def allocate(self, images: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Split an article's images into (selected, deferred), both in document order.
+        Selected images are charged against the batch budget.
+        """
+        with self._lock:
+            allowed = len(images)
+            if self.per_article is not None:
+                allowed = min(allowed, self.per_article)
+            if self.per_batch is not None:
+                allowed = min(allowed, max(0, self.per_batch - self.used))
+
+            if allowed >= len(images):
+                self.used += len(images)
+                return list(images), []
+
+            ranked = sorted(range(len(images)),
+                            key=lambda i: importance_score(images[i], i, len(images)), reverse=True)
+            chosen = set(ranked[:allowed])
+            self.used += allowed
+
+        selected = [img for i, img in enumerate(images) if i in chosen]
+        deferred = [img for i, img in enumerate(images) if i not in chosen]
+        return selected, deferred
+
+    def remaining(self) -> Optional[int]:
+        """Images left in the batch budget (None when unlimited)"""
+        if self.per_batch is None:
+            return None
+        with self._lock:
+            return max(0, self.per_batch - self.used)
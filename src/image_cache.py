@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Persistent Image Cache
+Remembers images that failed permanently (404, unreadable format, content refusal)
+so later runs never download or send them again
+"""
+
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+
+
+class ImageCache:
+    """JSON-backed per-URL image records shared across runs"""
+
+    def __init__(self, cache_file="cache/image_cache.json"):
+        self.cache_file = Path(cache_file)
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        if not self.cache_file.exists():
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save(self):
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_file.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, indent=2, ensure_ascii=False)
+        tmp_path.replace(self.cache_file)
+
+    def get_failure(self, url):
+        """Return the recorded permanent failure for an image URL, or None"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry and entry.get('status') == 'failed':
+                return entry
+            return None
+
+    def record_failure(self, url, category, reason):
+        """Record a permanent (non-retryable) failure for an image URL"""
+        with self._lock:
+            self._entries[url] = {
+                'status': 'failed',
+                'category': category,
+                'reason': str(reason)[:300],
+                'recorded_at': datetime.now().isoformat()
+            }
+            self._save()
+
+    def forget(self, url):
+        """Drop any record for an image URL"""
+        with self._lock:
+            if self._entries.pop(url, None) is not None:
+                self._save()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
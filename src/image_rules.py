@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Per-Site Image Rules
+Applies the `images` section of a site config (skip selectors, URL patterns, minimum
+dimensions, preferred variant width) before any download, and learns it from the
+SKIP / describe decisions the vision model made on earlier articles
+"""
+
+import logging
+import random
+import re
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+try:
+    from .lazy_imports import parse_html
+except ImportError:
+    from lazy_imports import parse_html
+
+# Evidence needed before a rule is promoted (only if the key was never described)
+EXACT_URL_MIN_SKIPS = 2     # same image skipped in two articles (site logo, sponsor badge)
+URL_PREFIX_MIN_SKIPS = 3    # three different images under one path (avatars, share icons)
+CLASS_MIN_SKIPS = 3         # three skipped images sharing a class token
+MIN_SKIP_ARTICLES = 2       # ...seen in at least this many articles
+
+# Folders that hold every upload of a period (/wp-content/uploads/2024/05/), not one kind of image
+UPLOAD_FOLDER_NAMES = {'uploads', 'upload', 'files', 'media', 'images', 'image', 'img', 'wp-content'}
+# Theme and editor layout classes shared by content images and chrome alike
+LAYOUT_CLASS_PATTERN = re.compile(
+    r'^(?:align(?:left|right|center|none)|size-[\w-]+|attachment-[\w-]+|wp-image|wp-post-image|'
+    r'img-fluid|img-responsive|responsive|lazy|lazyload(?:ed)?|loaded)$'
+)
+# Class tokens usable in an `img.<token>` selector without escaping (others are never learned)
+CSS_CLASS_PATTERN = re.compile(r'^-?[_a-zA-Z][\w-]*$', re.ASCII)
+
+# Share of rule-matched images still sent to vision, so a wrong rule collects
+# "describe" evidence and is demoted
+RULE_AUDIT_RATE = 0.05
+
+# Declared sizes above this are never learned as a minimum dimension
+MAX_LEARNED_MIN_DIMENSION = 150
+MIN_DIMENSION_SAMPLES = 3
+
+# Keep the evidence block in the site YAML bounded
+MAX_EVIDENCE_KEYS = 300
+
+
+def _attribute(img_tag: str, name: str) -> Optional[str]:
+    match = re.search(rf'\s{name}=["\']([^"\']*)["\']', img_tag, re.IGNORECASE)
+    return match.group(1) if match else None
+
+
+def _declared_dimension(img_tag: str, name: str) -> Optional[int]:
+    value = _attribute(img_tag, name)
+    if value and re.fullmatch(r'\s*\d+(?:px)?\s*', value):
+        return int(re.sub(r'\D', '', value))
+    return None
+
+
+def image_attributes(img_tag: str) -> Dict[str, Any]:
+    """Class tokens and declared width/height of an <img> tag"""
+    return {
+        'classes': (_attribute(img_tag, 'class') or '').split(),
+        'width': _declared_dimension(img_tag, 'width'),
+        'height': _declared_dimension(img_tag, 'height'),
+    }
+
+
+class ImageRules:
+    """The `images` section of one site config"""
+
+    def __init__(self, images_config: Optional[Dict[str, Any]] = None, logger=None,
+                 audit_rate: float = RULE_AUDIT_RATE):
+        images_config = images_config or {}
+        self.logger = logger or logging.getLogger(__name__)
+        self.skip_selectors = list(images_config.get('skip_selectors') or [])
+        self.skip_url_patterns = []
+        for pattern in images_config.get('skip_url_patterns') or []:
+            try:
+                self.skip_url_patterns.append(re.compile(pattern))
+            except re.error as e:
+                self.logger.warning(f"Ignoring invalid image URL pattern {pattern!r}: {e}")
+        self.min_width = images_config.get('min_width')
+        self.min_height = images_config.get('min_height')
+        # Site override for the width image variants are fetched at
+        self.preferred_srcset_width = images_config.get('preferred_srcset_width')
+        self.audit_rate = audit_rate
+
+    @classmethod
+    def from_site_config(cls, config: Optional[Dict[str, Any]], logger=None) -> 'ImageRules':
+        return cls((config or {}).get('images'), logger=logger)
+
+    def selector_matches(self, content: str) -> Set[str]:
+        """src/data-src values of every <img> matched by a skip selector"""
+        if not self.skip_selectors or not content:
+            return set()
+
+        soup = parse_html(content)
+        matched = set()
+        for selector in self.skip_selectors:
+            try:
+                elements = soup.select(selector)
+            except Exception as e:
+                self.logger.warning(f"Ignoring invalid image skip selector {selector!r}: {e}")
+                continue
+            for element in elements:
+                images = [element] if element.name == 'img' else element.find_all('img')
+                for img in images:
+                    for attribute in ('src', 'data-src', 'data-lazy-src'):
+                        if img.get(attribute):
+                            matched.add(img[attribute])
+        return matched
+
+    def skip_reason(self, src: str, img_tag: str, selector_srcs: Optional[Set[str]] = None) -> Optional[str]:
+        """Why this image is site chrome, or None if it should be processed"""
+        if selector_srcs and (src in selector_srcs or any(value in selector_srcs for value in
+                                                          (_attribute(img_tag, 'src'), _attribute(img_tag, 'data-src')))):
+            return 'site skip selector'
+
+        for pattern in self.skip_url_patterns:
+            if pattern.search(src):
+                return f"site URL pattern {pattern.pattern}"
+
+        attributes = image_attributes(img_tag)
+        if self.min_width and attributes['width'] and attributes['width'] < self.min_width:
+            return f"narrower than {self.min_width}px"
+        if self.min_height and attributes['height'] and attributes['height'] < self.min_height:
+            return f"shorter than {self.min_height}px"
+        return None
+
+    def audit(self) -> bool:
+        """Whether to send this rule-matched image to vision anyway (a sample, to catch wrong rules)"""
+        return random.random() < self.audit_rate
+
+
+def _is_upload_folder(directory: str) -> bool:
+    """Date folders (/2024/05/) and generic upload roots group images by time, not by role"""
+    segments = [segment.lower() for segment in directory.strip('/').split('/')]
+    return any(segment.isdigit() for segment in segments) or segments[-1] in UPLOAD_FOLDER_NAMES
+
+
+def _evidence_keys(decision: Dict[str, Any]) -> List[str]:
+    """Keys a SKIP / describe decision counts towards"""
+    parsed = urlparse(decision['src'])
+    if not parsed.netloc:
+        return []
+    path = parsed.path
+    keys = [f"url:{parsed.netloc}{path}"]
+    if '/' in path.strip('/'):
+        directory = path.rsplit('/', 1)[0]
+        if not _is_upload_folder(directory):
+            keys.append(f"prefix:{parsed.netloc}{directory}/")
+    for token in decision.get('classes') or []:
+        # Classes with digits are per-image (wp-image-123), layout classes are on every kind of image
+        if (CSS_CLASS_PATTERN.match(token) and not re.search(r'\d', token)
+                and not LAYOUT_CLASS_PATTERN.match(token)):
+            keys.append(f"class:{token}")
+    return keys
+
+
+def _rule_for_key(key: str) -> Dict[str, str]:
+    kind, value = key.split(':', 1)
+    if kind == 'class':
+        # Evidence from before tokens were checked may hold one a selector cannot express
+        return {'skip_selectors': f"img.{value}"} if CSS_CLASS_PATTERN.match(value) else {}
+    return {'skip_url_patterns': r'^https?://' + re.escape(value) + (r'(?:\?|$)' if kind == 'url' else '')}
+
+
+def learn_image_rules(images_config: Dict[str, Any],
+                      decisions: List[Dict[str, Any]]) -> List[str]:
+    """
+    Fold one article's vision decisions into a site's `images` section (modified in place).
+    Each decision is {'src', 'classes', 'width', 'height', 'skipped'}.
+    A learned URL or class rule whose key is later described (an audited image) is removed again,
+    and so is a learned minimum size that a described image falls below.
+    Returns the rules promoted (or removed) by this article.
+    """
+    evidence = images_config.setdefault('evidence', {})
+    sizes = images_config.setdefault('size_evidence', {'skipped': [], 'described_min': None})
+
+    # An image repeated within one article counts once
+    seen = set()
+    skipped_keys = set()
+    for decision in decisions:
+        outcome = 'skip' if decision['skipped'] else 'describe'
+        for key in _evidence_keys(decision):
+            if (key, outcome, decision['src']) in seen:
+                continue
+            seen.add((key, outcome, decision['src']))
+            counts = evidence.setdefault(key, {'skip': 0, 'describe': 0})
+            counts[outcome] += 1
+            if decision['skipped']:
+                skipped_keys.add(key)
+
+        side = min(decision.get('width') or 0, decision.get('height') or 0)
+        if side:
+            if decision['skipped'] and side <= MAX_LEARNED_MIN_DIMENSION:
+                sizes['skipped'] = (sizes['skipped'] + [side])[-50:]
+            elif not decision['skipped']:
+                described_min = sizes.get('described_min')
+                sizes['described_min'] = side if described_min is None else min(described_min, side)
+
+    # Articles that skipped each key (one article's repeated images are not a site-wide pattern)
+    for key in skipped_keys:
+        evidence[key]['skip_articles'] = evidence[key].get('skip_articles', 0) + 1
+
+    promoted = []
+    thresholds = {'url': EXACT_URL_MIN_SKIPS, 'prefix': URL_PREFIX_MIN_SKIPS, 'class': CLASS_MIN_SKIPS}
+    for key, counts in evidence.items():
+        if counts['describe']:
+            # Described at least once: not chrome, drop the rule if it was learned
+            for section, rule in _rule_for_key(key).items():
+                if rule in (images_config.get(section) or []):
+                    images_config[section].remove(rule)
+                    promoted.append(f"removed {rule}")
+            continue
+        if (counts['skip'] < thresholds[key.split(':', 1)[0]]
+                or counts.get('skip_articles', 0) < MIN_SKIP_ARTICLES):
+            continue
+        for section, rule in _rule_for_key(key).items():
+            rules = images_config.setdefault(section, [])
+            if rule not in rules:
+                rules.append(rule)
+                promoted.append(rule)
+
+    # Minimum size: everything skipped is smaller than anything ever described
+    described_min = sizes.get('described_min')
+    small_skips = [side for side in sizes['skipped'] if described_min is None or side < described_min]
+    min_side = max(small_skips) + 1 if len(small_skips) >= MIN_DIMENSION_SAMPLES else None
+    learned_min = sizes.get('learned_min')
+    if (learned_min and images_config.get('min_width') == learned_min
+            and described_min is not None and described_min < learned_min):
+        # An audited image below the learned minimum was described: lower the rule or drop it
+        # (a hand-written minimum is left alone)
+        if min_side:
+            images_config['min_width'] = images_config['min_height'] = sizes['learned_min'] = min_side
+            promoted.append(f"lowered min size to {min_side}px")
+        else:
+            images_config.pop('min_width', None)
+            images_config.pop('min_height', None)
+            sizes.pop('learned_min', None)
+            promoted.append(f"removed min size {learned_min}px")
+    elif min_side and min_side > (images_config.get('min_width') or 0):
+        images_config['min_width'] = images_config['min_height'] = sizes['learned_min'] = min_side
+        promoted.append(f"min size {min_side}px")
+
+    # Bound the evidence: drop the least-seen keys
+    if len(evidence) > MAX_EVIDENCE_KEYS:
+        keep = sorted(evidence, key=lambda k: evidence[k]['skip'] + evidence[k]['describe'], reverse=True)
+        images_config['evidence'] = {k: evidence[k] for k in keep[:MAX_EVIDENCE_KEYS]}
+
+    return promoted
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Image Variant Selection
+Picks the URL to fetch for the vision model: the smallest srcset candidate or resizing-CDN
+variant that still meets the vision resolution, instead of a full-size original or a thumbnail
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+# Width requested from resizing CDNs: enough for legible chart labels, far below camera originals
+VISION_TARGET_WIDTH = 1200
+
+# Attributes holding the real image (lazy-loading scripts swap them in)
+LAZY_SRC_ATTRIBUTES = ['data-src', 'data-lazy-src', 'data-original', 'data-orig-file']
+SRCSET_ATTRIBUTES = ['data-srcset', 'data-lazy-srcset', 'srcset']
+
+# Cloudinary transformation parameters that control the output size
+CLOUDINARY_SIZE_PARAMS = ('w_', 'h_', 'c_', 'dpr_', 'ar_')
+
+
+def _attribute(img_tag: str, name: str) -> Optional[str]:
+    match = re.search(rf'\s{name}=["\']([^"\']*)["\']', img_tag, re.IGNORECASE)
+    return match.group(1) if match else None
+
+
+def parse_srcset(srcset: str) -> List[Dict[str, Any]]:
+    """Parse a srcset attribute into [{'url', 'width'}] (width None for density descriptors)"""
+    candidates = []
+    for part in re.split(r',\s+', srcset.strip()):
+        pieces = part.strip().split()
+        if not pieces:
+            continue
+        width = None
+        if len(pieces) > 1 and pieces[1].endswith('w') and pieces[1][:-1].isdigit():
+            width = int(pieces[1][:-1])
+        candidates.append({'url': pieces[0], 'width': width})
+    return candidates
+
+
+def _width_candidates(srcset: str) -> List[Dict[str, Any]]:
+    return [c for c in parse_srcset(srcset) if c['width'] and not c['url'].startswith('data:')]
+
+
+def pick_srcset_candidate(srcset: str, target_width: int) -> Optional[str]:
+    """Smallest width-described candidate at least target_width wide (largest if none is)"""
+    candidates = _width_candidates(srcset)
+    if not candidates:
+        return None
+    large_enough = [c for c in candidates if c['width'] >= target_width]
+    if large_enough:
+        return min(large_enough, key=lambda c: c['width'])['url']
+    return max(candidates, key=lambda c: c['width'])['url']
+
+
+def _with_query(parsed, params):
+    return urlunparse(parsed._replace(query=urlencode(params, safe=',')))
+
+
+def _rewrite_photon(parsed, target_width):
+    """WordPress Photon (i0-i3.wp.com): w= keeps the aspect ratio and never upscales"""
+    params = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+              if k not in ('w', 'h', 'resize', 'fit', 'crop', 'zoom')]
+    return _with_query(parsed, params + [('w', str(target_width))])
+
+
+def _rewrite_imgix(parsed, target_width):
+    """imgix: fit=max scales down to w= but never up (signed URLs, with s=, cannot be changed)"""
+    if any(key == 's' for key, _ in parse_qsl(parsed.query, keep_blank_values=True)):
+        return None
+    params = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+              if k not in ('w', 'h', 'fit', 'dpr', 'ar', 'crop')]
+    return _with_query(parsed, params + [('w', str(target_width)), ('fit', 'max')])
+
+
+def _rewrite_query_width(parsed, target_width, width_param):
+    """CDNs with a plain width query parameter (Shopify, Contentful)"""
+    params = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+              if k not in (width_param, 'h', 'height', 'fit', 'crop')]
+    return _with_query(parsed, params + [(width_param, str(target_width))])
+
+
+def _rewrite_cloudinary(parsed, target_width):
+    """Cloudinary: replace size transformations with c_limit,w_<target> (no upscaling); signed URLs are kept"""
+    segments = parsed.path.split('/')
+    if any(re.fullmatch(r's--[\w-]+--', segment) for segment in segments):
+        # The signature covers the transformations: any change is refused with a 403
+        return None
+    try:
+        start = next(i for i, segment in enumerate(segments)
+                     if segment in ('upload', 'fetch', 'private', 'authenticated')) + 1
+    except StopIteration:
+        return None
+
+    end = start
+    kept = []
+    while end < len(segments) and re.fullmatch(r'[a-z]{1,3}_[^/]+', segments[end]) and not re.fullmatch(r'v\d+', segments[end]):
+        params = [p for p in segments[end].split(',') if not p.startswith(CLOUDINARY_SIZE_PARAMS)]
+        if params:
+            kept.append(','.join(params))
+        end += 1
+
+    new_segments = segments[:start] + kept + [f"c_limit,w_{target_width}"] + segments[end:]
+    return urlunparse(parsed._replace(path='/'.join(new_segments)))
+
+
+def _rewrite_wordpress_thumbnail(parsed, target_width, candidates=None):
+    """
+    WordPress uploads: a '-300x200' thumbnail narrower than the target -> the smallest srcset
+    size that is wide enough. The original upload (often camera-sized) is fetched only when
+    no listed size is.
+    """
+    match = re.search(r'-(\d+)x(\d+)(\.\w+)$', parsed.path)
+    if not match or int(match.group(1)) >= target_width:
+        return None
+    large_enough = [c for c in candidates or [] if c['width'] >= target_width]
+    if large_enough:
+        return min(large_enough, key=lambda c: c['width'])['url']
+    return urlunparse(parsed._replace(path=parsed.path[:match.start()] + match.group(3)))
+
+
+def rewrite_cdn_url(url: str, target_width: int = VISION_TARGET_WIDTH,
+                    srcset_candidates: Optional[List[Dict[str, Any]]] = None) -> str:
+    """
+    Rewrite a resizing-CDN URL to request target_width; other URLs are returned unchanged.
+    srcset_candidates (parse_srcset of the same <img>) are the sizes a WordPress thumbnail may be swapped for.
+    """
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if not host:
+        return url
+
+    rewritten = None
+    if re.fullmatch(r'i[0-3]\.wp\.com', host):
+        rewritten = _rewrite_photon(parsed, target_width)
+    elif host.endswith('.imgix.net'):
+        rewritten = _rewrite_imgix(parsed, target_width)
+    elif host == 'res.cloudinary.com' or host.endswith('.cloudinary.com'):
+        rewritten = _rewrite_cloudinary(parsed, target_width)
+    elif host == 'cdn.shopify.com':
+        rewritten = _rewrite_query_width(parsed, target_width, 'width')
+    elif host == 'images.ctfassets.net':
+        rewritten = _rewrite_query_width(parsed, target_width, 'w')
+    elif '/wp-content/uploads/' in parsed.path:
+        rewritten = _rewrite_wordpress_thumbnail(parsed, target_width, srcset_candidates)
+
+    return rewritten or url
+
+
+def lazy_src(img_tag: str) -> Optional[str]:
+    """Real image URL named by a lazy-loading attribute, if any"""
+    for attribute in LAZY_SRC_ATTRIBUTES:
+        value = _attribute(img_tag, attribute)
+        if value and not value.startswith('data:'):
+            return value
+    return None
+
+
+def select_vision_url(img_tag: str, src: str, target_width: int = VISION_TARGET_WIDTH) -> str:
+    """
+    URL to fetch for the vision model: lazy-loaded original over a low-quality src,
+    then the best srcset candidate, then a CDN rewrite to target_width
+    """
+    if src.startswith('data:'):
+        return src
+
+    url = lazy_src(img_tag) or src
+    candidates = None
+    for attribute in SRCSET_ATTRIBUTES:
+        srcset = _attribute(img_tag, attribute)
+        if srcset:
+            candidate = pick_srcset_candidate(srcset, target_width)
+            if candidate:
+                url = candidate
+                candidates = _width_candidates(srcset)
+                break
+
+    return rewrite_cdn_url(url, target_width, candidates)
@@ -6,62 +6,60 @@ Instead of guessing selectors, we extract everything, identify noise, then find
 
 import re
 import yaml
-import os
-from bs4 import BeautifulSoup
 from typing import Dict, List, Tuple, Optional
 
-# Optional Gemini support
-GEMINI_AVAILABLE = False
 try:
-    from google import genai
-    from google.genai.types import GenerateContentConfig, ThinkingConfig
-    GEMINI_AVAILABLE = True
+    from .llm_service import LLMService, GEMINI_AVAILABLE
+    from .events import emitter
+    from . import lazy_imports
 except ImportError:
-    pass
+    from llm_service import LLMService, GEMINI_AVAILABLE
+    from events import emitter
+    import lazy_imports
+
+_events = emitter('learning')
+
+# Error message (and sentinel for callers) when learning is put off until the API recovers
+LEARNING_DEFERRED = "Learning deferred: Gemini API is degraded (circuit open) or the token budget is spent"
 
 
 class InvertedLearner:
     """Learn extraction rules by identifying noise to exclude, not content to include"""
     
-    def __init__(self, use_gemini=True):
+    def __init__(self, use_gemini=True, llm=None):
         self.use_gemini = use_gemini and GEMINI_AVAILABLE
-        self.gemini_client = None
-        
-        if self.use_gemini:
-            api_key = os.getenv('GEMINI_API_KEY')
-            if api_key:
-                try:
-                    self.gemini_client = genai.Client(api_key=api_key)
-                    print("✓ Gemini inverted learning enabled (2.5 Flash - thinking disabled)")
-                except Exception as e:
-                    print(f"⚠️  Gemini init failed: {e}")
-                    self.use_gemini = False
-    
-    def _generate_content(self, contents):
-        """Helper to call Gemini with thinking disabled"""
-        if not self.gemini_client:
-            raise RuntimeError("Gemini client is not initialized")
         
-        config = GenerateContentConfig(
-            temperature=0.1,
-            top_p=0.95,
-            top_k=40,
-            max_output_tokens=8192,
-            thinking_config=ThinkingConfig(thinking_budget=0)
-        )
+        # Shared LLM service (client, limits, retries, deadlines); standalone use builds its own
+        self.llm = llm or LLMService()
+        self.model_router = self.llm.model_router
+        self.circuit_breaker = self.llm.circuit_breaker
         
-        return self.gemini_client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=contents,
-            config=config
-        )
+        if self.use_gemini and not self.llm.available:
+            try:
+                if self.llm.connect():
+                    _events.info("✓ Gemini inverted learning enabled (2.5 Flash - thinking disabled)")
+            except Exception as e:
+                _events.warning(f"⚠️  Gemini init failed: {e}")
+                self.use_gemini = False
+    
+    @property
+    def gemini_client(self):
+        """The shared service's Gemini client (None when Gemini is unavailable)"""
+        return self.llm.client
+    
+    def _generate_content(self, contents, call_type: str = 'boundaries', model: Optional[str] = None,
+                          max_attempts: int = 1, cache: bool = False):
+        """Call Gemini through the shared service (thinking disabled, model routed for this call type)"""
+        if max_attempts > 1:
+            return self.llm.generate_with_retry(call_type, contents, model=model, max_attempts=max_attempts, cache=cache)
+        return self.llm.generate(call_type, contents, model=model, cache=cache)
     
     def find_article_boundaries(self, extracted_text: str, html_content: str) -> Dict:
         """
         Ask LLM to identify CSS selectors that mark the START and END of the article content.
         This helps us extract just the article block, then apply exclusions within it.
         """
-        if not self.gemini_client:
+        if not self.llm.available:
             return {}
         
         # Prepare samples: beginning and end (where boundaries are)
@@ -151,40 +149,15 @@ EXAMPLES:
 Return ONLY the YAML with EXACT class names from HTML, no other text."""
 
         try:
-            print(f"\n🤖 ASKING GEMINI TO IDENTIFY ARTICLE BOUNDARIES...")
-            print(f"   Text sample: {len(text_sample):,} chars")
-            print(f"   HTML sample: {len(html_sample):,} chars")
+            _events.info(f"\n🤖 ASKING GEMINI TO IDENTIFY ARTICLE BOUNDARIES...")
+            _events.debug(f"   Text sample: {len(text_sample):,} chars")
+            _events.debug(f"   HTML sample: {len(html_sample):,} chars")
             
-            # Retry logic
-            max_retries = 3
-            last_error = None
-            for attempt in range(max_retries):
-                try:
-                    print(f"   Attempt {attempt + 1}/{max_retries}...")
-                    response = self._generate_content([system_prompt, user_prompt])
-                    break
-                except Exception as e:
-                    last_error = e
-                    error_msg = str(e)
-                    if "504" in error_msg or "timeout" in error_msg.lower() or "DeadlineExceeded" in error_msg:
-                        if attempt < max_retries - 1:
-                            import time
-                            wait_time = 10 * (attempt + 1)
-                            print(f"   ⏳ Timeout, retrying in {wait_time}s...")
-                            time.sleep(wait_time)
-                            continue
-                    raise
-            else:
-                # All retries failed
-                print(f"❌ All {max_retries} attempts failed: {last_error}")
-                return {}
+            response = self._generate_content([system_prompt, user_prompt], max_attempts=3)
             
             response_text = response.text.strip()
             
-            print(f"\n📥 LLM RESPONSE (boundaries):")
-            print("="*80)
-            print(response_text)
-            print("="*80)
+            _events.llm_exchange('boundaries', len(system_prompt) + len(user_prompt), response_text)
             
             # Extract YAML
             yaml_match = re.search(r'```yaml\n(.*?)\n```', response_text, re.DOTALL)
@@ -198,18 +171,18 @@ Return ONLY the YAML with EXACT class names from HTML, no other text."""
             if config.get('has_boundaries'):
                 start = config.get('article_start', {})
                 end = config.get('article_end', {})
-                print(f"   ✅ Found boundaries:")
-                print(f"      Start: {start.get('selector', 'N/A')}")
-                print(f"      End: {end.get('selector', 'N/A')}")
+                _events.info(f"   ✅ Found boundaries:")
+                _events.info(f"      Start: {start.get('selector', 'N/A')}")
+                _events.info(f"      End: {end.get('selector', 'N/A')}")
             else:
-                print(f"   ℹ️  No clear boundaries found: {config.get('reasoning', 'N/A')}")
+                _events.info(f"   ℹ️  No clear boundaries found: {config.get('reasoning', 'N/A')}")
             
             return config
             
         except Exception as e:
-            print(f"❌ Error finding boundaries: {e}")
+            _events.error(f"❌ Error finding boundaries: {e}")
             import traceback
-            traceback.print_exc()
+            _events.detail('TRACEBACK', traceback.format_exc)
             return {}
     
     def refine_boundaries(self, extracted_text: str, html_content: str, current_start: str, current_end: Optional[str], validation_feedback: Dict) -> Dict:
@@ -217,7 +190,7 @@ Return ONLY the YAML with EXACT class names from HTML, no other text."""
         Refine boundary selectors based on validation feedback.
         If validation says there's noise at beginning/end, find tighter boundaries.
         """
-        if not self.gemini_client:
+        if not self.llm.available:
             return {'has_boundaries': False}
         
         # Prepare samples
@@ -292,31 +265,16 @@ Find TIGHTER boundaries that exclude the noise shown above.
 Return ONLY the YAML, no other text."""
 
         try:
-            print(f"\n🔧 REFINING ARTICLE BOUNDARIES...")
-            print(f"   Current start: {current_start}")
-            print(f"   Current end: {current_end or 'None'}")
-            print(f"   Noise issues: {len(under_removed)}")
+            _events.info(f"\n🔧 REFINING ARTICLE BOUNDARIES...")
+            _events.info(f"   Current start: {current_start}")
+            _events.info(f"   Current end: {current_end or 'None'}")
+            _events.info(f"   Noise issues: {len(under_removed)}")
             
-            # Retry logic
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    print(f"   Attempt {attempt + 1}/{max_retries}...")
-                    response = self._generate_content([system_prompt, user_prompt])
-                    break
-                except Exception as e:
-                    if attempt < max_retries - 1:
-                        import time
-                        time.sleep(10 * (attempt + 1))
-                        continue
-                    raise
+            response = self._generate_content([system_prompt, user_prompt], call_type='boundary_refine', max_attempts=3)
             
             response_text = response.text.strip()
             
-            print(f"\n📥 LLM RESPONSE (refined boundaries):")
-            print("="*80)
-            print(response_text)
-            print("="*80)
+            _events.llm_exchange('boundary_refine', len(system_prompt) + len(user_prompt), response_text)
             
             # Extract YAML
             yaml_match = re.search(r'```yaml\n(.*?)\n```', response_text, re.DOTALL)
@@ -330,16 +288,16 @@ Return ONLY the YAML, no other text."""
             if config.get('has_boundaries'):
                 start = config.get('article_start', {})
                 end = config.get('article_end', {})
-                print(f"   ✅ Refined boundaries:")
-                print(f"      Start: {start.get('selector', 'N/A')}")
-                print(f"      End: {end.get('selector', 'N/A')}")
+                _events.info(f"   ✅ Refined boundaries:")
+                _events.info(f"      Start: {start.get('selector', 'N/A')}")
+                _events.info(f"      End: {end.get('selector', 'N/A')}")
             
             return config
             
         except Exception as e:
-            print(f"❌ Error refining boundaries: {e}")
+            _events.error(f"❌ Error refining boundaries: {e}")
             import traceback
-            traceback.print_exc()
+            _events.detail('TRACEBACK', traceback.format_exc)
             return {'has_boundaries': False}
     
     def extract_with_boundaries(self, html_content: str, start_selector: Optional[str], end_selector: Optional[str]) -> str:
@@ -348,7 +306,7 @@ Return ONLY the YAML, no other text."""
         - Start selector: Delete everything BEFORE this element (keep the element itself)
         - End selector: Delete this element and everything AFTER it
         """
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = lazy_imports.parse_html(html_content)
         
         # If we have a start boundary, delete everything before it
         if start_selector:
@@ -366,11 +324,11 @@ Return ONLY the YAML, no other text."""
                         # Stop if we reach body or html
                         if current and current.name in ['body', 'html', '[document]']:
                             break
-                    print(f"   ✂️  Applied start boundary: {start_selector} (deleted everything before)")
+                    _events.info(f"   ✂️  Applied start boundary: {start_selector} (deleted everything before)")
                 else:
-                    print(f"   ⚠️  Start selector not found: {start_selector}")
+                    _events.warning(f"   ⚠️  Start selector not found: {start_selector}")
             except Exception as e:
-                print(f"   ⚠️  Error with start selector '{start_selector}': {e}")
+                _events.warning(f"   ⚠️  Error with start selector '{start_selector}': {e}")
         
         # If we have an end boundary, delete it and everything after
         if end_selector:
@@ -382,11 +340,11 @@ Return ONLY the YAML, no other text."""
                         sibling.decompose()
                     # Delete the end element itself
                     end_element.decompose()
-                    print(f"   ✂️  Applied end boundary: {end_selector} (deleted it and everything after)")
+                    _events.info(f"   ✂️  Applied end boundary: {end_selector} (deleted it and everything after)")
                 else:
-                    print(f"   ⚠️  End selector not found: {end_selector}")
+                    _events.warning(f"   ⚠️  End selector not found: {end_selector}")
             except Exception as e:
-                print(f"   ⚠️  Error with end selector '{end_selector}': {e}")
+                _events.warning(f"   ⚠️  Error with end selector '{end_selector}': {e}")
         
         return str(soup)
     
@@ -395,7 +353,7 @@ Return ONLY the YAML, no other text."""
         Validate if boundary cut is good.
         Returns: {'status': 'ok' | 'cut_too_much' | 'need_tighter', 'feedback': '...'}
         """
-        if not self.gemini_client:
+        if not self.llm.available:
             return {'status': 'ok', 'feedback': 'No validation available'}
         
         # Prepare samples
@@ -422,6 +380,7 @@ Return ONLY valid YAML:
 
 ```yaml
 status: "ok"  # or "cut_too_much" or "need_tighter"
+confidence: "high"  # or "medium" or "low"
 feedback: "Brief explanation"
 ```"""
 
@@ -445,26 +404,44 @@ Determine:
 Return ONLY the YAML."""
 
         try:
-            response = self._generate_content([system_prompt, user_prompt])
-            response_text = response.text.strip()
-            
-            # Extract YAML
-            yaml_match = re.search(r'```yaml\n(.*?)\n```', response_text, re.DOTALL)
-            if yaml_match:
-                yaml_text = yaml_match.group(1)
-            else:
-                yaml_text = response_text
+            # Cheap model first; escalate on low confidence or an unparseable verdict
+            response, result = self.model_router.run(
+                'boundary_validation',
+                lambda model: self._generate_content([system_prompt, user_prompt], call_type='boundary_validation', model=model,
+                                                    cache=True),
+                parse=self._parse_boundary_verdict
+            )
             
-            result = yaml.safe_load(yaml_text)
+            if result is None:
+                result = self._parse_boundary_verdict(response, allow_low_confidence=True)
+            if result is None:
+                return {'status': 'ok', 'feedback': 'Could not parse validation verdict, assuming ok'}
             return result
             
         except Exception as e:
-            print(f"   ❌ Boundary validation error: {e}")
+            _events.error(f"   ❌ Boundary validation error: {e}")
             return {'status': 'ok', 'feedback': 'Validation failed, assuming ok'}
     
+    @staticmethod
+    def _parse_boundary_verdict(response, allow_low_confidence: bool = False) -> Optional[Dict]:
+        """Parse a boundary validation verdict. Returns None if unparseable or low-confidence"""
+        response_text = response.text.strip()
+        yaml_match = re.search(r'```yaml\n(.*?)\n```', response_text, re.DOTALL)
+        yaml_text = yaml_match.group(1) if yaml_match else response_text
+        
+        try:
+            result = yaml.safe_load(yaml_text)
+        except yaml.YAMLError:
+            return None
+        if not isinstance(result, dict) or result.get('status') not in ('ok', 'cut_too_much', 'need_tighter'):
+            return None
+        if not allow_low_confidence and str(result.get('confidence', '')).lower() == 'low':
+            return None
+        return result
+    
     def apply_default_exclusions(self, html_content: str) -> str:
         """Apply default exclusions that we KNOW are not article content"""
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = lazy_imports.parse_html(html_content)
         
         # Remove scripts, styles, and obvious non-content
         default_remove = ['script', 'style', 'noscript', 'iframe', 'embed', 'object']
@@ -472,19 +449,19 @@ Return ONLY the YAML."""
             for element in soup.find_all(tag):
                 element.decompose()
         
-        print(f"   ✂️  Applied default exclusions: {', '.join(default_remove)}")
+        _events.info(f"   ✂️  Applied default exclusions: {', '.join(default_remove)}")
         return str(soup)
     
     def extract_text_naive(self, html_content: str) -> str:
         """Extract all text from HTML without filtering"""
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = lazy_imports.parse_html(html_content)
         return soup.get_text(separator='\n', strip=True)
     
     def find_noise_categories(self, extracted_text: str, html_content: str) -> Dict:
         """
         Ask LLM to identify noise categories in extracted text and find selectors in HTML
         """
-        if not self.gemini_client:
+        if not self.llm.available:
             return {'exclude_selectors': []}
         
         # Prepare samples: beginning + middle + end to see full structure
@@ -572,56 +549,22 @@ HTML SOURCE (first 100k chars):
 Find noise categories in the text, locate them in HTML, and provide selectors to exclude them."""
 
         try:
-            print(f"\n🤖 ASKING GEMINI TO IDENTIFY NOISE CATEGORIES...")
-            print(f"   Original text: {len(extracted_text):,} chars")
-            print(f"   Text sample sent: {len(text_sample):,} chars")
-            print(f"   Original HTML: {len(html_content):,} chars")
-            print(f"   HTML sample sent: {len(html_sample):,} chars")
+            _events.info(f"\n🤖 ASKING GEMINI TO IDENTIFY NOISE CATEGORIES...")
+            _events.debug(f"   Original text: {len(extracted_text):,} chars")
+            _events.debug(f"   Text sample sent: {len(text_sample):,} chars")
+            _events.debug(f"   Original HTML: {len(html_content):,} chars")
+            _events.debug(f"   HTML sample sent: {len(html_sample):,} chars")
             if len(html_content) > 150000:
-                print(f"   📍 HTML structure: first 50K + middle 25K + last 50K (showing end where related articles usually appear)")
+                _events.debug(f"   📍 HTML structure: first 50K + middle 25K + last 50K (showing end where related articles usually appear)")
             
-            print(f"\n📤 SYSTEM PROMPT:")
-            print("="*80)
-            print(system_prompt)
-            print("="*80)
+            _events.detail('SYSTEM PROMPT', system_prompt)
+            _events.detail('USER PROMPT (first 2000 chars)', user_prompt[:2000])
             
-            print(f"\n📤 USER PROMPT (first 2000 chars):")
-            print("="*80)
-            print(user_prompt[:2000])
-            print("="*80)
+            response = self._generate_content([system_prompt, user_prompt], call_type='noise', max_attempts=3)
             
-            # Retry up to 3 times with 120s timeout budget
-            max_retries = 3
-            last_error = None
-            for attempt in range(max_retries):
-                try:
-                    print(f"   Attempt {attempt + 1}/{max_retries}...")
-                    response = self._generate_content([system_prompt, user_prompt])
-                    break  # Success, exit retry loop
-                except Exception as e:
-                    last_error = e
-                    error_msg = str(e)
-                    if "504" in error_msg or "timeout" in error_msg.lower() or "DeadlineExceeded" in error_msg:
-                        if attempt < max_retries - 1:
-                            wait_time = 10 * (attempt + 1)  # 10s, 20s, 30s
-                            print(f"   ⏳ Timeout error, waiting {wait_time}s before retry...")
-                            import time
-                            time.sleep(wait_time)
-                        else:
-                            print(f"   ❌ All {max_retries} attempts failed due to timeout")
-                            raise Exception(f"Gemini API timeout after {max_retries} attempts") from e
-                    else:
-                        # Non-timeout error, don't retry
-                        raise
-            else:
-                # All retries exhausted
-                raise last_error
             response_text = response.text.strip()
             
-            print(f"\n📥 GEMINI RESPONSE:")
-            print("="*80)
-            print(response_text)
-            print("="*80)
+            _events.llm_exchange('noise', len(system_prompt) + len(user_prompt), response_text)
             
             # Extract YAML
             yaml_match = re.search(r'```yaml\n(.*?)\n```', response_text, re.DOTALL)
@@ -632,23 +575,23 @@ Find noise categories in the text, locate them in HTML, and provide selectors to
             
             config = yaml.safe_load(yaml_text)
             
-            print(f"\n✅ PARSED NOISE CATEGORIES:")
-            print(f"   Categories found: {len(config.get('noise_categories', []))}")
+            _events.info(f"\n✅ PARSED NOISE CATEGORIES:")
+            _events.info(f"   Categories found: {len(config.get('noise_categories', []))}")
             for cat in config.get('noise_categories', []):
-                print(f"   - {cat['category']}: {cat.get('text_sample', '')[:50]}...")
-            print(f"   Total exclude selectors: {len(config.get('exclude_selectors', []))}")
+                _events.info(f"   - {cat['category']}: {cat.get('text_sample', '')[:50]}...")
+            _events.info(f"   Total exclude selectors: {len(config.get('exclude_selectors', []))}")
             
             return config
             
         except Exception as e:
-            print(f"❌ Error finding noise categories: {e}")
+            _events.error(f"❌ Error finding noise categories: {e}")
             import traceback
-            traceback.print_exc()
+            _events.detail('TRACEBACK', traceback.format_exc)
             return {'exclude_selectors': []}
     
     def apply_exclusions(self, html_content: str, exclude_selectors: List[str]) -> str:
         """Apply exclusion selectors to HTML"""
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = lazy_imports.parse_html(html_content)
         
         removed_count = 0
         for selector in exclude_selectors:
@@ -658,16 +601,16 @@ Find noise categories in the text, locate them in HTML, and provide selectors to
                     elem.decompose()
                     removed_count += 1
             except Exception as e:
-                print(f"   ⚠️  Invalid selector '{selector}': {e}")
+                _events.warning(f"   ⚠️  Invalid selector '{selector}': {e}")
         
-        print(f"   ✂️  Removed {removed_count} elements using {len(exclude_selectors)} selectors")
+        _events.info(f"   ✂️  Removed {removed_count} elements using {len(exclude_selectors)} selectors")
         return str(soup)
     
     def validate_extraction(self, original_text: str, cleaned_text: str, html_source: str) -> Dict:
         """
         Compare original vs cleaned text and determine if extraction is good
         """
-        if not self.gemini_client:
+        if not self.llm.available:
             return {'status': 'ok', 'feedback': 'No validation available'}
         
         # Prepare samples - show more of the END where noise often hides
@@ -731,34 +674,16 @@ CLEANED TEXT ({len(cleaned_text):,} chars):
 Is the cleaned version good? What needs to be fixed?"""
 
         try:
-            print(f"\n🔍 VALIDATING EXTRACTION QUALITY...")
-            print(f"   Original: {len(original_text):,} chars")
-            print(f"   Cleaned: {len(cleaned_text):,} chars")
-            print(f"   Reduction: {len(original_text) - len(cleaned_text):,} chars ({100*(len(original_text)-len(cleaned_text))//len(original_text) if original_text else 0}%)")
+            _events.info(f"\n🔍 VALIDATING EXTRACTION QUALITY...")
+            _events.info(f"   Original: {len(original_text):,} chars")
+            _events.info(f"   Cleaned: {len(cleaned_text):,} chars")
+            _events.info(f"   Reduction: {len(original_text) - len(cleaned_text):,} chars ({100*(len(original_text)-len(cleaned_text))//len(original_text) if original_text else 0}%)")
             
-            # Retry logic
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    print(f"   Validation attempt {attempt + 1}/{max_retries}...")
-                    response = self._generate_content([system_prompt, user_prompt])
-                    break
-                except Exception as e:
-                    if "504" in str(e) or "timeout" in str(e).lower():
-                        if attempt < max_retries - 1:
-                            import time
-                            time.sleep(10 * (attempt + 1))
-                        else:
-                            raise Exception(f"Validation timeout after {max_retries} attempts") from e
-                    else:
-                        raise
+            response = self._generate_content([system_prompt, user_prompt], call_type='validation', max_attempts=3)
             
             response_text = response.text.strip()
             
-            print(f"\n📥 VALIDATION RESPONSE:")
-            print("="*80)
-            print(response_text)
-            print("="*80)
+            _events.llm_exchange('validation', len(system_prompt) + len(user_prompt), response_text)
             
             # Extract YAML
             yaml_match = re.search(r'```yaml\n(.*?)\n```', response_text, re.DOTALL)
@@ -769,24 +694,24 @@ Is the cleaned version good? What needs to be fixed?"""
             
             result = yaml.safe_load(yaml_text)
             
-            print(f"\n✅ VALIDATION RESULT: {result.get('status', 'unknown')}")
-            print(f"   Feedback: {result.get('feedback', 'N/A')}")
+            _events.info(f"\n✅ VALIDATION RESULT: {result.get('status', 'unknown')}")
+            _events.info(f"   Feedback: {result.get('feedback', 'N/A')}")
             if result.get('over_removed'):
-                print(f"   ⚠️  Over-removed: {len(result['over_removed'])} items")
+                _events.warning(f"   ⚠️  Over-removed: {len(result['over_removed'])} items")
             if result.get('under_removed'):
-                print(f"   ⚠️  Under-removed: {len(result['under_removed'])} items")
+                _events.warning(f"   ⚠️  Under-removed: {len(result['under_removed'])} items")
             
             return result
             
         except Exception as e:
-            print(f"❌ Validation error: {e}")
+            _events.error(f"❌ Validation error: {e}")
             import traceback
-            traceback.print_exc()
+            _events.detail('TRACEBACK', traceback.format_exc)
             return {'status': 'unknown', 'feedback': str(e)}
     
     def refine_selectors(self, html_source: str, current_excludes: List[str], validation: Dict) -> Dict:
         """Refine selectors based on validation feedback"""
-        if not self.gemini_client:
+        if not self.llm.available:
             return {'final_exclude_list': current_excludes}
         
         # Show beginning + end of HTML so LLM can see related articles at bottom
@@ -843,31 +768,13 @@ HTML SAMPLE (first 50k):
 What selectors should we add or remove?"""
 
         try:
-            print(f"\n🔧 REFINING SELECTORS...")
+            _events.info(f"\n🔧 REFINING SELECTORS...")
             
-            # Retry logic
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    print(f"   Refinement attempt {attempt + 1}/{max_retries}...")
-                    response = self._generate_content([system_prompt, user_prompt])
-                    break
-                except Exception as e:
-                    if "504" in str(e) or "timeout" in str(e).lower():
-                        if attempt < max_retries - 1:
-                            import time
-                            time.sleep(10 * (attempt + 1))
-                        else:
-                            raise Exception(f"Refinement timeout after {max_retries} attempts") from e
-                    else:
-                        raise
+            response = self._generate_content([system_prompt, user_prompt], call_type='refine', max_attempts=3)
             
             response_text = response.text.strip()
             
-            print(f"\n📥 REFINEMENT RESPONSE:")
-            print("="*80)
-            print(response_text)
-            print("="*80)
+            _events.llm_exchange('refine', len(system_prompt) + len(user_prompt), response_text)
             
             # Extract YAML
             yaml_match = re.search(r'```yaml\n(.*?)\n```', response_text, re.DOTALL)
@@ -878,45 +785,49 @@ What selectors should we add or remove?"""
             
             result = yaml.safe_load(yaml_text)
             
-            print(f"\n✅ REFINEMENT RESULT:")
-            print(f"   Add: {len(result.get('add_selectors', []))} selectors")
-            print(f"   Remove: {len(result.get('remove_selectors', []))} selectors")
-            print(f"   Final total: {len(result.get('final_exclude_list', []))} selectors")
-            print(f"   Reasoning: {result.get('reasoning', 'N/A')}")
+            _events.info(f"\n✅ REFINEMENT RESULT:")
+            _events.info(f"   Add: {len(result.get('add_selectors', []))} selectors")
+            _events.info(f"   Remove: {len(result.get('remove_selectors', []))} selectors")
+            _events.info(f"   Final total: {len(result.get('final_exclude_list', []))} selectors")
+            _events.info(f"   Reasoning: {result.get('reasoning', 'N/A')}")
             
             return result
             
         except Exception as e:
-            print(f"❌ Refinement error: {e}")
+            _events.error(f"❌ Refinement error: {e}")
             import traceback
-            traceback.print_exc()
+            _events.detail('TRACEBACK', traceback.format_exc)
             return {'final_exclude_list': current_excludes}
     
     def learn_from_html(self, url: str, html_content: str) -> Tuple[bool, Optional[Dict], Optional[str]]:
         """
         Main inverted learning flow
         """
-        print(f"\n{'='*80}")
-        print(f"🧠 INVERTED LEARNING FOR: {url}")
-        print(f"{'='*80}")
-        print(f"HTML size: {len(html_content):,} characters\n")
+        _events.info(f"\n{'='*80}")
+        _events.info(f"🧠 INVERTED LEARNING FOR: {url}")
+        _events.info(f"{'='*80}")
+        _events.info(f"HTML size: {len(html_content):,} characters\n")
+        
+        if self.llm.degraded:
+            _events.info(f"⏸️  {LEARNING_DEFERRED}\n")
+            return False, None, LEARNING_DEFERRED
         
         # Step 1: Apply default exclusions
-        print(f"STEP 1: APPLY DEFAULT EXCLUSIONS")
-        print("-"*80)
+        _events.info(f"STEP 1: APPLY DEFAULT EXCLUSIONS")
+        _events.info("-"*80)
         html_cleaned = self.apply_default_exclusions(html_content)
-        print(f"   Result: {len(html_content):,} → {len(html_cleaned):,} chars\n")
+        _events.info(f"   Result: {len(html_content):,} → {len(html_cleaned):,} chars\n")
         
         # Step 2: Extract text naively
-        print(f"STEP 2: EXTRACT ALL TEXT NAIVELY")
-        print("-"*80)
+        _events.info(f"STEP 2: EXTRACT ALL TEXT NAIVELY")
+        _events.info("-"*80)
         original_text = self.extract_text_naive(html_cleaned)
-        print(f"   Extracted: {len(original_text):,} characters")
-        print(f"   First 500 chars: {original_text[:500]}...\n")
+        _events.info(f"   Extracted: {len(original_text):,} characters")
+        _events.detail('FIRST 500 CHARS', original_text[:500])
         
         # Step 3: Iteratively find and refine article boundaries (up to 3 iterations)
-        print(f"STEP 3: IDENTIFY & REFINE ARTICLE BOUNDARIES")
-        print("-"*80)
+        _events.info(f"STEP 3: IDENTIFY & REFINE ARTICLE BOUNDARIES")
+        _events.info("-"*80)
         
         article_start_selector = None
         article_end_selector = None
@@ -926,13 +837,13 @@ What selectors should we add or remove?"""
         
         while boundary_iteration < max_boundary_iterations:
             boundary_iteration += 1
-            print(f"\n   Boundary detection attempt {boundary_iteration}/{max_boundary_iterations}")
+            _events.info(f"\n   Boundary detection attempt {boundary_iteration}/{max_boundary_iterations}")
             
             # Ask LLM to find boundaries
             boundaries = self.find_article_boundaries(original_text, html_for_boundary_detection)
             
             if not boundaries.get('has_boundaries'):
-                print(f"   No clear boundaries found, will use body + exclusions\n")
+                _events.info(f"   No clear boundaries found, will use body + exclusions\n")
                 break
             
             # Extract proposed boundaries
@@ -941,64 +852,69 @@ What selectors should we add or remove?"""
             proposed_start = article_start.get('selector')
             proposed_end = article_end.get('selector')
             
-            print(f"   Proposed start: {proposed_start}")
-            print(f"   Proposed end: {proposed_end}")
+            _events.info(f"   Proposed start: {proposed_start}")
+            _events.info(f"   Proposed end: {proposed_end}")
             
             # Apply boundaries and extract
             html_with_boundaries = self.extract_with_boundaries(html_for_boundary_detection, proposed_start, proposed_end)
             boundary_extracted_text = self.extract_text_naive(html_with_boundaries)
             
-            print(f"   Result: {len(boundary_extracted_text):,} chars")
+            _events.info(f"   Result: {len(boundary_extracted_text):,} chars")
             
             # Validate: compare original vs boundary-cut version
-            print(f"   Validating boundary cut...")
+            _events.info(f"   Validating boundary cut...")
             validation = self._validate_boundary_cut(original_text, boundary_extracted_text)
             
             if validation.get('status') == 'ok':
                 # Boundaries are good!
                 article_start_selector = proposed_start
                 article_end_selector = proposed_end
-                print(f"   ✅ Boundaries validated successfully\n")
+                _events.info(f"   ✅ Boundaries validated successfully\n")
                 break
             elif validation.get('status') == 'cut_too_much':
                 # We removed article content - boundaries are wrong, try again with original HTML
-                print(f"   ⚠️  Cut too much: {validation.get('feedback')}")
-                print(f"   Retrying with original HTML...\n")
+                _events.warning(f"   ⚠️  Cut too much: {validation.get('feedback')}")
+                _events.info(f"   Retrying with original HTML...\n")
                 # Keep html_for_boundary_detection as is (original)
                 continue
             elif validation.get('status') == 'need_tighter':
                 # Still has noise - use the cut version for next iteration
-                print(f"   ⚠️  Need tighter boundaries: {validation.get('feedback')}")
-                print(f"   Retrying with cut HTML...\n")
+                _events.warning(f"   ⚠️  Need tighter boundaries: {validation.get('feedback')}")
+                _events.info(f"   Retrying with cut HTML...\n")
                 html_for_boundary_detection = html_with_boundaries
                 continue
             else:
                 # Unknown status, stop
-                print(f"   ⚠️  Unknown validation status: {validation.get('status')}\n")
+                _events.warning(f"   ⚠️  Unknown validation status: {validation.get('status')}\n")
                 break
         
         if article_start_selector or article_end_selector:
-            print(f"   Final boundaries:")
-            print(f"      Start: {article_start_selector or 'None'}")
-            print(f"      End: {article_end_selector or 'None'}\n")
+            _events.info(f"   Final boundaries:")
+            _events.info(f"      Start: {article_start_selector or 'None'}")
+            _events.info(f"      End: {article_end_selector or 'None'}\n")
         else:
-            print(f"   No boundaries found, will use body + exclusions\n")
+            _events.info(f"   No boundaries found, will use body + exclusions\n")
         
         # Step 4: Find noise categories
-        print(f"STEP 4: IDENTIFY NOISE CATEGORIES")
-        print("-"*80)
+        _events.info(f"STEP 4: IDENTIFY NOISE CATEGORIES")
+        _events.info("-"*80)
         noise_result = self.find_noise_categories(original_text, html_cleaned)
         exclude_selectors = noise_result.get('exclude_selectors', [])
         
+        if self.llm.degraded:
+            # Boundary/noise answers may be missing because the API went down (or the budget ran out) - don't learn from that
+            _events.info(f"⏸️  {LEARNING_DEFERRED}\n")
+            return False, None, LEARNING_DEFERRED
+        
         if not exclude_selectors:
-            print(f"❌ No exclusion selectors identified\n")
+            _events.error(f"❌ No exclusion selectors identified\n")
             return False, None, "Failed to identify noise categories"
         
-        print(f"   Found {len(exclude_selectors)} exclusion selectors\n")
+        _events.info(f"   Found {len(exclude_selectors)} exclusion selectors\n")
         
         # Step 5: Apply boundaries + exclusions
-        print(f"STEP 5: APPLY BOUNDARIES + EXCLUSIONS")
-        print("-"*80)
+        _events.info(f"STEP 5: APPLY BOUNDARIES + EXCLUSIONS")
+        _events.info("-"*80)
         
         # Apply boundaries first (if any)
         if article_start_selector or article_end_selector:
@@ -1009,11 +925,11 @@ What selectors should we add or remove?"""
         # Then apply exclusions within the boundaries
         html_filtered = self.apply_exclusions(html_with_boundaries, exclude_selectors)
         cleaned_text = self.extract_text_naive(html_filtered)
-        print(f"   Cleaned text: {len(cleaned_text):,} characters\n")
+        _events.info(f"   Cleaned text: {len(cleaned_text):,} characters\n")
         
         # Step 6: Validate
-        print(f"STEP 6: VALIDATE EXTRACTION")
-        print("-"*80)
+        _events.info(f"STEP 6: VALIDATE EXTRACTION")
+        _events.info("-"*80)
         validation = self.validate_extraction(original_text, cleaned_text, html_cleaned)
         
         # Step 7: Noise reduction refinement (max 3 iterations)
@@ -1022,8 +938,8 @@ What selectors should we add or remove?"""
         
         while validation.get('status') == 'needs_fixes' and iteration < max_iterations:
             iteration += 1
-            print(f"\nITERATION {iteration}/{max_iterations}: REFINING EXCLUSION SELECTORS")
-            print("-"*80)
+            _events.info(f"\nITERATION {iteration}/{max_iterations}: REFINING EXCLUSION SELECTORS")
+            _events.info("-"*80)
             
             refinement = self.refine_selectors(html_cleaned, exclude_selectors, validation)
             exclude_selectors = refinement.get('final_exclude_list', exclude_selectors)
@@ -1033,13 +949,17 @@ What selectors should we add or remove?"""
             html_filtered = self.apply_exclusions(html_with_boundaries, exclude_selectors)
             cleaned_text = self.extract_text_naive(html_filtered)
             
-            print(f"\nRE-VALIDATION:")
-            print("-"*80)
+            _events.info(f"\nRE-VALIDATION:")
+            _events.info("-"*80)
             validation = self.validate_extraction(original_text, cleaned_text, html_cleaned)
         
+        if self.llm.degraded:
+            _events.info(f"⏸️  {LEARNING_DEFERRED}\n")
+            return False, None, LEARNING_DEFERRED
+        
         # Step 8: Generate config
-        print(f"\nSTEP 8: GENERATE CONFIG")
-        print("-"*80)
+        _events.info(f"\nSTEP 8: GENERATE CONFIG")
+        _events.info("-"*80)
         
         from urllib.parse import urlparse
         parsed = urlparse(url)
@@ -1053,10 +973,10 @@ What selectors should we add or remove?"""
         # Use boundary selector if available, otherwise use body
         if article_start_selector:
             article_content_config['selector'] = article_start_selector
-            print(f"   Using boundary selector: {article_start_selector}")
+            _events.info(f"   Using boundary selector: {article_start_selector}")
         else:
             article_content_config['selector'] = 'body'
-            print(f"   Using default selector: body")
+            _events.info(f"   Using default selector: body")
         
         # Always add exclude_selectors (works inside boundaries too)
         article_content_config['exclude_selectors'] = exclude_selectors
@@ -1064,7 +984,7 @@ What selectors should we add or remove?"""
         # Add end boundary if found
         if article_end_selector:
             article_content_config['truncate_after'] = article_end_selector
-            print(f"   Truncate after: {article_end_selector}")
+            _events.info(f"   Truncate after: {article_end_selector}")
         
         config = {
             'domain': domain,
@@ -1074,10 +994,10 @@ What selectors should we add or remove?"""
             'notes': f'Inverted learning approach. Boundaries: {"yes" if article_start_selector else "no"}. Validation: {validation.get("status")}'
         }
         
-        print(f"   Domain: {domain}")
-        print(f"   Exclude selectors: {len(exclude_selectors)}")
-        print(f"   Validation status: {validation.get('status')}")
-        print(f"\n✅ LEARNING COMPLETE\n")
+        _events.info(f"   Domain: {domain}")
+        _events.info(f"   Exclude selectors: {len(exclude_selectors)}")
+        _events.info(f"   Validation status: {validation.get('status')}")
+        _events.info(f"\n✅ LEARNING COMPLETE\n")
         
         return True, config, None
 
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Lazy Imports
+Heavy dependencies (google-genai and its pydantic types, PIL, python-dotenv, BeautifulSoup,
+Playwright, cairosvg) are imported on first use instead of when our modules load, so short-lived CLI
+runs, runs without --gemini and registry-only use do not pay for them.
+Availability checks locate packages with importlib.util.find_spec without executing them.
+"""
+
+import functools
+import importlib
+import importlib.util
+import threading
+
+_env_lock = threading.Lock()
+_env_loaded = False
+
+
+@functools.lru_cache(maxsize=None)
+def _installed(module_name: str) -> bool:
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def available(*module_names: str) -> bool:
+    """True when every module can be imported (checked without importing it)"""
+    return all(_installed(name) for name in module_names)
+
+
+def load_env():
+    """Load .env into the environment once (no-op without python-dotenv)"""
+    global _env_loaded
+    with _env_lock:
+        if _env_loaded:
+            return
+        _env_loaded = True
+        try:
+            from dotenv import load_dotenv
+        except ImportError:
+            return
+        load_dotenv()
+
+
+def genai():
+    """The google.genai module (loads .env first, for GEMINI_API_KEY)"""
+    load_env()
+    return importlib.import_module('google.genai')
+
+
+def genai_types():
+    """google.genai.types: GenerateContentConfig, ThinkingConfig, HttpOptions, ..."""
+    return importlib.import_module('google.genai.types')
+
+
+def pil_image():
+    """The PIL.Image module"""
+    return importlib.import_module('PIL.Image')
+
+
+def cairosvg():
+    """The cairosvg module (SVG rasterization; also loads the native cairo library)"""
+    return importlib.import_module('cairosvg')
+
+
+def beautiful_soup():
+    """The BeautifulSoup class"""
+    from bs4 import BeautifulSoup
+    return BeautifulSoup
+
+
+def parse_html(markup):
+    """BeautifulSoup(markup, 'html.parser'), importing bs4 on first use"""
+    return beautiful_soup()(markup, 'html.parser')
+
+
+def sync_playwright():
+    """Playwright's sync_playwright() entry point"""
+    from playwright.sync_api import sync_playwright as start
+    return start()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+LLM Backends
+The transport behind LLMService. GeminiBackend talks to the real API; FakeBackend is a
+deterministic offline stand-in (scripted or replayed answers, latency distributions,
+error rates and 429 throttling) for tests and load tests without network or quota.
+"""
+
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+
+class LLMBackend:
+    """Interface: one generate_content call, returning an object with .text (and optionally .usage_metadata)"""
+
+    name = 'backend'
+
+    def generate(self, call_type: str, model: str, contents, config=None):
+        raise NotImplementedError
+
+
+class GeminiBackend(LLMBackend):
+    """The real Gemini API through a google-genai client"""
+
+    name = 'gemini'
+
+    def __init__(self, client):
+        self.client = client
+
+    def generate(self, call_type, model, contents, config=None):
+        return self.client.models.generate_content(model=model, contents=contents, config=config)
+
+
+def _part_fingerprint(part) -> str:
+    """Stable text for one content part (images by pixel hash, so re-encoding does not matter)"""
+    if isinstance(part, str):
+        return part
+    if hasattr(part, 'tobytes'):
+        return f"image:{part.size}:{hashlib.sha256(part.tobytes()).hexdigest()}"
+    if isinstance(part, bytes):
+        return f"bytes:{hashlib.sha256(part).hexdigest()}"
+    return repr(part)
+
+
+def prompt_key(call_type: str, contents) -> str:
+    """Key identifying one LLM request (call type plus every content part; model not included)"""
+    parts = contents if isinstance(contents, list) else [contents]
+    digest = hashlib.sha256(call_type.encode('utf-8'))
+    for part in parts:
+        digest.update(b'\0' + _part_fingerprint(part).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def prompt_text(contents) -> str:
+    """Text parts of a request joined together (images omitted)"""
+    parts = contents if isinstance(contents, list) else [contents]
+    return "\n".join(part for part in parts if isinstance(part, str))
+
+
+class RecordingBackend(LLMBackend):
+    """Passes calls to another backend and appends every answered exchange to a replay file (JSONL)"""
+
+    def __init__(self, backend: LLMBackend, path):
+        self.backend = backend
+        self.path = Path(path)
+        self.name = f"{backend.name} (recording)"
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        return getattr(self.backend, 'client', None)
+
+    def generate(self, call_type, model, contents, config=None):
+        start = time.monotonic()
+        response = self.backend.generate(call_type, model, contents, config)
+        try:
+            text = response.text
+        except Exception:
+            text = None
+        if text is None:
+            return response
+
+        usage = getattr(response, 'usage_metadata', None)
+        record = {
+            'key': prompt_key(call_type, contents),
+            'call_type': call_type,
+            'model': model,
+            'text': text,
+            'prompt_tokens': getattr(usage, 'prompt_token_count', None) if usage else None,
+            'output_tokens': getattr(usage, 'candidates_token_count', None) if usage else None,
+            'latency': round(time.monotonic() - start, 3),
+        }
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return response
+
+
+class FakeAPIError(Exception):
+    """Error raised by FakeBackend; .code is the HTTP status the real API would return"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+def _batch_answer(contents) -> str:
+    """vision_batch default: one description per 'IMAGE n:' part"""
+    count = sum(1 for part in contents if isinstance(part, str) and re.fullmatch(r'IMAGE \d+:', part))
+    return json.dumps([
+        {'index': i, 'skip': False, 'reason': '', 'description': f'Offline description of image {i}.'}
+        for i in range(1, count + 1)
+    ])
+
+
+# Well-formed answers for every call type, so the whole pipeline runs against the fake
+DEFAULT_FAKE_RESPONSES = {
+    'vision': 'Offline description of the image.',
+    'vision_batch': _batch_answer,
+    'image_triage': '{"decision": "describe", "confidence": "high", "reason": "offline"}',
+    'dynamic_check': '{"requires_browser": false, "confidence": "high", "reason": "offline"}',
+    'config': ("extraction:\n  article_content:\n    selector: \"article\"\n    fallback: \"body\"\n"
+               "  title:\n    fallback_selector: \"h1\"\n"),
+    'filter_validation': ('{"status": "approve", "issue_description": "", '
+                          '"filters_to_add": [], "filters_to_remove": []}'),
+    'boundaries': 'has_boundaries: false\n',
+    'boundary_refine': 'has_boundaries: false\n',
+    'boundary_validation': 'status: "ok"\nconfidence: "high"\nfeedback: "offline"\n',
+    'noise': ('noise_categories:\n  - category: "navigation"\n    selector: "nav"\n    reasoning: "offline"\n'
+              'exclude_selectors:\n  - "nav"\n  - "footer"\n'),
+    'validation': 'status: "ok"\nover_removed: []\nunder_removed: []\nfeedback: "offline"\n',
+    'refine': 'add_selectors: []\nremove_selectors: []\nfinal_exclude_list: []\nreasoning: "offline"\n',
+}
+
+
+class LatencyModel:
+    """
+    Latency distribution in seconds, from a spec such as
+    {'distribution': 'lognormal', 'median': 0.8, 'sigma': 0.5}. Distributions:
+    fixed (value), uniform (low, high), normal (mean, stddev), lognormal (median, sigma).
+    """
+
+    def __init__(self, spec: Optional[Dict[str, Any]] = None):
+        self.spec = dict(spec or {'distribution': 'fixed', 'value': 0.0})
+        self.distribution = self.spec.get('distribution', 'fixed')
+        if self.distribution not in ('fixed', 'uniform', 'normal', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution: {self.distribution}")
+
+    def sample(self, rng: random.Random) -> float:
+        spec = self.spec
+        if self.distribution == 'uniform':
+            value = rng.uniform(spec.get('low', 0.0), spec.get('high', 1.0))
+        elif self.distribution == 'normal':
+            value = rng.gauss(spec.get('mean', 1.0), spec.get('stddev', 0.1))
+        elif self.distribution == 'lognormal':
+            value = rng.lognormvariate(math.log(spec.get('median', 1.0)), spec.get('sigma', 0.5))
+        else:
+            value = spec.get('value', 0.0)
+        return max(0.0, min(value, spec.get('max', value)))
+
+
+class FakeBackend(LLMBackend):
+    """
+    Deterministic local stand-in for Gemini.
+    Answers come from, in order: the replay archive (recorded exchanges, matched by prompt_key),
+    the scripted responses (first rule whose call_type and regex match), then
+    DEFAULT_FAKE_RESPONSES. Every random draw uses one seeded generator.
+    """
+
+    name = 'fake'
+
+    def __init__(self, responses: Optional[List[Dict[str, Any]]] = None, replay: Optional[str] = None,
+                 strict_replay: bool = False, latency: Optional[Dict[str, Any]] = None,
+                 latency_by_call_type: Optional[Dict[str, Dict[str, Any]]] = None,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 requests_per_minute: Optional[int] = None, seed: int = 0, time_scale: float = 1.0,
+                 sleep: Callable[[float], None] = time.sleep, clock: Callable[[], float] = time.monotonic):
+        self.responses = []
+        for rule in responses or []:
+            self.responses.append({**rule, 'pattern': re.compile(rule['match'], re.DOTALL) if rule.get('match') else None})
+        self.strict_replay = strict_replay
+        self.latency = LatencyModel(latency)
+        self.latency_by_call_type = {name: LatencyModel(spec) for name, spec in (latency_by_call_type or {}).items()}
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.requests_per_minute = requests_per_minute
+        self.time_scale = time_scale
+        self._sleep = sleep
+        self._clock = clock
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window = deque()
+        self._replay: Dict[str, deque] = {}
+        if replay:
+            self.load_replay(replay)
+
+        self.calls: List[Dict[str, Any]] = []
+        self.stats = {'calls': 0, 'replayed': 0, 'unmatched': 0, 'scripted': 0, 'errors': 0, 'throttled': 0}
+
+    @classmethod
+    def from_file(cls, path, **overrides):
+        """Build from a YAML file with the constructor's keyword arguments (replay paths relative to it)"""
+        import yaml
+        path = Path(path)
+        options = yaml.safe_load(path.read_text(encoding='utf-8')) or {}
+        if options.get('replay') and not Path(options['replay']).is_absolute():
+            options['replay'] = str(path.parent / options['replay'])
+        options.update(overrides)
+        return cls(**options)
+
+    def load_replay(self, path):
+        """Load recorded exchanges (JSONL: key, call_type, text, prompt_tokens, output_tokens)"""
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                self._replay.setdefault(record['key'], deque()).append(record)
+
+    def _draw(self, call_type: str):
+        """All random decisions for one call, drawn under the lock so runs are reproducible"""
+        with self._lock:
+            latency = self.latency_by_call_type.get(call_type, self.latency).sample(self._rng)
+            failure = None
+            now = self._clock()
+            if self.requests_per_minute:
+                while self._window and now - self._window[0] >= 60.0:
+                    self._window.popleft()
+                if len(self._window) >= self.requests_per_minute:
+                    failure = FakeAPIError(429, 'RESOURCE_EXHAUSTED: requests per minute exceeded')
+                else:
+                    self._window.append(now)
+            roll = self._rng.random()
+            if failure is None and roll < self.rate_limit_rate:
+                failure = FakeAPIError(429, 'RESOURCE_EXHAUSTED: quota exceeded')
+            elif failure is None and roll < self.rate_limit_rate + self.error_rate:
+                failure = FakeAPIError(503, 'UNAVAILABLE: the model is overloaded')
+            return latency, failure
+
+    def _answer(self, call_type: str, contents):
+        """(text, usage) for a request"""
+        key = prompt_key(call_type, contents)
+        with self._lock:
+            recorded = self._replay.get(key)
+            if recorded:
+                # Repeated identical requests replay in recorded order; the last one keeps answering
+                record = recorded.popleft() if len(recorded) > 1 else recorded[0]
+                self.stats['replayed'] += 1
+                return record['text'], (record.get('prompt_tokens'), record.get('output_tokens'))
+        if self.strict_replay:
+            raise FakeAPIError(404, f"No recorded response for {call_type} request {key[:12]}")
+        if self._replay:
+            with self._lock:
+                self.stats['unmatched'] += 1
+
+        text = prompt_text(contents)
+        for rule in self.responses:
+            if rule.get('call_type') not in (None, call_type):
+                continue
+            if rule['pattern'] is not None and not rule['pattern'].search(text):
+                continue
+            with self._lock:
+                self.stats['scripted'] += 1
+            return rule['text'], (None, None)
+
+        answer = DEFAULT_FAKE_RESPONSES.get(call_type, 'OK')
+        return (answer(contents) if callable(answer) else answer), (None, None)
+
+    def generate(self, call_type, model, contents, config=None):
+        latency, failure = self._draw(call_type)
+        with self._lock:
+            self.stats['calls'] += 1
+            self.calls.append({'call_type': call_type, 'model': model, 'latency': latency,
+                               'error': failure.code if failure else None})
+
+        if latency and self.time_scale:
+            self._sleep(latency * self.time_scale)
+        if failure is not None:
+            with self._lock:
+                self.stats['throttled' if failure.code == 429 else 'errors'] += 1
+            raise failure
+
+        text, (prompt_tokens, output_tokens) = self._answer(call_type, contents)
+        usage = SimpleNamespace(
+            prompt_token_count=prompt_tokens if prompt_tokens is not None else len(prompt_text(contents)) // 4,
+            candidates_token_count=output_tokens if output_tokens is not None else len(text) // 4,
+            cached_content_token_count=0
+        )
+        return SimpleNamespace(text=text, usage_metadata=usage, candidates=[], prompt_feedback=None)
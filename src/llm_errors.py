@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Error taxonomy for image and LLM calls
+Classifies raw exceptions into retryable and non-retryable classes, each with its own retry policy
+"""
+
+import socket
+import urllib.error
+
+# Finish/block reasons that mean the model refused the content - retrying will not help
+REFUSAL_REASONS = {
+    'SAFETY', 'BLOCKLIST', 'PROHIBITED_CONTENT', 'SPII',
+    'IMAGE_SAFETY', 'IMAGE_PROHIBITED_CONTENT', 'MODEL_ARMOR', 'JAILBREAK'
+}
+
+
+class LLMCallError(Exception):
+    """Base class for classified call failures"""
+
+    category = 'unknown'
+    retryable = True
+    # Fatal errors are about our own request (key, model, config): every later call fails the same way
+    fatal = False
+    max_attempts = 3
+
+    def __init__(self, message, original=None):
+        super().__init__(message)
+        self.original = original
+
+    def retry_delay(self, attempt):
+        """Seconds to wait before retry number `attempt + 1` (attempt is 0-based)"""
+        return 2 ** attempt
+
+
+class NetworkTransientError(LLMCallError):
+    """Connection resets, DNS hiccups, 5xx from a flaky upstream"""
+
+    category = 'network_transient'
+    max_attempts = 3
+
+    def retry_delay(self, attempt):
+        return min(2 ** attempt, 8)
+
+
+class RateLimitError(LLMCallError):
+    """429 / RESOURCE_EXHAUSTED - back off harder and give the quota time to refill"""
+
+    category = 'rate_limit'
+    max_attempts = 4
+
+    def retry_delay(self, attempt):
+        return min(5 * 2 ** attempt, 60)
+
+
+class ServerTimeoutError(LLMCallError):
+    """504 / DEADLINE_EXCEEDED / client-side timeouts (large learning prompts)"""
+
+    category = 'server_timeout'
+    max_attempts = 3
+
+    def retry_delay(self, attempt):
+        return 10 * (attempt + 1)
+
+
+class EmptyResponseError(LLMCallError):
+    """No text and no block or refusal reason - usually a one-off hiccup, so it is retried"""
+
+    category = 'empty_response'
+    max_attempts = 3
+
+    def retry_delay(self, attempt):
+        return min(2 ** attempt, 8)
+
+
+class BadInputError(LLMCallError):
+    """The input itself is unusable: 404 image, unreadable format, invalid request"""
+
+    category = 'bad_input'
+    retryable = False
+    max_attempts = 1
+
+    def retry_delay(self, attempt):
+        return 0
+
+
+class PermanentRefusalError(LLMCallError):
+    """Content-policy refusal or permission failure - the same request will always fail"""
+
+    category = 'permanent_refusal'
+    retryable = False
+    max_attempts = 1
+
+    def retry_delay(self, attempt):
+        return 0
+
+
+class FatalRequestError(LLMCallError):
+    """401/403 or a malformed request: bad API key, unknown model, invalid config - nothing to do with the image"""
+
+    category = 'fatal_request'
+    retryable = False
+    fatal = True
+    max_attempts = 1
+
+    def retry_delay(self, attempt):
+        return 0
+
+
+class CachedContentError(LLMCallError):
+    """The context cache named in the request expired or was deleted - resend without it"""
+
+    category = 'cached_content'
+    retryable = False
+    max_attempts = 1
+
+    def retry_delay(self, attempt):
+        return 0
+
+
+# Words in a 400/404 API message that point at the image we sent rather than at the request
+_IMAGE_ERROR_HINTS = ('image', 'mime', 'inline_data', 'inlinedata', 'blob')
+
+
+def _status_code(exc):
+    """HTTP status code from SDK (APIError.code) or urllib (HTTPError.code) exceptions"""
+    code = getattr(exc, 'code', None)
+    if isinstance(code, int):
+        return code
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(exc):
+    """Map any exception to an LLMCallError subclass instance (returned, not raised)"""
+    if isinstance(exc, LLMCallError):
+        return exc
+
+    message = str(exc)
+    lowered = message.lower()
+    code = _status_code(exc)
+    name = type(exc).__name__
+
+    # Image decoding (PIL) and unsupported formats such as SVG
+    if name in ('UnidentifiedImageError', 'DecompressionBombError'):
+        return BadInputError(f"Unreadable image: {message}", exc)
+
+    if code is not None:
+        if code == 429:
+            return RateLimitError(message, exc)
+        if code in (408, 504):
+            return ServerTimeoutError(message, exc)
+        if code in (401, 403):
+            return PermanentRefusalError(message, exc)
+        if code in (400, 404, 410, 413, 415, 422):
+            return BadInputError(message, exc)
+        if code >= 500:
+            return NetworkTransientError(message, exc)
+
+    if 'resource_exhausted' in lowered or 'rate limit' in lowered or 'quota' in lowered:
+        return RateLimitError(message, exc)
+    if 'deadlineexceeded' in lowered or 'deadline_exceeded' in lowered or 'timeout' in lowered or 'timed out' in lowered:
+        return ServerTimeoutError(message, exc)
+    if isinstance(exc, (socket.timeout, TimeoutError)):
+        return ServerTimeoutError(message or 'Timed out', exc)
+    if isinstance(exc, (urllib.error.URLError, ConnectionError, OSError)) and not isinstance(exc, FileNotFoundError):
+        return NetworkTransientError(message, exc)
+    if name in ('ConnectError', 'ReadError', 'RemoteProtocolError', 'ReadTimeout', 'ConnectTimeout'):
+        if 'Timeout' in name:
+            return ServerTimeoutError(message, exc)
+        return NetworkTransientError(message, exc)
+
+    # Unknown failures keep the previous behaviour: a few quick retries
+    return LLMCallError(message, exc)
+
+
+def classify_llm_error(exc):
+    """
+    classify_error for exceptions raised by the Gemini API itself: 401/403 and request-level
+    400/404 (bad key, unknown model, invalid config) become FatalRequestError, an expired
+    context cache CachedContentError. 400s about the image we sent stay BadInputError;
+    download errors should use classify_error.
+    """
+    if isinstance(exc, LLMCallError):
+        return exc
+    code = _status_code(exc)
+    lowered = str(exc).lower()
+    if code in (400, 403, 404) and ('cachedcontent' in lowered or 'cached content' in lowered):
+        return CachedContentError(str(exc), exc)
+    if code in (401, 403):
+        return FatalRequestError(str(exc), exc)
+    if code in (400, 404) and not any(hint in lowered for hint in _IMAGE_ERROR_HINTS):
+        return FatalRequestError(str(exc), exc)
+    return classify_error(exc)
+
+
+def check_response(response):
+    """
+    Raise PermanentRefusalError if Gemini blocked the prompt or the answer, and the retryable
+    EmptyResponseError for an answer without text but also without a refusal reason
+    """
+    feedback = getattr(response, 'prompt_feedback', None)
+    block_reason = getattr(feedback, 'block_reason', None) if feedback else None
+    if block_reason and _reason_name(block_reason) in REFUSAL_REASONS:
+        raise PermanentRefusalError(f"Prompt blocked: {_reason_name(block_reason)}")
+
+    for candidate in getattr(response, 'candidates', None) or []:
+        finish_reason = getattr(candidate, 'finish_reason', None)
+        if finish_reason and _reason_name(finish_reason) in REFUSAL_REASONS:
+            raise PermanentRefusalError(f"Response blocked: {_reason_name(finish_reason)}")
+
+    if getattr(response, 'text', None) is None:
+        raise EmptyResponseError("Empty response from model")
+    return response
+
+
+def _reason_name(reason):
+    """Enum or string reason -> upper-case name"""
+    return str(getattr(reason, 'name', reason)).split('.')[-1].upper()
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Shared LLM Service
+One Gemini client for the whole process, shared by ArticleExtractor, SiteRegistry and
+InvertedLearner. Owns connection reuse, the concurrency limit, retries, per-call deadlines
+(via DeadlineCaller), the circuit breaker, token and cost accounting (with an optional
+hard budget, see token_budget) and response caching.
+The transport is pluggable (llm_backends): the real API or an offline fake.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+try:
+    from .model_router import ModelRouter
+    from .circuit_breaker import CircuitOpenError, get_circuit_breaker
+    from .llm_errors import FatalRequestError, classify_error, classify_llm_error, check_response
+    from .call_deadlines import DeadlineCaller
+    from .llm_backends import GeminiBackend
+    from .metrics_registry import get_metrics_registry
+    from .token_budget import call_cost
+    from .tracing import SPAN_KIND_CLIENT, current_span, in_context, span
+    from .events import emitter
+    from . import lazy_imports
+except ImportError:
+    from model_router import ModelRouter
+    from circuit_breaker import CircuitOpenError, get_circuit_breaker
+    from llm_errors import FatalRequestError, classify_error, classify_llm_error, check_response
+    from call_deadlines import DeadlineCaller
+    from llm_backends import GeminiBackend
+    from metrics_registry import get_metrics_registry
+    from token_budget import call_cost
+    from tracing import SPAN_KIND_CLIENT, current_span, in_context, span
+    from events import emitter
+    import lazy_imports
+
+_events = emitter('llm')
+
+# Optional Gemini support (google-genai is imported on first use)
+GEMINI_AVAILABLE = lazy_imports.available('google.genai')
+
+# Calls in flight at once across every component (one quota, one limit)
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Text-only responses kept in memory for identical repeated prompts
+DEFAULT_RESPONSE_CACHE_SIZE = 256
+
+
+def default_generation_config():
+    """Config used by the learning calls: low temperature, thinking disabled"""
+    types = lazy_imports.genai_types()
+    return types.GenerateContentConfig(
+        temperature=0.1,
+        top_p=0.95,
+        top_k=40,
+        max_output_tokens=8192,
+        thinking_config=types.ThinkingConfig(thinking_budget=0)
+    )
+
+
+class LLMService:
+    """Every Gemini call in the process goes through one instance of this class"""
+
+    def __init__(self, model_router=None, circuit_breaker=None, deadline_caller=None, hedge_percentile=None,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, response_cache_size=DEFAULT_RESPONSE_CACHE_SIZE,
+                 backend=None, logger=None, metrics_registry=None, budget=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.model_router = model_router or ModelRouter()
+        self.circuit_breaker = circuit_breaker or get_circuit_breaker()
+
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+        # Hedged duplicates count against the same concurrency limit as every other call, and
+        # every request keeps its slot until the API answers (also once its deadline passed)
+        self.deadline_caller = deadline_caller or DeadlineCaller(self.model_router, hedge_percentile=hedge_percentile,
+                                                                 logger=self.logger)
+        if self.deadline_caller.slots is None:
+            self.deadline_caller.slots = self._slots
+        # The losing request of a hedged pair is billed too
+        if self.deadline_caller.on_late_answer is None:
+            self.deadline_caller.on_late_answer = self._record_late_usage
+        self.backend = backend
+        self.budget = budget
+        # First FatalRequestError (bad key, unknown model, invalid config): later calls fail fast
+        self.fatal_error: Optional[FatalRequestError] = None
+
+        self.response_cache_size = response_cache_size
+        self._response_cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.usage: Dict[str, Dict[str, int]] = {}
+
+        # Live metrics (OpenMetrics exposition, see metrics_registry)
+        registry = metrics_registry or get_metrics_registry()
+        self._calls_metric = registry.counter('llm_calls', 'LLM calls by call type and outcome', ('call_type', 'outcome'))
+        self._latency_metric = registry.histogram('llm_call_seconds', 'LLM call latency', ('call_type',))
+        self._inflight_metric = registry.gauge('llm_inflight_calls', 'LLM calls currently in flight', ('call_type',))
+        self._retries_metric = registry.counter('llm_retries', 'LLM call retries by error category', ('call_type', 'category'))
+        self._tokens_metric = registry.counter('llm_tokens', 'LLM tokens by call type and kind', ('call_type', 'kind'))
+        self._cost_metric = registry.counter('llm_cost_usd', 'Estimated LLM cost in USD', ('call_type',))
+        self._cache_metric = registry.counter('llm_response_cache', 'LLM response cache lookups', ('call_type', 'result'))
+        self._cache_ratio_metric = registry.gauge('llm_response_cache_hit_ratio', 'LLM response cache hit ratio',
+                                                  ('call_type',))
+        self._circuit_metric = registry.gauge('llm_circuit_open', '1 while the Gemini circuit breaker is open')
+
+    @property
+    def available(self) -> bool:
+        return self.backend is not None
+
+    @property
+    def degraded(self) -> bool:
+        """True while calls fail fast: circuit open, token budget spent or a fatal request error"""
+        return (self.fatal_error is not None or self.circuit_breaker.is_open
+                or (self.budget is not None and self.budget.exhausted))
+
+    @property
+    def client(self):
+        """The google-genai client behind the backend (None for offline backends)"""
+        return getattr(self.backend, 'client', None)
+
+    @client.setter
+    def client(self, client):
+        self.backend = GeminiBackend(client) if client is not None else None
+        self.fatal_error = None
+
+    def connect(self, api_key=None) -> bool:
+        """Create the shared client (API key from argument or GEMINI_API_KEY). Returns False without a key"""
+        if self.backend is not None:
+            return True
+        if not GEMINI_AVAILABLE:
+            return False
+        genai = lazy_imports.genai()
+        api_key = api_key or os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            return False
+        self.backend = GeminiBackend(genai.Client(api_key=api_key))
+        self.fatal_error = None
+        return True
+
+    def _cache_key(self, call_type, model, contents, config) -> Optional[str]:
+        """Key for text-only prompts; None when the contents include images or other parts"""
+        parts = contents if isinstance(contents, list) else [contents]
+        if not all(isinstance(part, str) for part in parts):
+            return None
+        config_repr = repr(config.model_dump(exclude_none=True)) if hasattr(config, 'model_dump') else repr(config)
+        payload = json.dumps([call_type, model, parts, config_repr])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _record_usage(self, call_type, response=None, cache_hit=False, model=None):
+        with self._lock:
+            stats = self.usage.setdefault(call_type, {
+                'calls': 0, 'cache_hits': 0, 'prompt_tokens': 0, 'output_tokens': 0, 'cached_tokens': 0,
+                'cost_usd': 0.0
+            })
+            if cache_hit:
+                stats['cache_hits'] += 1
+                return
+            stats['calls'] += 1
+            usage = getattr(response, 'usage_metadata', None)
+            if not usage:
+                return
+            tokens = {
+                'prompt': getattr(usage, 'prompt_token_count', 0) or 0,
+                'output': getattr(usage, 'candidates_token_count', 0) or 0,
+                'cached': getattr(usage, 'cached_content_token_count', 0) or 0,
+            }
+            current_span().set_attributes(**{'llm.prompt_tokens': tokens['prompt'],
+                                             'llm.output_tokens': tokens['output'],
+                                             'llm.cached_tokens': tokens['cached']})
+            cost = call_cost(model, tokens['prompt'], tokens['output'], tokens['cached'])
+            stats['prompt_tokens'] += tokens['prompt']
+            stats['output_tokens'] += tokens['output']
+            stats['cached_tokens'] += tokens['cached']
+            stats['cost_usd'] += cost
+        for kind, count in tokens.items():
+            if count:
+                self._tokens_metric.inc(count, call_type=call_type, kind=kind)
+        self._cost_metric.inc(cost, call_type=call_type)
+        current_span().set_attribute('llm.cost_usd', round(cost, 6))
+        if self.budget is not None:
+            self.budget.charge(tokens['prompt'] + tokens['output'], cost)
+
+    def _record_late_usage(self, call_type, response, model=None, **kwargs):
+        """Charge an answer nobody waited for (losing hedge, call abandoned at its deadline)"""
+        self._record_usage(call_type, response, model=model)
+
+    def _record_cache_lookup(self, call_type, hit):
+        self._cache_metric.inc(call_type=call_type, result='hit' if hit else 'miss')
+        hits = self._cache_metric.value(call_type=call_type, result='hit')
+        misses = self._cache_metric.value(call_type=call_type, result='miss')
+        self._cache_ratio_metric.set(hits / (hits + misses), call_type=call_type)
+
+    def generate(self, call_type: str, contents, config=None, model: Optional[str] = None, cache: bool = False):
+        """
+        One Gemini call: routed model, circuit breaker, concurrency limit and deadline.
+        Raises PermanentRefusalError for blocked answers, the retryable EmptyResponseError for empty ones,
+        BudgetExceededError once the token budget is spent and FatalRequestError (from then on) after a bad
+        key or request. With cache=True, identical text-only prompts are answered from memory.
+        """
+        if self.backend is None:
+            raise RuntimeError("Gemini client is not initialized")
+        model = model or self.model_router.model_for(call_type)
+        with span(f"llm {call_type}", SPAN_KIND_CLIENT, **{'llm.call_type': call_type, 'llm.model': model}):
+            return self._generate(call_type, contents, config, model, cache)
+
+    def _generate(self, call_type, contents, config, model, cache):
+        if self.fatal_error is not None:
+            raise FatalRequestError(f"Gemini requests disabled: {self.fatal_error}", self.fatal_error)
+        if self.budget is not None:
+            self.budget.check(call_type)
+        if config is None:
+            config = default_generation_config()
+
+        key = self._cache_key(call_type, model, contents, config) if cache and self.response_cache_size else None
+        if key:
+            with self._lock:
+                cached = self._response_cache.get(key)
+                if cached is not None:
+                    self._response_cache.move_to_end(key)
+            self._record_cache_lookup(call_type, hit=cached is not None)
+            current_span().set_attribute('llm.cache_hit', cached is not None)
+            if cached is not None:
+                self._record_usage(call_type, cache_hit=True)
+                return cached
+
+        # The deadline caller holds a concurrency slot per request (see __init__)
+        with self._inflight_metric.track(call_type=call_type):
+            start = time.monotonic()
+            try:
+                response = self.circuit_breaker.call(
+                    self.deadline_caller.call, call_type,
+                    self.backend.generate, call_type,
+                    model=model,
+                    contents=contents,
+                    config=config
+                )
+                check_response(response)
+            except Exception as e:
+                self._calls_metric.inc(call_type=call_type, outcome='error')
+                error = classify_llm_error(e)
+                if error.fatal:
+                    self._record_fatal(call_type, error)
+                    raise error from e
+                raise
+            finally:
+                self._circuit_metric.set(1 if self.circuit_breaker.is_open else 0)
+        self._latency_metric.observe(time.monotonic() - start, call_type=call_type)
+        self._calls_metric.inc(call_type=call_type, outcome='ok')
+        self._record_usage(call_type, response, model=model)
+
+        if key:
+            with self._lock:
+                self._response_cache[key] = response
+                while len(self._response_cache) > self.response_cache_size:
+                    self._response_cache.popitem(last=False)
+        return response
+
+    def _record_fatal(self, call_type, error):
+        """Stop sending requests: the key, model or config is wrong for every call, not just this one"""
+        with self._lock:
+            first = self.fatal_error is None
+            if first:
+                self.fatal_error = error
+        if first:
+            self.logger.error(f"{call_type}: fatal request error, disabling Gemini calls: {error}")
+            _events.error(f"   ❌ Gemini request rejected ({error}) - check the API key, model and config")
+
+    def retry_delay(self, error: Exception, attempt: int, max_attempts: Optional[int] = None) -> Optional[float]:
+        """Seconds to wait before retrying a failed call, or None if it must not be retried"""
+        if isinstance(error, CircuitOpenError) or self.circuit_breaker.is_open:
+            return None
+        classified = classify_error(error)
+        allowed = classified.max_attempts if max_attempts is None else min(max_attempts, classified.max_attempts)
+        if not classified.retryable or attempt >= allowed - 1:
+            return None
+        return classified.retry_delay(attempt)
+
+    def generate_with_retry(self, call_type: str, contents, config=None, model: Optional[str] = None,
+                            max_attempts: Optional[int] = None, cache: bool = False):
+        """generate() with the retry policy of the classified error (max_attempts caps it)"""
+        attempt = 0
+        while True:
+            try:
+                return self.generate(call_type, contents, config=config, model=model, cache=cache)
+            except Exception as e:
+                delay = self.retry_delay(e, attempt, max_attempts)
+                if delay is None:
+                    raise
+                category = classify_error(e).category
+                self._retries_metric.inc(call_type=call_type, category=category)
+                _events.warning(f"   ⏳ {call_type}: {category} error (attempt {attempt + 1}), retrying in {delay}s...")
+                with span(f"llm backoff {call_type}", **{'llm.call_type': call_type, 'error.category': category,
+                                                        'llm.attempt': attempt + 1, 'retry.delay_s': delay}):
+                    time.sleep(delay)
+                attempt += 1
+
+    async def agenerate_with_retry(self, call_type: str, contents, config=None, model: Optional[str] = None,
+                                   max_attempts: Optional[int] = None, cache: bool = False):
+        """Async generate_with_retry: calls run in the executor, backoff does not block the loop"""
+        loop = asyncio.get_event_loop()
+        attempt = 0
+        while True:
+            try:
+                return await loop.run_in_executor(None, in_context(
+                    self.generate, call_type, contents, config=config, model=model, cache=cache
+                ))
+            except Exception as e:
+                delay = self.retry_delay(e, attempt, max_attempts)
+                if delay is None:
+                    raise
+                category = classify_error(e).category
+                self._retries_metric.inc(call_type=call_type, category=category)
+                self.logger.warning(f"{call_type}: attempt {attempt + 1} failed ({category}): {e}")
+                with span(f"llm backoff {call_type}", **{'llm.call_type': call_type, 'error.category': category,
+                                                        'llm.attempt': attempt + 1, 'retry.delay_s': delay}):
+                    await asyncio.sleep(delay)
+                attempt += 1
+
+    def usage_snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Copy of the per call type counters (diff two snapshots for the usage in between)"""
+        with self._lock:
+            return {name: dict(stats) for name, stats in self.usage.items()}
+
+    def usage_summary(self) -> str:
+        """One-line token summary per call type"""
+        with self._lock:
+            items = sorted(self.usage.items())
+        if not items:
+            return "no LLM calls"
+        return ", ".join(
+            f"{name}: {s['calls']} calls ({s['cache_hits']} cached), {s['prompt_tokens']} in / {s['output_tokens']} out tokens, "
+            f"${s['cost_usd']:.4f}"
+            for name, s in items
+        )
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Local Image Handling
+Fast path for images that need no download or vision call: data: URIs, lazy-load
+placeholders and SVG charts (whose titles, axis labels and values are plain text)
+"""
+
+import base64
+import hashlib
+import html
+import os
+import re
+import tempfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from urllib.parse import unquote_to_bytes
+
+try:
+    from . import lazy_imports
+except ImportError:
+    import lazy_imports
+
+# Optional SVG rasterization (only needed when an SVG has no readable text)
+CAIROSVG_AVAILABLE = lazy_imports.available('cairosvg')
+
+# Decoded images at or below this size are spacer/lazy-load placeholders
+PLACEHOLDER_MAX_BYTES = 100
+PLACEHOLDER_MAX_DIMENSION = 10
+
+# Inline SVGs without text smaller than this are icons, not charts
+MIN_CHART_DIMENSION = 200
+
+# An SVG with at least this many text items is described from its markup alone
+MIN_SVG_TEXT_ITEMS = 3
+
+# Elements that actually draw something (an SVG without them is a placeholder)
+SVG_DRAWING_TAGS = ('path', 'rect', 'circle', 'ellipse', 'line', 'polyline', 'polygon', 'text', 'image', 'use')
+
+MIME_EXTENSIONS = {
+    'image/png': '.png',
+    'image/jpeg': '.jpg',
+    'image/jpg': '.jpg',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'image/svg+xml': '.svg',
+}
+
+
+def decode_data_uri(uri):
+    """Decode a data: URI. Returns (mime_type, bytes), or None if malformed"""
+    if not uri.startswith('data:') or ',' not in uri:
+        return None
+
+    header, payload = uri[5:].split(',', 1)
+    parts = header.split(';')
+    mime_type = (parts[0] or 'text/plain').strip().lower()
+
+    try:
+        if 'base64' in parts[1:]:
+            data = base64.b64decode(html.unescape(payload), validate=False)
+        else:
+            data = unquote_to_bytes(html.unescape(payload))
+    except (ValueError, TypeError):
+        return None
+    return mime_type, data
+
+
+def is_svg(data):
+    """True if the bytes (or text) look like SVG markup"""
+    if isinstance(data, bytes):
+        data = data[:2048].decode('utf-8', errors='ignore')
+    return '<svg' in data[:2048].lower()
+
+
+def raster_dimensions(data):
+    """(width, height) of raster image bytes, or None if unreadable"""
+    try:
+        from io import BytesIO
+        with lazy_imports.pil_image().open(BytesIO(data)) as img:
+            return img.size
+    except Exception:
+        return None
+
+
+def svg_dimensions(markup):
+    """(width, height) from the root svg element's width/height or viewBox, or None"""
+    root_match = re.search(r'<svg\b[^>]*>', markup, re.IGNORECASE)
+    if not root_match:
+        return None
+    root = root_match.group(0)
+
+    width = re.search(r'\swidth=["\']\s*([\d.]+)(?:px)?\s*["\']', root)
+    height = re.search(r'\sheight=["\']\s*([\d.]+)(?:px)?\s*["\']', root)
+    if width and height:
+        return float(width.group(1)), float(height.group(1))
+
+    view_box = re.search(r'viewBox=["\']\s*[-\d.]+[\s,]+[-\d.]+[\s,]+([\d.]+)[\s,]+([\d.]+)', root)
+    if view_box:
+        return float(view_box.group(1)), float(view_box.group(2))
+    return None
+
+
+def is_placeholder(mime_type, data):
+    """True for tiny spacer images and empty SVGs used as lazy-load placeholders"""
+    if len(data) <= PLACEHOLDER_MAX_BYTES and not mime_type.endswith('svg+xml'):
+        return True
+
+    if mime_type.endswith('svg+xml') or is_svg(data):
+        markup = data.decode('utf-8', errors='ignore')
+        drawing = re.search(r'<(?:\w+:)?(?:%s)\b' % '|'.join(SVG_DRAWING_TAGS), markup, re.IGNORECASE)
+        return drawing is None
+
+    dimensions = raster_dimensions(data)
+    if dimensions:
+        width, height = dimensions
+        return width <= PLACEHOLDER_MAX_DIMENSION and height <= PLACEHOLDER_MAX_DIMENSION
+    return False
+
+
+def _local_name(tag):
+    """Tag name without XML namespace"""
+    return tag.rsplit('}', 1)[-1].lower()
+
+
+def _clean_text(text):
+    return re.sub(r'\s+', ' ', html.unescape(text or '')).strip()
+
+
+def extract_svg_text(markup):
+    """
+    Pull readable text out of SVG markup.
+    Returns {'title', 'description', 'axis_labels', 'legend', 'labels'}; text items are
+    grouped by the class names of their element and ancestors (axis/tick, legend, title).
+    """
+    result = {'title': '', 'description': '', 'axis_labels': [], 'legend': [], 'labels': []}
+
+    try:
+        root = ET.fromstring(markup)
+    except ET.ParseError:
+        root = None
+
+    if root is None:
+        # HTML-embedded SVG is not always well-formed XML: plain regex fallback
+        title = re.search(r'<title[^>]*>(.*?)</title>', markup, re.DOTALL | re.IGNORECASE)
+        desc = re.search(r'<desc[^>]*>(.*?)</desc>', markup, re.DOTALL | re.IGNORECASE)
+        result['title'] = _clean_text(re.sub(r'<[^>]+>', ' ', title.group(1))) if title else ''
+        result['description'] = _clean_text(re.sub(r'<[^>]+>', ' ', desc.group(1))) if desc else ''
+        for text_match in re.finditer(r'<text\b[^>]*>(.*?)</text>', markup, re.DOTALL | re.IGNORECASE):
+            text = _clean_text(re.sub(r'<[^>]+>', ' ', text_match.group(1)))
+            if text and text not in result['labels']:
+                result['labels'].append(text)
+        return result
+
+    aria_label = _clean_text(root.get('aria-label'))
+
+    def walk(element, classes):
+        tag = _local_name(element.tag)
+        classes = classes + ' ' + (element.get('class') or '').lower()
+
+        if tag == 'title' and not result['title']:
+            result['title'] = _clean_text(''.join(element.itertext()))
+            return
+        if tag == 'desc' and not result['description']:
+            result['description'] = _clean_text(''.join(element.itertext()))
+            return
+        if tag == 'text':
+            text = _clean_text(' '.join(element.itertext()))
+            if not text:
+                return
+            if 'title' in classes and not result['title']:
+                result['title'] = text
+            elif 'axis' in classes or 'tick' in classes:
+                if text not in result['axis_labels']:
+                    result['axis_labels'].append(text)
+            elif 'legend' in classes:
+                if text not in result['legend']:
+                    result['legend'].append(text)
+            elif text not in result['labels']:
+                result['labels'].append(text)
+            return
+
+        for child in element:
+            walk(child, classes)
+
+    walk(root, '')
+    if not result['title'] and aria_label:
+        result['title'] = aria_label
+    return result
+
+
+def svg_text_count(svg_text):
+    """Number of text items found in an SVG (title and description included)"""
+    return (bool(svg_text['title']) + bool(svg_text['description']) +
+            len(svg_text['axis_labels']) + len(svg_text['legend']) + len(svg_text['labels']))
+
+
+def describe_svg(markup, min_text_items=MIN_SVG_TEXT_ITEMS):
+    """
+    Text description of an SVG chart built from its markup.
+    Returns None when the SVG has too little text to be understood without looking at it.
+    """
+    svg_text = extract_svg_text(markup)
+    if svg_text_count(svg_text) < min_text_items:
+        return None
+
+    lines = ["SVG graphic (text extracted from markup)"]
+    if svg_text['title']:
+        lines.append(f"Title: {svg_text['title']}")
+    if svg_text['description']:
+        lines.append(f"Description: {svg_text['description']}")
+    if svg_text['axis_labels']:
+        lines.append(f"Axis labels: {', '.join(svg_text['axis_labels'])}")
+    if svg_text['legend']:
+        lines.append(f"Legend: {', '.join(svg_text['legend'])}")
+    if svg_text['labels']:
+        lines.append(f"Labels and values: {', '.join(svg_text['labels'])}")
+    return "\n\n".join(lines)
+
+
+def temp_image_path(temp_dir, key, extension):
+    """
+    New empty file in temp_dir for one download: named after a hash of key, plus a random part,
+    so images sharing a basename (or the same image in two concurrent articles) never overwrite each other
+    """
+    temp_dir = Path(temp_dir)
+    temp_dir.mkdir(parents=True, exist_ok=True)
+    prefix = hashlib.sha1(key.encode('utf-8') if isinstance(key, str) else key).hexdigest()[:16] + '_'
+    fd, path = tempfile.mkstemp(suffix=extension, prefix=prefix, dir=temp_dir)
+    os.close(fd)
+    return Path(path)
+
+
+def write_temp_image(data, mime_type, temp_dir):
+    """Write decoded image bytes to a new file in temp_dir. Returns the path"""
+    path = temp_image_path(temp_dir, data, MIME_EXTENSIONS.get(mime_type, '.png'))
+    path.write_bytes(data)
+    return path
+
+
+def rasterize_svg(svg_path, output_path=None, width=1024):
+    """
+    Render an SVG file to PNG for a vision call.
+    Returns the PNG path, or None when rasterization is unavailable or fails.
+    """
+    if not CAIROSVG_AVAILABLE:
+        return None
+    svg_path = Path(svg_path)
+    output_path = Path(output_path) if output_path else svg_path.with_suffix('.png')
+    try:
+        lazy_imports.cairosvg().svg2png(url=str(svg_path), write_to=str(output_path), output_width=width)
+    except Exception:
+        return None
+    return output_path
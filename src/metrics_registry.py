@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Live Metrics Registry
+Counters, gauges and histograms for long-running batch and service runs, exposed in the
+OpenMetrics text format: rewritten to a file (--openmetrics-file) and/or served on a local
+HTTP endpoint (--metrics-port) that Prometheus can scrape.
+"""
+
+import logging
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# Prefix for every metric family of this tool
+NAMESPACE = 'article_extractor'
+
+# Seconds: covers fast local stages up to slow vision and learning calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels(names: Sequence[str], values: Tuple, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    """One metric family; samples are keyed by label values"""
+
+    kind = 'unknown'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, float] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _header(self) -> List[str]:
+        return [f"# TYPE {self.name} {self.kind}", f"# HELP {self.name} {_escape(self.documentation)}"]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [f"{self.name}{_labels(self.labelnames, key)} {_format_value(value)}"
+                                 for key, value in items]
+
+
+class Counter(_Metric):
+    """Monotonic count (exposed as <name>_total)"""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [f"{self.name}_total{_labels(self.labelnames, key)} {_format_value(value)}"
+                                 for key, value in items]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down (in-flight calls, open browsers, ratios)"""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def track(self, **labels):
+        """Context manager: +1 while the block runs"""
+        gauge = self
+
+        class _Tracker:
+            def __enter__(self):
+                gauge.inc(**labels)
+
+            def __exit__(self, *exc):
+                gauge.dec(**labels)
+
+        return _Tracker()
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[Tuple, Dict[str, object]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.setdefault(key, {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series['count'] if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, {'buckets': list(s['buckets']), 'sum': s['sum'], 'count': s['count']})
+                           for key, s in self._series.items())
+        lines = self._header()
+        for key, series in items:
+            for bound, count in zip(self.buckets, series['buckets']):
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, ('le', _format_value(bound)))} {count}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {series['count']}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_format_value(series['sum'])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metric families plus collectors that refresh computed gauges before each exposition"""
+
+    def __init__(self, namespace: str = NAMESPACE, logger=None):
+        self.namespace = namespace
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Callable[[], None]] = {}
+        self._server = None
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        full_name = f"{self.namespace}_{name}" if self.namespace else name
+        with self._lock:
+            metric = self._metrics.get(full_name)
+            if metric is None:
+                metric = self._metrics[full_name] = cls(full_name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {full_name} already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def add_collector(self, name: str, collector: Callable[[], None]):
+        """Callable run before every exposition, e.g. to set gauges computed from other state (replaces `name`)"""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def render(self) -> str:
+        """OpenMetrics text exposition of every family"""
+        with self._lock:
+            collectors = list(self._collectors.values())
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        for collector in collectors:
+            try:
+                collector()
+            except Exception as e:
+                self.logger.warning(f"Metrics collector failed: {e}")
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def write_file(self, path) -> Path:
+        """Rewrite the exposition file atomically (for node_exporter's textfile collector or tailing)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        tmp_path.write_text(self.render(), encoding='utf-8')
+        tmp_path.replace(path)
+        return path
+
+    def serve(self, port: int, host: str = '127.0.0.1'):
+        """Serve /metrics on a daemon thread. Returns the (host, port) actually bound"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                registry.logger.debug(f"metrics endpoint: {format % args}")
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='metrics-endpoint', daemon=True).start()
+        return self._server.server_address[:2]
+
+    def shutdown(self):
+        """Stop the HTTP endpoint, if running"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# Shared registry for every component in this process
+_shared_registry = None
+_shared_lock = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Return the process-wide metrics registry"""
+    global _shared_registry
+    with _shared_lock:
+        if _shared_registry is None:
+            _shared_registry = MetricsRegistry()
+        return _shared_registry
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Model Tiering Router
+Sends cheap yes/no decisions to a lighter Gemini model and escalates to the full model only when needed
+"""
+
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import yaml
+
+FULL_MODEL = 'gemini-2.5-flash'
+LIGHT_MODEL = 'gemini-2.5-flash-lite'
+
+# Per call type: which model to use, which model to escalate to on low confidence / failure,
+# the call deadline in seconds and whether slow calls may be hedged (see call_deadlines.py).
+# This is the only copy of the defaults; config/model_routes.yaml lists overrides only
+DEFAULT_ROUTES = {
+    # Image description (article_extractor)
+    'vision': {'model': FULL_MODEL, 'timeout': 60, 'hedge': True},
+    # Several images per request (--batch-images)
+    'vision_batch': {'model': FULL_MODEL, 'timeout': 120},
+    # Skip-vs-describe check before the full description; low confidence escalates to the 'vision' route
+    # (on by default: a light-model call is far cheaper than describing chrome with the full model).
+    # Single-image path only: a 'vision_batch' request already decides skip-vs-describe per image
+    'image_triage': {'model': LIGHT_MODEL, 'enabled': True, 'timeout': 20, 'hedge': True},
+
+    # Site learning (site_registry)
+    'dynamic_check': {'model': LIGHT_MODEL, 'escalate_to': FULL_MODEL, 'timeout': 30, 'hedge': True},
+    'config': {'model': FULL_MODEL, 'timeout': 120},
+    'filter_validation': {'model': FULL_MODEL, 'timeout': 90},
+
+    # Inverted learning (inverted_learning) - large prompts get long deadlines and no hedging
+    'boundaries': {'model': FULL_MODEL, 'timeout': 180},
+    'boundary_refine': {'model': FULL_MODEL, 'timeout': 180},
+    'boundary_validation': {'model': LIGHT_MODEL, 'escalate_to': FULL_MODEL, 'timeout': 45, 'hedge': True},
+    'noise': {'model': FULL_MODEL, 'timeout': 180},
+    'validation': {'model': FULL_MODEL, 'timeout': 120},
+    'refine': {'model': FULL_MODEL, 'timeout': 180},
+}
+
+
+class ModelRouter:
+    """Resolves the Gemini model for each call type and handles escalation"""
+
+    def __init__(self, routes_file="config/model_routes.yaml", routes=None, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.routes = {name: dict(route) for name, route in DEFAULT_ROUTES.items()}
+        self.stats = {}
+
+        overrides = routes if routes is not None else self._load_routes_file(routes_file)
+        for name, route in (overrides or {}).items():
+            if isinstance(route, str):
+                route = {'model': route}
+            self.routes.setdefault(name, {'model': FULL_MODEL}).update(route or {})
+
+    def _load_routes_file(self, routes_file):
+        """Load per call type overrides from YAML (missing file means defaults)"""
+        if not routes_file:
+            return {}
+        path = Path(routes_file)
+        if not path.exists():
+            return {}
+        try:
+            with open(path, 'r') as f:
+                data = yaml.safe_load(f) or {}
+            return data.get('routes', {})
+        except Exception as e:
+            self.logger.warning(f"Failed to load model routes from {path}: {e}")
+            return {}
+
+    def get_route(self, call_type: str) -> Dict[str, Any]:
+        """Route for a call type (unknown call types go to the full model)"""
+        return self.routes.get(call_type, {'model': FULL_MODEL})
+
+    def model_for(self, call_type: str) -> str:
+        """Primary model for a call type"""
+        return self.get_route(call_type).get('model', FULL_MODEL)
+
+    def escalation_for(self, call_type: str) -> Optional[str]:
+        """Model to escalate to, or None if the route does not escalate"""
+        escalate_to = self.get_route(call_type).get('escalate_to')
+        if escalate_to and escalate_to != self.model_for(call_type):
+            return escalate_to
+        return None
+
+    def is_enabled(self, call_type: str) -> bool:
+        """Optional call types (like image triage) can be switched off per route"""
+        return self.get_route(call_type).get('enabled', True)
+
+    def record(self, call_type: str, key: str = 'calls'):
+        """Count a routed call (or an escalation) for the summary"""
+        stats = self.stats.setdefault(call_type, {'calls': 0, 'escalations': 0})
+        stats[key] += 1
+
+    def run(self, call_type: str, generate: Callable[[str], Any],
+            parse: Optional[Callable[[Any], Any]] = None) -> Tuple[Any, Any]:
+        """
+        Call `generate(model)` with the route's model.
+        Escalates once when the call raises or `parse(response)` returns None
+        (unparseable or low-confidence answer).
+        Returns (response, parsed)
+        """
+        model = self.model_for(call_type)
+        escalate_to = self.escalation_for(call_type)
+        self.record(call_type, 'calls')
+
+        try:
+            response = generate(model)
+            parsed = parse(response) if parse else response
+            if parsed is not None or not escalate_to:
+                return response, parsed
+            self.logger.info(f"{call_type}: low-confidence answer from {model}, escalating to {escalate_to}")
+        except Exception as e:
+            if not escalate_to:
+                raise
+            self.logger.info(f"{call_type}: {model} failed ({e}), escalating to {escalate_to}")
+
+        self.record(call_type, 'escalations')
+        response = generate(escalate_to)
+        parsed = parse(response) if parse else response
+        return response, parsed
+
+    def summary(self) -> str:
+        """One-line summary of routed calls and escalations"""
+        parts = [f"{name}: {s['calls']} ({s['escalations']} escalated)" for name, s in sorted(self.stats.items())]
+        return ", ".join(parts) if parts else "no routed calls"
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Per-Stage Profiling (--profile)
+Traces each pipeline stage with its own cProfile profile (nested stages such as learning
+inside extraction are attributed exclusively) and samples the pipeline thread's call stack
+into flamegraph-compatible collapsed stacks, rooted at the active stage names.
+When profiling is off no profiler exists and stages cost one attribute check.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Seconds between stack samples of the pipeline thread
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+# Functions listed in the per-stage text reports
+REPORT_TOP_FUNCTIONS = 40
+
+# Sampled stacks start at the pipeline entry point (frames above it are the same for every sample)
+ROOT_FUNCTIONS = ('process_article', '_run_article')
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StageProfiler:
+    """cProfile per stage plus a stack sampler; only the thread that runs the pipeline is profiled"""
+
+    def __init__(self, sample_interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.sample_interval = sample_interval
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        self._wall: Dict[str, float] = {}
+        self._stack: List[tuple] = []
+        self._folded: Counter = Counter()
+        self._lock = threading.Lock()
+        self._thread_id: Optional[int] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Profile a block as `name`; the enclosing stage is paused meanwhile"""
+        if self._thread_id is None:
+            self._thread_id = threading.get_ident()
+            self._start_sampler()
+        if threading.get_ident() != self._thread_id:
+            # Worker threads (vision calls, downloads) are not traced
+            yield
+            return
+
+        if self._stack:
+            self._stack[-1][1].disable()
+        profile = self._profiles.setdefault(name, cProfile.Profile())
+        with self._lock:
+            self._stack.append((name, profile))
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._wall[name] = self._wall.get(name, 0.0) + time.perf_counter() - start
+            with self._lock:
+                self._stack.pop()
+            if self._stack:
+                self._stack[-1][1].enable()
+
+    def _start_sampler(self):
+        if self.sample_interval <= 0:
+            return
+        self._sampler = threading.Thread(target=self._sample_loop, name='stage-profiler', daemon=True)
+        self._sampler.start()
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.sample_interval):
+            with self._lock:
+                stages = [name for name, _ in self._stack]
+            if not stages:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            frames = []
+            while frame is not None:
+                frames.append(frame)
+                if frame.f_code.co_name in ROOT_FUNCTIONS:
+                    break
+                frame = frame.f_back
+            stack = stages + [_frame_label(f) for f in reversed(frames)]
+            with self._lock:
+                self._folded[';'.join(stack)] += 1
+
+    def stop(self):
+        """Stop the stack sampler"""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join(timeout=1)
+
+    def cpu_seconds(self, name: str) -> float:
+        """Traced time of a stage (its own code and everything it called)"""
+        profile = self._profiles.get(name)
+        if profile is None:
+            return 0.0
+        return pstats.Stats(profile).total_tt
+
+    def write(self, output_dir) -> List[Path]:
+        """
+        Write <stage>.prof (pstats/snakeviz), <stage>.txt (top functions by cumulative time)
+        and stages.folded (flamegraph.pl / speedscope) into output_dir
+        """
+        self.stop()
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+        for name, profile in sorted(self._profiles.items()):
+            prof_path = output_dir / f"{name}.prof"
+            profile.dump_stats(prof_path)
+            report = io.StringIO()
+            stats = pstats.Stats(profile, stream=report)
+            report.write(f"Stage {name}: {self._wall.get(name, 0.0):.3f}s wall, {stats.total_tt:.3f}s traced\n")
+            stats.sort_stats('cumulative').print_stats(REPORT_TOP_FUNCTIONS)
+            txt_path = output_dir / f"{name}.txt"
+            txt_path.write_text(report.getvalue(), encoding='utf-8')
+            written.extend([prof_path, txt_path])
+
+        with self._lock:
+            folded = sorted(self._folded.items())
+        folded_path = output_dir / 'stages.folded'
+        folded_path.write_text(''.join(f"{stack} {count}\n" for stack, count in folded), encoding='utf-8')
+        written.append(folded_path)
+        return written
+
+    def summary(self) -> str:
+        """One line per stage: wall time and traced time"""
+        return ', '.join(f"{name} {self._wall.get(name, 0.0):.2f}s wall / {self.cpu_seconds(name):.2f}s traced"
+                         for name in sorted(self._profiles))
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Extraction Service (--serve)
+A long-running local HTTP API, on a TCP port or a unix socket, around one ArticleExtractor.
+The Gemini client and its connection pool, the parsed site configs, the image cache and a
+pooled headless browser stay warm across requests instead of being rebuilt per invocation.
+Results are returned from memory; nothing is written to the output directory unless sinks are given.
+One pipeline thread processes articles from a bounded queue; when the queue is full, requests
+are refused with 503 and Retry-After (backpressure) instead of piling up.
+
+Endpoints:
+    POST /extract   {"url": "...", "html": "<optional page HTML>", "format": "markdown" | "json"}
+    GET  /health    queue depth and request counts
+    GET  /metrics   OpenMetrics exposition of the shared registry
+"""
+
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Sequence
+
+try:
+    from .events import emitter
+    from .metrics_registry import CONTENT_TYPE as OPENMETRICS_CONTENT_TYPE
+except ImportError:
+    from events import emitter
+    from metrics_registry import CONTENT_TYPE as OPENMETRICS_CONTENT_TYPE
+
+_events = emitter('service')
+
+DEFAULT_PORT = 8765
+
+# Articles waiting for the pipeline thread before new requests get 503
+DEFAULT_MAX_QUEUE = 16
+
+# Seconds a request waits for its article (the article keeps running after a 504)
+DEFAULT_REQUEST_TIMEOUT = 600.0
+
+# Seconds suggested to refused clients
+RETRY_AFTER_SECONDS = 5
+
+# Per-article metrics records kept in memory (the --metrics file keeps all of them)
+RECORD_WINDOW = 1000
+
+# Largest accepted request body (raw HTML included)
+MAX_BODY_BYTES = 20 * 1024 * 1024
+
+
+class QueueFullError(Exception):
+    """The service is at capacity; the client should retry later"""
+
+
+class ExtractionService:
+    """Serializes articles through one warm extractor; submit() returns a Future per article"""
+
+    def __init__(self, extractor, max_queue: int = DEFAULT_MAX_QUEUE,
+                 request_timeout: float = DEFAULT_REQUEST_TIMEOUT, sinks: Sequence = ()):
+        self.extractor = extractor
+        self.request_timeout = request_timeout
+        # Result sinks per article (see article_result); none = in memory only
+        self.sinks = tuple(sinks)
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._worker: Optional[threading.Thread] = None
+        self.stats = {'accepted': 0, 'rejected': 0, 'succeeded': 0, 'failed': 0}
+        self._stats_lock = threading.Lock()
+
+        extractor.metrics.limit_records(RECORD_WINDOW)
+        registry = extractor.metrics_registry
+        self._requests_metric = registry.counter('service_requests', 'Service requests by outcome', ('outcome',))
+        queue_depth = registry.gauge('service_queue_depth', 'Articles waiting for the pipeline thread')
+        registry.add_collector('service_queue_depth', lambda: queue_depth.set(self._queue.qsize()))
+
+    def _count(self, outcome: str):
+        with self._stats_lock:
+            self.stats[outcome] += 1
+        self._requests_metric.inc(outcome=outcome)
+
+    def start(self):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name='extraction-pipeline', daemon=True)
+            self._worker.start()
+        return self
+
+    def submit(self, url: str, html: Optional[str] = None) -> Future:
+        """Queue one article; raises QueueFullError when the queue is full"""
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((url, html, future))
+        except queue.Full:
+            self._count('rejected')
+            raise QueueFullError(f"{self._queue.maxsize} articles already queued")
+        self._count('accepted')
+        return future
+
+    def _run(self):
+        # The pipeline thread owns the warm browser (Playwright is bound to one thread)
+        self.extractor.enable_browser_pool()
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    break
+                url, html, future = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(self._process(url, html))
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            self.extractor.close()
+
+    def _process(self, url: str, html: Optional[str]) -> Dict[str, Any]:
+        result = self.extractor.extract_article(url, html=html, sinks=self.sinks)
+        self._count('succeeded' if result.ok else 'failed')
+        return result.to_dict()
+
+    def health(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {'status': 'ok', 'queued': self._queue.qsize(), 'max_queue': self._queue.maxsize, **stats}
+
+    def stop(self, timeout: float = 30.0):
+        """Finish queued articles, then stop the pipeline thread"""
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join(timeout)
+            self._worker = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service: ExtractionService = None
+
+    def _send(self, status: int, body, content_type: str = 'application/json', headers=None):
+        if not isinstance(body, (bytes, str)):
+            body = json.dumps(body, ensure_ascii=False, default=str)
+        data = body.encode('utf-8') if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == '/health':
+            self._send(200, self.service.health())
+        elif path == '/metrics':
+            self._send(200, self.service.extractor.metrics_registry.render(), OPENMETRICS_CONTENT_TYPE)
+        else:
+            self._send(404, {'error': f"Unknown path {path}"})
+
+    def do_POST(self):
+        if self.path.split('?')[0] != '/extract':
+            self._send(404, {'error': f"Unknown path {self.path}"})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            self._send(413, {'error': f"Request body over {MAX_BODY_BYTES} bytes"})
+            return
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError as e:
+            self._send(400, {'error': f"Invalid JSON: {e}"})
+            return
+        url = request.get('url') if isinstance(request, dict) else None
+        output_format = request.get('format', 'markdown') if isinstance(request, dict) else None
+        if not url or output_format not in ('markdown', 'json'):
+            self._send(400, {'error': 'Expected {"url": ..., "html": optional, "format": "markdown" | "json"}'})
+            return
+
+        try:
+            future = self.service.submit(url, request.get('html'))
+        except QueueFullError as e:
+            self._send(503, {'error': str(e)}, headers={'Retry-After': str(RETRY_AFTER_SECONDS)})
+            return
+        try:
+            result = future.result(timeout=self.service.request_timeout)
+        except FutureTimeoutError:
+            self._send(504, {'error': f"Article not finished after {self.service.request_timeout:.0f}s", 'url': url})
+            return
+        except Exception as e:
+            self._send(500, {'error': str(e), 'url': url})
+            return
+
+        succeeded = result['status'] == 'success'
+        if output_format == 'json':
+            self._send(200 if succeeded else 422, result)
+        elif succeeded:
+            self._send(200, result['markdown'], 'text/markdown; charset=utf-8')
+        else:
+            self._send(422, {'error': result['error'], 'url': url})
+
+    def log_message(self, format, *args):
+        self.service.extractor.logger.debug(f"service: {format % args}")
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP over a unix socket (local clients only, no TCP port)"""
+
+    daemon_threads = True
+
+    def server_bind(self):
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        return request, ('unix', 0)
+
+
+def make_server(service: ExtractionService, port: int = DEFAULT_PORT, host: str = '127.0.0.1',
+                socket_path=None) -> socketserver.BaseServer:
+    """HTTP server for the service on host:port, or on socket_path when given"""
+    handler = type('ServiceHandler', (_Handler,), {'service': service})
+    if socket_path:
+        socket_path = str(socket_path)
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        return UnixHTTPServer(socket_path, handler)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def run_service(extractor, port: int = DEFAULT_PORT, host: str = '127.0.0.1', socket_path=None,
+                max_queue: int = DEFAULT_MAX_QUEUE, request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+                sinks: Sequence = ()):
+    """Serve until interrupted (Ctrl+C), then finish queued articles"""
+    service = ExtractionService(extractor, max_queue=max_queue, request_timeout=request_timeout,
+                                sinks=sinks).start()
+    server = make_server(service, port=port, host=host, socket_path=socket_path)
+    where = socket_path or f"http://{server.server_address[0]}:{server.server_address[1]}"
+    _events.info(f"🛰️  Serving extraction on {where} (POST /extract, GET /health, GET /metrics; queue {max_queue})")
+    started = time.monotonic()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+        service.stop()
+    health = service.health()
+    _events.info(f"🛰️  Service stopped after {time.monotonic() - started:.0f}s: {health['succeeded']} succeeded, "
+                 f"{health['failed']} failed, {health['rejected']} rejected")
+    return service
@@ -4,90 +4,80 @@ Site Registry with LLM-powered learning
 Automatically learns how to extract articles from new sites
 """
 
+import copy
 import os
+import threading
 import yaml
 import json
 import re
 from pathlib import Path
 from urllib.parse import urlparse
 from datetime import datetime
-from bs4 import BeautifulSoup
 try:
     from .extraction_engine import ExtractionEngine
+    from .circuit_breaker import CircuitOpenError
+    from .llm_errors import classify_error
+    from .image_rules import learn_image_rules
+    from .inverted_learning import LEARNING_DEFERRED, InvertedLearner
+    from .llm_service import LLMService
+    from .events import emitter
+    from . import lazy_imports
 except ImportError:
     from extraction_engine import ExtractionEngine
+    from circuit_breaker import CircuitOpenError
+    from llm_errors import classify_error
+    from image_rules import learn_image_rules
+    from inverted_learning import LEARNING_DEFERRED, InvertedLearner
+    from llm_service import LLMService
+    from events import emitter
+    import lazy_imports
 
-# Optional Gemini support
-GEMINI_AVAILABLE = False
-try:
-    from google import genai
-    from google.genai.types import GenerateContentConfig, ThinkingConfig
-    from dotenv import load_dotenv
-    load_dotenv()
-    GEMINI_AVAILABLE = True
-except ImportError:
-    pass
+# Optional Gemini and Playwright support (imported on first use, see lazy_imports)
+GEMINI_AVAILABLE = lazy_imports.available('google.genai', 'dotenv')
+PLAYWRIGHT_AVAILABLE = lazy_imports.available('playwright')
 
-# Optional Playwright support
-PLAYWRIGHT_AVAILABLE = False
-try:
-    from playwright.sync_api import sync_playwright
-    PLAYWRIGHT_AVAILABLE = True
-except ImportError:
-    pass
+_events = emitter('site_registry')
 
 
 class SiteRegistry:
     """Manages site-specific extraction configurations with LLM learning"""
     
-    def __init__(self, config_dir="config/sites", use_gemini=True):
+    def __init__(self, config_dir="config/sites", use_gemini=True, llm=None):
         self.config_dir = Path(config_dir)
         self.config_dir.mkdir(parents=True, exist_ok=True)
+        # Parsed configs by domain, reused while the file is unchanged (mtime and size)
+        self._config_cache = {}
+        self._config_cache_lock = threading.Lock()
         self.use_gemini = use_gemini and GEMINI_AVAILABLE
-        self.gemini_client = None
         self.request_timeout_s = 60  # LLM call target timeout
         self.extraction_engine = ExtractionEngine()
         
-        if self.use_gemini:
-            api_key = os.getenv('GEMINI_API_KEY')
-            if api_key:
-                try:
-                    self.gemini_client = genai.Client(api_key=api_key)
-                    print("✓ Gemini learning enabled (2.5 Flash - thinking disabled)")
-                except Exception as e:
-                    print(f"⚠️  Gemini init failed: {e}")
-                    self.use_gemini = False
-
-    def _generate_with_retry(self, contents, max_retries=2):
-        """Call Gemini with basic retry and extended timeout budget."""
-        if not self.gemini_client:
-            raise RuntimeError("Gemini client is not initialized")
-        last_err = None
-        for attempt in range(max_retries):
+        # Shared LLM service (client, limits, retries, deadlines); standalone use builds its own
+        self.llm = llm or LLMService()
+        self.model_router = self.llm.model_router
+        self.circuit_breaker = self.llm.circuit_breaker
+        
+        if self.use_gemini and not self.llm.available:
             try:
-                # Configure with thinking disabled for faster responses
-                config = GenerateContentConfig(
-                    temperature=0.1,
-                    top_p=0.95,
-                    top_k=40,
-                    max_output_tokens=8192,
-                    thinking_config=ThinkingConfig(thinking_budget=0)
-                )
-                response = self.gemini_client.models.generate_content(
-                    model='gemini-2.5-flash',
-                    contents=contents,
-                    config=config
-                )
-                return response
+                if self.llm.connect():
+                    _events.info("✓ Gemini learning enabled (2.5 Flash - thinking disabled)")
             except Exception as e:
-                last_err = e
-                print(f"   ❌ LLM call failed (attempt {attempt+1}/{max_retries}): {e}")
-                if attempt < max_retries - 1:
-                    import time
-                    backoff = min(5 * (attempt + 1), 10)
-                    print(f"   ⏳ Retrying after {backoff}s...")
-                    time.sleep(backoff)
-        raise last_err
+                _events.warning(f"⚠️  Gemini init failed: {e}")
+                self.use_gemini = False
+
+    @property
+    def gemini_client(self):
+        """The shared service's Gemini client (None when Gemini is unavailable)"""
+        return self.llm.client
+
+    def _generate_with_retry(self, contents, max_retries=2, call_type='config', model=None, cache=False):
+        """Call Gemini through the shared service, retrying per the classified error."""
+        try:
+            return self.llm.generate_with_retry(call_type, contents, model=model, max_attempts=max_retries,
+                                                cache=cache)
+        except Exception as e:
+            _events.error(f"   ❌ LLM call failed ({classify_error(e).category}): {e}")
+            raise
     
     def get_domain_from_url(self, url):
         """Extract domain from URL"""
@@ -103,7 +93,7 @@ class SiteRegistry:
         if not html_content:
             return html_content
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = lazy_imports.parse_html(html_content)
         
         # Only remove script and style elements (keep everything else for now)
         for element in soup(['script', 'style', 'noscript']):
@@ -128,30 +118,66 @@ class SiteRegistry:
         """Get path to config file for domain"""
         return self.config_dir / f"{domain}.yaml"
     
-    def load_config(self, domain):
-        """Load site configuration from YAML"""
+    def load_config(self, domain, verbose=True):
+        """Load site configuration from YAML (parsed once per file version; callers get their own copy)"""
         config_path = self.get_config_path(domain)
         
-        if not config_path.exists():
+        try:
+            stat = config_path.stat()
+        except FileNotFoundError:
             return None
-        
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
-        
-        print(f"✓ Loaded config for {domain}")
+        version = (stat.st_mtime_ns, stat.st_size)
+        
+        with self._config_cache_lock:
+            cached = self._config_cache.get(domain)
+        if cached is not None and cached[0] == version:
+            config = copy.deepcopy(cached[1])
+        else:
+            with open(config_path, 'r') as f:
+                config = yaml.safe_load(f)
+            with self._config_cache_lock:
+                self._config_cache[domain] = (version, copy.deepcopy(config))
+        
+        if verbose:
+            _events.info(f"✓ Loaded config for {domain}")
         return config
     
-    def save_config(self, domain, config):
+    def save_config(self, domain, config, update_timestamp=True):
         """Save site configuration to YAML"""
         config_path = self.get_config_path(domain)
         
-        # Add timestamp
-        config['learned_at'] = datetime.now().isoformat()
+        # Add timestamp (only when the extraction rules were (re)learned)
+        if update_timestamp:
+            config['learned_at'] = datetime.now().isoformat()
         
         with open(config_path, 'w') as f:
             yaml.dump(config, f, default_flow_style=False, sort_keys=False)
         
-        print(f"💾 Saved config for {domain}")
+        if update_timestamp:
+            _events.info(f"💾 Saved config for {domain}")
+    
+    def record_image_decisions(self, domain, decisions):
+        """
+        Accumulate one article's SKIP / describe vision decisions into the site's `images`
+        section, promote recurring chrome images to skip rules and drop rules that matched a
+        described image. Returns the rule changes.
+        """
+        config = self.load_config(domain, verbose=False)
+        if not config or not decisions:
+            return []
+        
+        images_config = config.get('images') or {}
+        before = copy.deepcopy(images_config)
+        promoted = learn_image_rules(images_config, decisions)
+        if images_config == before:
+            # Nothing learned (no evidence keys, no sizes): keep the file and its parsed copy
+            return promoted
+        config['images'] = images_config
+        self.save_config(domain, config, update_timestamp=False)
+        
+        if promoted:
+            _events.info(f"   🧹 Updated image rules for {domain}: {', '.join(promoted)}")
+        return promoted
     
     def extract_with_config(self, html_content, config):
         """Extract article content using site config"""
@@ -163,7 +189,7 @@ class SiteRegistry:
         Ask LLM if the HTML looks like it requires JavaScript rendering.
         Returns (is_dynamic, reason)
         """
-        if not self.use_gemini or not self.gemini_client:
+        if not self.use_gemini or not self.llm.available:
             return False, "LLM not available"
         
         # Sample the HTML (first 5000 chars is usually enough)
@@ -194,29 +220,48 @@ Respond in JSON format:
 Only JSON, no other text."""
 
         try:
-            response = self._generate_with_retry(prompt)
-            response_text = response.text.strip()
+            # Cheap model first; escalate on low confidence or an unparseable answer
+            response, result = self.model_router.run(
+                'dynamic_check',
+                lambda model: self._generate_with_retry(prompt, call_type='dynamic_check', model=model, cache=True),
+                parse=self._parse_dynamic_check
+            )
             
-            # Try to extract JSON
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
+            if result is None:
+                # Escalated answer was low-confidence too - use it if it parsed at all
+                result = self._parse_dynamic_check(response, allow_low_confidence=True)
+            
+            if result:
                 requires_browser = result.get('requires_browser', False)
                 reason = result.get('reason', 'Unknown')
                 confidence = result.get('confidence', 'unknown')
                 
                 if requires_browser:
-                    print(f"   🌐 Detected dynamic content (confidence: {confidence})")
-                    print(f"      Reason: {reason}")
+                    _events.info(f"   🌐 Detected dynamic content (confidence: {confidence})")
+                    _events.info(f"      Reason: {reason}")
                 
                 return requires_browser, reason
             
             return False, "Could not parse LLM response"
             
         except Exception as e:
-            print(f"   ⚠️  Dynamic content check failed: {e}")
+            _events.warning(f"   ⚠️  Dynamic content check failed: {e}")
             return False, str(e)
     
+    @staticmethod
+    def _parse_dynamic_check(response, allow_low_confidence=False):
+        """Parse the dynamic content verdict. Returns None if unparseable or low-confidence"""
+        json_match = re.search(r'\{.*\}', response.text.strip(), re.DOTALL)
+        if not json_match:
+            return None
+        try:
+            result = json.loads(json_match.group())
+        except json.JSONDecodeError:
+            return None
+        if not allow_low_confidence and str(result.get('confidence', '')).lower() == 'low':
+            return None
+        return result
+    
     @staticmethod
     def fetch_with_browser(url, timeout=30000):
         """
@@ -227,12 +272,12 @@ Only JSON, no other text."""
             return False, None, "Playwright not installed. Install with: pip install playwright && playwright install"
         
         try:
-            print(f"   🌐 Launching headless browser...")
-            with sync_playwright() as p:
+            _events.info(f"   🌐 Launching headless browser...")
+            with lazy_imports.sync_playwright() as p:
                 browser = p.chromium.launch(headless=True)
                 page = browser.new_page()
                 
-                print(f"   📄 Loading page with JavaScript...")
+                _events.info(f"   📄 Loading page with JavaScript...")
                 page.goto(url, timeout=timeout, wait_until='networkidle')
                 
                 # Wait a bit more for any async content
@@ -241,7 +286,7 @@ Only JSON, no other text."""
                 html_content = page.content()
                 browser.close()
                 
-                print(f"   ✅ Fetched {len(html_content)} bytes (browser-rendered)")
+                _events.info(f"   ✅ Fetched {len(html_content)} bytes (browser-rendered)")
                 return True, html_content, None
                 
         except Exception as e:
@@ -255,13 +300,12 @@ Only JSON, no other text."""
         if not self.use_gemini:
             return False, None, "Gemini not available for learning"
         
+        if self.llm.degraded:
+            # Defer learning until the API recovers instead of saving a half-learned config
+            return False, None, LEARNING_DEFERRED
+        
         # Use inverted learning approach
-        try:
-            from .inverted_learning import InvertedLearner
-        except ImportError:
-            from inverted_learning import InvertedLearner
-        learner = InvertedLearner(use_gemini=True)
-        learner.gemini_client = self.gemini_client  # Reuse our initialized client
+        learner = InvertedLearner(use_gemini=True, llm=self.llm)  # Reuse the shared client
         
         success, config, error = learner.learn_from_html(url, html_content)
         
@@ -274,6 +318,19 @@ Only JSON, no other text."""
         
         return success, config, error
     
+    def _structure_summary(self, html_content):
+        """Tag counts and key elements of a page, for the learning debug output"""
+        soup = lazy_imports.parse_html(html_content)
+        lines = [f"   - Total elements: {len(soup.find_all())}"]
+        for tag in ('article', 'main', 'h1', 'h2', 'p', 'div'):
+            lines.append(f"   - {tag.capitalize()} tags: {len(soup.find_all(tag))}")
+        for tag in ('article', 'main'):
+            if soup.find(tag):
+                lines.append(f"   - {tag.capitalize()} tag found: {soup.find(tag).get('class', 'no-class')}")
+        if soup.find('h1'):
+            lines.append(f"   - H1 found: '{soup.find('h1').get_text()[:100]}...'")
+        return '\n'.join(lines)
+    
     def learn_from_html_old(self, url, html_content, force=False, requires_browser=False):
         """
         Learn extraction rules from HTML using Gemini.
@@ -281,117 +338,105 @@ Only JSON, no other text."""
         """
         domain = self.get_domain_from_url(url)
         
-        print(f"\n{'='*80}")
-        print(f"🧠 LEARNING EXTRACTION RULES FOR {domain.upper()}")
-        print(f"{'='*80}")
-        print(f"URL: {url}")
-        print(f"HTML Content Length: {len(html_content):,} characters")
-        print(f"Force Mode: {force}")
-        print(f"Requires Browser: {requires_browser}")
+        _events.info(f"\n{'='*80}")
+        _events.info(f"🧠 LEARNING EXTRACTION RULES FOR {domain.upper()}")
+        _events.info(f"{'='*80}")
+        _events.info(f"URL: {url}")
+        _events.info(f"HTML Content Length: {len(html_content):,} characters")
+        _events.info(f"Force Mode: {force}")
+        _events.info(f"Requires Browser: {requires_browser}")
         
         # Check if config exists
         if not force:
             existing_config = self.load_config(domain)
             if existing_config:
-                print(f"✓ Config exists for {domain} (use --force-renew to recreate)")
+                _events.info(f"✓ Config exists for {domain} (use --force-renew to recreate)")
                 return True, existing_config, None
         
         if not self.use_gemini:
             return False, None, "Gemini not available - cannot learn new site"
         
-        print(f"\n🔍 ANALYZING HTML STRUCTURE WITH AI...")
-        
-        # Log HTML structure analysis
-        soup = BeautifulSoup(html_content, 'html.parser')
-        print(f"\n📊 HTML STRUCTURE ANALYSIS:")
-        print(f"   - Total elements: {len(soup.find_all())}")
-        print(f"   - Article tags: {len(soup.find_all('article'))}")
-        print(f"   - Main tags: {len(soup.find_all('main'))}")
-        print(f"   - H1 tags: {len(soup.find_all('h1'))}")
-        print(f"   - H2 tags: {len(soup.find_all('h2'))}")
-        print(f"   - P tags: {len(soup.find_all('p'))}")
-        print(f"   - Div tags: {len(soup.find_all('div'))}")
-        
-        # Show some key elements
-        print(f"\n🔍 KEY ELEMENTS FOUND:")
-        if soup.find('article'):
-            print(f"   - Article tag found: {soup.find('article').get('class', 'no-class')}")
-        if soup.find('main'):
-            print(f"   - Main tag found: {soup.find('main').get('class', 'no-class')}")
-        if soup.find('h1'):
-            print(f"   - H1 found: '{soup.find('h1').get_text()[:100]}...'")
+        _events.info(f"\n🔍 ANALYZING HTML STRUCTURE WITH AI...")
+        
+        # Log HTML structure analysis (debug only: it parses the whole page)
+        _events.detail('HTML STRUCTURE ANALYSIS', lambda: self._structure_summary(html_content))
         
         # Ask Gemini to analyze the site
         max_iterations = 6
         feedback = None  # Initialize feedback variable
         
         for iteration in range(max_iterations):
-            print(f"\n{'='*60}")
-            print(f"🔄 ITERATION {iteration + 1}/{max_iterations}")
-            print(f"{'='*60}")
+            _events.info(f"\n{'='*60}")
+            _events.info(f"🔄 ITERATION {iteration + 1}/{max_iterations}")
+            _events.info(f"{'='*60}")
             
             # First iteration: learn extraction rules
             if iteration == 0:
-                print(f"\n🤖 ASKING GEMINI FOR INITIAL CONFIG...")
+                _events.info(f"\n🤖 ASKING GEMINI FOR INITIAL CONFIG...")
                 config = self._ask_gemini_for_config(html_content, domain)
                 if not config:
-                    print(f"❌ FAILED: No config returned from Gemini")
+                    _events.error(f"❌ FAILED: No config returned from Gemini")
                     return False, None, "Failed to get config from Gemini"
                 
-                print(f"\n✅ GEMINI CONFIG RECEIVED:")
-                print(f"   Domain: {config.get('domain', 'NOT SET')}")
-                print(f"   Article selector: {config.get('extraction', {}).get('article_content', {}).get('selector', 'NOT SET')}")
-                print(f"   Fallback selector: {config.get('extraction', {}).get('article_content', {}).get('fallback', 'NOT SET')}")
-                print(f"   Exclude selectors: {len(config.get('extraction', {}).get('article_content', {}).get('exclude_selectors', []))}")
+                _events.info(f"\n✅ GEMINI CONFIG RECEIVED:")
+                _events.info(f"   Domain: {config.get('domain', 'NOT SET')}")
+                _events.info(f"   Article selector: {config.get('extraction', {}).get('article_content', {}).get('selector', 'NOT SET')}")
+                _events.info(f"   Fallback selector: {config.get('extraction', {}).get('article_content', {}).get('fallback', 'NOT SET')}")
+                _events.info(f"   Exclude selectors: {len(config.get('extraction', {}).get('article_content', {}).get('exclude_selectors', []))}")
                 
                 # Add requires_browser flag if detected
                 if requires_browser:
                     config['requires_browser'] = True
-                    print(f"   Requires browser: {requires_browser}")
+                    _events.info(f"   Requires browser: {requires_browser}")
             else:
-                print(f"\n🤖 ASKING GEMINI FOR IMPROVED CONFIG...")
+                _events.info(f"\n🤖 ASKING GEMINI FOR IMPROVED CONFIG...")
                 old_config = config.copy()
                 config = self._ask_gemini_for_better_config(html_content, domain, old_config, feedback or "Extraction failed")
                 if not config:
-                    print(f"❌ FAILED: No improved config returned from Gemini")
+                    _events.error(f"❌ FAILED: No improved config returned from Gemini")
                     config = old_config  # Fallback to old config
                 else:
-                    print(f"\n✅ IMPROVED CONFIG RECEIVED:")
-                    print(f"   Article selector: {config.get('extraction', {}).get('article_content', {}).get('selector', 'NOT SET')}")
-                    print(f"   Exclude selectors: {len(config.get('extraction', {}).get('article_content', {}).get('exclude_selectors', []))}")
+                    _events.info(f"\n✅ IMPROVED CONFIG RECEIVED:")
+                    _events.info(f"   Article selector: {config.get('extraction', {}).get('article_content', {}).get('selector', 'NOT SET')}")
+                    _events.info(f"   Exclude selectors: {len(config.get('extraction', {}).get('article_content', {}).get('exclude_selectors', []))}")
             
             # Extract content using learned rules (HTML, not converted to MD yet)
-            print(f"\n🔍 TESTING EXTRACTION WITH CURRENT CONFIG...")
+            _events.info(f"\n🔍 TESTING EXTRACTION WITH CURRENT CONFIG...")
             extracted_html = self.extract_with_config(html_content, config)
             
             if not extracted_html:
-                print("❌ EXTRACTION FAILED: No content returned (selector too strict)")
-                print(f"   Current selector: {config.get('extraction', {}).get('article_content', {}).get('selector', 'NOT SET')}")
-                print(f"   Current fallback: {config.get('extraction', {}).get('article_content', {}).get('fallback', 'NOT SET')}")
+                _events.error("❌ EXTRACTION FAILED: No content returned (selector too strict)")
+                _events.info(f"   Current selector: {config.get('extraction', {}).get('article_content', {}).get('selector', 'NOT SET')}")
+                _events.info(f"   Current fallback: {config.get('extraction', {}).get('article_content', {}).get('fallback', 'NOT SET')}")
                 feedback = "No content extracted - selector too strict"
                 # On next iteration, validation will detect this and suggest removing filters
                 continue
             
-            print(f"✅ EXTRACTION SUCCESSFUL:")
-            print(f"   Extracted content length: {len(extracted_html):,} characters")
-            print(f"   First 200 chars: {extracted_html[:200]}...")
-            print(f"   Last 200 chars: ...{extracted_html[-200:]}")
+            _events.info(f"✅ EXTRACTION SUCCESSFUL:")
+            _events.info(f"   Extracted content length: {len(extracted_html):,} characters")
+            _events.detail('EXTRACTED CONTENT (first/last 200 chars)',
+                           lambda: f"{extracted_html[:200]}\n...\n{extracted_html[-200:]}")
             
             # NEW: Validate by comparing original vs extracted HTML
-            print(f"\n🔍 VALIDATING EXTRACTION QUALITY...")
+            _events.info(f"\n🔍 VALIDATING EXTRACTION QUALITY...")
             is_valid, feedback, filter_changes = self._validate_and_suggest_filters(
                 html_content, extracted_html, config
             )
             
+            if is_valid is None:
+                # Not validated: keep the old config (if any) rather than saving an unchecked one
+                _events.info(f"⏸️  {feedback}\n")
+                return False, None, feedback
+            
             if is_valid:
-                print("✅ EXTRACTION VALIDATED SUCCESSFULLY!")
+                _events.info("✅ EXTRACTION VALIDATED SUCCESSFULLY!")
                 # Add requires_browser flag before saving
                 if requires_browser:
                     config['requires_browser'] = True
                 self.save_config(domain, config)
                 return True, config, None
             else:
-                print(f"⚠️  VALIDATION ISSUE: {feedback}")
+                _events.warning(f"⚠️  VALIDATION ISSUE: {feedback}")
                 
                 if iteration < max_iterations - 1:
                     # Apply filter adjustments iteratively
@@ -400,43 +445,43 @@ Only JSON, no other text."""
                         filters_to_remove = filter_changes.get('remove', [])
                         
                         if filters_to_add or filters_to_remove:
-                            print(f"\n🔄 APPLYING FILTER ADJUSTMENTS...")
+                            _events.info(f"\n🔄 APPLYING FILTER ADJUSTMENTS...")
                             if filters_to_add:
-                                print(f"   ➕ Adding {len(filters_to_add)} exclusions: {filters_to_add}")
+                                _events.info(f"   ➕ Adding {len(filters_to_add)} exclusions: {filters_to_add}")
                             if filters_to_remove:
-                                print(f"   ➖ Removing {len(filters_to_remove)} exclusions: {filters_to_remove}")
+                                _events.info(f"   ➖ Removing {len(filters_to_remove)} exclusions: {filters_to_remove}")
                             
                             # Apply adjustments to config
                             article_config = config.get('extraction', {}).get('article_content', {})
                             current_excludes = article_config.get('exclude_selectors', [])
                             
-                            print(f"\n📋 FILTER ADJUSTMENT DETAILS:")
-                            print(f"   Before: {len(current_excludes)} exclude selectors")
+                            _events.info(f"\n📋 FILTER ADJUSTMENT DETAILS:")
+                            _events.info(f"   Before: {len(current_excludes)} exclude selectors")
                             if current_excludes:
-                                print(f"   Current excludes: {current_excludes[:10]}{'...' if len(current_excludes) > 10 else ''}")
+                                _events.info(f"   Current excludes: {current_excludes[:10]}{'...' if len(current_excludes) > 10 else ''}")
                             
                             # Remove filters
                             for selector in filters_to_remove:
                                 if selector in current_excludes:
                                     current_excludes.remove(selector)
-                                    print(f"   🗑️  Removed: {selector}")
+                                    _events.info(f"   🗑️  Removed: {selector}")
                                 else:
-                                    print(f"   ⚠️  Not found to remove: {selector}")
+                                    _events.warning(f"   ⚠️  Not found to remove: {selector}")
                             
                             # Add new filters (avoid duplicates)
                             for selector in filters_to_add:
                                 if selector not in current_excludes:
                                     current_excludes.append(selector)
-                                    print(f"   ✅ Added: {selector}")
+                                    _events.info(f"   ✅ Added: {selector}")
                                 else:
-                                    print(f"   ⏭️  Skipped (duplicate): {selector}")
+                                    _events.info(f"   ⏭️  Skipped (duplicate): {selector}")
                             
                             article_config['exclude_selectors'] = current_excludes
                             
-                            print(f"\n📋 AFTER ADJUSTMENT:")
-                            print(f"   New count: {len(current_excludes)} exclude selectors")
+                            _events.info(f"\n📋 AFTER ADJUSTMENT:")
+                            _events.info(f"   New count: {len(current_excludes)} exclude selectors")
                             if current_excludes:
-                                print(f"   New excludes: {current_excludes[-10:]}{'...' if len(current_excludes) > 10 else ''}")
+                                _events.info(f"   New excludes: {current_excludes[-10:]}{'...' if len(current_excludes) > 10 else ''}")
                             
                             # Keep the same selector, just update exclusions
                             if 'extraction' not in config:
@@ -445,16 +490,16 @@ Only JSON, no other text."""
                                 config['extraction']['article_content'] = {}
                             config['extraction']['article_content'] = article_config
                         else:
-                            print("   ⚠️  No filter changes suggested, but extraction has issues")
+                            _events.warning("   ⚠️  No filter changes suggested, but extraction has issues")
                     else:
-                        print("   ⚠️  Validation did not return filter suggestions")
+                        _events.warning("   ⚠️  Validation did not return filter suggestions")
                 else:
-                    print(f"\n❌ MAX ITERATIONS REACHED - LEARNING FAILED")
+                    _events.error(f"\n❌ MAX ITERATIONS REACHED - LEARNING FAILED")
         
         # Failed after max iterations
-        print(f"\n{'='*80}")
-        print(f"❌ LEARNING FAILED AFTER {max_iterations} ATTEMPTS")
-        print(f"{'='*80}")
+        _events.info(f"\n{'='*80}")
+        _events.error(f"❌ LEARNING FAILED AFTER {max_iterations} ATTEMPTS")
+        _events.info(f"{'='*80}")
         return False, None, f"Failed to learn valid rules after {max_iterations} attempts"
     
     def _ask_gemini_for_config(self, html_content, domain):
@@ -462,7 +507,7 @@ Only JSON, no other text."""
         # Truncate HTML for cost efficiency (keep first 15000 chars - should include full article)
         # Clean HTML first to remove irrelevant fragments
         cleaned_html = self.clean_html_for_learning(html_content)
-        print(f"   HTML cleaned: {len(html_content):,} -> {len(cleaned_html):,} characters")
+        _events.debug(f"   HTML cleaned: {len(html_content):,} -> {len(cleaned_html):,} characters")
         
         # Take a larger sample of cleaned HTML for analysis (first 200k chars)
         html_sample = cleaned_html[:200000]
@@ -592,19 +637,13 @@ Steps:
 Provide the YAML configuration:"""
 
         try:
-            print(f"\n📤 SENDING TO GEMINI:")
-            print(f"   Domain: {domain}")
-            print(f"   HTML sample length: {len(html_sample):,} characters")
-            print(f"   System prompt length: {len(system_prompt):,} characters")
-            print(f"   User prompt length: {len(user_prompt):,} characters")
-            print(f"\n🔍 FULL SYSTEM PROMPT:")
-            print("="*80)
-            print(system_prompt)
-            print("="*80)
-            print(f"\n🔍 FULL USER PROMPT:")
-            print("="*80)
-            print(user_prompt)
-            print("="*80)
+            _events.info(f"\n📤 SENDING TO GEMINI:")
+            _events.info(f"   Domain: {domain}")
+            _events.debug(f"   HTML sample length: {len(html_sample):,} characters")
+            _events.debug(f"   System prompt length: {len(system_prompt):,} characters")
+            _events.debug(f"   User prompt length: {len(user_prompt):,} characters")
+            _events.detail('FULL SYSTEM PROMPT', system_prompt)
+            _events.detail('FULL USER PROMPT', user_prompt)
             
             # Use Flash model with retry wrapper
             response = self._generate_with_retry([
@@ -613,50 +652,42 @@ Provide the YAML configuration:"""
             ])
             
             response_text = response.text.strip()
-            print(f"\n📥 GEMINI RESPONSE:")
-            print(f"   Response length: {len(response_text):,} characters")
-            print(f"\n🔍 FULL GEMINI RESPONSE:")
-            print("="*80)
-            print(response_text)
-            print("="*80)
+            _events.llm_exchange('config', len(system_prompt) + len(user_prompt), response_text)
             
             # Extract YAML from response
             yaml_match = re.search(r'```yaml\n(.*?)\n```', response_text, re.DOTALL)
             if yaml_match:
                 yaml_text = yaml_match.group(1)
-                print(f"   ✅ Found YAML in code fences")
+                _events.info(f"   ✅ Found YAML in code fences")
             else:
                 # Try without code fences
                 yaml_text = response_text
-                print(f"   ⚠️  No code fences found, using full response")
+                _events.warning(f"   ⚠️  No code fences found, using full response")
             
-            print(f"\n🔍 PARSING YAML:")
-            print(f"   YAML text length: {len(yaml_text):,} characters")
-            print(f"   YAML preview: {yaml_text[:500]}...")
+            _events.detail(f"PARSING YAML ({len(yaml_text):,} characters, preview)", yaml_text[:500])
             
             # Parse YAML
             config = yaml.safe_load(yaml_text)
             
             if config:
-                print(f"   ✅ YAML parsed successfully")
-                print(f"   Config keys: {list(config.keys())}")
+                _events.info(f"   ✅ YAML parsed successfully")
+                _events.debug(f"   Config keys: {list(config.keys())}")
             else:
-                print(f"   ❌ YAML parsing returned None")
+                _events.error(f"   ❌ YAML parsing returned None")
             
             return config
             
         except Exception as e:
-            print(f"   ❌ Error getting config from Gemini: {e}")
-            print(f"   Exception type: {type(e).__name__}")
+            _events.error(f"   ❌ Error getting config from Gemini: {e}")
             import traceback
-            print(f"   Traceback: {traceback.format_exc()}")
+            _events.detail(f"TRACEBACK ({type(e).__name__})", traceback.format_exc)
             return None
     
     def _ask_gemini_for_better_config(self, html_content, domain, old_config, issue):
         """Ask Gemini Pro to improve the config based on issue"""
         # Clean HTML first to remove irrelevant fragments
         cleaned_html = self.clean_html_for_learning(html_content)
-        print(f"   HTML cleaned: {len(html_content):,} -> {len(cleaned_html):,} characters")
+        _events.debug(f"   HTML cleaned: {len(html_content):,} -> {len(cleaned_html):,} characters")
         
         # Take a larger sample of cleaned HTML for analysis (first 200k chars)
         html_sample = cleaned_html[:200000]
@@ -749,14 +780,8 @@ Your task:
 4. Return ONLY the corrected YAML config (same schema)."""
 
         try:
-            print(f"\n🔍 FULL IMPROVED CONFIG SYSTEM PROMPT:")
-            print("="*80)
-            print(system_prompt)
-            print("="*80)
-            print(f"\n🔍 FULL IMPROVED CONFIG USER PROMPT:")
-            print("="*80)
-            print(user_prompt)
-            print("="*80)
+            _events.detail('FULL IMPROVED CONFIG SYSTEM PROMPT', system_prompt)
+            _events.detail('FULL IMPROVED CONFIG USER PROMPT', user_prompt)
             
             # Use Flash model
             response = self._generate_with_retry([
@@ -765,12 +790,7 @@ Your task:
             ])
             
             response_text = response.text.strip()
-            print(f"\n📥 IMPROVED CONFIG GEMINI RESPONSE:")
-            print(f"   Response length: {len(response_text):,} characters")
-            print(f"\n🔍 FULL IMPROVED CONFIG GEMINI RESPONSE:")
-            print("="*80)
-            print(response_text)
-            print("="*80)
+            _events.llm_exchange('improved_config', len(system_prompt) + len(user_prompt), response_text)
             
             # Extract YAML
             yaml_match = re.search(r'```yaml\n(.*?)\n```', response_text, re.DOTALL)
@@ -783,19 +803,23 @@ Your task:
             return config
             
         except Exception as e:
-            print(f"   ❌ Error getting improved config: {e}")
+            _events.error(f"   ❌ Error getting improved config: {e}")
             return old_config  # Return old config as fallback
     
     def _validate_and_suggest_filters(self, original_html, extracted_html, current_config):
         """
         Validate extraction by comparing original vs cleaned HTML.
-        Returns (is_valid, feedback, suggested_filter_changes)
+        Returns (is_valid, feedback, suggested_filter_changes); is_valid is None when validation
+        is deferred because the API is degraded (circuit open, token budget spent, fatal error)
         
         The LLM sees both versions and suggests filter adjustments.
         """
         if not self.use_gemini:
             return True, None, None  # Skip validation if no Gemini
         
+        if self.llm.degraded:
+            return None, LEARNING_DEFERRED, None
+        
         # Sample start, middle, and END (to catch "Recommended" sections)
         html_len = len(original_html)
         content_len = len(extracted_html)
@@ -869,50 +893,45 @@ Analyze and provide filter adjustments:"""
 
         try:
             # Log the prompt being sent
-            print(f"\n   📤 SENDING TO LLM:")
-            print(f"   System prompt length: {len(system_prompt)} chars")
-            print(f"   User prompt length: {len(user_prompt)} chars")
-            print(f"   Original HTML sample length: {len(original_sample)} chars")
-            print(f"   Extracted HTML sample length: {len(extracted_sample)} chars")
+            _events.info(f"\n   📤 SENDING TO LLM:")
+            _events.debug(f"   System prompt length: {len(system_prompt)} chars")
+            _events.debug(f"   User prompt length: {len(user_prompt)} chars")
+            _events.debug(f"   Original HTML sample length: {len(original_sample)} chars")
+            _events.debug(f"   Extracted HTML sample length: {len(extracted_sample)} chars")
             
             response = self._generate_with_retry([
                 system_prompt,
                 user_prompt
-            ])
+            ], call_type='filter_validation')
             
             result = response.text.strip()
             
             # Log the raw response
-            print(f"\n   📥 LLM RESPONSE:")
-            print(f"   Response length: {len(result)} chars")
-            print(f"   First 500 chars: {result[:500]}")
-            if len(result) > 500:
-                print(f"   Last 300 chars: {result[-300:]}")
+            _events.llm_exchange('filter_validation', len(system_prompt) + len(user_prompt), result)
             
             # Try to extract JSON with filter suggestions
             json_match = re.search(r'\{.*\}', result, re.DOTALL)
             if json_match:
                 json_str = json_match.group()
-                print(f"\n   🔍 PARSED JSON:")
-                print(f"   {json_str[:800]}")
+                _events.detail('PARSED JSON', json_str[:800])
                 
                 validation_result = json.loads(json_str)
                 status = validation_result.get('status', '').lower()
                 
-                print(f"\n   ✨ EXTRACTED FILTERS:")
-                print(f"   Status: {status}")
+                _events.info(f"\n   ✨ EXTRACTED FILTERS:")
+                _events.info(f"   Status: {status}")
                 
                 if status == 'approve':
-                    print(f"   ✅ Approved - no changes needed")
+                    _events.info(f"   ✅ Approved - no changes needed")
                     return True, None, None
                 else:
                     issue = validation_result.get('issue_description', 'Unknown issue')
                     filters_to_add = validation_result.get('filters_to_add', [])
                     filters_to_remove = validation_result.get('filters_to_remove', [])
                     
-                    print(f"   Issue: {issue}")
-                    print(f"   Filters to add ({len(filters_to_add)}): {filters_to_add}")
-                    print(f"   Filters to remove ({len(filters_to_remove)}): {filters_to_remove}")
+                    _events.info(f"   Issue: {issue}")
+                    _events.info(f"   Filters to add ({len(filters_to_add)}): {filters_to_add}")
+                    _events.info(f"   Filters to remove ({len(filters_to_remove)}): {filters_to_remove}")
                     
                     return False, issue, {
                         'add': filters_to_add,
@@ -926,7 +945,10 @@ Analyze and provide filter adjustments:"""
                     return False, result, None
                 
         except Exception as e:
-            print(f"   ❌ Validation error: {e}")
+            if isinstance(e, CircuitOpenError) or self.llm.degraded:
+                # The API is unavailable, not the extraction at fault: validate on a later run
+                return None, LEARNING_DEFERRED, None
+            _events.error(f"   ❌ Validation error: {e}")
             return True, None, None  # Assume OK if validation fails
 
 
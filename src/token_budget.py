@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Token Costs and Budget
+Prices Gemini usage per model and enforces an optional hard budget (tokens and/or USD) for a run.
+Once the budget is spent every further LLM call fails fast with BudgetExceededError and the
+pipeline degrades to its non-AI paths: context-based image descriptions, no new site learning.
+"""
+
+import threading
+from typing import Optional
+
+try:
+    from .circuit_breaker import CircuitOpenError
+except ImportError:
+    from circuit_breaker import CircuitOpenError
+
+# USD per 1M tokens: (input, output, cached input). Unknown models are priced as gemini-2.5-flash
+MODEL_PRICES = {
+    'gemini-2.5-flash': (0.30, 2.50, 0.075),
+    'gemini-2.5-flash-lite': (0.10, 0.40, 0.025),
+    'gemini-2.5-pro': (1.25, 10.00, 0.31),
+}
+DEFAULT_MODEL_PRICE = MODEL_PRICES['gemini-2.5-flash']
+
+
+def call_cost(model: Optional[str], prompt_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+    """Estimated USD cost of one call (cached prompt tokens are billed at the cached rate)"""
+    input_price, output_price, cached_price = MODEL_PRICES.get(model or '', DEFAULT_MODEL_PRICE)
+    uncached = max(0, prompt_tokens - cached_tokens)
+    return (uncached * input_price + cached_tokens * cached_price + output_tokens * output_price) / 1_000_000
+
+
+class BudgetExceededError(CircuitOpenError):
+    """Raised instead of calling the API once the run's token budget is spent (handled like an open circuit)"""
+
+
+class TokenBudget:
+    """Hard cap on the tokens (prompt + output) and/or estimated USD spent by a run (None = unlimited)"""
+
+    def __init__(self, max_tokens: Optional[int] = None, max_cost: Optional[float] = None):
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+        self.tokens = 0
+        self.cost = 0.0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def exhausted(self) -> bool:
+        with self._lock:
+            return ((self.max_tokens is not None and self.tokens >= self.max_tokens) or
+                    (self.max_cost is not None and self.cost >= self.max_cost))
+
+    def charge(self, tokens: int, cost: float):
+        """Account one finished call (the call that crosses the limit still completes)"""
+        with self._lock:
+            self.tokens += tokens
+            self.cost += cost
+
+    def check(self, call_type: str):
+        """Raise BudgetExceededError when the budget is spent"""
+        if self.exhausted:
+            with self._lock:
+                self.rejected += 1
+            raise BudgetExceededError(f"{call_type} call skipped: token budget exhausted ({self.summary()})")
+
+    def summary(self) -> str:
+        with self._lock:
+            tokens = f"{self.tokens:,}" + (f"/{self.max_tokens:,}" if self.max_tokens is not None else '')
+            cost = f"${self.cost:.4f}" + (f"/${self.max_cost:.2f}" if self.max_cost is not None else '')
+            return f"{tokens} tokens, {cost} spent, {self.rejected} calls skipped"
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Span-Based Tracing
+Parent/child spans for every pipeline stage and external call (curl, browser, image
+downloads, LLM calls and retry backoff), exported to a local file as OTLP/JSON: one line per
+article trace, the format the OpenTelemetry collector's file exporter writes and reads, so
+traces can be loaded into Jaeger, Tempo or any OTLP viewer for a timeline view.
+Tracing is off unless configure_tracing() is called; spans are then shared no-ops.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+SERVICE_NAME = 'article-extractor'
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+def _otlp_value(value) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class Span:
+    """One timed operation; children find it through the current context"""
+
+    def __init__(self, name: str, parent: Optional['Span'] = None, kind: int = SPAN_KIND_INTERNAL,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.events: List[Dict[str, Any]] = []
+        self.status_code = STATUS_OK
+        self.status_message = ''
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, **attributes):
+        self.events.append({'name': name, 'time_ns': time.time_ns(), 'attributes': attributes})
+
+    def record_error(self, error: BaseException):
+        self.status_code = STATUS_ERROR
+        self.status_message = str(error)[:300]
+        self.add_event('exception', **{'exception.type': type(error).__name__,
+                                       'exception.message': str(error)[:300]})
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns or time.time_ns()),
+            'attributes': _otlp_attributes(self.attributes),
+            'status': {'code': self.status_code, **({'message': self.status_message} if self.status_message else {})},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        if self.events:
+            span['events'] = [{'name': e['name'], 'timeUnixNano': str(e['time_ns']),
+                               'attributes': _otlp_attributes(e['attributes'])} for e in self.events]
+        return span
+
+
+class _NoopSpan:
+    """Returned while tracing is off: every method does nothing"""
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+    def add_event(self, name, **attributes):
+        pass
+
+    def record_error(self, error):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Collects finished spans per trace and appends each trace as one OTLP/JSON line when its root ends"""
+
+    def __init__(self, trace_file, service_name: str = SERVICE_NAME):
+        self.trace_file = Path(trace_file)
+        self.trace_file.parent.mkdir(parents=True, exist_ok=True)
+        self.service_name = service_name
+        self._lock = threading.Lock()
+        self._pending: Dict[str, List[Span]] = {}
+        self.exported_traces = 0
+
+    @contextmanager
+    def span(self, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+        parent = _current_span.get()
+        span = Span(name, parent, kind, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            self._finish(span)
+
+    def _finish(self, span: Span):
+        with self._lock:
+            spans = self._pending.setdefault(span.trace_id, [])
+            spans.append(span)
+            if span.parent_id is not None:
+                return
+            # Root ended: export the whole trace (late children, e.g. abandoned calls, follow on their own)
+            del self._pending[span.trace_id]
+            self._export(spans)
+
+    def flush(self):
+        """Export spans whose root has not ended (e.g. at interpreter exit)"""
+        with self._lock:
+            for spans in self._pending.values():
+                self._export(spans)
+            self._pending.clear()
+
+    def _export(self, spans: List[Span]):
+        payload = {'resourceSpans': [{
+            'resource': {'attributes': _otlp_attributes({'service.name': self.service_name})},
+            'scopeSpans': [{'scope': {'name': 'article_extractor.tracing'},
+                            'spans': [span.to_otlp() for span in sorted(spans, key=lambda s: s.start_ns)]}]
+        }]}
+        with open(self.trace_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(payload, ensure_ascii=False) + '\n')
+        self.exported_traces += 1
+
+
+_tracer: Optional[Tracer] = None
+
+
+def configure_tracing(trace_file=None) -> Optional[Tracer]:
+    """Enable tracing to trace_file (None disables it). Returns the active tracer"""
+    global _tracer
+    if _tracer is not None:
+        _tracer.flush()
+    _tracer = Tracer(trace_file) if trace_file else None
+    return _tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+@contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    """Child of the current span (or a new trace); a shared no-op while tracing is off"""
+    tracer = _tracer
+    if tracer is None:
+        yield NOOP_SPAN
+        return
+    with tracer.span(name, kind, **attributes) as current:
+        yield current
+
+
+def current_span():
+    """The active span, or the no-op span"""
+    return _current_span.get() or NOOP_SPAN
+
+
+def in_context(func, *args, **kwargs):
+    """Bind func to the current context, so executor threads keep the caller's parent span"""
+    return functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for per-article stage metrics (no network, no API key)
+"""
+
+import io
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image
+
+from src import article_extractor
+from src.article_extractor import ArticleExtractor
+from src.article_metrics import ArticleMetrics, MetricsRecorder, percentile, usage_delta
+from src.llm_backends import FakeBackend
+
+ARTICLE_URL = 'https://www.example.com/blog/churn'
+ARTICLE_HTML = """<html><head><title>Churn benchmarks</title></head>
+<body><article>
+<h1>Churn benchmarks</h1>
+<p>Net revenue retention is the single most important SaaS metric for growth-stage companies.</p>
+<figure><img src="https://example.com/img/churn.png" width="800" height="500" alt="Churn by segment">
+<figcaption>Figure 1: Churn by segment</figcaption></figure>
+<p>Enterprise customers churn far less than SMB customers over a three year horizon.</p>
+<p>Segment-level churn matters because blended averages hide the cohorts that drive expansion revenue.
+A company with strong enterprise retention can absorb high SMB churn for years, while the reverse mix
+quietly caps growth no matter how much new business the sales team brings in each quarter.</p>
+</article></body></html>"""
+
+
+class CurlResult:
+    returncode = 0
+    stderr = ''
+
+    def __init__(self, stdout):
+        self.stdout = stdout
+
+
+def png_bytes():
+    buffer = io.BytesIO()
+    Image.new('RGB', (800, 500), 'navy').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 51.0
+    assert percentile(values, 99) == 100.0
+    assert percentile([], 50) is None
+
+
+def test_usage_delta_keeps_active_call_types():
+    before = {'vision': {'calls': 2, 'cache_hits': 0, 'prompt_tokens': 500, 'output_tokens': 50, 'cached_tokens': 0},
+              'noise': {'calls': 1, 'cache_hits': 0, 'prompt_tokens': 9000, 'output_tokens': 80, 'cached_tokens': 0}}
+    after = {'vision': {'calls': 5, 'cache_hits': 1, 'prompt_tokens': 1400, 'output_tokens': 150, 'cached_tokens': 300},
+             'noise': dict(before['noise'])}
+    assert usage_delta(before, after) == {
+        'vision': {'calls': 3, 'cache_hits': 1, 'prompt_tokens': 900, 'output_tokens': 100, 'cached_tokens': 300,
+                   'cost_usd': 0}
+    }
+
+
+def test_recorder_writes_jsonl_and_summary(tmp_path):
+    recorder = MetricsRecorder(tmp_path / 'metrics.jsonl')
+    for seconds in (0.1, 0.2, 0.3):
+        metrics = ArticleMetrics('https://www.example.com/a')
+        metrics.add_time('fetch', seconds)
+        metrics.set(images_found=2, images_described=1)
+        metrics.finish('success', llm_usage={'vision': {'calls': 1, 'prompt_tokens': 10}})
+        recorder.record(metrics)
+    failed = ArticleMetrics('https://example.com/b')
+    failed.finish('failed', error=ValueError('no config'))
+    recorder.record(failed)
+
+    summary = recorder.write_summary()
+    lines = [json.loads(line) for line in (tmp_path / 'metrics.jsonl').read_text().splitlines()]
+
+    assert [line['type'] for line in lines] == ['article'] * 4 + ['batch_summary']
+    assert lines[0]['domain'] == 'example.com' and lines[0]['stages'] == {'fetch': 0.1}
+    assert lines[3]['status'] == 'failed' and lines[3]['error'] == 'no config'
+    assert summary['successful'] == 3 and summary['failed'] == 1
+    assert summary['stages']['fetch'] == {'count': 3, 'p50': 0.2, 'p90': 0.3, 'p99': 0.3, 'max': 0.3}
+    assert summary['llm']['calls'] == 3 and summary['images_described'] == 3
+    assert recorder.summary_lines(summary)[1].startswith('total')
+
+
+def test_process_article_records_stages(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sites = tmp_path / 'config' / 'sites'
+    sites.mkdir(parents=True)
+    (sites / 'example.com.yaml').write_text(
+        "domain: example.com\nextraction:\n  article_content:\n    selector: article\n")
+    monkeypatch.setattr(article_extractor.subprocess, 'run', lambda *a, **k: CurlResult(ARTICLE_HTML))
+    monkeypatch.setattr(article_extractor.urllib.request, 'urlretrieve',
+                        lambda url, path: Path(path).write_bytes(png_bytes()))
+
+    backend = FakeBackend(responses=[{'call_type': 'vision', 'text': 'Bar chart: churn by segment.'}], time_scale=0)
+    extractor = ArticleExtractor(output_dir=tmp_path / 'out', log_file=tmp_path / 'test.log', use_gemini=True,
+                                 image_cache_file=tmp_path / 'cache.json', llm_backend=backend,
+                                 metrics_file=tmp_path / 'metrics.jsonl')
+    assert extractor.process_article(ARTICLE_URL) is not None
+
+    record = json.loads((tmp_path / 'metrics.jsonl').read_text().splitlines()[0])
+    assert record['status'] == 'success'
+    assert {'fetch', 'metadata', 'extraction', 'image_download', 'vision', 'conversion', 'write'} <= set(record['stages'])
+    assert record['html_bytes'] == len(ARTICLE_HTML.encode('utf-8'))
+    assert record['images_found'] == 1 and record['images_described'] == 1
+    assert record['images_downloaded'] == 1 and record['image_bytes'] == len(png_bytes())
+    assert record['llm']['calls'] >= 1 and 'vision' in record['llm_by_call_type']
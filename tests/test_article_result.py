@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-memory article result (ArticleResult) and pluggable result sinks
+"""
+
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image
+
+from src import article_extractor
+from src.article_extractor import ArticleExtractor
+from src.article_result import ArticleResult, MarkdownFileSink, ResultSink
+from src.llm_backends import FakeBackend
+
+ARTICLE_URL = 'https://www.example.com/blog/churn'
+ARTICLE_HTML = """<html><head><title>Churn benchmarks</title><meta name="author" content="Dana Lee"></head>
+<body><article>
+<h1>Churn benchmarks</h1>
+<p>Net revenue retention is the single most important SaaS metric for growth-stage companies.</p>
+<figure><img src="https://example.com/img/churn.png" width="800" height="500" alt="Churn by segment">
+<figcaption>Figure 1: Churn by segment</figcaption></figure>
+<p>Enterprise customers churn far less than SMB customers over a three year horizon.</p>
+<p>Segment-level churn matters because blended averages hide the cohorts that drive expansion revenue.
+A company with strong enterprise retention can absorb high SMB churn for years, while the reverse mix
+quietly caps growth no matter how much new business the sales team brings in each quarter.</p>
+</article></body></html>"""
+
+
+class CurlResult:
+    returncode = 0
+    stderr = ''
+    stdout = ARTICLE_HTML
+
+
+class ListSink(ResultSink):
+    name = 'list'
+
+    def __init__(self):
+        self.documents = []
+
+    def write(self, document):
+        self.documents.append(document)
+        return len(self.documents)
+
+
+def png_bytes():
+    buffer = io.BytesIO()
+    Image.new('RGB', (800, 500), 'navy').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def extractor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sites = tmp_path / 'config' / 'sites'
+    sites.mkdir(parents=True)
+    (sites / 'example.com.yaml').write_text(
+        "domain: example.com\nextraction:\n  article_content:\n    selector: article\n")
+    monkeypatch.setattr(article_extractor.subprocess, 'run', lambda *a, **k: CurlResult())
+    monkeypatch.setattr(article_extractor.urllib.request, 'urlretrieve',
+                        lambda url, path: Path(path).write_bytes(png_bytes()))
+
+    backend = FakeBackend(responses=[{'call_type': 'vision', 'text': 'Bar chart: churn by segment.'}], time_scale=0)
+    extractor = ArticleExtractor(output_dir=tmp_path / 'out', log_file=tmp_path / 'test.log', use_gemini=True,
+                                 image_cache_file=tmp_path / 'cache.json', llm_backend=backend)
+    yield extractor
+    extractor.close()
+
+
+def test_result_in_memory_without_sinks(extractor, tmp_path):
+    result = extractor.extract_article(ARTICLE_URL, sinks=())
+
+    assert result.ok and result.output_path is None and result.outputs == {}
+    assert not (tmp_path / 'out').exists()
+    assert result.metadata['title'] == 'Churn benchmarks'
+    assert result.markdown.startswith('# Churn benchmarks')
+    assert 'Bar chart: churn by segment.' in result.markdown
+
+    image, = result.images
+    assert image.src == 'https://example.com/img/churn.png' and image.alt == 'Churn by segment'
+    assert image.source == 'vision' and image.description == 'Bar chart: churn by segment.'
+    assert result.metrics['status'] == 'success' and 'vision' in result.metrics['stages']
+    assert result.metrics['markdown_bytes'] == len(result.markdown.encode('utf-8'))
+
+
+def test_result_is_read_only(extractor):
+    result = extractor.extract_article(ARTICLE_URL, sinks=())
+
+    with pytest.raises(TypeError):
+        result.metadata['title'] = 'Edited'
+    with pytest.raises(TypeError):
+        result.metrics['stages']['fetch'] = 0.0
+    with pytest.raises(AttributeError):
+        result.status = 'failed'
+    assert result.to_dict()['images'][0]['source'] == 'vision'
+
+
+def test_default_sink_writes_the_markdown_file(extractor, tmp_path):
+    sink = ListSink()
+    extractor.sinks.append(sink)
+
+    result = extractor.extract_article(ARTICLE_URL)
+
+    assert result.output_path == tmp_path / 'out' / 'Churn_benchmarks.md'
+    assert result.output_path.read_text(encoding='utf-8') == result.markdown
+    assert result.outputs['list'] == 1 and sink.documents[0].markdown == result.markdown
+    assert extractor.process_article(ARTICLE_URL) == result.output_path
+
+
+def test_failed_article_result(extractor, monkeypatch):
+    def no_content(*args, **kwargs):
+        raise ValueError('no article body')
+
+    monkeypatch.setattr(extractor, 'extract_article_content', no_content)
+
+    result = extractor.extract_article(ARTICLE_URL)
+
+    assert isinstance(result, ArticleResult) and not result.ok
+    assert result.error == 'no article body' and result.markdown is None and result.images == ()
+    assert result.metrics['status'] == 'failed'
+
+
+def test_markdown_file_sink_creates_its_directory(tmp_path):
+    sink = MarkdownFileSink(tmp_path / 'nested' / 'out')
+
+    path = sink.write_text('Churn: benchmarks / 2024', '# Churn\n')
+
+    assert path == tmp_path / 'nested' / 'out' / 'Churn_benchmarks_2024.md'
+    assert path.read_text(encoding='utf-8') == '# Churn\n'
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Tests for the asyncio API (aprocess_article / aprocess_articles) and its sync wrappers
+"""
+
+import asyncio
+import io
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image
+
+from src import article_extractor
+from src.article_extractor import ArticleExtractor
+from src.llm_backends import FakeBackend
+
+ARTICLE_HTML = """<html><head><title>Churn benchmarks</title></head>
+<body><article>
+<h1>Churn benchmarks</h1>
+<p>Net revenue retention is the single most important SaaS metric for growth-stage companies.</p>
+<figure><img src="https://example.com/img/churn.png" width="800" height="500" alt="Churn by segment">
+<figcaption>Figure 1: Churn by segment</figcaption></figure>
+<p>Enterprise customers churn far less than SMB customers over a three year horizon.</p>
+<p>Segment-level churn matters because blended averages hide the cohorts that drive expansion revenue.
+A company with strong enterprise retention can absorb high SMB churn for years, while the reverse mix
+quietly caps growth no matter how much new business the sales team brings in each quarter.</p>
+</article></body></html>"""
+
+
+class CurlResult:
+    returncode = 0
+    stderr = ''
+    stdout = ARTICLE_HTML
+
+
+def png_bytes():
+    buffer = io.BytesIO()
+    Image.new('RGB', (800, 500), 'navy').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def extractor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sites = tmp_path / 'config' / 'sites'
+    sites.mkdir(parents=True)
+    (sites / 'example.com.yaml').write_text(
+        "domain: example.com\nextraction:\n  article_content:\n    selector: article\n")
+    fetch_threads = []
+
+    def curl(*args, **kwargs):
+        # A slow download, so a blocked event loop would show
+        fetch_threads.append(threading.current_thread().name)
+        time.sleep(0.2)
+        return CurlResult()
+
+    monkeypatch.setattr(article_extractor.subprocess, 'run', curl)
+    monkeypatch.setattr(article_extractor.urllib.request, 'urlretrieve',
+                        lambda url, path: Path(path).write_bytes(png_bytes()))
+
+    backend = FakeBackend(responses=[{'call_type': 'vision', 'text': 'Bar chart: churn by segment.'}], time_scale=0)
+    extractor = ArticleExtractor(output_dir=tmp_path / 'out', log_file=tmp_path / 'test.log', use_gemini=True,
+                                 image_cache_file=tmp_path / 'cache.json', llm_backend=backend)
+    extractor.fetch_threads = fetch_threads
+    extractor.vision_loops = []
+    describe = extractor._process_images_parallel
+
+    async def recording_describe(*args, **kwargs):
+        extractor.vision_loops.append(asyncio.get_running_loop())
+        return await describe(*args, **kwargs)
+
+    extractor._process_images_parallel = recording_describe
+    yield extractor
+    extractor.close()
+
+
+def test_aprocess_article_keeps_the_loop_responsive(extractor):
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        ticking = asyncio.ensure_future(ticker())
+        output_path = await extractor.aprocess_article('https://www.example.com/blog/churn')
+        ticking.cancel()
+        return output_path, ticks, asyncio.get_running_loop()
+
+    output_path, ticks, loop = asyncio.run(run())
+
+    assert output_path is not None and 'Bar chart: churn by segment.' in output_path.read_text()
+    assert ticks >= 10
+    assert extractor.vision_loops == [loop]
+    assert extractor.fetch_threads[0].startswith('article-pipeline')
+
+
+def test_sync_api_refused_inside_a_running_loop(extractor):
+    async def run():
+        extractor.process_article('https://www.example.com/blog/churn')
+
+    with pytest.raises(RuntimeError, match='aprocess_article'):
+        asyncio.run(run())
+
+
+def test_concurrent_callers_are_processed_one_at_a_time(extractor):
+    async def run():
+        return await asyncio.gather(*[extractor.aprocess_article(f'https://www.example.com/blog/{name}')
+                                      for name in ('churn', 'retention')])
+
+    assert all(asyncio.run(run()))
+    assert [record['status'] for record in extractor.metrics.records] == ['success', 'success']
+    assert len(set(extractor.fetch_threads)) == 1
+
+
+def test_callers_on_different_loops(extractor):
+    async def run():
+        return await asyncio.gather(*[extractor.aprocess_article(f'https://www.example.com/blog/{name}')
+                                      for name in ('churn', 'retention')])
+
+    # Each asyncio.run is a new loop; the second must not reuse a lock bound to the first
+    assert all(asyncio.run(run()))
+    assert all(asyncio.run(run()))
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(asyncio.run(run()))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 2 and all(all(paths) for paths in results)
+    assert [record['status'] for record in extractor.metrics.records] == ['success'] * 8
+    assert len(set(extractor.fetch_threads)) == 1
+
+
+def test_sync_batch_reuses_one_loop(extractor):
+    urls = ['https://www.example.com/blog/churn', 'https://www.example.com/blog/retention']
+
+    results = list(extractor.process_articles(urls))
+
+    assert [url for url, _ in results] == urls and all(path for _, path in results)
+    assert len(extractor.vision_loops) == 2 and extractor.vision_loops[0] is extractor.vision_loops[1]
+    assert not extractor.vision_loops[0].is_closed()
+    extractor.close()
+    assert extractor.vision_loops[0].is_closed()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for the hot path benchmark fixtures and regression check
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bs4 import BeautifulSoup
+
+from benchmarks.bench_hot_paths import compare
+from benchmarks.html_fixtures import element_for_selector, generate_page
+
+CONFIG = {
+    'domain': 'example.com',
+    'extraction': {
+        'article_content': {
+            'selector': 'div.article-body',
+            'exclude_selectors': ["div[class*='Promo']", 'aside.related', 'div:has(> iframe)'],
+            'truncate_after': 'section.comments',
+        },
+    },
+}
+
+
+def test_element_for_selector_matches_selector():
+    markup = element_for_selector("div[class*='Promo'] > span.label", 'x')
+    assert BeautifulSoup(markup, 'html.parser').select_one("div[class*='Promo'] > span.label") is not None
+
+
+def test_element_for_selector_rejects_unsupported_selector():
+    assert element_for_selector('div:has(> iframe)', 'x') is None
+
+
+def test_generated_page_hits_size_and_selectors():
+    html = generate_page(CONFIG, 100 * 1024)
+    assert 100 * 1024 <= len(html) < 110 * 1024
+    assert html == generate_page(CONFIG, 100 * 1024)
+
+    soup = BeautifulSoup(html, 'html.parser')
+    assert soup.select_one('div.article-body') is not None
+    assert soup.select("div[class*='Promo']") or soup.select('aside.related')
+    assert soup.select_one('section.comments') is not None
+
+
+def test_compare_flags_slowdown_and_memory_growth():
+    baseline = {'results': [
+        {'benchmark': 'html_to_markdown', 'site': 'example', 'size': '1MB', 'median_s': 0.100, 'peak_memory_mb': 10.0},
+        {'benchmark': 'extract_images', 'site': 'example', 'size': '1MB', 'median_s': 0.050, 'peak_memory_mb': 4.0},
+    ]}
+    results = [
+        {'benchmark': 'html_to_markdown', 'site': 'example', 'size': '1MB', 'median_s': 0.150, 'peak_memory_mb': 10.0},
+        {'benchmark': 'extract_images', 'site': 'example', 'size': '1MB', 'median_s': 0.055, 'peak_memory_mb': 6.0},
+        {'benchmark': 'extract_metadata', 'site': 'example', 'size': '1MB', 'median_s': 9.0, 'peak_memory_mb': 99.0},
+    ]
+    regressions = compare(results, baseline)
+    assert len(regressions) == 2
+    assert regressions[0].startswith('html_to_markdown example 1MB: 100.00 ms -> 150.00 ms')
+    assert 'peak memory 4.00 MB -> 6.00 MB' in regressions[1]
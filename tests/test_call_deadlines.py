@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for per-call deadlines and hedged requests
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+from google.genai.types import GenerateContentConfig
+
+from src.call_deadlines import HEDGE_MIN_SAMPLES, DeadlineCaller
+from src.llm_errors import ServerTimeoutError
+from src.model_router import ModelRouter
+
+
+def make_caller(timeout=0.3, hedge=False, hedge_percentile=None):
+    router = ModelRouter(routes_file=None, routes={'probe': {'timeout': timeout, 'hedge': hedge}})
+    return DeadlineCaller(router, hedge_percentile=hedge_percentile)
+
+
+def test_stuck_call_raises_server_timeout_at_deadline():
+    caller = make_caller(timeout=0.2)
+    start = time.monotonic()
+    with pytest.raises(ServerTimeoutError):
+        caller.call('probe', time.sleep, 3)
+    assert time.monotonic() - start < 1.0
+    assert caller.stats['timeouts'] == 1
+
+
+def test_errors_and_results_pass_through():
+    caller = make_caller()
+    assert caller.call('probe', lambda x: x * 2, 21) == 42
+    with pytest.raises(ValueError):
+        caller.call('probe', int, 'not a number')
+
+
+def test_http_timeout_added_to_config():
+    caller = make_caller(timeout=45)
+    seen = {}
+    caller.call('probe', lambda config: seen.setdefault('config', config), config=GenerateContentConfig(temperature=0.1))
+    assert seen['config'].http_options.timeout == 45000
+    assert seen['config'].temperature == 0.1
+
+
+def test_hedged_request_wins_over_slow_primary():
+    caller = make_caller(timeout=2.0, hedge=True, hedge_percentile=95)
+    for _ in range(HEDGE_MIN_SAMPLES):
+        caller.call('probe', lambda: None)
+
+    calls = []
+    lock = threading.Lock()
+
+    def first_call_hangs():
+        with lock:
+            calls.append(1)
+            first = len(calls) == 1
+        if first:
+            time.sleep(1.5)
+            return 'slow'
+        return 'fast'
+
+    start = time.monotonic()
+    assert caller.call('probe', first_call_hangs) == 'fast'
+    assert time.monotonic() - start < 1.0
+    assert caller.stats['hedges'] == 1 and caller.stats['hedge_wins'] == 1
+
+
+def test_hedge_needs_a_free_concurrency_slot():
+    caller = make_caller(timeout=2.0, hedge=True, hedge_percentile=95)
+    for _ in range(HEDGE_MIN_SAMPLES):
+        caller.call('probe', lambda: None)
+    caller.slots = threading.BoundedSemaphore(2)
+
+    # The second slot is taken (as by another call in flight): no duplicate request
+    caller.slots.acquire()
+    assert caller.call('probe', time.sleep, 0.3) is None
+    assert caller.stats['hedges'] == 0 and caller.stats['hedges_skipped'] == 1
+
+    # A free slot is held by the hedge until it answers, then returned
+    caller.slots.release()
+    assert caller.call('probe', time.sleep, 0.3) is None
+    assert caller.stats['hedges'] == 1
+    time.sleep(0.4)
+    assert caller.slots.acquire(blocking=False) and caller.slots.acquire(blocking=False)
+
+
+def test_abandoned_call_keeps_its_slot_until_it_answers():
+    caller = make_caller(timeout=0.2)
+    caller.slots = threading.BoundedSemaphore(1)
+    late = []
+    caller.on_late_answer = lambda call_type, result, **kwargs: late.append((call_type, result))
+
+    def slow(seconds):
+        time.sleep(seconds)
+        return 'late'
+
+    with pytest.raises(ServerTimeoutError):
+        caller.call('probe', slow, 0.5)
+    # The request is still running on the API side: its slot is not free yet
+    assert not caller.slots.acquire(blocking=False)
+    time.sleep(0.5)
+    assert caller.slots.acquire(blocking=False)
+    assert late == [('probe', 'late')]
+
+
+def test_losing_hedge_answer_is_reported():
+    caller = make_caller(timeout=2.0, hedge=True, hedge_percentile=95)
+    for _ in range(HEDGE_MIN_SAMPLES):
+        caller.call('probe', lambda: None)
+    late = []
+    caller.on_late_answer = lambda call_type, result, **kwargs: late.append(result)
+    calls = []
+    lock = threading.Lock()
+
+    def first_call_hangs():
+        with lock:
+            calls.append(1)
+            first = len(calls) == 1
+        if first:
+            time.sleep(0.5)
+            return 'slow'
+        return 'fast'
+
+    assert caller.call('probe', first_call_hangs) == 'fast'
+    assert late == []
+    time.sleep(0.6)
+    assert late == ['slow']
+
+
+def test_no_hedging_for_routes_without_hedge():
+    caller = make_caller(hedge=False, hedge_percentile=95)
+    for _ in range(HEDGE_MIN_SAMPLES):
+        caller.call('probe', lambda: None)
+    assert caller.hedge_delay('probe') is None
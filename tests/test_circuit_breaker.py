@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared Gemini circuit breaker
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def failing():
+    raise RuntimeError('503 Service Unavailable')
+
+
+def call_ignoring_errors(breaker, func):
+    try:
+        return breaker.call(func)
+    except RuntimeError:
+        return None
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+
+    for _ in range(3):
+        call_ignoring_errors(breaker, failing)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.is_open
+    try:
+        breaker.call(lambda: 'never called')
+    except CircuitOpenError:
+        pass
+    else:
+        raise AssertionError('expected CircuitOpenError')
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+
+    call_ignoring_errors(breaker, failing)
+    breaker.call(lambda: 'ok')
+    call_ignoring_errors(breaker, failing)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_probe_closes_or_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    call_ignoring_errors(breaker, failing)
+    time.sleep(0.02)
+
+    # Failed probe re-opens immediately
+    call_ignoring_errors(breaker, failing)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.02)
+    assert breaker.call(lambda: 'ok') == 'ok'
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_allows_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    call_ignoring_errors(breaker, failing)
+    time.sleep(0.02)
+
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_filter_validation_deferred_while_the_circuit_is_open(tmp_path):
+    from types import SimpleNamespace
+
+    from src.llm_service import LLMService
+    from src.model_router import ModelRouter
+    from src.site_registry import SiteRegistry
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    service = LLMService(ModelRouter(routes_file=None), circuit_breaker=breaker)
+    models = SimpleNamespace(calls=0)
+
+    def generate_content(model, contents, config):
+        models.calls += 1
+        return SimpleNamespace(text='{"status": "approve"}', usage_metadata=None)
+
+    models.generate_content = generate_content
+    service.client = SimpleNamespace(models=models)
+    registry = SiteRegistry(config_dir=tmp_path, use_gemini=True, llm=service)
+    registry.use_gemini = True
+    config = {'extraction': {'article_content': {'exclude_selectors': []}}}
+
+    assert registry._validate_and_suggest_filters('<p>a</p>', '<p>a</p>', config) == (True, None, None)
+
+    call_ignoring_errors(breaker, failing)
+    is_valid, feedback, changes = registry._validate_and_suggest_filters('<p>a</p>', '<p>a</p>', config)
+    assert is_valid is None and 'deferred' in feedback and changes is None
+    assert models.calls == 1
+
+    # The call that opens the circuit does not count as an approval either
+    service.circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    models.generate_content = lambda model, contents, config: failing()
+    is_valid, feedback, changes = registry._validate_and_suggest_filters('<p>a</p>', '<p>a</p>', config)
+    assert is_valid is None and 'deferred' in feedback
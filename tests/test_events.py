@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for the progress event stream, renderers and queue-based logging
+"""
+
+import io
+import json
+import logging
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import events
+
+
+@pytest.fixture(autouse=True)
+def restore_tty_renderer():
+    yield
+    events.configure_events('tty')
+
+
+def test_tty_renderer_hides_debug_unless_verbose():
+    stream = io.StringIO()
+    events.configure_events('tty', stream=stream)
+    log = events.emitter('learning')
+    log.info('🧠 INVERTED LEARNING FOR: https://example.com/a')
+    log.debug('   Text sample: 12,000 chars')
+    log.llm_exchange('noise', 5000, 'exclude_selectors: [.related]')
+
+    assert stream.getvalue() == '🧠 INVERTED LEARNING FOR: https://example.com/a\n'
+
+    events.configure_events('tty', verbose=True, stream=stream)
+    log.llm_exchange('noise', 5000, 'exclude_selectors: [.related]')
+    assert 'LLM RESPONSE (noise)' in stream.getvalue()
+    assert 'exclude_selectors: [.related]' in stream.getvalue()
+
+
+def test_jsonl_renderer_writes_typed_events():
+    stream = io.StringIO()
+    events.configure_events('jsonl', stream=stream)
+    bus = events.get_event_bus()
+    bus.emit(events.ArticleStarted('https://example.com/a', 1, 2))
+    events.emitter('extractor').warning('⚠️  Browser fetch failed')
+    bus.emit(events.ArticleFinished('https://example.com/a', 'success', 'results/a.md', 1.25))
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [r['event'] for r in records] == ['article_started', 'message', 'article_finished']
+    assert records[0]['index'] == 1 and records[0]['total'] == 2
+    assert records[1]['level'] == 'warning' and records[1]['component'] == 'extractor'
+    assert records[2]['status'] == 'success' and records[2]['seconds'] == 1.25
+    assert all('ts' in r for r in records)
+
+
+def test_silent_mode_skips_building_events():
+    events.configure_events('silent')
+    built = []
+    log = events.emitter('site_registry')
+    log.detail('HTML STRUCTURE ANALYSIS', lambda: built.append(1) or 'counts')
+    log.error('❌ not shown')
+
+    assert built == []
+    assert not events.get_event_bus().enabled(events.ERROR)
+
+
+def test_parallel_events_never_interleave():
+    stream = io.StringIO()
+    events.configure_events('tty', verbose=True, stream=stream)
+    log = events.emitter('learning')
+
+    def worker(n):
+        for _ in range(50):
+            log.detail(f'PROMPT {n}', '\n'.join([f'line {n}'] * 5))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    blocks = stream.getvalue().split('\n🔍 ')[1:]
+    assert len(blocks) == 200
+    for block in blocks:
+        n = block.split(':')[0].split()[-1]
+        assert block.count(f'line {n}') == 5
+
+
+def test_queue_logging_writes_one_file(tmp_path):
+    logger = logging.getLogger('test_events_queue')
+    logger.setLevel(logging.INFO)
+    log_file = tmp_path / 'run.log'
+
+    for _ in range(2):
+        handler = logging.FileHandler(log_file, encoding='utf-8')
+        events.queue_logging(logger, handler)
+        logger.info('configured')
+    events.stop_queue_logging(logger)
+
+    assert len(logger.handlers) == 1
+    assert log_file.read_text().count('configured') == 2
+    assert list(tmp_path.iterdir()) == [log_file]
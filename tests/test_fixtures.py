@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for the record/replay fixture archive (no network, no API key)
+"""
+
+import io
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+from PIL import Image
+
+from src import article_extractor
+from src.article_extractor import ArticleExtractor
+from src.fixtures import FixtureArchive, FixtureMissError
+from src.llm_backends import FakeBackend
+from src.llm_errors import BadInputError
+
+ARTICLE_URL = 'https://example.com/blog/churn'
+ARTICLE_HTML = """<html><head><title>Churn benchmarks</title>
+<meta property="og:title" content="Churn benchmarks"></head>
+<body><article>
+<h1>Churn benchmarks</h1>
+<p>Net revenue retention is the single most important SaaS metric for growth-stage companies.</p>
+<figure><img src="https://example.com/img/churn.png" width="800" height="500" alt="Churn by segment">
+<figcaption>Figure 1: Churn by segment</figcaption></figure>
+<p>Enterprise customers churn far less than SMB customers over a three year horizon.</p>
+<h2>Why segments differ</h2>
+<p>Larger customers sign annual contracts, integrate the product deeply and have dedicated success managers.</p>
+<h2>What to do about it</h2>
+<p>Track gross and net retention per cohort and per segment, and review the numbers every quarter with the team.</p>
+<p>Pricing changes, onboarding quality and product usage in the first ninety days explain most of the gap.</p>
+</article></body></html>"""
+
+
+def png_bytes():
+    buffer = io.BytesIO()
+    Image.new('RGB', (800, 500), 'navy').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class CurlResult:
+    returncode = 0
+    stderr = ''
+
+    def __init__(self, stdout):
+        self.stdout = stdout
+
+
+def make_extractor(tmp_path, name, fixtures, backend=None):
+    return ArticleExtractor(output_dir=tmp_path / name, log_file=tmp_path / f'{name}.log', use_gemini=True,
+                            image_cache_file=tmp_path / f'{name}_cache.json', llm_backend=backend,
+                            fixtures=fixtures)
+
+
+def test_archive_round_trip(tmp_path):
+    archive = FixtureArchive(tmp_path / 'fx', 'record')
+    archive.record_page('https://a.test/', '<html>page</html>')
+    archive.record_rendered('https://a.test/', True, '<html>rendered</html>', None)
+    archive.record_image('https://a.test/x.png', png_bytes())
+    archive.record_image('https://a.test/y.png', png_bytes())
+    archive.record_image('https://a.test/missing.png', error=BadInputError('HTTP Error 404: Not Found'))
+    archive.save()
+
+    # Identical image bytes are stored once
+    assert len(list((tmp_path / 'fx' / 'blobs').glob('*.gz'))) == 3
+
+    replay = FixtureArchive(tmp_path / 'fx', 'replay')
+    assert replay.page('https://a.test/') == '<html>page</html>'
+    assert replay.rendered('https://a.test/') == (True, '<html>rendered</html>', None)
+    assert replay.image('https://a.test/x.png') == png_bytes()
+    with pytest.raises(BadInputError):
+        replay.image('https://a.test/missing.png')
+    with pytest.raises(FixtureMissError):
+        replay.page('https://a.test/other')
+    assert replay.stats['misses'] == 1
+
+
+def test_replay_requires_an_archive(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        FixtureArchive(tmp_path / 'nothing', 'replay')
+
+
+def test_recorded_run_replays_offline_with_identical_output(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sites = tmp_path / 'config' / 'sites'
+    sites.mkdir(parents=True)
+    (sites / 'example.com.yaml').write_text(
+        "domain: example.com\nextraction:\n  article_content:\n    selector: article\n    exclude_selectors:\n    - nav\n")
+
+    # Recording: "network" is a fake curl and image server, the "live" LLM is the fake backend
+    monkeypatch.setattr(article_extractor.subprocess, 'run', lambda *a, **k: CurlResult(ARTICLE_HTML))
+    monkeypatch.setattr(article_extractor.urllib.request, 'urlretrieve',
+                        lambda url, path: Path(path).write_bytes(png_bytes()))
+    live = FakeBackend(responses=[{'call_type': 'vision', 'text': 'Bar chart: churn by customer segment.'}],
+                       time_scale=0)
+    recording = FixtureArchive(tmp_path / 'fx', 'record')
+    recorded_path = make_extractor(tmp_path, 'recorded', recording, backend=live).process_article(ARTICLE_URL)
+    recording.save()
+    assert recorded_path is not None
+    assert recording.stats['pages'] == 1 and recording.stats['images'] == 1
+
+    exchanges = [json.loads(line) for line in (tmp_path / 'fx' / 'llm.jsonl').read_text().splitlines()]
+    assert 'vision' in {record['call_type'] for record in exchanges}
+
+    # Replay: any network access fails the test
+    def no_network(*args, **kwargs):
+        raise AssertionError('network access during replay')
+    monkeypatch.setattr(article_extractor.subprocess, 'run', no_network)
+    monkeypatch.setattr(article_extractor.urllib.request, 'urlretrieve', no_network)
+
+    replay = FixtureArchive(tmp_path / 'fx', 'replay')
+    extractor = make_extractor(tmp_path, 'replayed', replay)
+    replayed_path = extractor.process_article(ARTICLE_URL)
+    assert replayed_path is not None
+
+    def body(path):
+        # The front matter carries the processing timestamp
+        return path.read_text().split('\n---\n', 1)[-1]
+    assert body(replayed_path) == body(recorded_path)
+    assert 'Bar chart: churn by customer segment.' in body(replayed_path)
+    assert extractor.llm.backend.stats['replayed'] >= 1
+    assert extractor.llm.backend.stats['unmatched'] == 0
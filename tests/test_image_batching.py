@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Offline tests for multi-image packing (no API key needed)
+"""
+
+import sys
+import json
+import time
+import asyncio
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image
+
+from src.article_extractor import ArticleExtractor
+from src.llm_errors import NetworkTransientError
+
+
+class CodedError(Exception):
+    def __init__(self, code, message=''):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModels:
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = []
+        self.models = []
+
+    def generate_content(self, model, contents, config):
+        self.calls.append(contents)
+        self.models.append(model)
+        return FakeResponse(self.answer(contents))
+
+
+class FakeClient:
+    def __init__(self, answer):
+        self.models = FakeModels(answer)
+
+
+def make_extractor(tmp_path, answer, **kwargs):
+    kwargs.setdefault('batch_images', True)
+    extractor = ArticleExtractor(output_dir=tmp_path / 'out', log_file=tmp_path / 'test.log',
+                                 image_cache_file=tmp_path / 'image_cache.json', **kwargs)
+    extractor.use_gemini = True
+    extractor.gemini_client = FakeClient(answer)
+
+    extractor.fetched_paths = []
+
+    def fake_fetch(url, output_path):
+        extractor.fetched_paths.append(Path(output_path))
+        Image.new('RGB', (400, 300), 'white').save(output_path, 'PNG')
+    extractor._fetch_image = fake_fetch
+    return extractor
+
+
+def make_images(count):
+    return [{
+        'src': f'https://example.com/chart{i}.png',
+        'alt': '', 'title': '', 'position': i,
+        'context_before': 'Revenue grew quickly.',
+        'context_after': 'Churn stayed flat.'
+    } for i in range(count)]
+
+
+def test_images_are_packed_into_one_request(tmp_path):
+    def answer(contents):
+        count = sum(1 for part in contents if isinstance(part, str) and part.startswith('IMAGE '))
+        items = [{'index': 1, 'skip': True, 'reason': 'Logo', 'description': ''}]
+        items += [{'index': i, 'skip': False, 'reason': '', 'description': f'Bar Chart {i}'}
+                  for i in range(2, count + 1)]
+        return json.dumps(items)
+
+    extractor = make_extractor(tmp_path, answer)
+    descriptions = asyncio.run(extractor._process_images_parallel(make_images(3)))
+
+    assert len(extractor.gemini_client.models.calls) == 1
+    assert descriptions['https://example.com/chart0.png'] == '[UI Element - Logo]'
+    assert descriptions['https://example.com/chart2.png'] == 'Bar Chart 3'
+
+
+def test_batches_respect_image_limit(tmp_path):
+    extractor = make_extractor(tmp_path, lambda contents: '[]', batch_max_images=2)
+    entries = [{'img_data': img, 'image_path': None, 'tokens': 258} for img in make_images(5)]
+
+    batches = extractor._plan_image_batches(entries)
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+
+def test_failed_batch_falls_back_to_single_calls(tmp_path):
+    def answer(contents):
+        if len(contents) > 2:
+            return 'not json'
+        return 'Line Graph of MRR'
+
+    extractor = make_extractor(tmp_path, answer)
+    descriptions = asyncio.run(extractor._process_images_parallel(make_images(2)))
+
+    # The batch, then triage and a description per image
+    assert len(extractor.gemini_client.models.calls) == 5
+    assert set(descriptions.values()) == {'Line Graph of MRR'}
+
+
+def test_calls_per_image_with_default_routes(tmp_path):
+    from src.model_router import DEFAULT_ROUTES
+
+    def answer(contents):
+        if any(isinstance(part, str) and part.startswith('IMAGE ') for part in contents):
+            count = sum(1 for part in contents if isinstance(part, str) and part.startswith('IMAGE '))
+            return json.dumps([{'index': i, 'skip': False, 'reason': '', 'description': f'Bar Chart {i}'}
+                               for i in range(1, count + 1)])
+        if 'Respond in JSON format' in contents[0]:
+            return '{"decision": "describe", "confidence": "high", "reason": "Chart"}'
+        return 'Bar Chart'
+
+    # One at a time: a light-model triage call, then the full description
+    single = make_extractor(tmp_path / 'single', answer, batch_images=False)
+    asyncio.run(single._process_images_parallel(make_images(3)))
+    assert len(single.gemini_client.models.calls) == 2 * 3
+    assert single.gemini_client.models.models.count(DEFAULT_ROUTES['image_triage']['model']) == 3
+
+    # Batched: the batch request makes the skip decision itself, no triage per image
+    batched = make_extractor(tmp_path / 'batched', answer)
+    asyncio.run(batched._process_images_parallel(make_images(3)))
+    assert len(batched.gemini_client.models.calls) == 1
+
+
+def test_system_prompt_sent_as_instruction_not_in_user_prompt(tmp_path):
+    extractor = make_extractor(tmp_path, lambda contents: 'Line Graph of MRR', batch_images=False)
+    image = make_images(1)[0]
+
+    asyncio.run(extractor._generate_gemini_description_async(
+        image['src'], image['context_before'], image['context_after']))
+
+    user_prompt = extractor.gemini_client.models.calls[-1][0]
+    assert 'You are an expert at analyzing business charts' not in user_prompt
+    assert extractor.vision_prompt_stats['calls'] == 1
+
+
+def test_transient_batch_error_is_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(NetworkTransientError, 'retry_delay', lambda self, attempt: 0)
+    answers = [CodedError(503, 'UNAVAILABLE'),
+               json.dumps([{'index': i, 'skip': False, 'reason': '', 'description': f'Chart {i}'} for i in (1, 2)])]
+
+    def answer(contents):
+        result = answers.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    extractor = make_extractor(tmp_path, answer)
+    descriptions = asyncio.run(extractor._process_images_parallel(make_images(2)))
+
+    # Retried as a batch, not split into single-image calls
+    assert len(extractor.gemini_client.models.calls) == 2
+    assert set(descriptions.values()) == {'Chart 1', 'Chart 2'}
+
+
+def test_batch_files_deleted_when_deadline_cancels(tmp_path):
+    def answer(contents):
+        time.sleep(0.5)
+        return '[]'
+
+    extractor = make_extractor(tmp_path, answer, batch_max_images=1)
+    descriptions = asyncio.run(extractor._process_images_parallel(make_images(3), deadline=time.monotonic() + 0.2))
+
+    assert set(descriptions.values()) == {None}
+    assert len(extractor.fetched_paths) == 3
+    assert not any(path.exists() for path in extractor.fetched_paths)
+
+
+def test_images_sharing_a_basename_keep_separate_files(tmp_path):
+    def answer(contents):
+        images = [part for part in contents if hasattr(part, 'size')]
+        return json.dumps([{'index': i, 'skip': False, 'reason': '', 'description': f'{img.size[0]}px wide'}
+                           for i, img in enumerate(images, 1)])
+
+    extractor = make_extractor(tmp_path, answer)
+
+    def fetch_by_host(url, output_path):
+        extractor.fetched_paths.append(Path(output_path))
+        width = 400 if 'cdn-a' in url else 500
+        Image.new('RGB', (width, 300), 'white').save(output_path, 'PNG')
+    extractor._fetch_image = fetch_by_host
+
+    images = make_images(2)
+    images[0]['src'] = 'https://cdn-a.example.com/posts/1/image.png'
+    images[1]['src'] = 'https://cdn-b.example.com/posts/2/image.png?w=800'
+    descriptions = asyncio.run(extractor._process_images_parallel(images))
+
+    assert descriptions[images[0]['src']] == '400px wide'
+    assert descriptions[images[1]['src']] == '500px wide'
+    assert len(set(extractor.fetched_paths)) == 2
+    assert not any(path.exists() for path in extractor.fetched_paths)
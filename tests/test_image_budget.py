@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for the importance-ranked image budget
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.article_extractor import ArticleExtractor
+from src.image_budget import ImageBudget, importance_score
+
+
+def image(src, **extra):
+    data = {'src': src, 'alt': '', 'context_before': '', 'context_after': ''}
+    data.update(extra)
+    return data
+
+
+def test_captioned_large_image_outranks_gallery_thumbnail():
+    chart = image('chart.png', width=800, height=500, in_figure=True, caption='MRR growth',
+                  context_before='x' * 500, context_after='y' * 500)
+    thumb = image('thumb.png', width=120, height=80)
+    assert importance_score(chart, 5, 10) > importance_score(thumb, 0, 10)
+
+
+def test_per_article_budget_keeps_document_order():
+    images = [image(f'{i}.png', width=100, height=100) for i in range(5)]
+    images[3]['caption'] = 'Key chart'
+    images[3]['width'] = images[3]['height'] = 900
+
+    selected, deferred = ImageBudget(per_article=2).allocate(images)
+
+    assert [img['src'] for img in selected] == ['0.png', '3.png']
+    assert len(deferred) == 3
+
+
+def test_batch_budget_is_shared_across_articles():
+    budget = ImageBudget(per_batch=5)
+    first, _ = budget.allocate([image(f'a{i}.png') for i in range(3)])
+    second, deferred = budget.allocate([image(f'b{i}.png') for i in range(3)])
+
+    assert len(first) == 3 and len(second) == 2 and len(deferred) == 1
+    assert budget.remaining() == 0
+    assert budget.allocate([image('c.png')]) == ([], [image('c.png')])
+
+
+def test_unlimited_budget_selects_everything():
+    images = [image(f'{i}.png') for i in range(4)]
+    assert ImageBudget().allocate(images) == (images, [])
+
+
+def test_figure_caption_extracted_and_used_in_fallback(tmp_path):
+    extractor = ArticleExtractor(output_dir=tmp_path / 'out', log_file=tmp_path / 'test.log',
+                                 image_cache_file=tmp_path / 'image_cache.json')
+    content = ('<figure><img src="https://example.com/a.png"><figcaption>Churn by <b>cohort</b></figcaption></figure>'
+               '<p>Text</p><img src="https://example.com/b.png">')
+
+    images = extractor.extract_images(content)
+
+    assert images[0]['in_figure'] and images[0]['caption'] == 'Churn by cohort'
+    assert not images[1]['in_figure']
+    assert 'Caption: Churn by cohort' in extractor.generate_image_description(images[0], 0, 2)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Tests for per-site image rules and how they are learned from SKIP decisions
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.article_extractor import ArticleExtractor
+from src.image_rules import ImageRules, learn_image_rules
+from src.site_registry import SiteRegistry
+
+
+def decision(src, skipped, classes=None, width=None, height=None):
+    return {'src': src, 'classes': classes or [], 'width': width, 'height': height, 'skipped': skipped}
+
+
+def test_recurring_logo_promoted_after_two_articles():
+    images_config = {}
+    logo = 'https://example.com/assets/logo.png'
+
+    assert learn_image_rules(images_config, [decision(logo, True)]) == []
+    promoted = learn_image_rules(images_config, [decision(logo, True)])
+
+    assert promoted == [r'^https?://example\.com/assets/logo\.png(?:\?|$)']
+    assert ImageRules(images_config).skip_reason(logo + '?v=2', '<img>')
+
+
+def test_shared_path_and_class_promoted_only_without_described_images():
+    images_config = {}
+    avatars = [decision(f'https://cdn.example.com/avatars/{name}.jpg', True, ['avatar'])
+               for name in ('ann', 'bob', 'cy')]
+    charts = [decision(f'https://example.com/uploads/chart{i}.png', i > 0, ['size-full']) for i in range(3)]
+
+    # One article is not enough evidence, however many images it skips
+    assert learn_image_rules(images_config, avatars[:2] + charts) == []
+    learn_image_rules(images_config, avatars[2:])
+
+    assert images_config['skip_selectors'] == ['img.avatar']
+    assert r'^https?://cdn\.example\.com/avatars/' in images_config['skip_url_patterns']
+    assert not any('uploads' in pattern for pattern in images_config['skip_url_patterns'])
+    assert 'img.size-full' not in images_config['skip_selectors']
+
+
+def test_upload_folders_and_layout_classes_never_promoted():
+    images_config = {}
+    for month in ('04', '05'):
+        skipped = [decision(f'https://example.com/wp-content/uploads/2024/{month}/{name}.png', True,
+                            ['aligncenter', 'size-full', 'wp-image-1'])
+                   for name in ('icon', 'headshot', 'badge')]
+        learn_image_rules(images_config, skipped)
+
+    assert not images_config.get('skip_url_patterns') and not images_config.get('skip_selectors')
+    assert not any(key.startswith('prefix:') for key in images_config['evidence'])
+
+
+def test_described_audit_image_demotes_a_learned_rule():
+    images_config = {}
+    icons = [decision(f'https://example.com/assets/icons/{name}.png', True) for name in ('a', 'b', 'c')]
+    learn_image_rules(images_config, icons[:2])
+    learn_image_rules(images_config, icons[2:])
+    rule = r'^https?://example\.com/assets/icons/'
+    assert rule in images_config['skip_url_patterns']
+
+    # A rule-matched image sampled for vision turned out to be content
+    promoted = learn_image_rules(images_config, [decision('https://example.com/assets/icons/funnel.png', False)])
+
+    assert promoted == [f'removed {rule}']
+    assert rule not in images_config['skip_url_patterns']
+
+
+def test_minimum_size_learned_below_smallest_described_image():
+    images_config = {}
+    decisions = [decision(f'https://example.com/i/{i}.png', True, width=side, height=side)
+                 for i, side in enumerate((16, 24, 32))]
+    decisions.append(decision('https://example.com/c/chart.png', False, width=600, height=400))
+
+    learn_image_rules(images_config, decisions)
+
+    assert images_config['min_width'] == 33
+    rules = ImageRules(images_config)
+    assert rules.skip_reason('https://example.com/x.png', '<img width="20" height="20">')
+    assert rules.skip_reason('https://example.com/x.png', '<img width="300" height="200">') is None
+
+
+def test_described_audit_image_lowers_or_removes_a_learned_minimum_size():
+    images_config = {}
+    skipped = [decision(f'https://example.com/i/{i}.png', True, width=side, height=side)
+               for i, side in enumerate((8, 10, 12, 24, 32))]
+    learn_image_rules(images_config, skipped + [decision('https://example.com/c/a.png', False, width=600, height=400)])
+    assert images_config['min_width'] == 33
+
+    # An audited 20px image was content: only the skips below it still support a minimum
+    promoted = learn_image_rules(images_config, [decision('https://example.com/c/b.png', False, width=20, height=20)])
+    assert promoted == ['lowered min size to 13px']
+    assert images_config['min_width'] == images_config['min_height'] == 13
+
+    promoted = learn_image_rules(images_config, [decision('https://example.com/c/c.png', False, width=9, height=9)])
+    assert promoted == ['removed min size 13px']
+    assert 'min_width' not in images_config and 'min_height' not in images_config
+
+    # A hand-written minimum is never demoted
+    manual = {'min_width': 50, 'min_height': 50}
+    assert learn_image_rules(manual, [decision('https://example.com/c/d.png', False, width=20, height=20)]) == []
+    assert manual['min_width'] == 50
+
+
+def test_class_tokens_that_are_not_css_identifiers_are_never_promoted():
+    images_config = {'evidence': {'class:share:icon': {'skip': 5, 'describe': 0, 'skip_articles': 3}}}
+    for article in ('a', 'b'):
+        learn_image_rules(images_config, [decision(f'https://example.com/{article}/{name}.png', True,
+                                                   ['a/b', '-share', 'img.x'])
+                                          for name in ('x', 'y', 'z')])
+
+    assert images_config.get('skip_selectors') == ['img.-share']
+    assert not any(key in images_config['evidence'] for key in ('class:a/b', 'class:img.x'))
+
+
+def test_rules_applied_before_download(tmp_path):
+    extractor = ArticleExtractor(output_dir=tmp_path / 'out', log_file=tmp_path / 'test.log',
+                                 image_cache_file=tmp_path / 'image_cache.json')
+    rules = ImageRules({'skip_selectors': ['.author-box'],
+                        'skip_url_patterns': [r'/badges/']}, audit_rate=0)
+    content = ('<div class="author-box"><img src="https://example.com/me.jpg"></div>'
+               '<img src="https://example.com/badges/sponsor.png">'
+               '<p>Chart:</p><img src="https://example.com/chart.png" class="size-full" width="600" height="400">')
+
+    images = extractor.extract_images(content, image_rules=rules)
+
+    assert [img['src'] for img in images] == ['https://example.com/chart.png']
+    assert images[0]['classes'] == ['size-full'] and images[0]['width'] == 600
+
+    # The audit sample goes to vision despite the rules
+    rules.audit_rate = 1
+    assert len(extractor.extract_images(content, image_rules=rules)) == 3
+
+
+def test_registry_persists_learned_rules(tmp_path):
+    registry = SiteRegistry(config_dir=tmp_path, use_gemini=False)
+    registry.save_config('example.com', {'domain': 'example.com', 'extraction': {}})
+    learned_at = registry.load_config('example.com')['learned_at']
+    logo = decision('https://example.com/logo.png', True)
+
+    registry.record_image_decisions('example.com', [logo])
+    registry.record_image_decisions('example.com', [logo])
+
+    config = registry.load_config('example.com')
+    assert config['learned_at'] == learned_at
+    assert config['images']['skip_url_patterns'] == [r'^https?://example\.com/logo\.png(?:\?|$)']
+
+
+def test_registry_saves_only_when_the_images_section_changes(tmp_path):
+    registry = SiteRegistry(config_dir=tmp_path, use_gemini=False)
+    registry.save_config('example.com', {'domain': 'example.com', 'extraction': {}})
+    saves = []
+    save_config = registry.save_config
+    registry.save_config = lambda *args, **kwargs: (saves.append(args[0]), save_config(*args, **kwargs))
+    # Embedded images carry no URL or size evidence
+    inline = decision('data:image/png;base64,iVBORw0KGgo=', True)
+
+    registry.record_image_decisions('example.com', [inline])
+    registry.record_image_decisions('example.com', [inline])
+    registry.record_image_decisions('example.com', [decision('https://example.com/logo.png', True)])
+
+    # The first call adds the empty evidence blocks, the second changes nothing
+    assert saves == ['example.com', 'example.com']
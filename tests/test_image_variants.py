@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for srcset / resizing-CDN variant selection
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image
+
+from src.article_extractor import ArticleExtractor
+from src.llm_errors import BadInputError
+from src.image_variants import rewrite_cdn_url, select_vision_url
+
+
+def test_photon_resize_replaced_by_width():
+    url = 'https://i0.wp.com/example.com/wp-content/uploads/chart.png?resize=150%2C100&ssl=1'
+    assert rewrite_cdn_url(url, 1200) == 'https://i0.wp.com/example.com/wp-content/uploads/chart.png?ssl=1&w=1200'
+
+
+def test_cloudinary_size_transformations_replaced():
+    url = 'https://res.cloudinary.com/demo/image/upload/w_300,h_200,c_fill,q_auto/v1612/charts/mrr.png'
+    assert rewrite_cdn_url(url, 1200) == 'https://res.cloudinary.com/demo/image/upload/q_auto/c_limit,w_1200/v1612/charts/mrr.png'
+
+    plain = 'https://res.cloudinary.com/demo/image/upload/sample.jpg'
+    assert rewrite_cdn_url(plain, 800) == 'https://res.cloudinary.com/demo/image/upload/c_limit,w_800/sample.jpg'
+
+
+def test_imgix_and_unknown_hosts():
+    assert rewrite_cdn_url('https://acme.imgix.net/a.jpg?w=100&h=80&auto=format', 1200) == \
+        'https://acme.imgix.net/a.jpg?auto=format&w=1200&fit=max'
+    assert rewrite_cdn_url('https://example.com/images/a.jpg?w=100', 1200) == 'https://example.com/images/a.jpg?w=100'
+
+
+def test_signed_urls_are_not_rewritten():
+    signed_imgix = 'https://acme.imgix.net/a.jpg?w=100&s=0f3c9a'
+    assert rewrite_cdn_url(signed_imgix, 1200) == signed_imgix
+    signed_cloudinary = 'https://res.cloudinary.com/demo/image/upload/s--Ai4Znfl3--/w_300/sample.jpg'
+    assert rewrite_cdn_url(signed_cloudinary, 1200) == signed_cloudinary
+
+
+def test_page_src_fetched_when_the_variant_fails(tmp_path):
+    extractor = ArticleExtractor(output_dir=tmp_path / 'out', log_file=tmp_path / 'test.log',
+                                 image_cache_file=tmp_path / 'image_cache.json')
+    src = 'https://example.com/wp-content/uploads/2024/01/chart-300x200.png'
+    variant = 'https://example.com/wp-content/uploads/2024/01/chart.png'
+    fetches = []
+
+    def fetch(url, output_path):
+        fetches.append(url)
+        if url == variant:
+            raise BadInputError('HTTP Error 404: Not Found')
+        Image.new('RGB', (300, 200), 'white').save(output_path, 'PNG')
+    extractor._fetch_image = fetch
+
+    for _ in range(2):
+        image_path = extractor._download_image_for_vision(src, variant)
+        assert image_path is not None and image_path.exists()
+        image_path.unlink()
+
+    # The missing variant is remembered; the image itself is not marked as failed
+    assert fetches == [variant, src, src]
+    assert extractor.image_cache.get_failure(src) is None
+
+
+def test_wordpress_thumbnail_upgraded_only_when_too_small():
+    assert rewrite_cdn_url('https://example.com/wp-content/uploads/2024/01/chart-300x200.png', 1200) == \
+        'https://example.com/wp-content/uploads/2024/01/chart.png'
+    large = 'https://example.com/wp-content/uploads/2024/01/chart-1536x1024.png'
+    assert rewrite_cdn_url(large, 1200) == large
+
+
+def test_wordpress_thumbnail_prefers_srcset_sizes_over_the_original():
+    base = 'https://example.com/wp-content/uploads/2024/01/chart'
+    tag = (f'<img src="{base}-300x200.png" srcset="{base}-300x200.png 300w, {base}-1024x683.png 1024w, '
+           f'{base}-1536x1024.png 1536w, {base}-2048x1365.png 2048w">')
+    assert select_vision_url(tag, f'{base}-300x200.png', 1200) == f'{base}-1536x1024.png'
+
+    # No listed size is wide enough: only then the original upload
+    tag = f'<img src="{base}-300x200.png" srcset="{base}-300x200.png 300w, {base}-1024x683.png 1024w">'
+    assert select_vision_url(tag, f'{base}-300x200.png', 1200) == f'{base}.png'
+    assert rewrite_cdn_url(f'{base}-300x200.png', 1200, [{'url': f'{base}-1536x1024.png', 'width': 1536}]) == \
+        f'{base}-1536x1024.png'
+
+
+def test_srcset_and_lazy_attributes():
+    tag = ('<img src="thumb.png" data-src="https://example.com/full.png" '
+           'srcset="https://example.com/a-300.png 300w, https://example.com/a-1280.png 1280w, '
+           'https://example.com/a-2560.png 2560w">')
+    assert select_vision_url(tag, 'thumb.png', 1200) == 'https://example.com/a-1280.png'
+    assert select_vision_url('<img src="x.png" data-src="https://example.com/full.png">', 'x.png', 1200) == \
+        'https://example.com/full.png'
+
+
+def test_extract_images_keeps_page_src_and_sets_fetch_url(tmp_path):
+    extractor = ArticleExtractor(output_dir=tmp_path / 'out', log_file=tmp_path / 'test.log',
+                                 image_cache_file=tmp_path / 'image_cache.json', vision_width=1000)
+    content = '<p>Chart</p><img src="https://i1.wp.com/example.com/chart.png?resize=200%2C100">'
+
+    images = extractor.extract_images(content)
+
+    assert images[0]['src'] == 'https://i1.wp.com/example.com/chart.png?resize=200%2C100'
+    assert images[0]['vision_src'] == 'https://i1.wp.com/example.com/chart.png?w=1000'
+    assert 'original image: https://i1.wp.com/example.com/chart.png?resize=200%2C100]*' in \
+        extractor.html_to_markdown(content, images)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Tests for the pluggable LLM backends and the offline fake (no API key needed)
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+from PIL import Image
+
+from src import llm_service
+from src.circuit_breaker import CircuitBreaker
+from src.llm_backends import FakeAPIError, FakeBackend, LatencyModel, prompt_key
+from src.llm_errors import RateLimitError, classify_error
+from src.llm_service import LLMService
+from src.model_router import ModelRouter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_service(backend):
+    return LLMService(ModelRouter(routes_file=None, routes={}), circuit_breaker=CircuitBreaker(failure_threshold=100),
+                      backend=backend)
+
+
+def test_same_seed_gives_same_latencies_and_errors():
+    def run():
+        backend = FakeBackend(latency={'distribution': 'lognormal', 'median': 0.5, 'sigma': 0.8},
+                              error_rate=0.3, seed=7, time_scale=0)
+        outcomes = []
+        for i in range(30):
+            try:
+                backend.generate('vision', 'm', [f'prompt {i}'])
+                outcomes.append('ok')
+            except FakeAPIError as e:
+                outcomes.append(e.code)
+        return outcomes, [call['latency'] for call in backend.calls]
+
+    assert run() == run()
+    outcomes, _ = run()
+    assert 503 in outcomes and 'ok' in outcomes
+
+
+def test_latency_distributions():
+    import random
+    rng = random.Random(1)
+    assert LatencyModel({'distribution': 'fixed', 'value': 0.25}).sample(rng) == 0.25
+    samples = [LatencyModel({'distribution': 'uniform', 'low': 1, 'high': 2}).sample(rng) for _ in range(50)]
+    assert all(1 <= s <= 2 for s in samples)
+    assert LatencyModel({'distribution': 'lognormal', 'median': 100, 'max': 3}).sample(rng) == 3
+    with pytest.raises(ValueError):
+        LatencyModel({'distribution': 'pareto'})
+
+
+def test_latency_is_slept_with_time_scale():
+    slept = []
+    backend = FakeBackend(latency={'distribution': 'fixed', 'value': 2.0}, time_scale=0.5, sleep=slept.append)
+    backend.generate('noise', 'm', 'prompt')
+    assert slept == [1.0]
+
+
+def test_requests_per_minute_throttles_with_429():
+    clock = FakeClock()
+    backend = FakeBackend(requests_per_minute=2, clock=clock, time_scale=0)
+    backend.generate('config', 'm', 'a')
+    backend.generate('config', 'm', 'b')
+    with pytest.raises(FakeAPIError) as excinfo:
+        backend.generate('config', 'm', 'c')
+    assert isinstance(classify_error(excinfo.value), RateLimitError)
+
+    clock.now = 61.0
+    assert backend.generate('config', 'm', 'd').text
+    assert backend.stats['throttled'] == 1
+
+
+def test_service_retries_through_fake_errors(monkeypatch):
+    monkeypatch.setattr(llm_service.time, 'sleep', lambda seconds: None)
+    backend = FakeBackend(rate_limit_rate=0.5, seed=3, time_scale=0)
+    service = make_service(backend)
+
+    for i in range(10):
+        assert service.generate_with_retry('noise', f'prompt {i}', max_attempts=10).text
+    assert backend.stats['throttled'] > 0
+    assert service.usage['noise']['calls'] == 10
+
+
+def test_scripted_rules_then_defaults():
+    backend = FakeBackend(responses=[
+        {'call_type': 'vision', 'match': 'revenue', 'text': 'Revenue chart.'},
+        {'match': 'anything', 'text': 'Catch-all.'},
+    ], time_scale=0)
+
+    assert backend.generate('vision', 'm', ['Quarterly revenue']).text == 'Revenue chart.'
+    assert backend.generate('noise', 'm', ['anything at all']).text == 'Catch-all.'
+    assert backend.generate('boundaries', 'm', ['other']).text.startswith('has_boundaries: false')
+    batch = json.loads(backend.generate('vision_batch', 'm', ['prompt', 'IMAGE 1:', 'img', 'IMAGE 2:', 'img']).text)
+    assert [item['index'] for item in batch] == [1, 2]
+
+
+def test_replay_answers_recorded_requests_in_order(tmp_path):
+    image = Image.new('RGB', (20, 20), 'red')
+    contents = ['Describe this', image]
+    replay_file = tmp_path / 'llm.jsonl'
+    records = [
+        {'key': prompt_key('vision', contents), 'call_type': 'vision', 'text': 'first', 'prompt_tokens': 300},
+        {'key': prompt_key('vision', contents), 'call_type': 'vision', 'text': 'second'},
+    ]
+    replay_file.write_text('\n'.join(json.dumps(r) for r in records) + '\n')
+
+    backend = FakeBackend(replay=str(replay_file), strict_replay=True, time_scale=0)
+    same_image = Image.new('RGB', (20, 20), 'red')
+    first = backend.generate('vision', 'm', ['Describe this', same_image])
+    assert first.text == 'first'
+    assert first.usage_metadata.prompt_token_count == 300
+    assert backend.generate('vision', 'm', contents).text == 'second'
+    assert backend.generate('vision', 'm', contents).text == 'second'
+
+    with pytest.raises(FakeAPIError):
+        backend.generate('vision', 'm', ['Never recorded'])
+
+
+def test_extractor_describes_images_offline(tmp_path):
+    from src.article_extractor import ArticleExtractor
+
+    backend = FakeBackend(responses=[{'call_type': 'vision', 'text': 'Line chart of churn.'}], time_scale=0)
+    extractor = ArticleExtractor(output_dir=tmp_path / 'out', log_file=tmp_path / 'test.log', use_gemini=True,
+                                 image_cache_file=tmp_path / 'image_cache.json', llm_backend=backend)
+    assert extractor.use_gemini and extractor.llm.available
+
+    def fake_fetch(url, output_path):
+        Image.new('RGB', (400, 300), 'white').save(output_path, 'PNG')
+    extractor._fetch_image = fake_fetch
+
+    description = asyncio.run(extractor._generate_gemini_description_async(
+        'https://example.com/churn.png', 'Churn fell.', 'Retention rose.'))
+    assert 'Line chart of churn.' in description
+    assert [call['call_type'] for call in backend.calls] == ['image_triage', 'vision']
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM/image error taxonomy and the persistent image cache
+"""
+
+import asyncio
+import socket
+import sys
+import urllib.error
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image, UnidentifiedImageError
+
+from src.circuit_breaker import CircuitBreaker
+from src.image_cache import ImageCache
+from src.llm_errors import (BadInputError, EmptyResponseError, FatalRequestError, LLMCallError,
+                            NetworkTransientError, PermanentRefusalError, RateLimitError, ServerTimeoutError, check_response,
+                            classify_error, classify_llm_error)
+
+
+class CodedError(Exception):
+    def __init__(self, code, message=''):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+def test_classifies_status_codes():
+    assert isinstance(classify_error(CodedError(429, 'RESOURCE_EXHAUSTED')), RateLimitError)
+    assert isinstance(classify_error(CodedError(504, 'DEADLINE_EXCEEDED')), ServerTimeoutError)
+    assert isinstance(classify_error(CodedError(503)), NetworkTransientError)
+    assert isinstance(classify_error(CodedError(404)), BadInputError)
+    assert isinstance(classify_error(CodedError(403)), PermanentRefusalError)
+
+
+def test_classifies_network_and_image_errors():
+    assert isinstance(classify_error(socket.timeout('timed out')), ServerTimeoutError)
+    assert isinstance(classify_error(urllib.error.URLError('connection reset')), NetworkTransientError)
+    assert isinstance(classify_error(UnidentifiedImageError('cannot identify image')), BadInputError)
+    assert type(classify_error(ValueError('weird'))) is LLMCallError
+
+
+def test_api_errors_about_the_request_are_fatal():
+    assert isinstance(classify_llm_error(CodedError(401, 'API key not valid')), FatalRequestError)
+    assert isinstance(classify_llm_error(CodedError(403, 'PERMISSION_DENIED')), FatalRequestError)
+    assert isinstance(classify_llm_error(CodedError(404, 'models/gemini-9 is not found')), FatalRequestError)
+    assert isinstance(classify_llm_error(CodedError(400, 'Unable to process input image')), BadInputError)
+    assert isinstance(classify_llm_error(CodedError(429)), RateLimitError)
+    assert not classify_llm_error(CodedError(401)).retryable
+
+
+def test_retry_policies():
+    assert not classify_error(CodedError(404)).retryable
+    rate_limit = classify_error(CodedError(429))
+    assert rate_limit.retryable
+    assert rate_limit.retry_delay(0) < rate_limit.retry_delay(2) <= 60
+
+
+def test_check_response_flags_refusals():
+    class Candidate:
+        finish_reason = 'SAFETY'
+
+    class Response:
+        prompt_feedback = None
+        candidates = [Candidate()]
+        text = None
+
+    try:
+        check_response(Response())
+    except PermanentRefusalError:
+        pass
+    else:
+        raise AssertionError('refusal not detected')
+
+
+def test_empty_response_without_reason_is_retryable():
+    class Response:
+        prompt_feedback = None
+        candidates = [SimpleNamespace(finish_reason='STOP')]
+        text = None
+
+    try:
+        check_response(Response())
+    except EmptyResponseError as e:
+        assert e.retryable
+    else:
+        raise AssertionError('empty response not detected')
+
+
+def test_image_cache_persists_failures(tmp_path):
+    cache_file = tmp_path / 'image_cache.json'
+    cache = ImageCache(cache_file)
+    cache.record_failure('https://example.com/a.png', 'bad_input', 'HTTP 404')
+
+    reloaded = ImageCache(cache_file)
+    assert reloaded.get_failure('https://example.com/a.png')['category'] == 'bad_input'
+    assert reloaded.get_failure('https://example.com/b.png') is None
+
+    reloaded.forget('https://example.com/a.png')
+    assert ImageCache(cache_file).get_failure('https://example.com/a.png') is None
+
+
+def test_bad_image_is_not_retried_or_fetched_again(tmp_path):
+    from src.article_extractor import ArticleExtractor
+
+    extractor = ArticleExtractor(output_dir=tmp_path / 'out', log_file=tmp_path / 'test.log',
+                                 image_cache_file=tmp_path / 'image_cache.json')
+    extractor.use_gemini = True
+    extractor.gemini_client = object()
+    fetches = []
+
+    def fake_fetch(url, output_path):
+        fetches.append(url)
+        raise CodedError(404, 'Not Found')
+
+    extractor._fetch_image = fake_fetch
+    url = 'https://example.com/missing.png'
+    for _ in range(2):
+        result = asyncio.run(extractor._generate_gemini_description_async(url, '', ''))
+        assert result is None
+
+    assert fetches == [url]
+    assert extractor.image_cache.get_failure(url)['category'] == 'bad_input'
+
+
+class RejectingModels:
+    """The API answers every request with the given status (expired key, unknown model...)"""
+
+    def __init__(self, code, message):
+        self.error = CodedError(code, message)
+        self.calls = 0
+
+    def generate_content(self, model, contents, config):
+        self.calls += 1
+        raise self.error
+
+
+def test_rejected_request_does_not_mark_images_as_failed(tmp_path):
+    from src.article_extractor import ArticleExtractor
+
+    extractor = ArticleExtractor(output_dir=tmp_path / 'out', log_file=tmp_path / 'test.log',
+                                 image_cache_file=tmp_path / 'image_cache.json')
+    extractor.use_gemini = True
+    extractor.llm.circuit_breaker = extractor.circuit_breaker = CircuitBreaker()
+    models = RejectingModels(403, 'PERMISSION_DENIED: API key expired')
+    extractor.gemini_client = SimpleNamespace(models=models)
+    extractor._fetch_image = lambda url, output_path: Image.new('RGB', (600, 400), 'white').save(output_path, 'PNG')
+
+    for url in ('https://example.com/chart-1.png', 'https://example.com/chart-2.png'):
+        assert asyncio.run(extractor._generate_gemini_description_async(url, '', '')) is None
+
+    assert len(extractor.image_cache) == 0
+    assert len(ImageCache(tmp_path / 'image_cache.json')) == 0
+    # The first rejection stops the run from sending more requests
+    assert models.calls == 1
+    assert extractor.llm.degraded and isinstance(extractor.llm.fatal_error, FatalRequestError)
+
+
+class EmptyModels:
+    """The API answers with no text and no block or finish reason"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, model, contents, config):
+        self.calls += 1
+        return SimpleNamespace(prompt_feedback=None, candidates=[], text=None, usage_metadata=None)
+
+
+def test_empty_answer_does_not_mark_image_as_failed(tmp_path):
+    from src.article_extractor import ArticleExtractor
+
+    extractor = ArticleExtractor(output_dir=tmp_path / 'out', log_file=tmp_path / 'test.log',
+                                 image_cache_file=tmp_path / 'image_cache.json')
+    extractor.use_gemini = True
+    extractor.llm.circuit_breaker = extractor.circuit_breaker = CircuitBreaker()
+    policy = extractor.llm.retry_delay
+    extractor.llm.retry_delay = lambda e, attempt, max_attempts: (
+        None if policy(e, attempt, max_attempts) is None else 0)
+    models = EmptyModels()
+    extractor.gemini_client = SimpleNamespace(models=models)
+    extractor._fetch_image = lambda url, output_path: Image.new('RGB', (600, 400), 'white').save(output_path, 'PNG')
+
+    url = 'https://example.com/chart.png'
+    assert asyncio.run(extractor._generate_gemini_description_async(url, '', '')) is None
+
+    # One triage call, then the vision call is retried up to its max_attempts
+    assert models.calls == 1 + EmptyResponseError.max_attempts
+    assert extractor.image_cache.get_failure(url) is None
+    assert not extractor.llm.degraded
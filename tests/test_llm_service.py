@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared LLM service (no API key needed)
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from src.circuit_breaker import CircuitBreaker
+from src.inverted_learning import InvertedLearner
+from src.llm_errors import BadInputError
+from src.llm_service import LLMService
+from src.model_router import ModelRouter
+from src.site_registry import SiteRegistry
+from src import llm_service
+
+
+class CodedError(Exception):
+    def __init__(self, code, message=''):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class FakeModels:
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.calls = []
+
+    def generate_content(self, model, contents, config):
+        self.calls.append((model, contents))
+        answer = self.answers.pop(0) if len(self.answers) > 1 else self.answers[0]
+        if isinstance(answer, Exception):
+            raise answer
+        usage = SimpleNamespace(prompt_token_count=100, candidates_token_count=20, cached_content_token_count=0)
+        return SimpleNamespace(text=answer, usage_metadata=usage)
+
+
+def make_service(answers=('ok',), **kwargs):
+    router = ModelRouter(routes_file=None, routes={'config': {'model': 'model-a', 'timeout': 5}})
+    service = LLMService(router, circuit_breaker=CircuitBreaker(failure_threshold=100), **kwargs)
+    service.client = SimpleNamespace(models=FakeModels(answers))
+    return service
+
+
+def test_components_share_one_client(tmp_path):
+    service = make_service()
+    registry = SiteRegistry(config_dir=tmp_path / 'sites', llm=service)
+    learner = InvertedLearner(llm=service)
+
+    assert registry.gemini_client is service.client
+    assert learner.gemini_client is service.client
+    assert learner.model_router is registry.model_router is service.model_router
+
+
+def test_retries_rate_limit_then_succeeds(monkeypatch):
+    monkeypatch.setattr(llm_service.time, 'sleep', lambda seconds: None)
+    service = make_service([CodedError(429, 'RESOURCE_EXHAUSTED'), 'answer'])
+
+    response = service.generate_with_retry('config', 'prompt', max_attempts=3)
+    assert response.text == 'answer'
+    assert len(service.client.models.calls) == 2
+    assert service.client.models.calls[0][0] == 'model-a'
+
+
+def test_bad_input_is_not_retried(monkeypatch):
+    monkeypatch.setattr(llm_service.time, 'sleep', lambda seconds: None)
+    service = make_service([CodedError(400, 'INVALID_ARGUMENT')])
+
+    with pytest.raises(Exception):
+        service.generate_with_retry('config', 'prompt', max_attempts=3)
+    assert len(service.client.models.calls) == 1
+    assert service.retry_delay(BadInputError('bad'), 0) is None
+
+
+def test_identical_text_prompts_hit_response_cache():
+    service = make_service(['first', 'second'])
+
+    assert service.generate('config', ['system', 'user'], cache=True).text == 'first'
+    assert service.generate('config', ['system', 'user'], cache=True).text == 'first'
+    assert service.generate('config', ['system', 'other'], cache=True).text == 'second'
+    assert len(service.client.models.calls) == 2
+    assert service.usage['config']['cache_hits'] == 1
+
+
+def test_usage_is_accounted_per_call_type():
+    service = make_service()
+    service.generate('config', 'a')
+    service.generate('noise', 'b')
+    service.generate('noise', 'c')
+
+    assert service.usage['noise']['calls'] == 2
+    assert service.usage['noise']['prompt_tokens'] == 200
+    assert service.usage['config']['output_tokens'] == 20
+    assert 'noise: 2 calls' in service.usage_summary()
+
+
+def test_concurrency_limit_is_global():
+    service = make_service(max_concurrency=2)
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def slow_generate(model, contents, config):
+        with lock:
+            in_flight.append(1)
+            peak.append(len(in_flight))
+        time.sleep(0.05)
+        with lock:
+            in_flight.pop()
+        return SimpleNamespace(text='ok', usage_metadata=None)
+
+    service.client.models.generate_content = slow_generate
+    threads = [threading.Thread(target=service.generate, args=('config', f'prompt {i}')) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) == 2
+    assert service.usage['config']['calls'] == 6
+
+
+def test_hedged_requests_share_the_concurrency_limit():
+    service = make_service(max_concurrency=2)
+
+    assert service.deadline_caller.slots is service._slots
+
+
+def test_call_abandoned_at_its_deadline_holds_its_slot_and_is_billed():
+    from src.llm_errors import ServerTimeoutError
+    from src.token_budget import TokenBudget
+
+    router = ModelRouter(routes_file=None, routes={'config': {'model': 'model-a', 'timeout': 0.2}})
+    budget = TokenBudget(max_tokens=10_000)
+    service = LLMService(router, circuit_breaker=CircuitBreaker(failure_threshold=100), max_concurrency=1,
+                         budget=budget)
+    usage = SimpleNamespace(prompt_token_count=120, candidates_token_count=30, cached_content_token_count=0)
+
+    def slow_generate(model, contents, config):
+        time.sleep(0.5)
+        return SimpleNamespace(text='ok', usage_metadata=usage)
+
+    service.client = SimpleNamespace(models=SimpleNamespace(generate_content=slow_generate))
+    with pytest.raises(ServerTimeoutError):
+        service.generate('config', 'prompt')
+
+    assert not service._slots.acquire(blocking=False)
+    time.sleep(0.5)
+    assert service._slots.acquire(blocking=False)
+    service._slots.release()
+    assert service.usage['config']['prompt_tokens'] == 120
+    assert budget.tokens == 150
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the local SVG / data: URI image fast path
+"""
+
+import base64
+import sys
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image
+
+from src import local_images
+from src.article_extractor import ArticleExtractor
+
+PIXEL_GIF = 'data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7'
+EMPTY_SVG = "data:image/svg+xml,%3Csvg%20xmlns='http://www.w3.org/2000/svg'%20viewBox='0%200%20800%20600'%3E%3C/svg%3E"
+
+CHART_SVG = """<svg xmlns="http://www.w3.org/2000/svg" width="600" height="400">
+  <title>Monthly Recurring Revenue</title>
+  <g class="x axis"><g class="tick"><text>Jan</text></g><g class="tick"><text>Feb</text></g></g>
+  <g class="legend"><text>New MRR</text><text>Churned MRR</text></g>
+  <rect x="10" y="10" width="20" height="100"/>
+  <text>$120k</text>
+</svg>"""
+
+ICON_SVG = '<svg width="24" height="24" viewBox="0 0 24 24"><path d="M0 0h24v24H0z"/></svg>'
+
+
+def png_data_uri(width, height):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), 'white').save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def make_extractor(tmp_path):
+    return ArticleExtractor(output_dir=tmp_path / 'out', log_file=tmp_path / 'test.log',
+                            image_cache_file=tmp_path / 'image_cache.json')
+
+
+def test_placeholders_are_detected():
+    assert local_images.is_placeholder(*local_images.decode_data_uri(PIXEL_GIF))
+    assert local_images.is_placeholder(*local_images.decode_data_uri(EMPTY_SVG))
+    assert not local_images.is_placeholder(*local_images.decode_data_uri(png_data_uri(400, 300)))
+
+
+def test_svg_text_is_grouped():
+    svg_text = local_images.extract_svg_text(CHART_SVG)
+    assert svg_text['title'] == 'Monthly Recurring Revenue'
+    assert svg_text['axis_labels'] == ['Jan', 'Feb']
+    assert svg_text['legend'] == ['New MRR', 'Churned MRR']
+    assert svg_text['labels'] == ['$120k']
+    assert local_images.describe_svg(ICON_SVG) is None
+
+
+def test_extract_images_resolves_and_skips_placeholders(tmp_path):
+    extractor = make_extractor(tmp_path)
+    content = (f'<p>Intro</p><img src="{PIXEL_GIF}" data-src="https://example.com/chart.png">'
+               f'<img src="{EMPTY_SVG}"><p>Icon</p>{ICON_SVG}<p>Chart</p>{CHART_SVG}')
+
+    images = extractor.extract_images(content)
+
+    assert [img['src'] for img in images] == ['https://example.com/chart.png', 'inline-svg-2']
+    assert images[1]['alt'] == 'Monthly Recurring Revenue'
+
+
+def test_inline_svg_chart_described_without_vision(tmp_path):
+    extractor = make_extractor(tmp_path)
+    content = f'<p>Revenue grew.</p>{CHART_SVG}<p>After.</p>'
+    images = extractor.extract_images(content)
+
+    remaining = extractor.describe_local_images(images)
+    markdown = extractor.html_to_markdown(content, images)
+
+    assert remaining == []
+    assert 'Axis labels: Jan, Feb' in markdown
+    assert '<svg' not in markdown and 'inline-svg' not in markdown
+
+
+def test_data_uri_decoded_for_vision_without_download(tmp_path):
+    extractor = make_extractor(tmp_path)
+    extractor._fetch_image = lambda url, output_path: (_ for _ in ()).throw(AssertionError('downloaded'))
+
+    image_path = extractor._download_image_for_vision(png_data_uri(400, 300))
+
+    assert image_path.exists()
+    with Image.open(image_path) as img:
+        assert img.size == (400, 300)
+    image_path.unlink()
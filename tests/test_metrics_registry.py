@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for the live metrics registry and its OpenMetrics exposition
+"""
+
+import sys
+import urllib.request
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from src.circuit_breaker import CircuitBreaker
+from src.llm_service import LLMService
+from src.metrics_registry import CONTENT_TYPE, MetricsRegistry
+from src.model_router import ModelRouter
+
+
+def test_exposition_format():
+    registry = MetricsRegistry()
+    articles = registry.counter('articles', 'Processed articles', ('status',))
+    articles.inc(status='success')
+    articles.inc(2, status='failed')
+    inflight = registry.gauge('llm_inflight_calls', 'In flight', ('call_type',))
+    with inflight.track(call_type='vision'):
+        assert inflight.value(call_type='vision') == 1
+    latency = registry.histogram('stage_seconds', 'Stage latency', ('stage',), buckets=(0.1, 1))
+    latency.observe(0.05, stage='fetch')
+    latency.observe(0.5, stage='fetch')
+
+    text = registry.render()
+
+    assert '# TYPE article_extractor_articles counter' in text
+    assert 'article_extractor_articles_total{status="failed"} 2' in text
+    assert 'article_extractor_llm_inflight_calls{call_type="vision"} 0' in text
+    assert 'article_extractor_stage_seconds_bucket{stage="fetch",le="0.1"} 1' in text
+    assert 'article_extractor_stage_seconds_bucket{stage="fetch",le="+Inf"} 2' in text
+    assert 'article_extractor_stage_seconds_count{stage="fetch"} 2' in text
+    assert text.endswith('# EOF\n')
+
+
+def test_registration_is_idempotent_but_checks_labels():
+    registry = MetricsRegistry()
+    assert registry.counter('retries', 'Retries', ('category',)) is registry.counter('retries', 'Retries', ('category',))
+    with pytest.raises(ValueError):
+        registry.gauge('retries', 'Retries', ('category',))
+    with pytest.raises(ValueError):
+        registry.counter('retries', 'Retries', ('category',)).inc(kind='x')
+
+
+def test_collectors_refresh_before_exposition():
+    registry = MetricsRegistry()
+    domains = registry.gauge('learned_domains', 'Learned sites')
+    count = [3]
+    registry.add_collector('learned_domains', lambda: domains.set(count[0]))
+    assert 'article_extractor_learned_domains 3' in registry.render()
+    count[0] = 4
+    assert 'article_extractor_learned_domains 4' in registry.render()
+
+
+def test_file_and_http_exposition(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter('articles', 'Processed articles', ('status',)).inc(status='success')
+
+    path = registry.write_file(tmp_path / 'metrics.prom')
+    assert 'article_extractor_articles_total{status="success"} 1' in path.read_text()
+
+    host, port = registry.serve(0)
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as response:
+            assert response.headers['Content-Type'] == CONTENT_TYPE
+            assert 'article_extractor_articles_total' in response.read().decode('utf-8')
+    finally:
+        registry.shutdown()
+
+
+def test_llm_service_reports_calls_tokens_and_cache():
+    class Models:
+        def generate_content(self, model, contents, config):
+            usage = SimpleNamespace(prompt_token_count=100, candidates_token_count=20, cached_content_token_count=0)
+            return SimpleNamespace(text='ok', usage_metadata=usage)
+
+    registry = MetricsRegistry()
+    service = LLMService(ModelRouter(routes_file=None), circuit_breaker=CircuitBreaker(failure_threshold=100),
+                         metrics_registry=registry)
+    service.client = SimpleNamespace(models=Models())
+    config = SimpleNamespace(temperature=0.1)
+    service.generate('config', 'prompt', config=config, cache=True)
+    service.generate('config', 'prompt', config=config, cache=True)
+
+    text = registry.render()
+    assert 'article_extractor_llm_calls_total{call_type="config",outcome="ok"} 1' in text
+    assert 'article_extractor_llm_tokens_total{call_type="config",kind="prompt"} 100' in text
+    assert 'article_extractor_llm_response_cache_hit_ratio{call_type="config"} 0.5' in text
+    assert 'article_extractor_llm_inflight_calls{call_type="config"} 0' in text
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tests for model tiering routes and escalation
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.model_router import ModelRouter, FULL_MODEL, LIGHT_MODEL
+
+
+def test_cheap_decisions_route_to_light_model():
+    router = ModelRouter(routes_file=None)
+
+    assert router.model_for('dynamic_check') == LIGHT_MODEL
+    assert router.model_for('boundary_validation') == LIGHT_MODEL
+    assert router.model_for('noise') == FULL_MODEL
+    assert router.model_for('unknown_call') == FULL_MODEL
+    assert router.is_enabled('image_triage')
+
+
+def test_routes_file_overrides_defaults(tmp_path):
+    routes_file = tmp_path / 'routes.yaml'
+    routes_file.write_text("routes:\n  noise: gemini-2.5-flash-lite\n  image_triage:\n    enabled: false\n")
+
+    router = ModelRouter(routes_file=routes_file)
+
+    assert router.model_for('noise') == LIGHT_MODEL
+    assert not router.is_enabled('image_triage')
+
+
+def test_shipped_routes_file_only_overrides():
+    shipped = Path(__file__).parent.parent / 'config' / 'model_routes.yaml'
+
+    assert ModelRouter(routes_file=shipped).routes == ModelRouter(routes_file=None).routes
+
+
+def test_low_confidence_escalates_once():
+    router = ModelRouter(routes_file=None)
+    models = []
+
+    def generate(model):
+        models.append(model)
+        return 'low' if model == LIGHT_MODEL else 'high'
+
+    response, parsed = router.run('dynamic_check', generate, parse=lambda r: r if r == 'high' else None)
+
+    assert models == [LIGHT_MODEL, FULL_MODEL]
+    assert parsed == 'high'
+    assert router.stats['dynamic_check'] == {'calls': 1, 'escalations': 1}
+
+
+def test_failure_without_escalation_raises():
+    router = ModelRouter(routes_file=None)
+
+    def generate(model):
+        raise RuntimeError('boom')
+
+    try:
+        router.run('noise', generate)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError('expected RuntimeError')
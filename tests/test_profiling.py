@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for per-stage profiling (--profile)
+"""
+
+import re
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.article_metrics import ArticleMetrics
+from src.profiling import StageProfiler
+
+
+def busy(repeats):
+    return sum(len(re.findall(r'\w+', 'net revenue retention ' * 200)) for _ in range(repeats))
+
+
+def test_nested_stages_profiled_separately(tmp_path):
+    profiler = StageProfiler(sample_interval=0.001)
+    metrics = ArticleMetrics('https://example.com/a', profiler=profiler)
+
+    def process_article():
+        with metrics.stage('extraction'):
+            busy(100)
+            with profiler.stage('learning'):
+                busy(300)
+        with metrics.stage('conversion'):
+            busy(50)
+
+    process_article()
+    written = {path.name for path in profiler.write(tmp_path)}
+
+    assert {'extraction.prof', 'learning.prof', 'conversion.prof', 'learning.txt', 'stages.folded'} <= written
+    assert profiler.cpu_seconds('learning') > 0
+    assert 'extraction' in metrics.stages and 'conversion' in metrics.stages
+
+    folded = (tmp_path / 'stages.folded').read_text().splitlines()
+    assert folded and all(re.match(r'^\S.* \d+$', line) for line in folded)
+    assert any(line.startswith('extraction;learning;process_article') for line in folded)
+
+
+def test_worker_threads_are_not_traced(tmp_path):
+    profiler = StageProfiler(sample_interval=0)
+
+    def download():
+        with profiler.stage('fetch'):
+            busy(10)
+
+    with profiler.stage('vision'):
+        worker = threading.Thread(target=download)
+        worker.start()
+        worker.join()
+
+    assert {path.name for path in profiler.write(tmp_path)} == {'vision.prof', 'vision.txt', 'stages.folded'}
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Tests for the extraction service (--serve): HTTP API, raw HTML input and backpressure
+"""
+
+import http.client
+import json
+import logging
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.article_metrics import ArticleMetrics, MetricsRecorder
+from src.article_result import ArticleDocument, ArticleResult
+from src.llm_backends import FakeBackend
+from src.metrics_registry import MetricsRegistry
+from src.service import ExtractionService, QueueFullError, make_server
+
+
+class StubBrowserPool:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class StubExtractor:
+    """Stands in for ArticleExtractor: one in-memory Markdown document per article"""
+
+    def __init__(self, gate=None):
+        self.metrics_registry = MetricsRegistry()
+        self.metrics = MetricsRecorder(registry=self.metrics_registry)
+        self.logger = logging.getLogger('test_service')
+        self.browser_pool = None
+        self.gate = gate
+        self.calls = []
+
+    def enable_browser_pool(self):
+        self.browser_pool = StubBrowserPool()
+        return self.browser_pool
+
+    def close(self):
+        self.browser_pool.close()
+
+    def extract_article(self, url, html=None, sinks=None):
+        self.calls.append((url, html))
+        if self.gate is not None:
+            self.gate.wait(5)
+        metrics = ArticleMetrics(url)
+        if 'broken' in url:
+            metrics.finish('failed', error=ValueError('no article body'))
+            record = self.metrics.record(metrics)
+            return ArticleResult(url, 'failed', metrics=record, error=record['error'])
+        document = ArticleDocument(url, {'title': 'Article'},
+                                   f"# Article\n\nFrom {'raw HTML' if html else 'the web'}\n")
+        outputs = {sink.name: sink.write(document) for sink in sinks or ()}
+        metrics.finish('success')
+        return ArticleResult(url, 'success', document=document, metrics=self.metrics.record(metrics), outputs=outputs)
+
+
+@pytest.fixture
+def running():
+    started = []
+
+    def start(extractor, max_queue=4, **server_kwargs):
+        service = ExtractionService(extractor, max_queue=max_queue, request_timeout=10).start()
+        server = make_server(service, port=0, **server_kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        started.append((server, service))
+        return server, service
+
+    yield start
+    for server, service in started:
+        server.shutdown()
+        server.server_close()
+        service.stop()
+
+
+def post(port, body):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('POST', '/extract', json.dumps(body), {'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    return response.status, dict(response.getheaders()), response.read().decode('utf-8')
+
+
+def test_extract_returns_markdown_or_json(running):
+    extractor = StubExtractor()
+    server, service = running(extractor)
+    port = server.server_address[1]
+
+    status, headers, body = post(port, {'url': 'https://example.com/a'})
+    assert status == 200 and headers['Content-Type'].startswith('text/markdown')
+    assert body.startswith('# Article')
+
+    status, _, body = post(port, {'url': 'https://example.com/b', 'html': '<html></html>', 'format': 'json'})
+    result = json.loads(body)
+    assert status == 200 and result['status'] == 'success'
+    assert 'From raw HTML' in result['markdown']
+    assert result['metrics']['domain'] == 'example.com'
+    assert extractor.calls[-1] == ('https://example.com/b', '<html></html>')
+
+    status, _, body = post(port, {'url': 'https://example.com/broken', 'format': 'json'})
+    assert status == 422 and json.loads(body)['error'] == 'no article body'
+
+    assert post(port, {'format': 'pdf'})[0] == 400
+    assert service.health()['succeeded'] == 2 and service.health()['failed'] == 1
+
+
+def test_full_queue_is_refused_with_retry_after():
+    gate = threading.Event()
+    extractor = StubExtractor(gate=gate)
+    service = ExtractionService(extractor, max_queue=1).start()
+
+    first = service.submit('https://example.com/1')
+    # Wait until the pipeline thread holds the first article, so the next one is queued
+    for _ in range(100):
+        if extractor.calls:
+            break
+        threading.Event().wait(0.01)
+    second = service.submit('https://example.com/2')
+    with pytest.raises(QueueFullError):
+        service.submit('https://example.com/3')
+
+    gate.set()
+    assert first.result(5)['status'] == 'success'
+    assert second.result(5)['status'] == 'success'
+    service.stop()
+
+    assert service.health()['rejected'] == 1
+    assert extractor.browser_pool.closed
+    assert 'article_extractor_service_requests_total{outcome="rejected"} 1' in extractor.metrics_registry.render()
+
+
+def test_http_503_when_busy(running):
+    gate = threading.Event()
+    extractor = StubExtractor(gate=gate)
+    server, service = running(extractor, max_queue=1)
+    port = server.server_address[1]
+
+    service.submit('https://example.com/1')
+    for _ in range(100):
+        if extractor.calls:
+            break
+        threading.Event().wait(0.01)
+    service.submit('https://example.com/2')
+
+    status, headers, _ = post(port, {'url': 'https://example.com/3'})
+    gate.set()
+    assert status == 503 and headers['Retry-After']
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='unix sockets not available')
+def test_unix_socket_health(tmp_path, running):
+    socket_path = tmp_path / 'extractor.sock'
+    running(StubExtractor(), socket_path=socket_path)
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(str(socket_path))
+    client.sendall(b'GET /health HTTP/1.0\r\n\r\n')
+    response = b''
+    while chunk := client.recv(4096):
+        response += chunk
+    client.close()
+
+    head, body = response.decode('utf-8').split('\r\n\r\n', 1)
+    assert head.startswith('HTTP/1.0 200')
+    assert json.loads(body)['status'] == 'ok'
+
+
+def test_site_configs_stay_parsed_until_the_file_changes(tmp_path, monkeypatch):
+    from src import site_registry
+
+    registry = site_registry.SiteRegistry(config_dir=tmp_path, use_gemini=False)
+    registry.save_config('example.com', {'domain': 'example.com', 'extraction': {'article_content': {'selector': 'article'}}})
+    loads = []
+    real_load = site_registry.yaml.safe_load
+    monkeypatch.setattr(site_registry.yaml, 'safe_load', lambda f: loads.append(1) or real_load(f))
+
+    first = registry.load_config('example.com', verbose=False)
+    first['extraction']['article_content']['selector'] = 'main'
+    second = registry.load_config('example.com', verbose=False)
+    assert loads == [1]
+    assert second['extraction']['article_content']['selector'] == 'article'
+
+    registry.save_config('example.com', {'domain': 'example.com', 'extraction': {}})
+    assert registry.load_config('example.com', verbose=False)['extraction'] == {}
+    assert loads == [1, 1]
+
+
+class CodedError(Exception):
+    def __init__(self, code, message=''):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class FakeCaches:
+    """Context caches that expire after their TTL, like the Gemini API's"""
+
+    def __init__(self):
+        self.expiry = {}
+        self.created = 0
+
+    def create(self, model, config):
+        self.created += 1
+        name = f'cachedContents/{self.created}'
+        self.expiry[name] = time.monotonic() + float(config.ttl.rstrip('s'))
+        return SimpleNamespace(name=name)
+
+    def update(self, name, config):
+        if self.expiry.get(name, 0) <= time.monotonic():
+            raise CodedError(404, f'CachedContent not found: {name}')
+        self.expiry[name] = time.monotonic() + float(config.ttl.rstrip('s'))
+
+    def delete(self, name):
+        self.expiry.pop(name, None)
+
+
+class FakeVisionModels:
+    def __init__(self, caches):
+        self.caches = caches
+        self.requests = []
+
+    def generate_content(self, model, contents, config):
+        usage = SimpleNamespace(prompt_token_count=300, candidates_token_count=20, cached_content_token_count=0)
+        if config.cached_content is None and config.system_instruction is None:
+            # Image triage (no vision system instruction)
+            return SimpleNamespace(text='{"decision": "describe", "confidence": "high", "reason": ""}',
+                                   usage_metadata=usage, prompt_feedback=None, candidates=[])
+        self.requests.append(config.cached_content)
+        if config.cached_content and self.caches.expiry.get(config.cached_content, 0) <= time.monotonic():
+            raise CodedError(403, 'CachedContent not found (or permission denied)')
+        return SimpleNamespace(text='Bar chart: churn by segment.', usage_metadata=usage,
+                               prompt_feedback=None, candidates=[])
+
+
+def article_html(n):
+    return f"""<html><head><title>Churn {n}</title></head><body><article>
+<h1>Churn {n}</h1>
+<p>Net revenue retention is the single most important SaaS metric for growth-stage companies.</p>
+<figure><img src="https://example.com/img/churn-{n}.png" width="800" height="500" alt="Churn by segment">
+<figcaption>Figure 1: Churn by segment</figcaption></figure>
+<p>Enterprise customers churn far less than SMB customers over a three year horizon.</p>
+<p>Segment-level churn matters because blended averages hide the cohorts that drive expansion revenue.
+A company with strong enterprise retention can absorb high SMB churn for years, while the reverse mix
+quietly caps growth no matter how much new business the sales team brings in each quarter.</p>
+<p>Cohort tables make the difference visible long before it shows up in the blended numbers.</p>
+</article></body></html>"""
+
+
+def test_vision_cache_outlives_its_ttl_in_service_mode(tmp_path, monkeypatch):
+    from PIL import Image
+    from src import article_extractor
+    from src.circuit_breaker import CircuitBreaker
+
+    monkeypatch.chdir(tmp_path)
+    sites = tmp_path / 'config' / 'sites'
+    sites.mkdir(parents=True)
+    (sites / 'example.com.yaml').write_text(
+        "domain: example.com\nextraction:\n  article_content:\n    selector: article\n")
+    monkeypatch.setattr(article_extractor.urllib.request, 'urlretrieve',
+                        lambda url, path: Image.new('RGB', (800, 500), 'navy').save(path, 'PNG'))
+    monkeypatch.setattr(article_extractor, 'VISION_CACHE_TTL_SECONDS', 1.0)
+
+    extractor = article_extractor.ArticleExtractor(output_dir=tmp_path / 'out', log_file=tmp_path / 'test.log',
+                                                   use_gemini=True, image_cache_file=tmp_path / 'cache.json',
+                                                   llm_backend=FakeBackend(time_scale=0))
+    extractor.llm.circuit_breaker = extractor.circuit_breaker = CircuitBreaker()
+    caches = FakeCaches()
+    models = FakeVisionModels(caches)
+    extractor.gemini_client = SimpleNamespace(models=models, caches=caches)
+    service = ExtractionService(extractor, sinks=()).start()
+
+    def extract(n):
+        result = service.submit(f'https://www.example.com/blog/churn-{n}', html=article_html(n)).result(10)
+        assert 'Bar chart: churn by segment.' in result['markdown']
+
+    extract(1)
+    time.sleep(0.85)
+    # Close to the TTL: the cache is extended before the call
+    extract(2)
+    time.sleep(1.1)
+    # Idle past the TTL: a new cache, never the expired one
+    extract(3)
+    # Gone on the server anyway: one retry with the plain system instruction, then a new cache
+    caches.delete('cachedContents/2')
+    extract(4)
+    extract(5)
+    service.stop()
+
+    assert models.requests == ['cachedContents/1', 'cachedContents/1', 'cachedContents/2', 'cachedContents/2', None,
+                               'cachedContents/3']
+    assert len(extractor.image_cache) == 0 and extractor.llm.fatal_error is None
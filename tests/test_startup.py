@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for the cold-start import budget (heavy dependencies are loaded on first use)
+"""
+
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Cumulative seconds for a cold `import src.article_extractor` (google-genai alone takes longer)
+IMPORT_BUDGET_SECONDS = 0.5
+
+# Must not be imported until a run actually needs them
+HEAVY_MODULES = ('google.genai', 'pydantic', 'PIL.Image', 'dotenv', 'bs4', 'playwright', 'cairosvg')
+
+
+def run_python(code, *flags):
+    return subprocess.run([sys.executable, *flags, '-c', code], cwd=ROOT, capture_output=True, text=True,
+                          check=True)
+
+
+def test_import_loads_no_heavy_dependencies():
+    result = run_python(
+        "import sys, src.article_extractor, src.site_registry, src.inverted_learning\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    assert result.stdout.strip() == ''
+
+
+def test_cold_import_within_budget():
+    result = run_python('import src.article_extractor', '-X', 'importtime')
+    match = re.search(r'^import time:\s+\d+ \|\s+(\d+) \| src\.article_extractor$', result.stderr, re.MULTILINE)
+    assert match, result.stderr[-2000:]
+    seconds = int(match.group(1)) / 1_000_000
+    assert seconds < IMPORT_BUDGET_SECONDS, f"import took {seconds:.3f}s (budget {IMPORT_BUDGET_SECONDS}s)"
+
+
+def test_dependencies_load_on_first_use():
+    result = run_python(
+        "import sys\n"
+        "from src import lazy_imports\n"
+        "print('bs4' in sys.modules)\n"
+        "soup = lazy_imports.parse_html('<p>net revenue retention</p>')\n"
+        "print('bs4' in sys.modules, soup.p.get_text())"
+    )
+    assert result.stdout.splitlines() == ['False', 'True net revenue retention']
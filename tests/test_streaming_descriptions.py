@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming image descriptions with a per-article deadline and Markdown checkpoints
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.article_extractor import ArticleExtractor
+
+
+def make_extractor(tmp_path, delays, **kwargs):
+    extractor = ArticleExtractor(output_dir=tmp_path / 'out', log_file=tmp_path / 'test.log',
+                                 image_cache_file=tmp_path / 'image_cache.json', **kwargs)
+    extractor.use_gemini = True
+
+    async def fake_describe(image_url, context_before, context_after, max_retries=None, image_path=None, fetch_url=None):
+        # A blocking call in a worker thread, like the real SDK call
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, time.sleep, delays[image_url])
+        return f"Description of {image_url}"
+
+    extractor._generate_gemini_description_async = fake_describe
+    return extractor
+
+
+def images(*names):
+    return [{'src': name, 'alt': '', 'title': '', 'position': i, 'context_before': '', 'context_after': ''}
+            for i, name in enumerate(names)]
+
+
+def test_results_streamed_to_callback(tmp_path):
+    extractor = make_extractor(tmp_path, {'fast': 0.0, 'slow': 0.3})
+    seen = []
+
+    results = extractor._run_async(extractor._process_images_parallel(
+        images('fast', 'slow'), on_result=lambda current: seen.append(dict(current))))
+
+    assert results == {'fast': 'Description of fast', 'slow': 'Description of slow'}
+    assert seen[0] == {'fast': 'Description of fast', 'slow': None}
+
+
+def test_deadline_bounds_article_latency(tmp_path):
+    extractor = make_extractor(tmp_path, {'fast': 0.0, 'hung': 5.0})
+
+    start = time.monotonic()
+    results = extractor._run_async(extractor._process_images_parallel(
+        images('fast', 'hung'), deadline=time.monotonic() + 0.5))
+
+    assert time.monotonic() - start < 2.0
+    assert results == {'fast': 'Description of fast', 'hung': None}
+
+
+def test_checkpoint_writes_partial_markdown(tmp_path):
+    extractor = make_extractor(tmp_path, {}, checkpoint_interval=0)
+    article_html = '<p>Intro</p><img src="https://example.com/a.png"><p>Middle</p><img src="https://example.com/b.png">'
+    article_images = extractor.extract_images(article_html)
+    checkpoint = extractor._markdown_checkpointer('https://example.com/post', {'title': 'Post'},
+                                                  article_html, article_images, len(article_images))
+
+    checkpoint({'https://example.com/a.png': 'A line chart of MRR', 'https://example.com/b.png': None})
+
+    written = (tmp_path / 'out' / 'Post.md').read_text()
+    assert 'Partial: 1/2 AI image descriptions ready' in written
+    assert 'A line chart of MRR' in written
+    assert not list((tmp_path / 'out').glob('*.tmp'))
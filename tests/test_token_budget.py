@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for token cost accounting and the hard token budget (no API key needed)
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from src.article_metrics import ArticleMetrics, MetricsRecorder
+from src.circuit_breaker import CircuitBreaker
+from src.inverted_learning import InvertedLearner
+from src.llm_service import LLMService
+from src.metrics_registry import MetricsRegistry
+from src.model_router import ModelRouter
+from src.token_budget import BudgetExceededError, TokenBudget, call_cost
+
+
+class Models:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, model, contents, config):
+        self.calls += 1
+        usage = SimpleNamespace(prompt_token_count=40000, candidates_token_count=500, cached_content_token_count=0)
+        return SimpleNamespace(text='{"exclude_selectors": []}', usage_metadata=usage)
+
+
+def make_service(budget=None):
+    router = ModelRouter(routes_file=None, routes={'noise': {'model': 'gemini-2.5-flash', 'timeout': 5}})
+    service = LLMService(router, circuit_breaker=CircuitBreaker(failure_threshold=100),
+                         metrics_registry=MetricsRegistry(), budget=budget)
+    service.client = SimpleNamespace(models=Models())
+    return service
+
+
+def test_call_cost_bills_cached_tokens_at_cached_rate():
+    assert call_cost('gemini-2.5-flash', 1_000_000, 0) == pytest.approx(0.30)
+    assert call_cost('gemini-2.5-flash', 1_000_000, 0, cached_tokens=1_000_000) == pytest.approx(0.075)
+    assert call_cost('gemini-2.5-flash-lite', 0, 1_000_000) == pytest.approx(0.40)
+    assert call_cost('unknown-model', 0, 1_000_000) == call_cost('gemini-2.5-flash', 0, 1_000_000)
+
+
+def test_usage_records_cost_per_call_type():
+    service = make_service()
+    service.generate('noise', 'prompt', config=SimpleNamespace())
+
+    usage = service.usage_snapshot()['noise']
+    assert usage['prompt_tokens'] == 40000 and usage['output_tokens'] == 500
+    assert usage['cost_usd'] == pytest.approx(call_cost('gemini-2.5-flash', 40000, 500))
+
+
+def test_budget_fails_fast_once_spent():
+    budget = TokenBudget(max_tokens=60000)
+    service = make_service(budget)
+    service.generate('noise', 'prompt', config=SimpleNamespace())
+    assert not service.degraded
+
+    # The call that crosses the limit completes; the next one never reaches the API
+    service.generate('noise', 'prompt', config=SimpleNamespace())
+    assert service.degraded
+    with pytest.raises(BudgetExceededError):
+        service.generate_with_retry('noise', 'prompt', config=SimpleNamespace(), max_attempts=3)
+    assert service.client.models.calls == 2
+    assert budget.rejected == 1
+
+
+def test_learning_deferred_when_budget_spent():
+    budget = TokenBudget(max_cost=0.0001)
+    budget.charge(100, 0.01)
+    learner = InvertedLearner(use_gemini=True, llm=make_service(budget))
+
+    success, config, error = learner.learn_from_html('https://example.com/a', '<html><body><p>Text</p></body></html>')
+
+    assert not success and config is None and 'budget' in error
+    assert learner.llm.client.models.calls == 0
+
+
+def test_registry_defers_learning_with_the_learner_message(tmp_path):
+    from src.inverted_learning import LEARNING_DEFERRED
+    from src.site_registry import SiteRegistry
+
+    budget = TokenBudget(max_cost=0.0001)
+    budget.charge(100, 0.01)
+    registry = SiteRegistry(config_dir=tmp_path, llm=make_service(budget))
+    registry.use_gemini = True
+
+    assert registry.learn_from_html('https://example.com/a', '<p>Text</p>') == (False, None, LEARNING_DEFERRED)
+
+
+def test_batch_summary_rolls_up_per_domain_and_call_type():
+    recorder = MetricsRecorder()
+    for url, noise_tokens in (('https://a.com/1', 40000), ('https://www.a.com/2', 0), ('https://b.com/1', 20000)):
+        metrics = ArticleMetrics(url)
+        usage = {'vision': {'calls': 2, 'prompt_tokens': 600, 'output_tokens': 300, 'cost_usd': 0.001}}
+        if noise_tokens:
+            usage['noise'] = {'calls': 1, 'prompt_tokens': noise_tokens, 'output_tokens': 500, 'cost_usd': 0.0132}
+        metrics.finish('success', llm_usage=usage)
+        recorder.record(metrics)
+
+    summary = recorder.summary()
+
+    assert summary['llm']['prompt_tokens'] == 61800
+    assert summary['llm']['cost_usd'] == pytest.approx(0.0294)
+    assert summary['llm_by_call_type']['noise']['calls'] == 2
+    assert summary['llm_by_domain']['a.com']['articles'] == 2
+    assert summary['llm_by_domain']['b.com']['prompt_tokens'] == 20600
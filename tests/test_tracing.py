@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for span tracing (--trace)
+"""
+
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import tracing
+from src.article_metrics import ArticleMetrics
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / 'traces.jsonl'
+    tracing.configure_tracing(path)
+    yield path
+    tracing.configure_tracing(None)
+
+
+def load_spans(path):
+    lines = path.read_text().splitlines()
+    return [[span for resource in json.loads(line)['resourceSpans']
+             for scope in resource['scopeSpans'] for span in scope['spans']] for line in lines]
+
+
+def test_root_span_exports_one_otlp_line_per_trace(trace_file):
+    for url in ('https://example.com/a', 'https://example.com/b'):
+        with tracing.span('article', **{'url.full': url}):
+            with tracing.span('curl', tracing.SPAN_KIND_CLIENT) as curl:
+                curl.set_attribute('http.response.body.size', 1024)
+
+    traces = load_spans(trace_file)
+    assert len(traces) == 2
+    article, curl = traces[0]
+    assert article['name'] == 'article' and 'parentSpanId' not in article
+    assert curl['parentSpanId'] == article['spanId']
+    assert curl['traceId'] == article['traceId'] != traces[1][0]['traceId']
+    assert curl['kind'] == tracing.SPAN_KIND_CLIENT
+    assert {'key': 'http.response.body.size', 'value': {'intValue': '1024'}} in curl['attributes']
+    assert int(curl['endTimeUnixNano']) >= int(curl['startTimeUnixNano'])
+
+    payload = json.loads(trace_file.read_text().splitlines()[0])
+    resource = payload['resourceSpans'][0]['resource']['attributes']
+    assert {'key': 'service.name', 'value': {'stringValue': tracing.SERVICE_NAME}} in resource
+
+
+def test_errors_mark_span_status(trace_file):
+    with pytest.raises(ValueError):
+        with tracing.span('article'):
+            with tracing.span('extraction'):
+                raise ValueError('no article body')
+
+    article, extraction = load_spans(trace_file)[0]
+    assert extraction['status']['code'] == tracing.STATUS_ERROR
+    assert extraction['events'][0]['name'] == 'exception'
+    assert article['status'] == {'code': tracing.STATUS_ERROR, 'message': 'no article body'}
+
+
+def test_in_context_keeps_parent_in_executor_threads(trace_file):
+    def download():
+        with tracing.span('image download'):
+            return tracing.current_span().trace_id
+
+    with tracing.span('article') as article:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            trace_ids = list(pool.map(lambda f: f(), [tracing.in_context(download) for _ in range(3)]))
+
+    assert trace_ids == [article.trace_id] * 3
+    spans = load_spans(trace_file)[0]
+    downloads = [s for s in spans if s['name'] == 'image download']
+    assert len(downloads) == 3
+    assert all(s['parentSpanId'] == article.span_id for s in downloads)
+
+
+def test_metrics_stages_become_spans(trace_file):
+    metrics = ArticleMetrics('https://www.example.com/a')
+    with tracing.span('article'):
+        with metrics.stage('download'):
+            pass
+        with metrics.stage('conversion'):
+            pass
+
+    names = [s['name'] for s in load_spans(trace_file)[0]]
+    assert names == ['article', 'download', 'conversion']
+
+
+def test_tracing_off_is_a_noop(tmp_path):
+    tracing.configure_tracing(None)
+    with tracing.span('article') as article:
+        article.set_attribute('url.full', 'https://example.com/a')
+        article.record_error(ValueError('ignored'))
+        assert tracing.current_span() is tracing.NOOP_SPAN
+    assert tracing.get_tracer() is None
+    assert not list(tmp_path.iterdir())